@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+JSON响应序列化基准测试
+
+比较旧的safe_jsonify流程（递归清理 + json.dumps校验 + Flask jsonify）与
+dumps_json（orjson及标准库回退）每MB负载的序列化耗时
+
+用法:
+    python benchmarks/bench_json_serializer.py [行数]
+"""
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import json_utils
+from src.utils.json_utils import clean_nan_values, clean_dataframe_nan, dumps_json
+
+
+def build_payload(rows):
+    """构造与sheet_data接口相同结构的负载，包含NaN"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ITEM': [f'ITEM{i:06d}' for i in range(rows)],
+        'DESCRIPTION': ['红色T恤 / Red T-shirt' if i % 2 else 'Blue jeans' for i in range(rows)],
+        'SIZE': rng.choice(['S', 'M', 'L', 'XL'], rows),
+        'QUANTITY': rng.integers(1, 100, rows),
+        'PRICE': np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows) * 100),
+        'AMOUNT': rng.random(rows) * 1000
+    })
+    sheet = clean_dataframe_nan(df)
+    return {
+        'columns': sheet['columns'],
+        'data': sheet['data'],
+        'total_rows': rows,
+        'sheet_name': 'Order_Items'
+    }
+
+
+def legacy_serialize(app, data):
+    """旧的safe_jsonify流程"""
+    clean_data = clean_nan_values(data)
+    json.dumps(clean_data, ensure_ascii=False)
+    with app.app_context():
+        return jsonify(clean_data).get_data()
+
+
+def measure(func, repeat=5):
+    """返回最快一次的耗时（秒）和输出大小（字节）"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        elapsed = time.perf_counter() - start
+        size = len(output)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = Flask(__name__)
+    data = build_payload(rows)
+
+    candidates = [('legacy safe_jsonify', lambda: legacy_serialize(app, data))]
+    if json_utils.HAS_ORJSON:
+        candidates.append(('dumps_json (orjson)', lambda: dumps_json(data)))
+
+    def stdlib_dumps():
+        has_orjson = json_utils.HAS_ORJSON
+        json_utils.HAS_ORJSON = False
+        try:
+            return dumps_json(data)
+        finally:
+            json_utils.HAS_ORJSON = has_orjson
+
+    candidates.append(('dumps_json (stdlib)', stdlib_dumps))
+
+    print(f"负载: {rows} 行")
+    print(f"{'实现':<24}{'输出MB':>10}{'耗时ms':>10}{'ms/MB':>10}")
+    for name, func in candidates:
+        elapsed, size = measure(func)
+        megabytes = size / (1024 * 1024)
+        print(f"{name:<24}{megabytes:>10.2f}{elapsed * 1000:>10.1f}{elapsed * 1000 / megabytes:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+多工作表订单加载基准测试
+
+构造PDF转换得到的多工作表订单（客户信息表 + 若干订单明细表），比较
+逐个工作表调用pd.read_excel（旧流程）、load_order_data打开一次工作簿解析各工作表、
+以及load_order_data直接使用转换时保存的订单数据产物的耗时
+
+用法:
+    python benchmarks/bench_load_order_data.py [订单明细工作表数] [每个工作表行数]
+"""
+
+import os
+import sys
+import time
+import logging
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.conversion_artifacts import save_order_artifact
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.workbook_inspector import inspect_workbook, is_sheet_empty
+
+
+def build_order(path, sheets, rows):
+    """写入与PDF转换输出结构相同的订单Excel"""
+    rng = np.random.default_rng(0)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        pd.DataFrame([{'customer': 'ACME', 'po_number': '4500012345'}]).to_excel(
+            writer, sheet_name='Customer_Info', index=False)
+        for index in range(sheets):
+            quantity = rng.integers(1, 100, rows)
+            price = np.round(rng.random(rows) * 100, 2)
+            pd.DataFrame({
+                'ITEM': [f'A{index:02d}{i:05d}' for i in range(rows)],
+                'DESCRIPTION': ['红色T恤 / Red T-shirt' if i % 2 else 'Blue jeans' for i in range(rows)],
+                'SIZE': rng.choice(['S', 'M', 'L', 'XL'], rows),
+                'QUANTITY': quantity,
+                'PRICE': price,
+                'AMOUNT': np.round(quantity * price, 2)
+            }).to_excel(writer, sheet_name=f'Order_Items_{index + 1}', index=False)
+
+
+def legacy_load(comparator, path):
+    """旧流程：每个工作表单独调用pd.read_excel，每次都重新打开工作簿"""
+    frames = []
+    for sheet in inspect_workbook(path, dimensions=True):
+        if not is_sheet_empty(sheet):
+            frames.append((sheet['name'], pd.read_excel(path, sheet_name=sheet['name'])))
+    return comparator.standardize_order_sheets(frames)
+
+
+def measure(func, repeat=3):
+    """返回最快一次的耗时（秒）和结果"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    # 客户信息表没有订单列，加载时记录的日志不影响结果
+    logging.disable(logging.CRITICAL)
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'order.xlsx')
+        build_order(path, sheets, rows)
+        comparator = OrderSpecComparator(output_dir=temp_dir)
+
+        candidates = [
+            ('per-sheet read_excel', lambda: legacy_load(comparator, path)),
+            ('load_order_data (Excel)', lambda: comparator.load_order_data(path))
+        ]
+        results = []
+        print(f"订单: {sheets} 个明细工作表 x {rows} 行, 文件 {os.path.getsize(path) / 1024:.0f}KB")
+        print(f"{'实现':<28}{'行数':>8}{'耗时ms':>10}")
+        for name, func in candidates:
+            elapsed, order_df = measure(func)
+            results.append(order_df)
+            print(f"{name:<28}{len(order_df):>8}{elapsed * 1000:>10.1f}")
+
+        save_order_artifact(path, results[-1])
+        elapsed, order_df = measure(lambda: comparator.load_order_data(path))
+        print(f"{'load_order_data (artifact)':<28}{len(order_df):>8}{elapsed * 1000:>10.1f}")
+
+        if not all(result.equals(results[0]) for result in results):
+            print("警告: 各实现加载的订单数据不一致")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
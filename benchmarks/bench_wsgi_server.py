@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+WSGI服务器吞吐量基准测试
+
+分别启动Werkzeug开发服务器（python -m src.main的方式，关闭debug及重载）和
+gunicorn（gunicorn.conf.py，preload_app预派生工作进程），以相同的并发客户端
+请求同一组接口，比较每秒请求数及延迟分位数
+
+用法:
+    python benchmarks/bench_wsgi_server.py [并发数] [每个服务器的测试秒数] [接口路径 ...]
+"""
+
+import os
+import sys
+import time
+import socket
+import subprocess
+import threading
+import http.client
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = ['/api/pdf/health', '/api/list_specs', '/api/spec_cache/stats']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_commands(port):
+    """(名称, 启动命令)"""
+    dev_server = (
+        "import sys; sys.path.insert(0, '.'); from src.main import app; "
+        f"app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"
+    )
+    return [
+        ('werkzeug dev server', [sys.executable, '-c', dev_server]),
+        ('gunicorn (preload)', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+                                '--access-logfile', '/dev/null', 'src.wsgi:application'])
+    ]
+
+
+def wait_ready(port, path, timeout=60):
+    """等待服务器开始响应"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', path)
+            connection.getresponse().read()
+            connection.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load(port, paths, concurrency, duration):
+    """并发请求duration秒，返回(请求数, 失败数, 每个请求的延迟)"""
+    latencies = [[] for _ in range(concurrency)]
+    failures = [0] * concurrency
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        count = 0
+        while time.perf_counter() < deadline:
+            path = paths[count % len(paths)]
+            count += 1
+            start = time.perf_counter()
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                connection.close()
+                if response.status >= 500:
+                    failures[index] += 1
+            except OSError:
+                failures[index] += 1
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    samples = sorted(latency for client_latencies in latencies for latency in client_latencies)
+    return len(samples), sum(failures), samples
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else float('nan')
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    paths = sys.argv[3:] or DEFAULT_PATHS
+
+    print(f"并发 {concurrency}, 每个服务器 {duration:.0f}s, CPU {os.cpu_count()} 核, 接口: {', '.join(paths)}")
+    print(f"{'服务器':<24}{'请求数':>8}{'失败':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    port = free_port()
+    for name, command in server_commands(port):
+        process = subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_ready(port, paths[0]):
+                print(f"{name:<24}启动失败")
+                continue
+            run_load(port, paths, concurrency, 1)  # 预热
+            requests, failed, samples = run_load(port, paths, concurrency, duration)
+            print(f"{name:<24}{requests:>8}{failed:>6}{requests / duration:>10.1f}"
+                  f"{percentile(samples, 0.5) * 1000:>10.1f}{percentile(samples, 0.99) * 1000:>10.1f}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
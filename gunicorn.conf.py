@@ -0,0 +1,47 @@
+"""
+gunicorn配置 - 生产环境预派生服务器
+
+在项目根目录运行 gunicorn src.wsgi:application 时自动读取本文件。
+各参数均可通过环境变量覆盖：
+
+    GUNICORN_BIND                  监听地址（默认0.0.0.0:5000）
+    GUNICORN_WORKERS               工作进程数（默认CPU核数，至少2个）
+    GUNICORN_THREADS               每个工作进程的线程数（默认4，大于1时使用gthread）
+    GUNICORN_TIMEOUT               请求超时秒数（默认300，大PDF转换及比对较慢）
+    GUNICORN_GRACEFUL_TIMEOUT      重启时等待请求完成的秒数（默认30）
+    GUNICORN_KEEPALIVE             keep-alive秒数（默认5）
+    GUNICORN_MAX_REQUESTS          工作进程处理多少个请求后重启，回收PDF解析累积的内存（默认1000，0为不重启）
+    GUNICORN_MAX_REQUESTS_JITTER   重启请求数的随机抖动，避免工作进程同时重启（默认100）
+    GUNICORN_LOG_LEVEL             日志级别（默认info）
+    PRELOAD_SPECS                  启动时是否预加载已上传的规格表（默认1）
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# 主进程中加载应用、PDF处理引擎及规格表缓存，工作进程写时复制共享
+preload_app = True
+
+workers = _env_int('GUNICORN_WORKERS', max(2, multiprocessing.cpu_count()))
+threads = _env_int('GUNICORN_THREADS', 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = _env_int('GUNICORN_TIMEOUT', 300)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+accesslog = '-'
+errorlog = '-'
+
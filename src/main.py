@@ -6,11 +6,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.models.file_catalog import ConvertedFile, ensure_catalog_columns, import_json_sidecars
+from src.models.spec_catalog import SpecFile, import_spec_metadata
 from src.routes.user import user_bp
 from src.routes.pdf_converter import pdf_converter_bp
-from src.routes.spec_routes import spec_bp
+from src.routes.spec_routes import spec_bp, spec_manager
+from src.utils.upload_stream import StreamingUploadRequest
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+# 上传文件在解析请求时直接写入上传目录的临时文件，同时计算哈希
+app.request_class = StreamingUploadRequest
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 
@@ -37,6 +42,26 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    # 首次启动或文件目录新增列时把已有的JSON元数据导入文件目录
+    try:
+        if ensure_catalog_columns() or ConvertedFile.query.first() is None:
+            import_json_sidecars(path_manager.config.uploads_dir, path_manager.config.outputs_dir)
+    except Exception as e:
+        app.logger.warning(f"导入文件目录失败: {str(e)}")
+    # 首次启动时把已有规格表的内容哈希导入规格表目录
+    if SpecFile.query.first() is None:
+        try:
+            import_spec_metadata(spec_manager.specs_dir)
+        except Exception as e:
+            app.logger.warning(f"导入规格表目录失败: {str(e)}")
+
+@app.cli.command('import-file-catalog')
+def import_file_catalog():
+    """重新从JSON元数据导入文件目录"""
+    count = import_json_sidecars(path_manager.config.uploads_dir, path_manager.config.outputs_dir)
+    print(f"导入了 {count} 条文件记录")
+    count = import_spec_metadata(spec_manager.specs_dir)
+    print(f"导入了 {count} 条规格表记录")
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from datetime import datetime
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+class CachedComparison(db.Model):
+    """比对结果缓存：相同的订单内容、规格表内容、比对选项及比对器版本直接返回已有结果"""
+    __tablename__ = 'comparison_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    order_hash = db.Column(db.String(64), nullable=False)
+    spec_hash = db.Column(db.String(64), nullable=False)
+    check_total_calc = db.Column(db.Boolean, nullable=False, default=True)
+    comparator_version = db.Column(db.Integer, nullable=False)
+    result_file_id = db.Column(db.String(64), nullable=False, index=True)
+    created_time = db.Column(db.String(32))
+    # ISO格式时间字符串，按最近使用时间淘汰
+    last_used_time = db.Column(db.String(32), index=True)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CachedComparison {self.result_file_id}>'
+
+    def to_dict(self):
+        return {
+            'result_file_id': self.result_file_id,
+            'order_hash': self.order_hash,
+            'spec_hash': self.spec_hash,
+            'check_total_calc': self.check_total_calc,
+            'comparator_version': self.comparator_version,
+            'created_time': self.created_time or '',
+            'last_used_time': self.last_used_time or '',
+            'hits': self.hits
+        }
+
+
+def comparison_cache_key(order_hash, spec_hash, check_total_calc, comparator_version):
+    """由订单哈希、规格表哈希、check_total_calc及比对器版本生成缓存键"""
+    fingerprint = f"{order_hash}|{spec_hash}|{int(bool(check_total_calc))}|{comparator_version}"
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+
+def find_cached_comparison(cache_key):
+    """
+    查找缓存的比对结果，命中时更新最近使用时间和命中次数
+
+    Returns:
+        CachedComparison，未命中返回None
+    """
+    try:
+        entry = CachedComparison.query.filter_by(cache_key=cache_key).first()
+        if entry is not None:
+            entry.last_used_time = datetime.now().isoformat()
+            entry.hits += 1
+            db.session.commit()
+        return entry
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def record_cached_comparison(cache_key, order_hash, spec_hash, check_total_calc, comparator_version,
+                             result_file_id, max_entries):
+    """
+    记录比对结果，超过max_entries条时淘汰最久未使用的记录
+
+    Returns:
+        list: 被淘汰的result_file_id，由调用方删除对应的结果文件
+    """
+    try:
+        now = datetime.now().isoformat()
+        entry = CachedComparison.query.filter_by(cache_key=cache_key).first()
+        if entry is None:
+            entry = CachedComparison(cache_key=cache_key)
+            db.session.add(entry)
+        entry.order_hash = order_hash
+        entry.spec_hash = spec_hash
+        entry.check_total_calc = bool(check_total_calc)
+        entry.comparator_version = comparator_version
+        entry.result_file_id = result_file_id
+        entry.created_time = now
+        entry.last_used_time = now
+        entry.hits = 0
+        db.session.flush()
+
+        evicted = (CachedComparison.query
+                   .order_by(CachedComparison.last_used_time.desc(), CachedComparison.id.desc())
+                   .offset(max_entries).all())
+        evicted_ids = [item.result_file_id for item in evicted]
+        for item in evicted:
+            db.session.delete(item)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if evicted_ids:
+        logger.info(f"淘汰了 {len(evicted_ids)} 条比对结果缓存")
+    return evicted_ids
+
+
+def remove_cached_comparison(cache_key):
+    """删除缓存记录（结果文件已不存在时）"""
+    try:
+        CachedComparison.query.filter_by(cache_key=cache_key).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def cached_comparisons_for_order(order_hash):
+    """订单内容哈希相同的缓存记录"""
+    return CachedComparison.query.filter_by(order_hash=order_hash).all()
@@ -0,0 +1,202 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+class ConvertedFile(db.Model):
+    """上传及转换文件的目录，替代逐个读取JSON元数据文件"""
+    __tablename__ = 'converted_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    original_filename = db.Column(db.String(255), nullable=False, default='')
+    filename = db.Column(db.String(255))
+    upload_time = db.Column(db.String(32))
+    upload_size = db.Column(db.Integer, nullable=False, default=0)
+    # 上传文件内容的SHA-256，按哈希查找内容相同的上传文件
+    sha256 = db.Column(db.String(64), index=True)
+    # ISO格式时间字符串，字典序与时间顺序一致，便于索引排序
+    convert_time = db.Column(db.String(32), index=True)
+    file_size = db.Column(db.Integer, nullable=False, default=0)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ConvertedFile {self.file_id}>'
+
+    @property
+    def is_converted(self):
+        return self.convert_time is not None
+
+    def to_dict(self):
+        return {
+            'file_id': self.file_id,
+            'filename': self.filename or f"converted_{self.file_id}.xlsx",
+            'original_filename': self.original_filename or '',
+            'file_size': self.file_size,
+            'convert_time': self.convert_time or '',
+            'record_count': self.record_count
+        }
+
+
+def _get_or_create(file_id):
+    entry = ConvertedFile.query.filter_by(file_id=file_id).first()
+    if entry is None:
+        entry = ConvertedFile(file_id=file_id)
+        db.session.add(entry)
+    return entry
+
+
+def ensure_catalog_columns():
+    """
+    为旧版本创建的文件目录表补充新增的列（db.create_all不会修改已有的表）
+
+    Returns:
+        bool: 是否补充了列，补充后需要重新导入JSON元数据
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns(ConvertedFile.__tablename__)}
+    if 'sha256' in columns:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {ConvertedFile.__tablename__} ADD COLUMN sha256 VARCHAR(64)"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{ConvertedFile.__tablename__}_sha256 "
+            f"ON {ConvertedFile.__tablename__} (sha256)"))
+    return True
+
+
+def record_upload(file_id, original_filename, upload_time, upload_size, sha256=None):
+    """记录文件上传"""
+    try:
+        entry = _get_or_create(file_id)
+        entry.original_filename = original_filename
+        entry.upload_time = upload_time
+        entry.upload_size = upload_size
+        entry.sha256 = sha256
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def record_conversion(file_id, metadata):
+    """记录文件转换结果，metadata与转换后的JSON元数据格式一致"""
+    try:
+        entry = _get_or_create(file_id)
+        entry.original_filename = metadata.get('original_filename', entry.original_filename or '')
+        entry.filename = metadata.get('filename')
+        entry.convert_time = metadata.get('convert_time')
+        entry.file_size = metadata.get('file_size', 0)
+        entry.record_count = metadata.get('record_count', 0)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def remove_conversion(file_id):
+    """删除文件的目录记录"""
+    try:
+        ConvertedFile.query.filter_by(file_id=file_id).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def get_entry(file_id):
+    """按file_id获取目录记录"""
+    return ConvertedFile.query.filter_by(file_id=file_id).first()
+
+
+def find_uploads_by_hash(sha256):
+    """按上传文件内容哈希查找文件，返回排序后的file_id列表"""
+    entries = ConvertedFile.query.filter_by(sha256=sha256).all()
+    return sorted(entry.file_id for entry in entries)
+
+
+def list_conversions(offset=0, limit=None):
+    """
+    按转换时间倒序分页列出已转换文件
+
+    Returns:
+        (记录列表, 总数)
+    """
+    query = ConvertedFile.query.filter(ConvertedFile.convert_time.isnot(None))
+    total = query.count()
+    query = query.order_by(ConvertedFile.convert_time.desc()).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all(), total
+
+
+def _iter_sidecars(directory):
+    """遍历目录中的JSON元数据文件，跳过比对结果和转换产物"""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if not name.endswith('.json') or name.startswith('order_comparison_'):
+            continue
+        file_id = name[:-len('.json')]
+        if '.' in file_id:
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                yield file_id, json.load(f)
+        except Exception as e:
+            logger.warning(f"读取元数据失败: {name}, 错误: {e}")
+
+
+def import_json_sidecars(uploads_dir, outputs_dir):
+    """
+    一次性导入已有的JSON元数据文件到文件目录
+
+    已存在的记录会被JSON内容覆盖，因此可以重复执行
+
+    Returns:
+        int: 导入的记录数
+    """
+    entries = {}
+    for file_id, metadata in _iter_sidecars(uploads_dir):
+        entries.setdefault(file_id, {})['upload'] = metadata
+    for file_id, metadata in _iter_sidecars(outputs_dir):
+        entries.setdefault(file_id, {})['convert'] = metadata
+
+    try:
+        existing = {entry.file_id: entry for entry in ConvertedFile.query.all()}
+        for file_id, sidecars in entries.items():
+            entry = existing.get(file_id)
+            if entry is None:
+                entry = ConvertedFile(file_id=file_id)
+                db.session.add(entry)
+
+            upload = sidecars.get('upload')
+            if upload:
+                entry.original_filename = upload.get('original_filename', '')
+                entry.upload_time = upload.get('upload_time')
+                entry.upload_size = upload.get('file_size', 0)
+                entry.sha256 = upload.get('sha256')
+
+            converted = sidecars.get('convert')
+            if converted:
+                excel_path = os.path.join(outputs_dir, f"{file_id}.xlsx")
+                convert_time = converted.get('convert_time')
+                if not convert_time and os.path.exists(excel_path):
+                    convert_time = datetime.fromtimestamp(os.path.getmtime(excel_path)).isoformat()
+                entry.original_filename = converted.get('original_filename', entry.original_filename or '')
+                entry.filename = converted.get('filename')
+                entry.convert_time = convert_time or datetime.now().isoformat()
+                entry.file_size = converted.get('file_size', 0)
+                entry.record_count = converted.get('record_count', 0)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"从JSON元数据导入了 {len(entries)} 条文件记录")
+    return len(entries)
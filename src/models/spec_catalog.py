@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+
+from src.models.user import db
+from src.utils.content_hash import file_sha256
+
+logger = logging.getLogger(__name__)
+
+class SpecFile(db.Model):
+    """规格表目录：按上传文件内容的SHA-256直接查找内容相同的规格表，不再逐个读取元数据"""
+    __tablename__ = 'spec_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    spec_id = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<SpecFile {self.spec_id}>'
+
+
+def record_spec(spec_id, sha256):
+    """记录规格表上传文件的内容哈希"""
+    try:
+        entry = SpecFile.query.filter_by(spec_id=spec_id).first()
+        if entry is None:
+            entry = SpecFile(spec_id=spec_id, sha256=sha256)
+            db.session.add(entry)
+        entry.sha256 = sha256
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def remove_spec(spec_id):
+    """删除规格表的目录记录"""
+    try:
+        SpecFile.query.filter_by(spec_id=spec_id).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def find_specs_by_hash(sha256):
+    """按上传文件内容哈希查找规格表，返回排序后的spec_id列表"""
+    entries = SpecFile.query.filter_by(sha256=sha256).all()
+    return sorted(entry.spec_id for entry in entries)
+
+
+def import_spec_metadata(specs_dir):
+    """
+    一次性导入已有规格表的内容哈希
+
+    元数据中没有sha256的旧规格表按上传的原始文件计算；已存在的记录会被覆盖，因此可以重复执行
+
+    Returns:
+        int: 导入的记录数
+    """
+    digests = {}
+    if os.path.isdir(specs_dir):
+        for name in os.listdir(specs_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(specs_dir, name), 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                digest = metadata.get('sha256')
+                if digest is None:
+                    digest = file_sha256(os.path.join(specs_dir, metadata['stored_filename']))
+                digests[metadata['spec_id']] = digest
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"读取规格表元数据失败: {name}, 错误: {e}")
+
+    try:
+        existing = {entry.spec_id: entry for entry in SpecFile.query.all()}
+        for spec_id, digest in digests.items():
+            entry = existing.get(spec_id)
+            if entry is None:
+                entry = SpecFile(spec_id=spec_id, sha256=digest)
+                db.session.add(entry)
+            entry.sha256 = digest
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"从规格表元数据导入了 {len(digests)} 条记录")
+    return len(digests)
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, send_file, current_app
 from werkzeug.utils import secure_filename
 import os
 import uuid
@@ -23,12 +23,40 @@ import traceback
 import json
 import math
 import re
-from ..utils.json_utils import safe_jsonify, prepare_preview_data, prepare_sheet_data
+from ..utils.json_utils import (
+    safe_jsonify, prepare_preview_data, prepare_sheet_page,
+    parse_layout, preview_tables_to_columnar, LAYOUT_COLUMNAR
+)
+from ..utils.workbook_inspector import inspect_workbook
+from ..utils.sheet_reader import read_sheet_page, stream_sheet_rows, read_back_frame, SheetNotFoundError
+from ..utils.ndjson_stream import wants_ndjson, table_events, ndjson_response
+from ..utils.arrow_export import (
+    HAS_PYARROW, wants_arrow, rows_to_arrow, arrow_response, arrow_unavailable_response
+)
 from ..utils.path_manager import get_path_manager
 from ..utils.enhanced_pdf_parser import get_enhanced_parser
+from ..utils.order_comparator import OrderSpecComparator
+from ..utils.upload_stream import UploadRejected, save_upload, upload_kind
+from ..utils.column_profile import (
+    PDF_HEADER_KEYWORDS, PDF_FIRST_ROW_KEYWORDS, PDF_COLUMN_ALIASES, PDF_CONTENT_RULES, PDF_CONTENT_COLUMNS,
+    cell_text, contains_any, header_like_ratio, infer_fields_by_content, match_column_alias
+)
+from ..models.file_catalog import (
+    record_upload, record_conversion, remove_conversion, get_entry, list_conversions,
+    find_uploads_by_hash
+)
+from ..models.comparison_cache import cached_comparisons_for_order, remove_cached_comparison
+from ..utils.comparison_results import load_comparison_summary, remove_comparison_result
+from ..utils.content_hash import file_sha256
+from ..utils.conversion_artifacts import (
+    PREVIEW_MAX_ROWS, save_preview_artifact, load_preview_artifact, save_order_artifact, remove_artifacts
+)
 
 pdf_converter_bp = Blueprint('pdf_converter', __name__)
 
+# 转换时标准化订单数据使用的比对器
+comparator = OrderSpecComparator()
+
 # 配置
 ALLOWED_EXTENSIONS = {'pdf'}
 
@@ -40,6 +68,58 @@ def get_upload_output_paths():
     path_manager = get_path_manager()
     return path_manager.config.uploads_dir, path_manager.config.outputs_dir
 
+def update_catalog(operation, *args):
+    """更新文件目录，目录不可用时只记录警告（JSON元数据仍然保留）"""
+    try:
+        operation(*args)
+    except Exception as e:
+        current_app.logger.warning(f"更新文件目录失败: {str(e)}")
+
+def lookup_catalog(file_id):
+    """从文件目录获取记录，目录不可用或没有记录时返回None"""
+    try:
+        return get_entry(file_id)
+    except Exception as e:
+        current_app.logger.warning(f"查询文件目录失败: {str(e)}")
+        return None
+
+def lookup_duplicate_uploads(sha256):
+    """从文件目录查找内容相同的已上传文件，目录不可用时返回空列表"""
+    try:
+        return find_uploads_by_hash(sha256)
+    except Exception as e:
+        current_app.logger.warning(f"查询文件目录失败: {str(e)}")
+        return []
+
+def forget_order_comparisons(excel_path, order_hash, output_path):
+    """
+    订单文件被删除或重新转换为其它内容时，删除按该文件生成工作簿的比对结果及其缓存记录
+
+    已生成工作簿的结果不依赖订单文件，仍然保留
+    """
+    try:
+        order_file_path = os.path.realpath(excel_path)
+        for entry in cached_comparisons_for_order(order_hash):
+            if os.path.exists(os.path.join(output_path, f"order_comparison_{entry.result_file_id}.xlsx")):
+                continue
+            source = (load_comparison_summary(output_path, entry.result_file_id) or {}).get('source')
+            if source and os.path.realpath(source['order_file_path']) == order_file_path:
+                remove_cached_comparison(entry.cache_key)
+                remove_comparison_result(output_path, entry.result_file_id)
+    except Exception as e:
+        current_app.logger.warning(f"清理订单的比对结果缓存失败: {str(e)}")
+
+def read_metadata(metadata_path):
+    """读取JSON元数据文件，失败时返回None"""
+    if not os.path.exists(metadata_path):
+        return None
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        current_app.logger.warning(f"读取元数据失败: {str(e)}")
+        return None
+
 def merge_split_rows(df):
     """
     智能合并被分割的行，特别是DESCRIPTION字段
@@ -87,33 +167,9 @@ def handle_multiline_headers(df):
     if len(df) < 2:
         return df
     
-    # 表头关键词
-    header_keywords = ['ITEM', 'EXTERNAL', 'NUMBER', 'DESCRIPTION', 'DELIVERY', 'DATE', 'UNIT', 'QUANTITY', 'QTY', 'PRICE', 'AMOUNT']
-    
-    # 检查每一行是否看起来像表头行
-    header_rows = []
-    for row_idx in range(min(3, len(df))):
-        row_data = df.iloc[row_idx]
-        header_like_cells = 0
-        total_non_empty_cells = 0
-        
-        for cell_value in row_data:
-            if pd.notna(cell_value) and str(cell_value).strip():
-                total_non_empty_cells += 1
-                cell_str = str(cell_value).strip().upper()
-                
-                # 检查是否包含表头关键词
-                if any(keyword in cell_str for keyword in header_keywords):
-                    header_like_cells += 1
-                # 或者是否看起来像表头（全是字母，不包含数字和特殊字符）
-                elif re.match(r'^[A-Za-z\s]+$', cell_str) and len(cell_str) > 2:
-                    header_like_cells += 1
-        
-        # 如果大部分非空单元格都像表头，则认为这是表头行
-        if total_non_empty_cells > 0 and header_like_cells / total_non_empty_cells >= 0.6:
-            header_rows.append(row_idx)
-        else:
-            break  # 遇到数据行就停止
+    # 前3行中大部分非空单元格都像表头的行为表头行，遇到数据行就停止
+    header_like = (header_like_ratio(df.head(3), PDF_HEADER_KEYWORDS) >= 0.6).tolist()
+    header_rows = list(range(header_like.index(False) if False in header_like else len(header_like)))
     
     if not header_rows:
         return df  # 没有找到多行表头
@@ -147,6 +203,18 @@ def handle_multiline_headers(df):
     
     return df
 
+def infer_columns_by_content(df):
+    """
+    按列内容推断没有表头的PDF表格的标准列名
+
+    Returns:
+        dict: 列位置 -> 标准列名；推断不出ITEM及QUANTITY或PRICE时返回None
+    """
+    fields = infer_fields_by_content(df, rules=PDF_CONTENT_RULES)
+    if 'item_id' not in fields.values() or not {'quantity', 'unit_price'} & set(fields.values()):
+        return None
+    return {position: PDF_CONTENT_COLUMNS[field] for position, field in fields.items()}
+
 def standardize_column_names(df):
     """标准化列名，确保符合预期格式"""
     # 标准列名映射 - 更新为正确的8个字段
@@ -155,13 +223,15 @@ def standardize_column_names(df):
     # 检查是否需要处理表头（第一行是否包含列名关键词且当前列名是数字索引）
     current_columns_are_numeric = all(str(col).isdigit() or str(col).startswith('col_') for col in df.columns)
     
+    header_from_data = False
+    
     # 首先处理多行表头
     if not current_columns_are_numeric:
         df = handle_multiline_headers(df)
     
     if len(df) > 0:
-        first_row_str = ' '.join(str(cell).upper() for cell in df.iloc[0] if pd.notna(cell))
-        has_header_in_data = any(keyword in first_row_str for keyword in ['DESCRIPTION', 'ITEM', 'QTY', 'PRICE', 'AMOUNT'])
+        first_row = cell_text(df.head(1)).apply(lambda column: column.str.upper())
+        has_header_in_data = bool(contains_any(first_row, PDF_FIRST_ROW_KEYWORDS).to_numpy().any())
         
         # 如果当前列名是数字索引且第一行包含表头信息，使用第一行作为列名
         if current_columns_are_numeric and has_header_in_data:
@@ -177,14 +247,22 @@ def standardize_column_names(df):
             df.columns = new_columns[:len(df.columns)]
             # 删除表头行
             df = df.drop(0).reset_index(drop=True)
+            header_from_data = True
             # 处理可能的多行表头
             df = handle_multiline_headers(df)
     
     # 如果是数字列名（col_0, col_1等），按位置映射到标准列名
     if current_columns_are_numeric:
+        # 没有表头且列数与标准格式不同时按位置映射会错位，改为按列内容打分推断
+        inferred_columns = None
+        if not header_from_data and len(df.columns) != len(standard_column_order):
+            inferred_columns = infer_columns_by_content(df)
+        
         new_column_mapping = {}
         for i, col in enumerate(df.columns):
-            if i < len(standard_column_order):
+            if inferred_columns is not None:
+                new_column_mapping[col] = inferred_columns.get(i, f'Column_{i}')
+            elif i < len(standard_column_order):
                 new_column_mapping[col] = standard_column_order[i]
             else:
                 new_column_mapping[col] = f'Column_{i}'
@@ -192,41 +270,16 @@ def standardize_column_names(df):
         df = df.rename(columns=new_column_mapping)
         return df
     
-    # 如果已经有合理的列名，尝试标准化
-    standard_columns = {
-        'ITEM': ['item', 'item_code', 'code', '项目', '编号', 'part', 'part_no'],
-        'EXTERNAL ITEM NUMBER': [
-            'external_item_number', 'external_item', 'ext_item', 'supplier_code', 'vendor_code',
-            'external item number', 'external item', 'ext item number'
-        ],
-        'DESCRIPTION': ['description', 'desc', 'product', 'name', '描述', '产品名称', 'product_name'],
-        'DELIVERY DATE': [
-            'delivery_date', 'delivery', 'due_date', 'ship_date',
-            'delivery date'
-        ],
-        'UNIT': ['unit', 'uom', 'measure', '单位', 'units'],
-        'QUANTITY': ['quantity', 'qty', 'amount', '数量', 'qnty'],
-        'PRICE': ['price', 'unit_price', 'cost', '单价', '价格', 'rate'],
-        'AMOUNT': ['amount', 'total', 'total_price', '总价', '金额', 'total_amount']
-    }
-    
-    # 创建列名映射字典
+    # 如果已经有合理的列名，按别名映射到标准列名
     column_mapping = {}
     for col in df.columns:
-        col_normalized = normalize_field_name(col)
-        
         # 直接匹配标准字段名
-        if col_normalized in standard_columns:
+        if normalize_field_name(col) in PDF_COLUMN_ALIASES:
             continue
         
-        # 模糊匹配
-        for standard_col, aliases in standard_columns.items():
-            for alias in aliases:
-                if normalize_field_name(alias) == col_normalized:
-                    column_mapping[col] = standard_col
-                    break
-            if col in column_mapping:
-                break
+        standard_col = match_column_alias(col, PDF_COLUMN_ALIASES, normalize=normalize_field_name)
+        if standard_col:
+            column_mapping[col] = standard_col
     
     # 应用列名映射
     if column_mapping:
@@ -425,40 +478,102 @@ def extract_tables_with_tabula(pdf_path):
         print(f"Tabula提取失败: {str(e)}")
         return None, str(e)
 
-def convert_to_excel(extracted_data, output_path):
-    """将提取的数据转换为Excel文件"""
-    try:
-        # 检查输入数据
-        if not extracted_data or not isinstance(extracted_data, list):
-            # 创建一个空的Excel文件，包含提示信息
-            df_empty = pd.DataFrame({
-                '提示': ['未能从PDF中提取到表格数据'],
-                '说明': ['请检查PDF文件是否包含表格，或尝试其他PDF文件']
-            })
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df_empty.to_excel(writer, sheet_name='提示信息', index=False)
-            return True, "未提取到表格数据，已创建空文件"
+def build_table_sheets(extracted_data):
+    """按工作表顺序生成每个提取表格对应的工作表数据，没有表格时为提示信息工作表"""
+    if not extracted_data or not isinstance(extracted_data, list):
+        return [('提示信息', pd.DataFrame({
+            '提示': ['未能从PDF中提取到表格数据'],
+            '说明': ['请检查PDF文件是否包含表格，或尝试其他PDF文件']
+        }))]
+    
+    sheet_frames = []
+    for table_info in extracted_data:
+        if not isinstance(table_info, dict) or 'data' not in table_info:
+            continue
+            
+        df = table_info['data']
+        if df is None or df.empty:
+            continue
+            
+        sheet_name = f"Table_{table_info.get('table_index', 1)}_Page_{table_info.get('page', 1)}"
+        # Excel工作表名称长度限制
+        if len(sheet_name) > 31:
+            sheet_name = f"Table_{table_info.get('table_index', 1)}"
         
+        sheet_frames.append((sheet_name, df))
+    return sheet_frames
+
+def write_excel_sheets(sheet_frames, output_path):
+    """将[(工作表名称, DataFrame)]写入Excel文件"""
+    try:
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            for table_info in extracted_data:
-                if not isinstance(table_info, dict) or 'data' not in table_info:
-                    continue
-                    
-                df = table_info['data']
-                if df is None or df.empty:
-                    continue
-                    
-                sheet_name = f"Table_{table_info.get('table_index', 1)}_Page_{table_info.get('page', 1)}"
-                # Excel工作表名称长度限制
-                if len(sheet_name) > 31:
-                    sheet_name = f"Table_{table_info.get('table_index', 1)}"
-                
+            for sheet_name, df in sheet_frames:
                 df.to_excel(writer, sheet_name=sheet_name, index=False)
-        
         return True, None
     except Exception as e:
         return False, str(e)
 
+def convert_to_excel(extracted_data, output_path):
+    """将提取的数据转换为Excel文件"""
+    success, error = write_excel_sheets(build_table_sheets(extracted_data), output_path)
+    if success and (not extracted_data or not isinstance(extracted_data, list)):
+        return True, "未提取到表格数据，已创建空文件"
+    return success, error
+
+def save_converted_order(excel_path, sheet_frames):
+    """
+    保存转换结果的标准化订单数据，比对时直接使用而无需重新解析Excel和推断列名
+    
+    各工作表数据按read_excel读回的结果处理，与从Excel加载的订单数据一致
+    """
+    try:
+        # 同名工作表在Excel中相互覆盖，无法对应
+        if len({sheet_name for sheet_name, _ in sheet_frames}) != len(sheet_frames):
+            return False
+        order_df = comparator.standardize_order_sheets(
+            [(sheet_name, read_back_frame(df)) for sheet_name, df in sheet_frames]
+        )
+        return order_df is not None and save_order_artifact(excel_path, order_df)
+    except Exception as e:
+        current_app.logger.warning(f"保存订单数据产物失败: {str(e)}")
+        return False
+
+def extract_order_tables(pdf_path):
+    """
+    提取PDF中的订单表格，转换和预览共用同一提取流程
+    
+    优先使用增强解析器，未找到表格时依次回退到Camelot和Tabula
+    
+    Returns:
+        (extracted_data, pdf_sections, method, error)
+        pdf_sections为增强解析器的完整结构信息，解析失败时为None
+    """
+    enhanced_parser = get_enhanced_parser()
+    pdf_content = enhanced_parser.extract_pdf_content(pdf_path)
+    
+    pdf_sections = None
+    extracted_data = None
+    error = None
+    method = 'enhanced'
+    
+    if pdf_content['success']:
+        pdf_sections = pdf_content['sections']
+        order_tables = pdf_sections['order_tables']
+        extracted_data = order_tables['data'] if order_tables['found'] else []
+    else:
+        error = pdf_content.get('error')
+    
+    # 如果没有找到表格，尝试原始方法作为备选
+    if not extracted_data:
+        method = 'camelot'
+        extracted_data, fallback_error = extract_tables_with_camelot(pdf_path)
+        if extracted_data is None or len(extracted_data) == 0:
+            method = 'tabula'
+            extracted_data, fallback_error = extract_tables_with_tabula(pdf_path)
+        error = error or fallback_error
+    
+    return extracted_data, pdf_sections, method, error
+
 # 重复的函数定义已删除，使用下面更完整的版本
 
 @pdf_converter_bp.route('/health', methods=['GET'])
@@ -501,24 +616,43 @@ def upload_file():
             
             upload_path, _ = get_upload_output_paths()
             file_path = os.path.join(upload_path, unique_filename)
-            file.save(file_path)
+            # 分块写入临时文件后改名，同时计算SHA-256和页数，文件头不是PDF时拒绝
+            try:
+                upload_info = save_upload(file, file_path, kind=upload_kind(filename),
+                                          max_bytes=current_app.config.get('MAX_CONTENT_LENGTH'))
+            except UploadRejected as e:
+                current_app.logger.warning(f"拒绝上传文件 {filename}: {e.message}")
+                status = 413 if e.error_code == 'FILE_TOO_LARGE' else 400
+                return safe_jsonify({'error': e.message, 'error_code': e.error_code}), status
             
-            # 保存元数据，包括原始文件名
+            # 保存元数据，包括原始文件名及内容哈希（用于去重及缓存）
             metadata = {
                 'original_filename': filename,
                 'upload_time': datetime.now().isoformat(),
-                'file_size': os.path.getsize(file_path)
+                'file_size': upload_info['file_size'],
+                'sha256': upload_info['sha256'],
+                'page_count': upload_info['page_count']
             }
             
             metadata_path = os.path.join(upload_path, f"{file_id}.json")
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False)
             
-            return safe_jsonify({
+            # 内容相同的已上传文件
+            duplicates = lookup_duplicate_uploads(upload_info['sha256'])
+            update_catalog(record_upload, file_id, filename, metadata['upload_time'], metadata['file_size'],
+                           upload_info['sha256'])
+            
+            response = {
                 'message': '文件上传成功',
                 'file_id': file_id,
-                'original_filename': filename
-            }), 200
+                'original_filename': filename,
+                'sha256': upload_info['sha256'],
+                'page_count': upload_info['page_count']
+            }
+            if duplicates:
+                response['duplicate_of'] = duplicates
+            return safe_jsonify(response), 200
         else:
             return safe_jsonify({'error': '不支持的文件类型，请上传PDF文件'}), 400
             
@@ -536,33 +670,13 @@ def convert_pdf(file_id):
         if not os.path.exists(pdf_path):
             return safe_jsonify({'error': '文件不存在'}), 404
         
-        # 使用增强的PDF解析器
-        enhanced_parser = get_enhanced_parser()
-        pdf_content = enhanced_parser.extract_pdf_content(pdf_path)
+        # 使用增强的PDF解析器提取表格，失败时回退到原始方法
+        extracted_data, pdf_sections, extraction_method, error = extract_order_tables(pdf_path)
         
-        if not pdf_content['success']:
-            # 回退到原始方法
-            extracted_data, error = extract_tables_with_camelot(pdf_path)
-            if extracted_data is None or len(extracted_data) == 0:
-                extracted_data, error = extract_tables_with_tabula(pdf_path)
-            
-            if extracted_data is None or len(extracted_data) == 0:
-                return safe_jsonify({
-                    'error': f'无法从PDF中提取数据。错误信息: {pdf_content.get("error", error or "未检测到内容")}'
-                }), 400
-        else:
-            # 使用增强解析器的结果
-            sections = pdf_content['sections']
-            extracted_data = sections['order_tables']['data'] if sections['order_tables']['found'] else []
-            
-            # 如果没有找到表格，尝试原始方法作为备选
-            if not extracted_data:
-                extracted_data, error = extract_tables_with_camelot(pdf_path)
-                if extracted_data is None or len(extracted_data) == 0:
-                    extracted_data, error = extract_tables_with_tabula(pdf_path)
-            
-            # 存储完整的PDF内容信息以供后续使用
-            pdf_sections = sections
+        if pdf_sections is None and (extracted_data is None or len(extracted_data) == 0):
+            return safe_jsonify({
+                'error': f'无法从PDF中提取数据。错误信息: {error or "未检测到内容"}'
+            }), 400
         
         # 获取原始文件名
         original_filename = f"{file_id}.pdf"
@@ -585,16 +699,22 @@ def convert_pdf(file_id):
         excel_filename = f"{file_id}.xlsx"
         excel_path = os.path.join(output_path, excel_filename)
         
+        # 重新转换前订单的内容哈希，内容变化时清理按旧内容缓存的比对结果
+        previous_hash = file_sha256(excel_path) if os.path.exists(excel_path) else None
+        
         # 如果有完整的PDF结构信息，创建多工作表Excel
-        if 'pdf_sections' in locals() and pdf_sections:
-            success = enhanced_parser.create_multi_sheet_excel(pdf_sections, excel_path)
+        success = False
+        if pdf_sections:
+            try:
+                sheet_frames = get_enhanced_parser().build_sheet_frames(pdf_sections)
+                success, error = write_excel_sheets(sheet_frames, excel_path)
+            except Exception as e:
+                error = str(e)
             if not success:
-                # 回退到原始方法
-                success, error = convert_to_excel(extracted_data, excel_path)
-                if not success:
-                    return safe_jsonify({'error': f'Excel生成失败: {error}'}), 500
-        else:
-            success, error = convert_to_excel(extracted_data, excel_path)
+                current_app.logger.warning(f"多工作表Excel生成失败，回退到原始方法: {error}")
+        if not success:
+            sheet_frames = build_table_sheets(extracted_data)
+            success, error = write_excel_sheets(sheet_frames, excel_path)
             if not success:
                 return safe_jsonify({'error': f'Excel生成失败: {error}'}), 500
         
@@ -621,6 +741,14 @@ def convert_pdf(file_id):
         with open(converted_metadata_path, 'w', encoding='utf-8') as f:
             json.dump(converted_metadata, f, ensure_ascii=False)
         
+        update_catalog(record_conversion, file_id, converted_metadata)
+        if previous_hash is not None and file_sha256(excel_path) != previous_hash:
+            forget_order_comparisons(excel_path, previous_hash, output_path)
+        
+        # 保存提取表格的预览产物，预览接口直接读取而无需重新提取
+        save_preview_artifact(output_path, file_id, extracted_data, extraction_method)
+        save_converted_order(excel_path, sheet_frames)
+        
         # 使用统一的预览数据准备函数
         preview_data = prepare_preview_data(extracted_data, max_rows=10)
         
@@ -678,23 +806,41 @@ def download_file(file_id):
 def preview_file(file_id):
     """获取转换后文件的预览数据"""
     try:
-        upload_path, _ = get_upload_output_paths()
+        upload_path, output_path = get_upload_output_paths()
         get_path_manager().ensure_directories()
-        pdf_path = os.path.join(upload_path, f"{file_id}.pdf")
         
+        try:
+            layout = parse_layout(request.args.get('layout'))
+        except ValueError as e:
+            return safe_jsonify({'error': str(e)}), 400
+        
+        # 优先使用转换时保存的预览产物
+        artifact = load_preview_artifact(output_path, file_id)
+        if artifact is not None:
+            preview_data = artifact['preview_data']
+            if layout == LAYOUT_COLUMNAR:
+                preview_data = preview_tables_to_columnar(preview_data)
+            return safe_jsonify({
+                'file_id': file_id,
+                'tables_count': artifact['tables_count'],
+                'preview_data': preview_data
+            }), 200
+        
+        pdf_path = os.path.join(upload_path, f"{file_id}.pdf")
         if not os.path.exists(pdf_path):
             return safe_jsonify({'error': '文件不存在'}), 404
         
-        # 重新提取数据用于预览
-        extracted_data, error = extract_tables_with_camelot(pdf_path)
-        if extracted_data is None or len(extracted_data) == 0:
-            extracted_data, error = extract_tables_with_tabula(pdf_path)
+        # 没有预览产物时，使用与转换相同的流程提取数据
+        extracted_data, _, extraction_method, error = extract_order_tables(pdf_path)
         
         if extracted_data is None or len(extracted_data) == 0:
             return safe_jsonify({'error': '无法提取预览数据'}), 400
         
+        # 保存预览产物，后续预览直接复用
+        save_preview_artifact(output_path, file_id, extracted_data, extraction_method)
+        
         # 使用统一的预览数据准备函数
-        preview_data = prepare_preview_data(extracted_data, max_rows=20)
+        preview_data = prepare_preview_data(extracted_data, max_rows=PREVIEW_MAX_ROWS, layout=layout)
         
         return safe_jsonify({
             'file_id': file_id,
@@ -723,16 +869,20 @@ def get_status(file_id):
             'status': 'unknown'
         }
         
-        # 如果元数据存在，读取文件名
-        if status['metadata_exists']:
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    status['filename'] = metadata.get('filename', f"converted_{file_id}.xlsx")
-                    status['original_filename'] = metadata.get('original_filename', '')
-                    status['convert_time'] = metadata.get('convert_time', '')
-            except Exception as e:
-                current_app.logger.warning(f"读取元数据失败: {str(e)}")
+        # 优先从文件目录读取文件名，没有记录时读取JSON元数据
+        entry = lookup_catalog(file_id)
+        if entry is not None and entry.is_converted:
+            status['metadata_exists'] = True
+            metadata = entry.to_dict()
+        elif status['metadata_exists']:
+            metadata = read_metadata(metadata_path)
+        else:
+            metadata = None
+        
+        if metadata is not None:
+            status['filename'] = metadata.get('filename') or f"converted_{file_id}.xlsx"
+            status['original_filename'] = metadata.get('original_filename', '')
+            status['convert_time'] = metadata.get('convert_time', '')
         
         if not status['pdf_exists'] and not status['excel_exists']:
             status['status'] = 'not_found'
@@ -750,62 +900,83 @@ def get_status(file_id):
     except Exception as e:
         return safe_jsonify({'error': f'状态查询失败: {str(e)}'}), 500
 
+def scan_converted_sidecars(output_path):
+    """扫描JSON元数据文件列出已转换文件（文件目录不可用时的后备方案）"""
+    files = []
+    
+    # 获取所有JSON元数据文件，跳过比对结果和转换产物
+    metadata_files = [
+        f for f in os.listdir(output_path)
+        if f.endswith('.json') and not f.startswith('order_comparison_') and '.' not in f[:-len('.json')]
+    ]
+    
+    for metadata_file in metadata_files:
+        file_id = metadata_file.rsplit('.', 1)[0]
+        excel_path = os.path.join(output_path, f"{file_id}.xlsx")
+        
+        # 检查Excel文件是否存在
+        file_exists = os.path.exists(excel_path)
+        
+        # 读取元数据
+        metadata = read_metadata(os.path.join(output_path, metadata_file))
+        if metadata is None:
+            continue
+        
+        try:
+            # 获取文件信息
+            if file_exists:
+                file_size = os.path.getsize(excel_path)
+                file_time = os.path.getmtime(excel_path)
+            else:
+                file_size = metadata.get('file_size', 0)
+                file_time = datetime.fromisoformat(metadata.get('convert_time', datetime.now().isoformat())).timestamp()
+            
+            files.append({
+                'file_id': file_id,
+                'filename': metadata.get('filename', f"converted_{file_id}.xlsx"),
+                'original_filename': metadata.get('original_filename', ''),
+                'file_size': file_size,
+                'convert_time': metadata.get('convert_time', datetime.fromtimestamp(file_time).isoformat()),
+                'record_count': metadata.get('record_count', 0),
+                'exists': file_exists  # 文件是否存在
+            })
+        except Exception as e:
+            current_app.logger.warning(f"读取元数据失败: {metadata_file}, 错误: {str(e)}")
+            continue
+    
+    # 按时间倒序排序
+    files.sort(key=lambda x: x['convert_time'], reverse=True)
+    return files
+
 @pdf_converter_bp.route('/list_converted', methods=['GET'])
 def list_converted_files():
-    """列出已转换的订单文件"""
+    """列出已转换的订单文件（支持offset/limit分页）"""
     try:
         _, output_path = get_upload_output_paths()
         get_path_manager().ensure_directories()
-        files = []
-        
-        # 获取所有JSON元数据文件
-        metadata_files = [f for f in os.listdir(output_path) if f.endswith('.json') and not f.startswith('order_comparison_')]
-        
-        for metadata_file in metadata_files:
-            file_id = metadata_file.rsplit('.', 1)[0]
-            excel_file = f"{file_id}.xlsx"
-            excel_path = os.path.join(output_path, excel_file)
-            
-            # 检查Excel文件是否存在
-            file_exists = os.path.exists(excel_path)
-            
-            # 读取元数据
-            metadata_path = os.path.join(output_path, metadata_file)
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    
-                # 获取文件信息
-                if file_exists:
-                    file_size = os.path.getsize(excel_path)
-                    file_time = os.path.getmtime(excel_path)
-                else:
-                    file_size = metadata.get('file_size', 0)
-                    file_time = datetime.fromisoformat(metadata.get('convert_time', datetime.now().isoformat())).timestamp()
-                
-                # 使用元数据中的信息
-                filename = metadata.get('filename', f"converted_{file_id}.xlsx")
-                original_filename = metadata.get('original_filename', '')
-                convert_time = metadata.get('convert_time', datetime.fromtimestamp(file_time).isoformat())
-                record_count = metadata.get('record_count', 0)
-                
-                # 添加到文件列表
-                files.append({
-                    'file_id': file_id,
-                    'filename': filename,
-                    'original_filename': original_filename,
-                    'file_size': file_size,
-                    'convert_time': convert_time,
-                    'record_count': record_count,
-                    'exists': file_exists  # 文件是否存在
-                })
-            except Exception as e:
-                current_app.logger.warning(f"读取元数据失败: {metadata_file}, 错误: {str(e)}")
-                continue
+        offset = max(request.args.get('offset', default=0, type=int) or 0, 0)
+        limit = request.args.get('limit', default=None, type=int)
+        
+        try:
+            entries, total = list_conversions(offset, limit)
+            files = []
+            for entry in entries:
+                file_info = entry.to_dict()
+                # 只检查当前页文件是否存在
+                file_info['exists'] = os.path.exists(os.path.join(output_path, f"{entry.file_id}.xlsx"))
+                files.append(file_info)
+        except Exception as e:
+            current_app.logger.warning(f"文件目录不可用，回退到扫描元数据文件: {str(e)}")
+            files = scan_converted_sidecars(output_path)
+            total = len(files)
+            files = files[offset:offset + limit] if limit is not None else files[offset:]
         
-        # 按时间倒序排序
-        files.sort(key=lambda x: x['convert_time'], reverse=True)
-        return safe_jsonify({'files': files}), 200
+        return safe_jsonify({
+            'files': files,
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        }), 200
     except Exception as e:
         current_app.logger.error(f"获取文件列表失败: {str(e)}")
         return safe_jsonify({'error': f'获取文件列表失败: {str(e)}'}), 500
@@ -835,25 +1006,100 @@ def preview_converted(file_id):
                 'file_size': os.path.getsize(file_path)
             }
         
-        # 获取Excel工作表列表
-        import pandas as pd
-        xl = pd.ExcelFile(file_path)
-        sheets = xl.sheet_names
+        # 获取Excel工作表列表（只读取workbook.xml，dimensions=true时读取各工作表维度）
+        include_dimensions = request.args.get('dimensions', '').lower() in ('1', 'true', 'yes')
+        sheet_info = inspect_workbook(file_path, dimensions=include_dimensions)
         
-        return safe_jsonify({
+        response = {
             'file_id': file_id,
             'filename': metadata.get('filename', f"converted_{file_id}.xlsx"),
             'convert_time': metadata.get('convert_time'),
             'file_size': os.path.getsize(file_path),
-            'sheets': sheets
-        }), 200
+            'sheets': [sheet['name'] for sheet in sheet_info]
+        }
+        if include_dimensions:
+            response['sheet_info'] = sheet_info
+        
+        return safe_jsonify(response), 200
     except Exception as e:
         current_app.logger.error(f"预览转换文件失败: {str(e)}")
         return safe_jsonify({'error': '预览失败'}), 500
 
+def parse_sheet_query_args(args):
+    """
+    解析工作表分页查询参数
+    
+    支持的参数：
+        offset: 跳过的行数
+        limit: 返回的行数
+        columns: 逗号分隔的列名
+        filter: 可重复，格式为"列名:关键字"（不区分大小写的子串匹配）
+        sort: 排序列名
+        order: asc 或 desc
+    """
+    offset = args.get('offset', default=0, type=int) or 0
+    limit = args.get('limit', default=None, type=int)
+    
+    columns_arg = args.get('columns', '')
+    columns = [c.strip() for c in columns_arg.split(',') if c.strip()] or None
+    
+    filters = {}
+    for item in args.getlist('filter'):
+        if ':' not in item:
+            raise ValueError(f'无效的过滤条件: {item}，格式应为 列名:关键字')
+        column, keyword = item.split(':', 1)
+        if column.strip():
+            filters[column.strip()] = keyword
+    
+    sort_by = args.get('sort') or None
+    descending = args.get('order', 'asc').lower() == 'desc'
+    
+    return {
+        'offset': offset,
+        'limit': limit,
+        'columns': columns,
+        'filters': filters,
+        'sort_by': sort_by,
+        'descending': descending
+    }
+
+def open_sheet_rows(file_path, sheet_name, query):
+    """
+    按查询参数打开工作表的行流
+    
+    没有排序时直接由只读工作簿逐行输出；排序需要先按read_sheet_page收集一页
+    
+    Returns:
+        (列名列表, 数据行数, 行迭代器)
+    """
+    if query['sort_by'] is None:
+        return stream_sheet_rows(
+            file_path, sheet_name, query['offset'], query['limit'], query['columns'], query['filters']
+        )
+    page = read_sheet_page(file_path, sheet_name, **query)
+    return page['columns'], page['total_rows'], iter(page['rows'])
+
+def stream_sheet_data(file_path, sheet_name, query):
+    """以NDJSON流输出工作表数据"""
+    columns, total_rows, rows = open_sheet_rows(file_path, sheet_name, query)
+    header = {
+        'sheet_name': sheet_name,
+        'columns': columns,
+        'total_rows': total_rows,
+        'offset': query['offset'],
+        'limit': query['limit']
+    }
+    return ndjson_response(table_events(header, rows))
+
+def arrow_sheet_data(file_path, sheet_name, query):
+    """以Arrow IPC流输出工作表数据"""
+    columns, total_rows, rows = open_sheet_rows(file_path, sheet_name, query)
+    metadata = {'sheet_name': sheet_name, 'total_rows': total_rows, 'offset': query['offset']}
+    return arrow_response(rows_to_arrow(columns, rows, metadata))
+
 @pdf_converter_bp.route('/sheet_data/<file_id>', methods=['GET'])
 def get_sheet_data(file_id):
-    """获取Excel工作表数据（统一接口）"""
+    """获取Excel工作表数据（统一接口，支持分页、列投影、过滤和排序）"""
     try:
         sheet_name = request.args.get('sheet', 'Sheet1')
         
@@ -864,11 +1110,28 @@ def get_sheet_data(file_id):
         if not os.path.exists(file_path):
             return safe_jsonify({'error': '文件不存在'}), 404
         
-        # 读取指定工作表数据
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        try:
+            query = parse_sheet_query_args(request.args)
+            layout = parse_layout(request.args.get('layout'))
+        except ValueError as e:
+            return safe_jsonify({'error': str(e)}), 400
+        
+        # 按行范围读取指定工作表数据
+        try:
+            if wants_arrow(request):
+                if not HAS_PYARROW:
+                    return arrow_unavailable_response()
+                return arrow_sheet_data(file_path, sheet_name, query)
+            if wants_ndjson(request):
+                return stream_sheet_data(file_path, sheet_name, query)
+            page = read_sheet_page(file_path, sheet_name, **query)
+        except SheetNotFoundError:
+            return safe_jsonify({'error': f'工作表不存在: {sheet_name}'}), 404
+        except KeyError as e:
+            return safe_jsonify({'error': str(e.args[0]) if e.args else '列不存在'}), 400
         
         # 使用统一的数据准备函数
-        sheet_data = prepare_sheet_data(df, sheet_name)
+        sheet_data = prepare_sheet_page(page, sheet_name, query['offset'], query['limit'], layout=layout)
         
         return safe_jsonify(sheet_data), 200
         
@@ -934,20 +1197,23 @@ def check_file_exists(file_id):
             'metadata_exists': metadata_exists
         }
         
-        # 如果元数据存在，读取更多信息
-        if metadata_exists:
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                file_info.update({
-                    'filename': metadata.get('filename', f"converted_{file_id}.xlsx"),
-                    'original_filename': metadata.get('original_filename', ''),
-                    'convert_time': metadata.get('convert_time', ''),
-                    'record_count': metadata.get('record_count', 0)
-                })
-            except Exception as e:
-                current_app.logger.warning(f"读取元数据失败: {str(e)}")
+        # 优先从文件目录读取更多信息，没有记录时读取JSON元数据
+        entry = lookup_catalog(file_id)
+        if entry is not None and entry.is_converted:
+            file_info['metadata_exists'] = True
+            metadata = entry.to_dict()
+        elif metadata_exists:
+            metadata = read_metadata(metadata_path)
+        else:
+            metadata = None
+        
+        if metadata is not None:
+            file_info.update({
+                'filename': metadata.get('filename') or f"converted_{file_id}.xlsx",
+                'original_filename': metadata.get('original_filename', ''),
+                'convert_time': metadata.get('convert_time', ''),
+                'record_count': metadata.get('record_count', 0)
+            })
         
         return safe_jsonify(file_info), 200
     except Exception as e:
@@ -967,15 +1233,25 @@ def delete_converted_file(file_id):
         metadata_exists = os.path.exists(metadata_path)
         
         if not file_exists and not metadata_exists:
+            if lookup_catalog(file_id) is not None:
+                # 文件已被外部删除，只清理目录记录
+                update_catalog(remove_conversion, file_id)
+                return safe_jsonify({'message': '文件删除成功'}), 200
             return safe_jsonify({'error': '文件不存在'}), 404
         
-        # 删除Excel文件（如果存在）
+        # 删除Excel文件（如果存在），按该文件生成工作簿的比对结果不再可用
         if file_exists:
+            forget_order_comparisons(file_path, file_sha256(file_path), output_path)
             os.remove(file_path)
         
         # 删除元数据文件（如果存在）
         if metadata_exists:
             os.remove(metadata_path)
+        
+        # 删除转换产物
+        remove_artifacts(output_path, file_id)
+        
+        update_catalog(remove_conversion, file_id)
             
         return safe_jsonify({'message': '文件删除成功'}), 200
     except Exception as e:
@@ -2,15 +2,35 @@
 订单与产品规格比对相关的API路由
 """
 
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, send_file, current_app
 import os
 import sys
+import json
+import uuid
+import hashlib
+import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.utils.enhanced_spec_manager import EnhancedProductSpecManager
-from src.utils.order_comparator import OrderSpecComparator
-from src.utils.json_utils import safe_jsonify, clean_nan_values, prepare_sheet_data
+from src.utils.order_comparator import OrderSpecComparator, COMPARATOR_VERSION
+from src.utils.json_utils import (
+    safe_jsonify, clean_nan_values, prepare_sheet_data, parse_layout, records_to_columns, LAYOUT_COLUMNAR
+)
+from src.utils.comparison_results import (
+    load_comparison_summary, backfill_comparison_summary, remove_comparison_result
+)
+from src.utils.content_hash import file_sha256
+from src.utils.ndjson_stream import wants_ndjson, table_events, ndjson_response
+from src.utils.arrow_export import (
+    HAS_PYARROW, wants_arrow, dataframe_to_arrow, arrow_response, arrow_unavailable_response
+)
+from src.utils.sheet_reader import stream_sheet_rows
+from src.utils.workbook_inspector import list_sheet_names
+from src.utils.spec_cache import get_spec_cache
 from ..utils.path_manager import get_path_manager
+from ..models.comparison_cache import (
+    comparison_cache_key, find_cached_comparison, record_cached_comparison, remove_cached_comparison
+)
 
 # 创建蓝图
 spec_bp = Blueprint('spec', __name__)
@@ -19,12 +39,18 @@ spec_bp = Blueprint('spec', __name__)
 spec_manager = EnhancedProductSpecManager()
 comparator = OrderSpecComparator()
 
+# 批量比对单次最多的订单数
+BATCH_MAX_ORDERS = 1000
+
+# 比对结果缓存保留的最大结果数，超过时删除最久未使用的结果
+COMPARISON_CACHE_MAX_ENTRIES = 200
+
 @spec_bp.route('/api/upload_spec', methods=['POST'])
 def upload_spec():
     """上传产品规格表"""
     try:
         if 'file' not in request.files:
-            return jsonify({
+            return safe_jsonify({
                 'error': '未选择文件',
                 'error_code': 'NO_FILE_SELECTED',
                 'message': '请选择一个Excel文件上传'
@@ -34,7 +60,7 @@ def upload_spec():
         
         # 检查文件名是否为空
         if file.filename == '':
-            return jsonify({
+            return safe_jsonify({
                 'error': '文件名为空',
                 'error_code': 'EMPTY_FILENAME',
                 'message': '请选择一个有效的文件'
@@ -73,7 +99,7 @@ def upload_spec():
             # 添加可接受的列名示例
             response['acceptable_columns'] = spec_manager.generate_column_mapping_examples()
             
-            return jsonify(response), 400
+            return safe_jsonify(response), 400
         else:
             # 添加警告（如果有）
             if 'warnings' in result:
@@ -88,11 +114,11 @@ def upload_spec():
                 result['mapping_applied'] = True
                 result['mapping_count'] = len(result['mapped_columns'])
                 
-            return jsonify(result), 200
+            return safe_jsonify(result), 200
             
     except Exception as e:
         current_app.logger.error(f"上传规格表失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'error': '上传失败',
             'error_code': 'UPLOAD_FAILED',
             'message': f'处理文件时发生错误: {str(e)}',
@@ -104,11 +130,11 @@ def list_specs():
     """获取产品规格表列表"""
     try:
         specs = spec_manager.list_specs()
-        return jsonify({'specs': specs}), 200
+        return safe_jsonify({'specs': specs}), 200
         
     except Exception as e:
         current_app.logger.error(f"获取规格表列表失败: {str(e)}")
-        return jsonify({'error': '获取列表失败'}), 500
+        return safe_jsonify({'error': '获取列表失败'}), 500
 
 @spec_bp.route('/api/delete_spec/<spec_id>', methods=['DELETE'])
 def delete_spec(spec_id):
@@ -117,27 +143,45 @@ def delete_spec(spec_id):
         result = spec_manager.delete_spec(spec_id)
         
         if 'error' in result:
-            return jsonify(result), 404
+            return safe_jsonify(result), 404
         else:
-            return jsonify(result), 200
+            return safe_jsonify(result), 200
             
     except Exception as e:
         current_app.logger.error(f"删除规格表失败: {str(e)}")
-        return jsonify({'error': '删除失败'}), 500
+        return safe_jsonify({'error': '删除失败'}), 500
+
+@spec_bp.route('/api/spec_cache/stats', methods=['GET'])
+def get_spec_cache_stats():
+    """获取规格表缓存统计信息"""
+    try:
+        return safe_jsonify(get_spec_cache().stats()), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"获取规格表缓存统计失败: {str(e)}")
+        return safe_jsonify({'error': '获取缓存统计失败'}), 500
 
 @spec_bp.route('/api/compare_orders', methods=['POST'])
 def compare_orders():
-    """比对订单与产品规格表"""
+    """比对订单与产品规格表，spec_ids为按优先顺序叠加的多个规格表"""
     try:
         data = request.get_json()
         
-        if not data or 'order_file_id' not in data or 'spec_id' not in data:
+        if not data or 'order_file_id' not in data or ('spec_id' not in data and 'spec_ids' not in data):
             return safe_jsonify({'error': '缺少必需的参数'}), 400
             
         order_file_id = data['order_file_id']
-        spec_id = data['spec_id']
         check_total_calc = data.get('check_total_calc', True)
         
+        spec_ids = data.get('spec_ids')
+        if spec_ids is not None and (not isinstance(spec_ids, list) or not spec_ids):
+            return safe_jsonify({'error': 'spec_ids必须是非空列表'}), 400
+        
+        # 分块比对的每块行数，不指定时订单很大才自动分块
+        chunk_size = data.get('chunk_size')
+        if chunk_size is not None and (not isinstance(chunk_size, int) or chunk_size < 1):
+            return safe_jsonify({'error': 'chunk_size必须是正整数'}), 400
+        
         # 获取订单文件路径 - 使用路径管理器
         path_manager = get_path_manager()
         order_file_path = path_manager.get_output_path(f"{order_file_id}.xlsx")
@@ -146,18 +190,45 @@ def compare_orders():
         if not os.path.exists(order_file_path):
             current_app.logger.error(f"订单文件不存在: {order_file_path}")
             return safe_jsonify({'error': '订单文件不存在'}), 404
-            
-        # 获取规格表文件路径
-        spec_file_path = spec_manager.get_spec_path(spec_id)
-        if not spec_file_path:
-            return safe_jsonify({'error': '规格表文件不存在'}), 404
-            
-        # 执行比对
-        result = comparator.compare_orders(
-            order_file_path, 
-            spec_file_path, 
-            check_total_calc
-        )
+        
+        if spec_ids is not None:
+            # 获取各层规格表文件路径（重复的spec_id只保留第一次出现的位置）
+            spec_layers = []
+            for spec_id in dict.fromkeys(map(str, spec_ids)):
+                spec_file_path = spec_manager.get_spec_path(spec_id)
+                if not spec_file_path:
+                    return safe_jsonify({'error': f'规格表文件不存在: {spec_id}'}), 404
+                spec_layers.append((spec_id, spec_file_path))
+            
+            # 相同订单、规格表和选项的比对直接返回已有结果
+            fingerprint = comparison_fingerprint(order_file_path, spec_layers, check_total_calc, layered=True)
+            result = find_cached_result(fingerprint)
+            if result is None:
+                # 执行分层比对，结果工作簿在第一次下载时生成
+                result = comparator.compare_orders_layered(order_file_path, spec_layers, check_total_calc, chunk_size,
+                                                           write_workbook=False)
+                cache_result(fingerprint, result)
+        else:
+            spec_id = data['spec_id']
+            
+            # 获取规格表文件路径
+            spec_file_path = spec_manager.get_spec_path(spec_id)
+            if not spec_file_path:
+                return safe_jsonify({'error': '规格表文件不存在'}), 404
+            
+            fingerprint = comparison_fingerprint(order_file_path, [(spec_id, spec_file_path)], check_total_calc)
+            result = find_cached_result(fingerprint)
+            if result is None:
+                # 执行比对，结果工作簿在第一次下载时生成
+                result = comparator.compare_orders(
+                    order_file_path, 
+                    spec_file_path, 
+                    check_total_calc,
+                    spec_id=spec_id,
+                    chunk_rows=chunk_size,
+                    write_workbook=False
+                )
+                cache_result(fingerprint, result)
         
         if 'error' in result:
             return safe_jsonify(result), 500
@@ -175,18 +246,184 @@ def compare_orders():
         current_app.logger.error(f"订单比对失败: {str(e)}")
         return safe_jsonify({'error': f'比对失败: {str(e)}'}), 500
 
+def comparison_fingerprint(order_file_path, spec_layers, check_total_calc, layered=False):
+    """
+    比对结果缓存的指纹：订单内容哈希、规格表内容哈希、check_total_calc及比对器版本
+    
+    分层比对的结果记录了各层的spec_id，因此分层时规格表哈希包含各层的spec_id和顺序
+    """
+    order_hash = file_sha256(order_file_path)
+    if layered:
+        layers = '|'.join(f"{spec_id}:{file_sha256(path)}" for spec_id, path in spec_layers)
+        spec_hash = hashlib.sha256(f"layered|{layers}".encode('utf-8')).hexdigest()
+    else:
+        spec_hash = file_sha256(spec_layers[0][1])
+    return {
+        'cache_key': comparison_cache_key(order_hash, spec_hash, check_total_calc, COMPARATOR_VERSION),
+        'order_hash': order_hash,
+        'spec_hash': spec_hash,
+        'check_total_calc': check_total_calc
+    }
+
+def find_cached_result(fingerprint):
+    """查找缓存的比对结果，结果文件已被删除或缓存不可用时返回None"""
+    try:
+        entry = find_cached_comparison(fingerprint['cache_key'])
+        if entry is None:
+            return None
+        
+        output_dir = comparator.output_dir
+        result_filename = f"order_comparison_{entry.result_file_id}.xlsx"
+        result_file_path = os.path.join(output_dir, result_filename)
+        summary = load_comparison_summary(output_dir, entry.result_file_id)
+        workbook_ready = os.path.exists(result_file_path)
+        if summary is None or not (workbook_ready or source_order_unchanged(summary, fingerprint['order_hash'])):
+            remove_cached_comparison(fingerprint['cache_key'])
+            return None
+        
+        current_app.logger.info(f"使用缓存的比对结果: {entry.result_file_id}")
+        return {
+            'result_file_id': entry.result_file_id,
+            'result_file_path': result_file_path,
+            'filename': result_filename,
+            'workbook_ready': workbook_ready,
+            'stats': summary['stats'],
+            'cached': True
+        }
+    except Exception as e:
+        current_app.logger.warning(f"查询比对结果缓存失败: {str(e)}")
+        return None
+
+def source_order_unchanged(summary, order_hash):
+    """
+    工作簿尚未生成的结果能否复用：生成工作簿时读取的比对来源订单仍然存在且内容与本次比对的订单相同
+    
+    相同内容的其它订单命中缓存时，来源订单可能已被删除或重新转换为其它内容
+    """
+    source = summary.get('source')
+    if not source or not os.path.exists(source['order_file_path']):
+        return False
+    return file_sha256(source['order_file_path']) == order_hash
+
+def cache_result(fingerprint, result):
+    """缓存比对结果，并删除被淘汰的比对结果文件"""
+    if 'error' in result:
+        return
+    try:
+        evicted_ids = record_cached_comparison(
+            fingerprint['cache_key'],
+            fingerprint['order_hash'],
+            fingerprint['spec_hash'],
+            fingerprint['check_total_calc'],
+            COMPARATOR_VERSION,
+            result['result_file_id'],
+            COMPARISON_CACHE_MAX_ENTRIES
+        )
+        for result_file_id in evicted_ids:
+            remove_comparison_result(comparator.output_dir, result_file_id)
+    except Exception as e:
+        current_app.logger.warning(f"记录比对结果缓存失败: {str(e)}")
+
+@spec_bp.route('/api/compare_orders/batch', methods=['POST'])
+def compare_orders_batch():
+    """用同一个规格表批量比对多个订单"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'order_file_ids' not in data or 'spec_id' not in data:
+            return safe_jsonify({'error': '缺少必需的参数'}), 400
+            
+        order_file_ids = data['order_file_ids']
+        if not isinstance(order_file_ids, list) or not order_file_ids:
+            return safe_jsonify({'error': 'order_file_ids必须是非空列表'}), 400
+        if len(order_file_ids) > BATCH_MAX_ORDERS:
+            return safe_jsonify({'error': f'单次最多比对{BATCH_MAX_ORDERS}个订单'}), 400
+            
+        spec_id = data['spec_id']
+        check_total_calc = data.get('check_total_calc', True)
+        write_workbooks = bool(data.get('write_workbooks', False))
+        max_workers = data.get('max_workers')
+        if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+            return safe_jsonify({'error': 'max_workers必须是正整数'}), 400
+        
+        # 获取规格表文件路径
+        spec_file_path = spec_manager.get_spec_path(spec_id)
+        if not spec_file_path:
+            return safe_jsonify({'error': '规格表文件不存在'}), 404
+        
+        # 不存在的订单文件单独记录错误，不影响其它订单
+        path_manager = get_path_manager()
+        order_files = {}
+        missing = []
+        for order_file_id in dict.fromkeys(map(str, order_file_ids)):
+            order_file_path = path_manager.get_output_path(f"{order_file_id}.xlsx")
+            if os.path.exists(order_file_path):
+                order_files[order_file_id] = order_file_path
+            else:
+                current_app.logger.error(f"订单文件不存在: {order_file_path}")
+                missing.append(order_file_id)
+        
+        # 相同订单、规格表和选项已有比对结果的订单直接使用缓存的结果，其余订单批量比对
+        cached_results = []
+        fingerprints = {}
+        for order_file_id, order_file_path in order_files.items():
+            fingerprint = comparison_fingerprint(order_file_path, [(spec_id, spec_file_path)], check_total_calc)
+            cached = find_cached_result(fingerprint)
+            if cached is None:
+                fingerprints[order_file_id] = fingerprint
+                continue
+            if write_workbooks and not cached['workbook_ready']:
+                cached['workbook_ready'] = get_comparison_workbook_path(cached['result_file_id']) is not None
+            cached.pop('result_file_path', None)
+            cached['order_file_id'] = order_file_id
+            cached_results.append(cached)
+        
+        if fingerprints:
+            result = comparator.compare_orders_batch(
+                {order_file_id: order_files[order_file_id] for order_file_id in fingerprints},
+                spec_file_path,
+                check_total_calc,
+                spec_id=spec_id,
+                write_workbooks=write_workbooks,
+                max_workers=max_workers
+            )
+            if 'error' in result:
+                return safe_jsonify(result), 500
+            for item in result['results']:
+                cache_result(fingerprints[item['order_file_id']], item)
+        else:
+            result = {'results': [], 'workers': 0}
+        
+        # 按请求顺序返回每个订单的结果
+        by_id = {item['order_file_id']: item for item in cached_results + result['results']}
+        for order_file_id in missing:
+            by_id[order_file_id] = {'order_file_id': order_file_id, 'error': '订单文件不存在'}
+        results = [by_id[order_file_id] for order_file_id in dict.fromkeys(map(str, order_file_ids))]
+        
+        stats = comparator.aggregate_stats(results)
+        return safe_jsonify(clean_nan_values({
+            'spec_id': spec_id,
+            'results': results,
+            'stats': stats,
+            'workers': result['workers'],
+            'summary': comparator.get_comparison_summary(stats)
+        })), 200
+            
+    except Exception as e:
+        current_app.logger.error(f"批量订单比对失败: {str(e)}")
+        return safe_jsonify({'error': f'批量比对失败: {str(e)}'}), 500
+
 @spec_bp.route('/api/download_comparison/<result_file_id>', methods=['GET'])
 def download_comparison_result(result_file_id):
     """下载比对结果文件"""
     try:
         # 使用与order_comparator一致的路径构建方式
         # 使用路径管理器获取文件路径
-        path_manager = get_path_manager()
-        file_path = path_manager.get_output_path(f"order_comparison_{result_file_id}.xlsx")
+        file_path = get_comparison_workbook_path(result_file_id)
         
-        if not os.path.exists(file_path):
-            current_app.logger.error(f"比对结果文件不存在: {file_path}")
-            return safe_jsonify({'error': '文件不存在'}), 404
+        if not file_path:
+            current_app.logger.error(f"比对结果文件不存在: {result_file_id}")
+            return workbook_unavailable_response(result_file_id)
             
         return send_file(
             file_path,
@@ -199,52 +436,131 @@ def download_comparison_result(result_file_id):
         current_app.logger.error(f"下载比对结果失败: {str(e)}")
         return safe_jsonify({'error': '下载失败'}), 500
 
+def get_comparison_workbook_path(result_file_id):
+    """比对结果工作簿路径，工作簿在第一次使用时生成（之后直接使用磁盘上的文件），不存在时返回None"""
+    file_path = os.path.join(get_path_manager().config.outputs_dir, f"order_comparison_{result_file_id}.xlsx")
+    if not os.path.exists(file_path):
+        file_path = comparator.render_workbook(result_file_id)
+    return file_path if file_path and os.path.exists(file_path) else None
+
+def workbook_unavailable_response(result_file_id):
+    """工作簿无法生成时的响应：有比对来源的结果已失效（订单或规格表在比对后已变化）为410，否则为404"""
+    summary = load_comparison_summary(get_path_manager().config.outputs_dir, result_file_id)
+    if summary is not None and summary.get('source'):
+        return safe_jsonify({
+            'error': '比对结果已失效，订单或规格表在比对后已变化，请重新比对',
+            'error_code': 'RESULT_STALE'
+        }), 410
+    return safe_jsonify({'error': '文件不存在'}), 404
+
+def get_comparison_summary_data(result_file_id):
+    """读取比对结果摘要，旧结果没有摘要时从工作簿生成一次"""
+    output_dir = get_path_manager().config.outputs_dir
+    summary = load_comparison_summary(output_dir, result_file_id)
+    if summary is None:
+        summary = backfill_comparison_summary(output_dir, result_file_id, comparator.ERROR_TYPES)
+    return summary
+
+def comparison_stream_events(file_path, stats):
+    """NDJSON流事件：先输出统计信息，再逐个工作表输出完整的比对结果行"""
+    yield {
+        'type': 'stats',
+        'total_rows': stats['total_records'],
+        'error_rows': stats['error_records']
+    }
+    for sheet_name in list_sheet_names(file_path):
+        columns, total_rows, rows = stream_sheet_rows(file_path, sheet_name)
+        header = {'sheet_name': sheet_name, 'columns': columns, 'total_rows': total_rows}
+        yield from table_events(header, rows)
+
+def comparison_arrow_table(file_path, stats):
+    """比对结果的Arrow表，多个工作表合并时增加工作表列"""
+    import pandas as pd
+    
+    frames = []
+    sheet_names = list_sheet_names(file_path)
+    for sheet_name in sheet_names:
+        columns, _, rows = stream_sheet_rows(file_path, sheet_name)
+        df = pd.DataFrame(list(rows), columns=pd.Index(columns, dtype=object))
+        if len(sheet_names) > 1:
+            df.insert(0, '工作表', sheet_name)
+        frames.append(df)
+    
+    metadata = {'total_rows': stats['total_records'], 'error_rows': stats['error_records']}
+    return dataframe_to_arrow(pd.concat(frames, ignore_index=True), metadata)
+
 @spec_bp.route('/api/preview_comparison/<result_file_id>', methods=['GET'])
 def preview_comparison_result(result_file_id):
     """预览比对结果"""
     try:
-        # 使用与order_comparator一致的路径构建方式
-        # 使用路径管理器获取文件路径
-        path_manager = get_path_manager()
-        file_path = path_manager.get_output_path(f"order_comparison_{result_file_id}.xlsx")
+        try:
+            layout = parse_layout(request.args.get('layout'))
+        except ValueError as e:
+            return safe_jsonify({'error': str(e)}), 400
         
-        if not os.path.exists(file_path):
-            current_app.logger.error(f"比对结果文件不存在: {file_path}")
+        summary = get_comparison_summary_data(result_file_id)
+        if summary is None:
+            current_app.logger.error(f"比对结果文件不存在: {result_file_id}")
             return safe_jsonify({'error': '文件不存在'}), 404
-            
-        import pandas as pd
         
-        # 读取Excel文件
-        df = pd.read_excel(file_path)
+        arrow_requested = wants_arrow(request)
+        if arrow_requested or wants_ndjson(request):
+            file_path = get_comparison_workbook_path(result_file_id)
+            if not file_path:
+                return workbook_unavailable_response(result_file_id)
+            if not arrow_requested:
+                return ndjson_response(comparison_stream_events(file_path, summary['stats']))
+            if not HAS_PYARROW:
+                return arrow_unavailable_response()
+            return arrow_response(comparison_arrow_table(file_path, summary['stats']))
         
-        # 使用统一的数据准备函数，限制预览行数
-        sheet_data = prepare_sheet_data(df.head(100))
-        preview_data = sheet_data['data']
-        columns = sheet_data['columns']
+        preview = summary['preview']
+        stats = summary['stats']
         
-        # 统计信息
-        total_rows = len(df)
-        error_rows = len(df[df['核对状态'] == '有问题']) if '核对状态' in df.columns else 0
+        response = {
+            'columns': preview['columns'],
+            'data': preview['data'],
+            'total_rows': stats['total_records'],
+            'error_rows': stats['error_records'],
+            'preview_rows': len(preview['data'])
+        }
+        if layout == LAYOUT_COLUMNAR:
+            response['layout'] = LAYOUT_COLUMNAR
+            response['data'] = records_to_columns(preview['columns'], preview['data'])
         
-        return safe_jsonify({
-            'columns': columns,
-            'data': preview_data,
-            'total_rows': total_rows,
-            'error_rows': error_rows,
-            'preview_rows': len(preview_data)
-        }), 200
+        return safe_jsonify(response), 200
         
     except Exception as e:
         current_app.logger.error(f"预览比对结果失败: {str(e)}")
         return safe_jsonify({'error': '预览失败'}), 500
 
+@spec_bp.route('/api/comparison/<result_file_id>/stats', methods=['GET'])
+def get_comparison_stats(result_file_id):
+    """获取比对结果统计信息（只读取摘要文件，适合轮询）"""
+    try:
+        summary = get_comparison_summary_data(result_file_id)
+        if summary is None:
+            return safe_jsonify({'error': '比对结果不存在'}), 404
+        
+        stats = summary['stats']
+        return safe_jsonify({
+            'result_file_id': result_file_id,
+            'created_time': summary.get('created_time', ''),
+            'stats': stats,
+            'summary': comparator.get_comparison_summary(stats)
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"获取比对统计失败: {str(e)}")
+        return safe_jsonify({'error': '获取统计失败'}), 500
+
 @spec_bp.route('/api/spec_info/<spec_id>', methods=['GET'])
 def get_spec_info(spec_id):
     """获取规格表详细信息"""
     try:
         spec_path = spec_manager.get_spec_path(spec_id)
         if not spec_path:
-            return jsonify({'error': '规格表不存在'}), 404
+            return safe_jsonify({'error': '规格表不存在'}), 404
             
         # 验证规格表格式并获取信息
         validation_result = spec_manager.validate_spec_format(spec_path)
@@ -269,7 +585,7 @@ def get_spec_info(spec_id):
             if 'mapping_result' in validation_result:
                 response['mapping_result'] = validation_result['mapping_result']
                 
-            return jsonify(response), 400
+            return safe_jsonify(response), 400
             
         response = {
             'spec_id': spec_id,
@@ -290,11 +606,11 @@ def get_spec_info(spec_id):
         if 'data_errors' in validation_result:
             response['data_errors'] = validation_result['data_errors']
             
-        return jsonify(response), 200
+        return safe_jsonify(response), 200
         
     except Exception as e:
         current_app.logger.error(f"获取规格表信息失败: {str(e)}")
-        return jsonify({'error': '获取信息失败'}), 500
+        return safe_jsonify({'error': '获取信息失败'}), 500
 
 @spec_bp.route('/api/download_spec/<spec_id>', methods=['GET'])
 def download_spec(spec_id):
@@ -302,7 +618,7 @@ def download_spec(spec_id):
     try:
         spec_path = spec_manager.get_spec_path(spec_id)
         if not spec_path:
-            return jsonify({'error': '规格表不存在'}), 404
+            return safe_jsonify({'error': '规格表不存在'}), 404
         
         # 获取原始文件名
         import json
@@ -321,7 +637,23 @@ def download_spec(spec_id):
         
     except Exception as e:
         current_app.logger.error(f"下载规格表失败: {str(e)}")
-        return jsonify({'error': '下载失败'}), 500
+        return safe_jsonify({'error': '下载失败'}), 500
+
+def open_spec_stream(spec_path):
+    """
+    打开规格表第一个工作表的行流
+    
+    Returns:
+        (列名列表, 数据行数, 行迭代器)
+    """
+    if not spec_path.lower().endswith('.xls'):
+        return stream_sheet_rows(spec_path)
+    
+    # xls格式不支持只读迭代，由pandas读取后逐行输出
+    import pandas as pd
+    sheet_data = prepare_sheet_data(pd.read_excel(spec_path), layout=LAYOUT_COLUMNAR)
+    values = [column.tolist() if hasattr(column, 'tolist') else column for column in sheet_data['data']]
+    return sheet_data['columns'], sheet_data['total_rows'], (list(row) for row in zip(*values))
 
 @spec_bp.route('/api/preview_spec/<spec_id>', methods=['GET'])
 def preview_spec(spec_id):
@@ -329,7 +661,17 @@ def preview_spec(spec_id):
     try:
         spec_path = spec_manager.get_spec_path(spec_id)
         if not spec_path:
-            return jsonify({'error': '规格表不存在'}), 404
+            return safe_jsonify({'error': '规格表不存在'}), 404
+        
+        try:
+            layout = parse_layout(request.args.get('layout'))
+        except ValueError as e:
+            return safe_jsonify({'error': str(e)}), 400
+        
+        if wants_ndjson(request):
+            columns, total_rows, rows = open_spec_stream(spec_path)
+            header = {'spec_id': spec_id, 'columns': columns, 'total_rows': total_rows}
+            return ndjson_response(table_events(header, rows))
         
         import pandas as pd
         
@@ -337,17 +679,20 @@ def preview_spec(spec_id):
         df = pd.read_excel(spec_path)
         
         # 使用统一的数据准备函数，限制预览行数
-        sheet_data = prepare_sheet_data(df.head(100))
-        preview_data = sheet_data['data']
-        columns = sheet_data['columns']
+        preview_df = df.head(100)
+        sheet_data = prepare_sheet_data(preview_df, layout=layout)
         
-        return safe_jsonify({
+        response = {
             'spec_id': spec_id,
-            'columns': columns,
-            'data': preview_data,
+            'columns': sheet_data['columns'],
+            'data': sheet_data['data'],
             'total_rows': len(df),
-            'preview_rows': len(preview_data)
-        }), 200
+            'preview_rows': len(preview_df)
+        }
+        if layout == LAYOUT_COLUMNAR:
+            response['layout'] = LAYOUT_COLUMNAR
+        
+        return safe_jsonify(response), 200
         
     except Exception as e:
         current_app.logger.error(f"预览规格表失败: {str(e)}")
@@ -379,17 +724,17 @@ def download_spec_template():
             
     except Exception as e:
         current_app.logger.error(f"生成规格表模板失败: {str(e)}")
-        return jsonify({'error': '模板生成失败'}), 500
+        return safe_jsonify({'error': '模板生成失败'}), 500
 
 @spec_bp.route('/api/column_mapping_info', methods=['GET'])
 def get_column_mapping_info():
     """获取列名映射配置信息"""
     try:
         mapping_info = spec_manager.get_column_mapping_info()
-        return jsonify(mapping_info), 200
+        return safe_jsonify(mapping_info), 200
     except Exception as e:
         current_app.logger.error(f"获取列名映射配置失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'error': '获取配置失败',
             'error_code': 'CONFIG_FETCH_ERROR',
             'message': '无法获取列名映射配置信息',
@@ -409,7 +754,7 @@ def get_column_mappings_config():
         if not config:
             config = ConfigLoader.get_default_column_mappings()
         
-        return jsonify({
+        return safe_jsonify({
             'success': True,
             'config': config,
             'message': '获取列名映射配置成功'
@@ -417,7 +762,7 @@ def get_column_mappings_config():
         
     except Exception as e:
         current_app.logger.error(f"获取列名映射配置失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '获取配置失败',
             'error_code': 'CONFIG_FETCH_ERROR',
@@ -430,7 +775,7 @@ def update_column_mappings_config():
     """更新列名映射配置"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
@@ -444,7 +789,7 @@ def update_column_mappings_config():
         
         # 验证配置数据
         if not isinstance(config_data, dict):
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '无效的配置数据格式',
                 'error_code': 'INVALID_CONFIG_FORMAT',
@@ -456,7 +801,7 @@ def update_column_mappings_config():
         missing_keys = [key for key in required_keys if key not in config_data]
         
         if missing_keys:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'缺少必要的配置键: {", ".join(missing_keys)}',
                 'error_code': 'MISSING_CONFIG_KEYS',
@@ -465,7 +810,7 @@ def update_column_mappings_config():
         
         # 验证column_mappings格式
         if not isinstance(config_data['column_mappings'], dict):
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'column_mappings必须是一个对象',
                 'error_code': 'INVALID_COLUMN_MAPPINGS',
@@ -474,7 +819,7 @@ def update_column_mappings_config():
         
         # 验证required_columns和optional_columns格式
         if not isinstance(config_data['required_columns'], list) or not isinstance(config_data['optional_columns'], list):
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'required_columns和optional_columns必须是数组',
                 'error_code': 'INVALID_COLUMNS_FORMAT',
@@ -484,7 +829,7 @@ def update_column_mappings_config():
         # 验证required_columns中的列是否都在column_mappings中定义
         undefined_required = [col for col in config_data['required_columns'] if col not in config_data['column_mappings']]
         if undefined_required:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'以下必需列在column_mappings中未定义: {", ".join(undefined_required)}',
                 'error_code': 'UNDEFINED_REQUIRED_COLUMNS',
@@ -494,7 +839,7 @@ def update_column_mappings_config():
         # 验证optional_columns中的列是否都在column_mappings中定义
         undefined_optional = [col for col in config_data['optional_columns'] if col not in config_data['column_mappings']]
         if undefined_optional:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'以下可选列在column_mappings中未定义: {", ".join(undefined_optional)}',
                 'error_code': 'UNDEFINED_OPTIONAL_COLUMNS',
@@ -506,13 +851,13 @@ def update_column_mappings_config():
             # 重新加载配置到spec_manager
             spec_manager.load_column_mappings()
             
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': '列名映射配置已更新',
                 'config': config_data
             }), 200
         else:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '保存配置失败',
                 'error_code': 'CONFIG_SAVE_ERROR',
@@ -521,7 +866,7 @@ def update_column_mappings_config():
         
     except Exception as e:
         current_app.logger.error(f"更新列名映射配置失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '更新配置失败',
             'error_code': 'CONFIG_UPDATE_ERROR',
@@ -543,13 +888,13 @@ def reset_column_mappings_config():
             # 重新加载配置到spec_manager
             spec_manager.load_column_mappings()
             
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': '列名映射配置已重置为默认值',
                 'config': default_config
             }), 200
         else:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '重置配置失败',
                 'error_code': 'CONFIG_RESET_ERROR',
@@ -558,7 +903,7 @@ def reset_column_mappings_config():
         
     except Exception as e:
         current_app.logger.error(f"重置列名映射配置失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '重置配置失败',
             'error_code': 'CONFIG_RESET_ERROR',
@@ -571,7 +916,7 @@ def add_column_mapping():
     """添加新的列映射"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
@@ -588,7 +933,7 @@ def add_column_mapping():
         missing_params = [param for param in required_params if param not in data]
         
         if missing_params:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'缺少必要的参数: {", ".join(missing_params)}',
                 'error_code': 'MISSING_PARAMETERS',
@@ -601,7 +946,7 @@ def add_column_mapping():
         
         # 验证参数类型
         if not isinstance(standard_column, str) or not standard_column:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'standard_column必须是非空字符串',
                 'error_code': 'INVALID_STANDARD_COLUMN',
@@ -609,7 +954,7 @@ def add_column_mapping():
             }), 400
         
         if not isinstance(aliases, list):
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'aliases必须是字符串数组',
                 'error_code': 'INVALID_ALIASES',
@@ -617,7 +962,7 @@ def add_column_mapping():
             }), 400
         
         if not isinstance(is_required, bool):
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'is_required必须是布尔值',
                 'error_code': 'INVALID_IS_REQUIRED',
@@ -657,7 +1002,7 @@ def add_column_mapping():
             # 重新加载配置到spec_manager
             spec_manager.load_column_mappings()
             
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': f'已添加列映射: {standard_column}',
                 'standard_column': standard_column,
@@ -666,7 +1011,7 @@ def add_column_mapping():
                 'config': config
             }), 200
         else:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '保存配置失败',
                 'error_code': 'CONFIG_SAVE_ERROR',
@@ -675,7 +1020,7 @@ def add_column_mapping():
         
     except Exception as e:
         current_app.logger.error(f"添加列映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '添加列映射失败',
             'error_code': 'ADD_MAPPING_ERROR',
@@ -696,7 +1041,7 @@ def delete_column_mapping(standard_column):
         
         # 检查列是否存在
         if standard_column not in config['column_mappings']:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'列映射不存在: {standard_column}',
                 'error_code': 'COLUMN_NOT_FOUND',
@@ -718,13 +1063,13 @@ def delete_column_mapping(standard_column):
             # 重新加载配置到spec_manager
             spec_manager.load_column_mappings()
             
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': f'已删除列映射: {standard_column}',
                 'config': config
             }), 200
         else:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '保存配置失败',
                 'error_code': 'CONFIG_SAVE_ERROR',
@@ -733,7 +1078,7 @@ def delete_column_mapping(standard_column):
         
     except Exception as e:
         current_app.logger.error(f"删除列映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '删除列映射失败',
             'error_code': 'DELETE_MAPPING_ERROR',
@@ -746,7 +1091,7 @@ def add_column_alias(standard_column):
     """添加列别名"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
@@ -760,7 +1105,7 @@ def add_column_alias(standard_column):
         
         # 验证必要的参数
         if 'alias' not in data:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': '缺少必要的参数: alias',
                 'error_code': 'MISSING_PARAMETERS',
@@ -771,7 +1116,7 @@ def add_column_alias(standard_column):
         
         # 验证参数类型
         if not isinstance(alias, str) or not alias:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': 'alias必须是非空字符串',
                 'error_code': 'INVALID_ALIAS',
@@ -785,7 +1130,7 @@ def add_column_alias(standard_column):
         
         # 检查列是否存在
         if standard_column not in config['column_mappings']:
-            return jsonify({
+            return safe_jsonify({
                 'success': False,
                 'error': f'列映射不存在: {standard_column}',
                 'error_code': 'COLUMN_NOT_FOUND',
@@ -801,21 +1146,21 @@ def add_column_alias(standard_column):
                 # 重新加载配置到spec_manager
                 spec_manager.load_column_mappings()
                 
-                return jsonify({
+                return safe_jsonify({
                     'success': True,
                     'message': f'已添加别名: {alias}',
                     'standard_column': standard_column,
                     'aliases': config['column_mappings'][standard_column]
                 }), 200
             else:
-                return jsonify({
+                return safe_jsonify({
                     'success': False,
                     'error': '保存配置失败',
                     'error_code': 'CONFIG_SAVE_ERROR',
                     'message': '无法保存列名映射配置'
                 }), 500
         else:
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': f'别名已存在: {alias}',
                 'standard_column': standard_column,
@@ -824,7 +1169,7 @@ def add_column_alias(standard_column):
         
     except Exception as e:
         current_app.logger.error(f"添加列别名失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': '添加列别名失败',
             'error_code': 'ADD_ALIAS_ERROR',
@@ -845,20 +1190,20 @@ def get_column_mapping_examples():
         for col in sample_df.columns:
             sample_data[col] = sample_df[col].tolist()
         
-        return jsonify({
+        return safe_jsonify({
             'examples': examples,
             'sample_data': sample_data
         }), 200
     except Exception as e:
         current_app.logger.error(f"获取列名映射示例失败: {str(e)}")
-        return jsonify({'error': '获取示例失败'}), 500
+        return safe_jsonify({'error': '获取示例失败'}), 500
 
 @spec_bp.route('/api/upload_for_mapping', methods=['POST'])
 def upload_for_mapping():
     """上传文件用于列映射预览和确认"""
     try:
         if 'file' not in request.files:
-            return jsonify({
+            return safe_jsonify({
                 'error': '未选择文件',
                 'error_code': 'NO_FILE_SELECTED',
                 'message': '请选择一个Excel文件上传'
@@ -868,7 +1213,7 @@ def upload_for_mapping():
         
         # 检查文件名是否为空
         if file.filename == '':
-            return jsonify({
+            return safe_jsonify({
                 'error': '文件名为空',
                 'error_code': 'EMPTY_FILENAME',
                 'message': '请选择一个有效的文件'
@@ -876,7 +1221,7 @@ def upload_for_mapping():
         
         # 检查文件格式
         if not spec_manager.allowed_file(file.filename):
-            return jsonify({
+            return safe_jsonify({
                 'error': '文件格式不支持，请上传Excel文件(.xlsx或.xls)',
                 'error_code': 'INVALID_FILE_FORMAT',
                 'message': '只支持.xlsx或.xls格式的Excel文件'
@@ -900,7 +1245,7 @@ def upload_for_mapping():
             
             if df.empty:
                 os.remove(file_path)
-                return jsonify({
+                return safe_jsonify({
                     'error': 'Excel文件为空或格式不正确',
                     'error_code': 'EMPTY_EXCEL_FILE',
                     'message': '上传的Excel文件不包含任何数据，请检查文件内容'
@@ -937,14 +1282,14 @@ def upload_for_mapping():
             # 添加列名映射配置信息
             response['column_mapping_info'] = spec_manager.get_column_mapping_info()
             
-            return jsonify(response), 200
+            return safe_jsonify(response), 200
             
         except Exception as e:
             # 如果读取失败，删除临时文件
             if os.path.exists(file_path):
                 os.remove(file_path)
                 
-            return jsonify({
+            return safe_jsonify({
                 'error': f'Excel文件处理失败: {str(e)}',
                 'error_code': 'EXCEL_PROCESSING_ERROR',
                 'message': '无法处理Excel文件，请检查文件格式是否正确',
@@ -953,7 +1298,7 @@ def upload_for_mapping():
             
     except Exception as e:
         current_app.logger.error(f"上传文件用于映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'error': f'上传失败: {str(e)}',
             'error_code': 'UPLOAD_FAILED',
             'message': '文件上传过程中发生错误',
@@ -965,7 +1310,7 @@ def validate_mapping():
     """验证列映射"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
                 'message': '请确保请求体是有效的JSON格式'
@@ -974,7 +1319,7 @@ def validate_mapping():
         data = request.get_json()
         
         if 'file_id' not in data:
-            return jsonify({
+            return safe_jsonify({
                 'error': '缺少file_id参数',
                 'error_code': 'MISSING_FILE_ID',
                 'message': '请提供file_id参数以识别要验证的文件'
@@ -988,7 +1333,7 @@ def validate_mapping():
         file_path = os.path.join(temp_dir, f"{file_id}.xlsx")
         
         if not os.path.exists(file_path):
-            return jsonify({
+            return safe_jsonify({
                 'error': '找不到上传的文件',
                 'error_code': 'FILE_NOT_FOUND',
                 'message': f'找不到ID为{file_id}的文件，可能已过期或未上传'
@@ -1019,7 +1364,7 @@ def validate_mapping():
                 # 生成修改建议
                 correction_suggestions = spec_manager.suggest_corrections(df, validation_result)
                 
-                return jsonify({
+                return safe_jsonify({
                     'valid': False,
                     'error': validation_result['error'],
                     'error_code': 'CUSTOM_MAPPING_VALIDATION_FAILED',
@@ -1044,7 +1389,7 @@ def validate_mapping():
                 result['has_warnings'] = True
                 result['data_errors'] = validation_result.get('data_errors', {})
                 
-            return jsonify(result), 200
+            return safe_jsonify(result), 200
         else:
             # 使用自动映射
             mapping_result = spec_manager.map_columns(df)
@@ -1069,7 +1414,7 @@ def validate_mapping():
                             'suggestions': column_suggestions
                         }
                 
-                return jsonify({
+                return safe_jsonify({
                     'valid': False, 
                     'error': error_msg,
                     'error_code': 'AUTO_MAPPING_FAILED',
@@ -1091,7 +1436,7 @@ def validate_mapping():
                 # 生成修改建议
                 correction_suggestions = spec_manager.suggest_corrections(df, validation_result)
                 
-                return jsonify({
+                return safe_jsonify({
                     'valid': False,
                     'error': validation_result['error'],
                     'error_code': 'AUTO_MAPPING_VALIDATION_FAILED',
@@ -1116,11 +1461,11 @@ def validate_mapping():
                 result['has_warnings'] = True
                 result['data_errors'] = validation_result.get('data_errors', {})
                 
-            return jsonify(result), 200
+            return safe_jsonify(result), 200
             
     except Exception as e:
         current_app.logger.error(f"验证列映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'error': f'验证失败: {str(e)}',
             'error_code': 'MAPPING_VALIDATION_ERROR',
             'message': '验证列映射时发生错误',
@@ -1132,7 +1477,7 @@ def preview_mapping():
     """预览列映射结果"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
                 'message': '请确保请求体是有效的JSON格式'
@@ -1141,7 +1486,7 @@ def preview_mapping():
         data = request.get_json()
         
         if 'file_id' not in data:
-            return jsonify({
+            return safe_jsonify({
                 'error': '缺少file_id参数',
                 'error_code': 'MISSING_FILE_ID',
                 'message': '请提供file_id参数以识别要预览的文件'
@@ -1155,7 +1500,7 @@ def preview_mapping():
         file_path = os.path.join(temp_dir, f"{file_id}.xlsx")
         
         if not os.path.exists(file_path):
-            return jsonify({
+            return safe_jsonify({
                 'error': '找不到上传的文件',
                 'error_code': 'FILE_NOT_FOUND',
                 'message': f'找不到ID为{file_id}的文件，可能已过期或未上传'
@@ -1204,7 +1549,7 @@ def preview_mapping():
                 'total_rows': len(df)
             }
             
-            return jsonify(response), 200
+            return safe_jsonify(response), 200
             
         else:
             # 使用自动映射
@@ -1258,11 +1603,11 @@ def preview_mapping():
                 
                 response['suggestions'] = structured_suggestions
             
-            return jsonify(response), 200
+            return safe_jsonify(response), 200
             
     except Exception as e:
         current_app.logger.error(f"预览列映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'error': f'预览失败: {str(e)}',
             'error_code': 'MAPPING_PREVIEW_ERROR',
             'message': '预览列映射时发生错误',
@@ -1274,7 +1619,7 @@ def confirm_mapping():
     """确认列映射并上传规格表"""
     try:
         if not request.is_json:
-            return jsonify({
+            return safe_jsonify({
                 'error': '请求必须是JSON格式',
                 'error_code': 'INVALID_REQUEST_FORMAT',
                 'message': '请确保请求体是有效的JSON格式'
@@ -1283,7 +1628,7 @@ def confirm_mapping():
         data = request.get_json()
         
         if 'file_id' not in data:
-            return jsonify({
+            return safe_jsonify({
                 'error': '缺少file_id参数',
                 'error_code': 'MISSING_FILE_ID',
                 'message': '请提供file_id参数以识别要确认的文件'
@@ -1297,7 +1642,7 @@ def confirm_mapping():
         file_path = os.path.join(temp_dir, f"{file_id}.xlsx")
         
         if not os.path.exists(file_path):
-            return jsonify({
+            return safe_jsonify({
                 'error': '找不到上传的文件',
                 'error_code': 'FILE_NOT_FOUND',
                 'message': f'找不到ID为{file_id}的文件，可能已过期或未上传'
@@ -1327,7 +1672,7 @@ def confirm_mapping():
             
             # 如果验证失败，返回错误信息
             if not validation_result['valid']:
-                return jsonify({
+                return safe_jsonify({
                     'valid': False,
                     'error': validation_result['error'],
                     'error_code': 'CUSTOM_MAPPING_VALIDATION_FAILED',
@@ -1345,6 +1690,7 @@ def confirm_mapping():
             # 保存映射后的DataFrame
             spec_file_path = os.path.join(spec_manager.specs_dir, f"{spec_id}.xlsx")
             mapped_df.to_excel(spec_file_path, index=False)
+            comparator.index_spec(spec_file_path)
             
             # 创建元数据文件
             metadata = {
@@ -1362,6 +1708,9 @@ def confirm_mapping():
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
             
+            # 规格表文件已更新，丢弃旧的缓存
+            get_spec_cache().invalidate(spec_id)
+            
             # 删除临时文件
             try:
                 os.remove(file_path)
@@ -1369,7 +1718,7 @@ def confirm_mapping():
                 pass
             
             # 返回成功响应
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': '规格表上传成功',
                 'spec_id': spec_id,
@@ -1386,7 +1735,7 @@ def confirm_mapping():
             
             # 如果映射失败，返回错误信息
             if not mapping_result.success:
-                return jsonify({
+                return safe_jsonify({
                     'success': False,
                     'error': f'自动映射失败，缺少必需的列: {", ".join(mapping_result.missing_required)}',
                     'error_code': 'AUTO_MAPPING_FAILED',
@@ -1402,7 +1751,7 @@ def confirm_mapping():
             
             # 如果验证失败，返回错误信息
             if not validation_result['valid']:
-                return jsonify({
+                return safe_jsonify({
                     'success': False,
                     'error': validation_result['error'],
                     'error_code': 'AUTO_MAPPING_VALIDATION_FAILED',
@@ -1420,6 +1769,7 @@ def confirm_mapping():
             # 保存映射后的DataFrame
             spec_file_path = os.path.join(spec_manager.specs_dir, f"{spec_id}.xlsx")
             mapped_df.to_excel(spec_file_path, index=False)
+            comparator.index_spec(spec_file_path)
             
             # 创建元数据文件
             metadata = {
@@ -1437,6 +1787,9 @@ def confirm_mapping():
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
             
+            # 规格表文件已更新，丢弃旧的缓存
+            get_spec_cache().invalidate(spec_id)
+            
             # 删除临时文件
             try:
                 os.remove(file_path)
@@ -1444,7 +1797,7 @@ def confirm_mapping():
                 pass
             
             # 返回成功响应
-            return jsonify({
+            return safe_jsonify({
                 'success': True,
                 'message': '规格表上传成功',
                 'spec_id': spec_id,
@@ -1457,7 +1810,7 @@ def confirm_mapping():
             
     except Exception as e:
         current_app.logger.error(f"确认列映射失败: {str(e)}")
-        return jsonify({
+        return safe_jsonify({
             'success': False,
             'error': f'确认失败: {str(e)}',
             'error_code': 'MAPPING_CONFIRMATION_ERROR',
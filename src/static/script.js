@@ -536,7 +536,7 @@ async function previewOrder(fileId) {
 async function loadSheetData(fileId, sheetName) {
     try {
         showLoading();
-        const response = await fetch(`/api/pdf/sheet_data/${fileId}?sheet=${encodeURIComponent(sheetName)}`);
+        const response = await fetch(`/api/pdf/sheet_data/${fileId}?sheet=${encodeURIComponent(sheetName)}&layout=columnar`);
         const result = await response.json();
 
         if (response.ok) {
@@ -553,8 +553,41 @@ async function loadSheetData(fileId, sheetName) {
     }
 }
 
+// 将列式数据（每列一个数组）转换为对象数组
+function columnarToRecords(columns, columnData) {
+    const rowCount = columnData.length > 0 ? columnData[0].length : 0;
+    const records = new Array(rowCount);
+    for (let i = 0; i < rowCount; i++) {
+        const row = {};
+        columns.forEach((col, j) => {
+            row[col] = columnData[j][i];
+        });
+        records[i] = row;
+    }
+    return records;
+}
+
+// 将列式数据（每列一个数组）转换为二维行数组
+function columnarToRows(columnData) {
+    const rowCount = columnData.length > 0 ? columnData[0].length : 0;
+    const rows = new Array(rowCount);
+    for (let i = 0; i < rowCount; i++) {
+        rows[i] = columnData.map(column => column[i]);
+    }
+    return rows;
+}
+
 // 格式化工作表数据
 function formatSheetData(result) {
+    // 列式布局（layout=columnar）：列名只出现一次，data为每列一个数组
+    if (result.layout === 'columnar') {
+        const columns = result.columns || [];
+        return {
+            columns: columns,
+            data: columnarToRecords(columns, result.data || [])
+        };
+    }
+
     if (result.data && Array.isArray(result.data) && result.data.length > 0) {
         // 如果数据是对象数组格式，转换为displayTable期望的格式
         if (typeof result.data[0] === 'object') {
@@ -655,7 +688,7 @@ async function loadPreview() {
     if (!currentFileId) return;
 
     try {
-        const response = await fetch(`/api/pdf/preview/${currentFileId}`);
+        const response = await fetch(`/api/pdf/preview/${currentFileId}?layout=columnar`);
         const result = await response.json();
 
         if (response.ok) {
@@ -886,11 +919,12 @@ async function loadResultPreview() {
     if (!currentResultFileId) return;
 
     try {
-        const response = await fetch(`/api/preview_comparison/${currentResultFileId}`);
+        const response = await fetch(`/api/preview_comparison/${currentResultFileId}?layout=columnar`);
         const result = await response.json();
 
         if (response.ok) {
-            displayTable(result.data, result.columns, elements.resultTableContainer);
+            const formattedData = formatSheetData(result);
+            displayTable(formattedData.data, formattedData.columns, elements.resultTableContainer);
         } else {
             throw new Error(result.error || '预览失败');
         }
@@ -1096,7 +1130,7 @@ async function previewSpec(specId) {
     try {
         showLoading();
 
-        const response = await fetch(`/api/preview_spec/${specId}`);
+        const response = await fetch(`/api/preview_spec/${specId}?layout=columnar`);
         const result = await response.json();
 
         hideLoading();
@@ -1136,7 +1170,8 @@ async function previewSpec(specId) {
             modal.style.display = 'block';
 
             // 显示表格数据
-            displayTable(result.data, result.columns, document.getElementById('spec-preview-container'));
+            const formattedData = formatSheetData(result);
+            displayTable(formattedData.data, formattedData.columns, document.getElementById('spec-preview-container'));
 
             // 点击模态框外部关闭
             window.onclick = function (event) {
@@ -1418,11 +1453,14 @@ function displayMultiTablePreview(previewData, container) {
             accuracyPercent = Math.min(tableData.accuracy, 100).toFixed(1);
         }
 
+        // 列式布局先转换为二维行数组
+        const rows = tableData.layout === 'columnar' ? columnarToRows(tableData.data) : tableData.data;
+
         html += `<h4>表格 ${tableData.table_index} (页面 ${tableData.page}) - 准确率: ${accuracyPercent}%</h4>`;
-        html += `<p class="table-info">共 ${tableData.total_rows} 行 ${tableData.total_columns} 列，显示前 ${Math.min(tableData.data.length, 20)} 行</p>`;
+        html += `<p class="table-info">共 ${tableData.total_rows} 行 ${tableData.total_columns} 列，显示前 ${Math.min(rows.length, 20)} 行</p>`;
 
         // 格式化数据
-        const formattedData = formatPreviewData(tableData.data, tableData.columns);
+        const formattedData = formatPreviewData(rows, tableData.columns);
 
         // 生成表格HTML
         html += '<table class="preview-table"><thead><tr>';
@@ -1820,7 +1858,7 @@ async function batchPreviewFiles() {
 
     for (const fileId of selectedFiles) {
         try {
-            const response = await fetch(`/api/pdf/preview/${fileId}`);
+            const response = await fetch(`/api/pdf/preview/${fileId}?layout=columnar`);
             const result = await response.json();
 
             if (response.ok && result.preview_data) {
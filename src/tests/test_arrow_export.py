@@ -0,0 +1,160 @@
+"""
+测试Arrow IPC导出
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from datetime import date
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+from flask import Flask, request
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.arrow_export import HAS_PYARROW, ARROW_STREAM_MIMETYPE, wants_arrow
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    from src.utils.arrow_export import dataframe_to_arrow
+
+ARROW_HEADERS = {'Accept': ARROW_STREAM_MIMETYPE}
+
+
+class TestArrowNegotiation(unittest.TestCase):
+    """测试Accept头协商"""
+
+    def test_wants_arrow(self):
+        """测试只有Arrow优先时才输出Arrow"""
+        app = Flask(__name__)
+        cases = [
+            ({}, False),
+            (ARROW_HEADERS, True),
+            ({'Accept': 'application/json, application/vnd.apache.arrow.stream;q=0.5'}, False),
+            ({'Accept': 'application/x-ndjson'}, False)
+        ]
+        for headers, expected in cases:
+            with app.test_request_context(headers=headers):
+                self.assertEqual(wants_arrow(request), expected, headers)
+
+
+@unittest.skipUnless(HAS_PYARROW, '未安装pyarrow')
+class TestDataframeToArrow(unittest.TestCase):
+    """测试列类型转换"""
+
+    def test_typed_columns(self):
+        """测试数量、单价、金额、交货日期的类型"""
+        df = pd.DataFrame({
+            'ITEM': ['A', 'B', None],
+            'DELIVERY DATE': ['2024-03-01', '2024/03/02', '无'],
+            'QUANTITY': ['1,200', 3, None],
+            'PRICE': ['$1.50', '2', 'N/A'],
+            'AMOUNT': [1800.0, 6.0, np.nan],
+            'NOTE': [1, 'x', None]
+        })
+
+        table = dataframe_to_arrow(df, {'sheet_name': 'Order_Items'})
+
+        self.assertEqual(table.schema.field('QUANTITY').type, pa.int64())
+        self.assertEqual(table.schema.field('PRICE').type, pa.float64())
+        self.assertEqual(table.schema.field('AMOUNT').type, pa.float64())
+        self.assertEqual(table.schema.field('DELIVERY DATE').type, pa.date32())
+        self.assertEqual(table.schema.field('NOTE').type, pa.string())
+        self.assertEqual(table.column('QUANTITY').to_pylist(), [1200, 3, None])
+        self.assertEqual(table.column('PRICE').to_pylist(), [1.5, 2.0, None])
+        self.assertEqual(table.column('DELIVERY DATE').to_pylist(), [date(2024, 3, 1), date(2024, 3, 2), None])
+        self.assertEqual(table.column('NOTE').to_pylist(), ['1', 'x', None])
+        self.assertEqual(table.schema.metadata[b'sheet_name'], b'Order_Items')
+
+    def test_fractional_quantity(self):
+        """测试含小数的数量列输出为浮点数"""
+        table = dataframe_to_arrow(pd.DataFrame({'quantity': [1.5, 2]}))
+        self.assertEqual(table.schema.field('quantity').type, pa.float64())
+
+
+class TestArrowEndpoints(unittest.TestCase):
+    """测试sheet_data和preview_comparison的Arrow输出"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        pd.DataFrame({
+            'ITEM': [f'ITEM{i:03d}' for i in range(1200)],
+            'QUANTITY': list(range(1200)),
+            'PRICE': [float(i) for i in range(1200)]
+        }).to_excel(os.path.join(self.temp_dir, 'file-1.xlsx'), sheet_name='Order_Items', index=False)
+
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.app = Flask(__name__)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_pyarrow_missing(self):
+        """测试未安装pyarrow时返回406"""
+        with patch('src.routes.pdf_converter.HAS_PYARROW', False):
+            response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items', headers=ARROW_HEADERS)
+
+        self.assertEqual(response.status_code, 406)
+        self.assertIn('pyarrow', response.get_json()['error'])
+
+    @unittest.skipUnless(HAS_PYARROW, '未安装pyarrow')
+    def test_sheet_data_stream(self):
+        """测试工作表数据按record batch输出"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&offset=100',
+                                   headers=ARROW_HEADERS)
+
+        self.assertEqual(response.mimetype, ARROW_STREAM_MIMETYPE)
+        reader = pa.ipc.open_stream(response.get_data())
+        batches = list(reader)
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(table.num_rows, 1100)
+        self.assertEqual(table.schema.field('QUANTITY').type, pa.int64())
+        self.assertEqual(table.column('ITEM')[0].as_py(), 'ITEM100')
+        self.assertEqual(reader.schema.metadata[b'total_rows'], b'1200')
+
+    @unittest.skipUnless(HAS_PYARROW, '未安装pyarrow')
+    def test_comparison_stream(self):
+        """测试比对结果的Arrow输出"""
+        from src.utils.order_comparator import OrderSpecComparator
+        from src.routes.spec_routes import spec_bp
+        self.app.register_blueprint(spec_bp)
+
+        order_path = os.path.join(self.temp_dir, 'order.xlsx')
+        spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'B999'], 'unit_price': [10.0, 5.0], 'quantity': [2, 1], 'total_price': [20.0, 5.0]
+        }).to_excel(order_path, index=False)
+        pd.DataFrame({'item_id': ['A001'], 'standard_unit_price': [10.0]}).to_excel(spec_path, index=False)
+        result = OrderSpecComparator(output_dir=self.temp_dir).compare_orders(order_path, spec_path)
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        with patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager):
+            response = self.client.get(f"/api/preview_comparison/{result['result_file_id']}", headers=ARROW_HEADERS)
+
+        table = pa.ipc.open_stream(response.get_data()).read_all()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.schema.field('unit_price').type, pa.float64())
+        self.assertEqual(table.column('核对状态').to_pylist(), ['通过', '有问题'])
+        self.assertEqual(table.schema.metadata[b'error_rows'], b'1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+测试批量订单比对
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import order_comparator
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.comparison_results import load_comparison_summary
+from src.utils.spec_cache import get_spec_cache
+
+
+class BatchComparisonTestCase(unittest.TestCase):
+    """创建规格表和多个订单文件"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002'],
+            'size': ['M', 'L', ''],
+            'standard_unit_price': [10.0, 10.0, 5.0]
+        }).to_excel(self.spec_path, index=False)
+
+        self.orders = {
+            'order-1': pd.DataFrame({'item_id': ['A001', 'B002'], 'size': ['M', ''], 'unit_price': [10.0, 5.0]}),
+            'order-2': pd.DataFrame({'item_id': ['A001', 'C003', 'A001'], 'size': ['XL', '', 'L'],
+                                     'unit_price': [10.0, 1.0, 9.0]}),
+            'order-3': pd.DataFrame({'item_id': ['B002'], 'size': [''], 'unit_price': [5.0]})
+        }
+        self.order_files = {}
+        for order_file_id, df in self.orders.items():
+            path = os.path.join(self.temp_dir, f'{order_file_id}.xlsx')
+            df.to_excel(path, index=False)
+            self.order_files[order_file_id] = path
+
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+
+class TestCompareOrdersBatch(BatchComparisonTestCase):
+    """测试比对器的批量比对"""
+
+    def test_matches_single_comparison(self):
+        """测试每个订单的统计与单独比对一致，汇总为各订单之和"""
+        result = self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+
+        self.assertEqual([item['order_file_id'] for item in result['results']], list(self.order_files))
+        for item in result['results']:
+            single = self.comparator.compare_orders(self.order_files[item['order_file_id']], self.spec_path)
+            self.assertEqual(item['stats'], single['stats'])
+
+        stats = result['stats']
+        self.assertEqual((stats['total_orders'], stats['succeeded_orders'], stats['error_orders']), (3, 3, 1))
+        self.assertEqual((stats['total_records'], stats['error_records']), (6, 3))
+        self.assertEqual(stats['error_types']['SIZE_MISMATCH'], 1)
+        self.assertEqual(stats['error_types']['PRODUCT_NOT_FOUND'], 1)
+        self.assertEqual(stats['error_types']['PRICE_MISMATCH'], 1)
+
+    def test_spec_loaded_once(self):
+        """测试规格表只加载一次"""
+        with patch.object(OrderSpecComparator, 'load_spec_data', wraps=OrderSpecComparator.load_spec_data) as mock_load:
+            self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+
+        self.assertEqual(mock_load.call_count, 1)
+
+    def test_lazy_workbooks(self):
+        """测试默认不生成工作簿，render_workbook按摘要中的来源生成"""
+        result = self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+        result_file_id = result['results'][1]['result_file_id']
+        workbook_path = os.path.join(self.temp_dir, f'order_comparison_{result_file_id}.xlsx')
+
+        self.assertFalse(result['results'][1]['workbook_ready'])
+        self.assertFalse(os.path.exists(workbook_path))
+        self.assertEqual(load_comparison_summary(self.temp_dir, result_file_id)['stats'], result['results'][1]['stats'])
+
+        self.assertEqual(self.comparator.render_workbook(result_file_id), workbook_path)
+        df = pd.read_excel(workbook_path)
+        self.assertEqual(df['核对状态'].tolist(), ['有问题', '有问题', '有问题'])
+
+    def test_write_workbooks(self):
+        """测试write_workbooks时立即生成工作簿"""
+        result = self.comparator.compare_orders_batch(self.order_files, self.spec_path, write_workbooks=True)
+
+        for item in result['results']:
+            self.assertTrue(item['workbook_ready'])
+            self.assertTrue(os.path.exists(os.path.join(self.temp_dir, f"order_comparison_{item['result_file_id']}.xlsx")))
+        self.assertIsNone(load_comparison_summary(self.temp_dir, result['results'][0]['result_file_id']).get('source'))
+
+    def test_failed_order(self):
+        """测试单个订单失败不影响其它订单"""
+        with open(self.order_files['order-2'], 'wb') as f:
+            f.write(b'not a workbook')
+
+        result = self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+
+        self.assertIn('error', result['results'][1])
+        self.assertEqual((result['stats']['succeeded_orders'], result['stats']['failed_orders']), (2, 1))
+        self.assertEqual(result['stats']['total_records'], 3)
+
+    def test_worker_pool(self):
+        """测试多个线程的结果与逐个比对一致"""
+        serial = self.comparator.compare_orders_batch(self.order_files, self.spec_path, max_workers=1)
+        with patch.object(order_comparator, 'BATCH_MAX_WORKERS', 2):
+            with patch.object(OrderSpecComparator, 'load_spec_data') as mock_load:
+                pooled = self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+
+        mock_load.assert_not_called()
+        self.assertEqual(pooled['workers'], 2)
+        self.assertEqual([item['stats'] for item in pooled['results']], [item['stats'] for item in serial['results']])
+        self.assertEqual(pooled['stats'], serial['stats'])
+
+    def test_pool_reused(self):
+        """测试线程池只创建一次，之后的批量比对复用"""
+        with patch.object(order_comparator, 'BATCH_MAX_WORKERS', 2), \
+                patch.object(order_comparator, '_batch_executor', None), \
+                patch.object(order_comparator, 'ThreadPoolExecutor', wraps=ThreadPoolExecutor) as mock_pool:
+            for _ in range(3):
+                result = self.comparator.compare_orders_batch(self.order_files, self.spec_path)
+                self.assertEqual(result['stats']['succeeded_orders'], 3)
+            executor = order_comparator.get_batch_executor()
+
+        self.assertEqual(mock_pool.call_count, 1)
+        executor.shutdown()
+
+
+class TestBatchEndpoint(BatchComparisonTestCase):
+    """测试批量比对接口及延迟生成工作簿的下载"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        super().setUp()
+        from src.routes import spec_routes
+        self.app = Flask(__name__)
+        self.app.register_blueprint(spec_routes.spec_bp)
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        mock_path_manager.get_output_path.side_effect = lambda filename: os.path.join(self.temp_dir, filename)
+        self.patchers = [
+            patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager),
+            patch.object(spec_routes.spec_manager, 'get_spec_path', return_value=self.spec_path),
+            patch.object(spec_routes.comparator, 'output_dir', self.temp_dir)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        for patcher in self.patchers:
+            patcher.stop()
+        super().tearDown()
+
+    def test_batch_and_download(self):
+        """测试批量比对结果、缺失订单及下载时生成工作簿"""
+        response = self.client.post('/api/compare_orders/batch', json={
+            'order_file_ids': ['order-1', 'missing', 'order-2'],
+            'spec_id': 'spec-1'
+        })
+
+        self.assertEqual(response.status_code, 200, response.get_json())
+        data = response.get_json()
+        self.assertEqual([item['order_file_id'] for item in data['results']], ['order-1', 'missing', 'order-2'])
+        self.assertEqual(data['results'][1]['error'], '订单文件不存在')
+        self.assertEqual((data['stats']['total_orders'], data['stats']['failed_orders']), (3, 1))
+        self.assertEqual(data['stats']['error_records'], 3)
+        self.assertIn('比对摘要报告', data['summary'])
+
+        result_file_id = data['results'][2]['result_file_id']
+        response = self.client.get(f'/api/download_comparison/{result_file_id}')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, f'order_comparison_{result_file_id}.xlsx')))
+
+    def test_invalid_requests(self):
+        """测试参数错误"""
+        cases = [
+            {'spec_id': 'spec-1'},
+            {'order_file_ids': [], 'spec_id': 'spec-1'},
+            {'order_file_ids': 'order-1', 'spec_id': 'spec-1'},
+            {'order_file_ids': ['order-1'], 'spec_id': 'spec-1', 'max_workers': 0}
+        ]
+        for payload in cases:
+            self.assertEqual(self.client.post('/api/compare_orders/batch', json=payload).status_code, 400, payload)
+
+        self.assertEqual(self.client.get('/api/download_comparison/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
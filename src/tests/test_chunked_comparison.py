@@ -0,0 +1,144 @@
+"""
+测试分块比对
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+import pandas as pd
+from openpyxl import load_workbook
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import order_comparator
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.comparison_results import load_comparison_summary
+from src.utils.sheet_reader import iter_sheet_chunks
+from src.utils.spec_cache import get_spec_cache
+
+
+def order_frame(rows, offset=0):
+    items = ['A001', 'B002', 'X999', '', 'NA']
+    return pd.DataFrame({
+        'Item_ID': [items[(i + offset) % len(items)] for i in range(rows)],
+        'Size': [['M', 'L', 'XL'][(i + offset) % 3] for i in range(rows)],
+        'Unit_Price': [[10.0, 5.0, 9.0, None][(i + offset) % 4] for i in range(rows)],
+        'Quantity': [2] * rows,
+        'Total_Price': [[20.0, 10.0, 18.0][(i + offset) % 3] for i in range(rows)]
+    })
+
+
+class TestIterSheetChunks(unittest.TestCase):
+    """测试按块读取工作表"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'order.xlsx')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_chunks_match_read_excel(self):
+        """测试分块内容与read_excel一致：末尾空行不输出、中间空行保留、空表跳过、NA转换为None"""
+        df = pd.DataFrame({'a': ['x', None, 'NA', 'y', None], 'b': [1, None, 2, 3, None]})
+        with pd.ExcelWriter(self.path) as writer:
+            df.to_excel(writer, sheet_name='data', index=False)
+            pd.DataFrame({'a': []}).to_excel(writer, sheet_name='empty', index=False)
+
+        headers, chunks = iter_sheet_chunks(self.path, 2)
+        chunk_list = list(chunks)
+
+        self.assertEqual(headers, {'data': ['a', 'b']})
+        self.assertEqual([len(rows) for _, rows in chunk_list], [2, 2])
+        rows = [row for _, chunk in chunk_list for row in chunk]
+        self.assertEqual(rows, [('x', 1), (None, None), (None, 2), ('y', 3)])
+        self.assertEqual(len(pd.read_excel(self.path, sheet_name='data')), len(rows))
+
+
+class TestChunkedComparison(unittest.TestCase):
+    """测试分块比对与整体比对结果一致"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002'],
+            'size': ['M', 'L', 'M'],
+            'standard_unit_price': [10.0, 10.0, 5.0]
+        }).to_excel(spec_path, index=False)
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().clear()
+        self.spec_table = self.comparator.load_spec_table(spec_path)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+    def write_order(self, sheets):
+        path = os.path.join(self.temp_dir, 'order.xlsx')
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return path
+
+    def assert_same_result(self, order_path, chunk_rows):
+        full = self.comparator.compare_with_table(order_path, self.spec_table)
+        with patch.object(self.comparator, 'find_row_errors', wraps=self.comparator.find_row_errors) as mock_check:
+            chunked = self.comparator.compare_with_table(order_path, self.spec_table, chunk_rows=chunk_rows)
+
+        # 每次比对的行数不超过块大小
+        self.assertGreater(mock_check.call_count, 1)
+        self.assertTrue(all(len(call.args[0]) <= chunk_rows for call in mock_check.call_args_list))
+
+        self.assertEqual(chunked['stats'], full['stats'])
+        self.assertEqual(load_comparison_summary(self.temp_dir, chunked['result_file_id'])['preview'],
+                         load_comparison_summary(self.temp_dir, full['result_file_id'])['preview'])
+
+        full_wb = load_workbook(full['result_file_path'])
+        chunked_wb = load_workbook(chunked['result_file_path'])
+        self.assertEqual(chunked_wb.sheetnames, full_wb.sheetnames)
+        for sheet_name in full_wb.sheetnames:
+            full_rows = list(full_wb[sheet_name].iter_rows())
+            chunked_rows = list(chunked_wb[sheet_name].iter_rows())
+            self.assertEqual([[cell.value for cell in row] for row in chunked_rows],
+                             [[cell.value for cell in row] for row in full_rows])
+            self.assertEqual([[cell.fill.fgColor.rgb for cell in row] for row in chunked_rows[1:]],
+                             [[cell.fill.fgColor.rgb for cell in row] for row in full_rows[1:]])
+            # 分块写入不添加批注，内存不随问题行数增长
+            self.assertFalse(any(cell.comment for row in chunked_rows for cell in row))
+        return chunked
+
+    def test_single_sheet(self):
+        """测试单工作表"""
+        df = order_frame(45)
+        df.loc[[7, 8]] = None
+        result = self.assert_same_result(self.write_order({'Orders': df}), chunk_rows=10)
+        self.assertEqual(result['stats']['total_records'], 43)
+
+    def test_multi_sheet(self):
+        """测试列不同的多个工作表"""
+        second = order_frame(23, offset=1).drop(columns=['Size'])
+        second['Note'] = 'x'
+        self.assert_same_result(self.write_order({'Zeta': order_frame(31), 'Alpha': second}), chunk_rows=8)
+
+    def test_auto_chunked(self):
+        """测试超过行数阈值时自动分块"""
+        order_path = self.write_order({'Orders': order_frame(30)})
+        with patch.object(order_comparator, 'CHUNKED_COMPARE_MIN_ROWS', 10), \
+                patch.object(self.comparator, 'compare_chunked', wraps=self.comparator.compare_chunked) as mock_chunked:
+            result = self.comparator.compare_with_table(order_path, self.spec_table)
+
+        mock_chunked.assert_called_once()
+        self.assertEqual(result['stats']['total_records'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+测试列画像：按列内容及表头关键词推断列名
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.column_profile import (
+    PDF_HEADER_KEYWORDS, header_like_ratio, infer_fields_by_content, keyword_rows, match_column_alias,
+    match_header_fields, profile_columns
+)
+from src.utils.order_comparator import OrderSpecComparator
+from src.routes.pdf_converter import standardize_column_names
+
+
+class TestProfileColumns(unittest.TestCase):
+    """测试各列的内容特征"""
+
+    def test_features(self):
+        """测试数字、小数、编码及文本比例只统计前若干个非空值"""
+        df = pd.DataFrame({
+            0: ['SKU-12', 'A001', 'AB', None],
+            1: ['10.00', '1,200', 'x', None],
+            2: [7.0, 12.5, np.nan, 3],
+            3: [None, None, None, None]
+        })
+        profile = profile_columns(df, sample_size=3)
+
+        self.assertEqual(profile['count'].tolist(), [3, 3, 3, 0])
+        self.assertAlmostEqual(profile.loc[1, 'numeric_ratio'], 2 / 3)
+        self.assertAlmostEqual(profile.loc[1, 'decimal_ratio'], 1 / 3)
+        # 读取为浮点数的整数不算小数
+        self.assertAlmostEqual(profile.loc[2, 'decimal_ratio'], 1 / 3)
+        self.assertAlmostEqual(profile.loc[0, 'code_ratio'], 2 / 3)
+        self.assertAlmostEqual(profile.loc[0, 'text_ratio'], 2 / 3)
+        self.assertEqual(profile.loc[3, ['numeric_ratio', 'text_ratio']].tolist(), [0.0, 0.0])
+
+    def test_infer_fields(self):
+        """测试依列顺序推断字段，每个字段只分配一次"""
+        df = pd.DataFrame({
+            0: ['A-1001', 'B-2002', 'C-3003'],
+            1: ['全棉T恤', '羊毛衫', '衬衫'],
+            2: [12.5, 8.0, 10.0],
+            3: [2, 5, 1],
+            4: [3, 4, 6]
+        })
+        self.assertEqual(infer_fields_by_content(df), {0: 'item_id', 1: 'product_name', 2: 'unit_price', 3: 'quantity'})
+
+    def test_nan_text_is_not_numeric(self):
+        """测试文本nan不算数字"""
+        df = pd.DataFrame({0: ['nan', 'nan', 'n/a']})
+        self.assertEqual(profile_columns(df).loc[0, 'numeric_ratio'], 0.0)
+
+
+class TestHeaderKeywords(unittest.TestCase):
+    """测试表头关键词匹配"""
+
+    def test_order_header_fields(self):
+        """测试表头行的字段按优先顺序确定"""
+        rows = pd.DataFrame([['Order 1', None, None], ['Item No', 'Unit Price', 'Total Amount']])
+        self.assertEqual(keyword_rows(rows, ['item', 'price']).tolist(), [1])
+        self.assertEqual(match_header_fields(rows.iloc[[1]]), {0: 'item_id', 1: 'unit_price', 2: 'quantity'})
+
+    def test_header_like_ratio(self):
+        """测试各行像表头的单元格比例"""
+        df = pd.DataFrame([['ITEM', 'Description', None], ['A-1', 'shirt', '10'], [None, None, None]])
+        ratio = header_like_ratio(df, PDF_HEADER_KEYWORDS)
+        self.assertEqual(ratio.iloc[0], 1.0)
+        self.assertAlmostEqual(ratio.iloc[1], 1 / 3)
+        self.assertTrue(np.isnan(ratio.iloc[2]))
+
+    def test_column_alias(self):
+        """测试别名映射到标准列名"""
+        normalize = lambda name: str(name).strip().lower().replace('_', ' ')
+        self.assertEqual(match_column_alias('Unit_Price', normalize=normalize), 'PRICE')
+        self.assertIsNone(match_column_alias('remark', normalize=normalize))
+
+
+class TestOrderColumnInference(unittest.TestCase):
+    """测试订单比对使用列画像推断列名"""
+
+    def test_infer_columns_by_content(self):
+        """测试按列名返回推断结果"""
+        df = pd.DataFrame({'0': ['A-1001', 'B-2002'], '1': [12.5, 8.0], '2': [2, 5]})
+        self.assertEqual(OrderSpecComparator()._infer_columns_by_content(df),
+                         {'0': 'item_id', '1': 'unit_price', '2': 'quantity'})
+
+
+class TestPdfColumnInference(unittest.TestCase):
+    """测试PDF表格列名标准化使用列画像推断列名"""
+
+    def test_columns_inferred_by_content(self):
+        """测试没有表头且列数与标准格式不同时按内容推断，推断不出的列保留位置名"""
+        df = pd.DataFrame({
+            'col_0': ['A-1001', 'B-2002'],
+            'col_1': ['Cotton shirt', 'Wool sweater'],
+            'col_2': ['2', '5'],
+            'col_3': ['PCS', 'PCS'],
+            'col_4': ['12.50', '8.00'],
+            'col_5': ['25.00', '40.00']
+        })
+        self.assertEqual(standardize_column_names(df).columns.tolist(),
+                         ['ITEM', 'DESCRIPTION', 'QUANTITY', 'Column_3', 'PRICE', 'AMOUNT'])
+
+    def test_standard_layout_by_position(self):
+        """测试列数与标准格式相同或推断不出产品编号时仍按位置映射"""
+        standard = pd.DataFrame([['1', 'A-1001', 'shirt', '2024-01-01', 'PCS', '2', '12.50', '25.00']],
+                                columns=[f'col_{i}' for i in range(8)])
+        self.assertEqual(standardize_column_names(standard).columns.tolist()[:3],
+                         ['ITEM', 'EXTERNAL ITEM NUMBER', 'DESCRIPTION'])
+
+        no_code = pd.DataFrame({'col_0': ['shirt'], 'col_1': ['2'], 'col_2': ['12.50']})
+        self.assertEqual(standardize_column_names(no_code).columns.tolist(), ['ITEM', 'EXTERNAL ITEM NUMBER', 'DESCRIPTION'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+"""
+测试比对结果缓存
+"""
+
+import os
+import sys
+import glob
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.user import db
+from src.models.comparison_cache import CachedComparison, comparison_cache_key
+from src.utils.comparison_results import get_comparison_summary_path, get_comparison_rows_path
+from src.utils.spec_cache import get_spec_cache
+from src.utils.order_comparator import COMPARATOR_VERSION
+
+
+class TestComparisonCache(unittest.TestCase):
+    """测试compare_orders接口复用相同输入的比对结果"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        self.write_spec([10.0, 5.0])
+        for i in range(3):
+            pd.DataFrame({
+                'item_id': ['A001', 'B002'], 'unit_price': [10.0 + i, 5.0], 'quantity': [1, 2], 'total_price': [10.0, 9.0]
+            }).to_excel(os.path.join(self.temp_dir, f'order-{i}.xlsx'), index=False)
+
+        from src.routes import spec_routes
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.spec_routes = spec_routes
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+        self.app.register_blueprint(spec_routes.spec_bp)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.get_output_path.side_effect = lambda filename: os.path.join(self.temp_dir, filename)
+        self.patchers = [
+            patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager),
+            patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager),
+            patch.object(spec_routes.spec_manager, 'get_spec_path', return_value=self.spec_path),
+            patch.object(spec_routes.comparator, 'output_dir', self.temp_dir)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        for patcher in self.patchers:
+            patcher.stop()
+        get_spec_cache().clear()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def write_spec(self, prices):
+        pd.DataFrame({'item_id': ['A001', 'B002'], 'standard_unit_price': prices}).to_excel(self.spec_path, index=False)
+
+    def compare(self, order_file_id='order-0', **options):
+        response = self.client.post('/api/compare_orders', json={
+            'order_file_id': order_file_id, 'spec_id': 'spec-1', **options
+        })
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def result_summaries(self):
+        return glob.glob(os.path.join(self.temp_dir, 'order_comparison_*.json'))
+
+    def test_repeat_returns_cached_result(self):
+        """测试重复比对返回同一结果，不再重新比对"""
+        first = self.compare()
+        with patch.object(self.spec_routes.comparator, 'compare_orders') as mock_compare:
+            second = self.compare()
+
+        mock_compare.assert_not_called()
+        self.assertEqual(second['result_file_id'], first['result_file_id'])
+        self.assertEqual(second['stats'], first['stats'])
+        self.assertTrue(second['cached'])
+        self.assertNotIn('cached', first)
+        self.assertIn('比对摘要报告', second['summary'])
+        self.assertEqual(len(self.result_summaries()), 1)
+        self.assertEqual(CachedComparison.query.one().hits, 1)
+
+    def test_key_components(self):
+        """测试选项、规格表内容及比对器版本变化时重新比对，订单内容相同时命中"""
+        first = self.compare()['result_file_id']
+        self.assertNotEqual(self.compare(check_total_calc=False)['result_file_id'], first)
+
+        # 重新写入相同内容的订单（mtime变化）仍然命中
+        order_path = os.path.join(self.temp_dir, 'order-0.xlsx')
+        with open(order_path, 'rb') as f:
+            content = f.read()
+        with open(order_path, 'wb') as f:
+            f.write(content)
+        os.utime(order_path, ns=(0, 0))
+        self.assertEqual(self.compare()['result_file_id'], first)
+
+        with patch.object(self.spec_routes, 'COMPARATOR_VERSION', 999):
+            self.assertNotEqual(self.compare()['result_file_id'], first)
+
+        self.write_spec([11.0, 5.0])
+        self.assertNotEqual(self.compare()['result_file_id'], first)
+
+    def test_result_before_column_profile_ignored(self):
+        """测试列名推断规则变化前（比对器版本2）缓存的结果不再使用，按当前版本重新比对并缓存"""
+        with patch.object(self.spec_routes, 'COMPARATOR_VERSION', 2):
+            old = self.compare()['result_file_id']
+
+        with patch.object(self.spec_routes.comparator, 'compare_orders',
+                          wraps=self.spec_routes.comparator.compare_orders) as mock_compare:
+            current = self.compare()
+        mock_compare.assert_called_once()
+        self.assertNotEqual(current['result_file_id'], old)
+        self.assertNotIn('cached', current)
+        self.assertTrue(self.compare()['cached'])
+        self.assertEqual(CachedComparison.query.filter_by(comparator_version=COMPARATOR_VERSION).count(), 1)
+
+    def test_batch_uses_cached_results(self):
+        """测试批量比对中已比对过的订单使用缓存的结果，只比对其余订单并缓存其结果"""
+        single = self.compare('order-0')['result_file_id']
+        with patch.object(self.spec_routes.comparator, 'compare_orders_batch',
+                          wraps=self.spec_routes.comparator.compare_orders_batch) as mock_batch:
+            response = self.client.post('/api/compare_orders/batch', json={
+                'order_file_ids': ['order-0', 'order-1'], 'spec_id': 'spec-1'
+            })
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(list(mock_batch.call_args[0][0]), ['order-1'])
+
+        results = response.get_json()['results']
+        self.assertEqual([item['order_file_id'] for item in results], ['order-0', 'order-1'])
+        self.assertEqual((results[0]['result_file_id'], results[0]['cached']), (single, True))
+        self.assertNotIn('cached', results[1])
+        self.assertEqual(self.compare('order-1')['result_file_id'], results[1]['result_file_id'])
+
+    def test_eviction(self):
+        """测试超过保留数量时删除最久未使用的结果"""
+        with patch.object(self.spec_routes, 'COMPARISON_CACHE_MAX_ENTRIES', 2):
+            ids = [self.compare(f'order-{i}')['result_file_id'] for i in range(2)]
+            self.compare('order-0')
+            ids.append(self.compare('order-2')['result_file_id'])
+
+        self.assertEqual(CachedComparison.query.count(), 2)
+        self.assertFalse(os.path.exists(get_comparison_summary_path(self.temp_dir, ids[1])))
+        self.assertFalse(os.path.exists(get_comparison_rows_path(self.temp_dir, ids[1])))
+        self.assertEqual(len(self.result_summaries()), 2)
+        self.assertEqual(self.compare('order-0')['result_file_id'], ids[0])
+
+    def test_stale_entry(self):
+        """测试结果文件已被删除时重新比对"""
+        first = self.compare()['result_file_id']
+        os.remove(get_comparison_summary_path(self.temp_dir, first))
+
+        second = self.compare()
+        self.assertNotEqual(second['result_file_id'], first)
+        self.assertNotIn('cached', second)
+        self.assertEqual(CachedComparison.query.one().result_file_id, second['result_file_id'])
+
+    def write_order(self, order_file_id, item_ids):
+        pd.DataFrame({
+            'item_id': item_ids, 'unit_price': [10.0] * len(item_ids), 'quantity': [1] * len(item_ids),
+            'total_price': [10.0] * len(item_ids)
+        }).to_excel(os.path.join(self.temp_dir, f'{order_file_id}.xlsx'), index=False)
+
+    def test_source_order_changed(self):
+        """测试相同内容的订单命中延迟生成工作簿的结果后，来源订单被删除或改为其它内容时不再复用"""
+        shutil.copyfile(os.path.join(self.temp_dir, 'order-0.xlsx'), os.path.join(self.temp_dir, 'order-3.xlsx'))
+        first = self.compare('order-0')['result_file_id']
+        self.assertEqual(self.compare('order-3')['result_file_id'], first)
+
+        self.write_order('order-0', ['ZZZ9'])
+        second = self.compare('order-3')
+        self.assertNotEqual(second['result_file_id'], first)
+        self.assertNotIn('cached', second)
+
+        os.remove(os.path.join(self.temp_dir, 'order-0.xlsx'))
+        self.assertTrue(self.compare('order-3')['cached'])
+        shutil.copyfile(os.path.join(self.temp_dir, 'order-3.xlsx'), os.path.join(self.temp_dir, 'order-4.xlsx'))
+        os.remove(os.path.join(self.temp_dir, 'order-3.xlsx'))
+        third = self.compare('order-4')
+        self.assertNotIn('cached', third)
+
+        response = self.client.get(f"/api/download_comparison/{third['result_file_id']}")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        workbook = pd.read_excel(os.path.join(self.temp_dir, f"order_comparison_{third['result_file_id']}.xlsx"))
+        self.assertEqual(workbook['item_id'].tolist(), ['A001', 'B002'])
+
+    def test_delete_converted_drops_results(self):
+        """测试删除订单时删除按该订单生成工作簿的结果，已生成工作簿的结果保留"""
+        lazy = self.compare('order-0')['result_file_id']
+        ready = self.compare('order-1')['result_file_id']
+        self.client.get(f'/api/download_comparison/{ready}').close()
+
+        for order_file_id in ('order-0', 'order-1'):
+            response = self.client.delete(f'/api/pdf/delete_converted/{order_file_id}')
+            self.assertEqual(response.status_code, 200, response.get_json())
+
+        self.assertEqual([entry.result_file_id for entry in CachedComparison.query.all()], [ready])
+        self.assertFalse(os.path.exists(get_comparison_summary_path(self.temp_dir, lazy)))
+        self.assertEqual(self.client.get(f'/api/download_comparison/{ready}').status_code, 200)
+
+    def test_reconversion_drops_results(self):
+        """测试重新转换为其它内容时删除按旧内容缓存的结果"""
+        with open(os.path.join(self.temp_dir, 'order-9.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+
+        def convert(item_ids):
+            extracted = [{'table_index': 1, 'page': 1, 'accuracy': 0.9, 'data': pd.DataFrame({
+                'item_id': item_ids, 'unit_price': [10.0] * len(item_ids), 'quantity': [1] * len(item_ids)
+            })}]
+            with patch('src.routes.pdf_converter.extract_order_tables',
+                       return_value=(extracted, None, 'camelot', None)):
+                response = self.client.post('/api/pdf/convert/order-9')
+            self.assertEqual(response.status_code, 200, response.get_json())
+
+        convert(['A001', 'B002'])
+        first = self.compare('order-9')['result_file_id']
+        self.assertEqual(CachedComparison.query.count(), 1)
+
+        convert(['ZZZ9'])
+        self.assertEqual(CachedComparison.query.count(), 0)
+        self.assertFalse(os.path.exists(get_comparison_summary_path(self.temp_dir, first)))
+        self.assertNotEqual(self.compare('order-9')['result_file_id'], first)
+
+    def test_cache_key(self):
+        """测试缓存键由全部组成部分决定"""
+        key = comparison_cache_key('o', 's', True, 1)
+        self.assertEqual(len(key), 64)
+        self.assertNotEqual(key, comparison_cache_key('o', 's', False, 1))
+        self.assertNotEqual(key, comparison_cache_key('o', 's', True, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+测试向量化比对引擎
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.spec_cache import SpecTable
+
+
+class TestCheckRows(unittest.TestCase):
+    """测试每种比对结果的核对状态、错误详情和统计"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        self.spec = SpecTable.from_frame(pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002', 'C003'],
+            'size': ['M', 'L', '', 'S'],
+            'color': ['红', '蓝', '白', '黑'],
+            'standard_unit_price': [10.0, 12.0, 5.5, float('nan')]
+        }))
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_all_branches(self):
+        """测试与逐行比对相同的错误详情"""
+        order_df = pd.DataFrame({
+            'item_id': ['A001', '', 'A001', 'Z999', 'A001', 'A001', 'A001', 'A001', 'B002', 'C003', 'A001'],
+            'size':    ['M',    'M', 'M',   'M',    'XL',   'M',    'XL',   'L',    '',     'S',    ''],
+            'color':   ['红',   '红', '红',  '红',   '红',   '绿',   '绿',   '红',   '白',   '黑',   '蓝'],
+            'unit_price': [10.0, 10.0, 0.0, 10.0, 10.0, 10.0, 10.0, 10.0, 6.0, 99.0, 10.0],
+            'quantity': [2.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 3.0, 1.0, 1.0],
+            'total_price': [20.0, 10.0, 0.0, 10.0, 10.0, 10.0, 10.0, 10.0, 10.0, 5.0, 10.0]
+        })
+
+        has_error, details, stats = self.comparator.check_rows(order_df, self.spec)
+
+        self.assertEqual(list(details), [
+            '',
+            '产品ID为空',
+            '单价无效',
+            '产品ID不存在',
+            '尺寸不符',
+            '颜色不符',
+            '尺寸不符; 颜色不符',
+            '',
+            '单价不符 (标准价格: 5.5); 总价计算错误 (应为: 18.00)',
+            '总价计算错误 (应为: 99.00)',
+            ''
+        ])
+        self.assertEqual(list(has_error), [d != '' for d in details])
+        self.assertEqual(stats['error_records'], 8)
+        self.assertEqual(stats['error_types'], {
+            'PRODUCT_NOT_FOUND': 1,
+            'SIZE_MISMATCH': 2,
+            'COLOR_MISMATCH': 2,
+            'PRICE_MISMATCH': 1,
+            'TOTAL_CALC_ERROR': 2
+        })
+
+    def test_fallback_price_columns(self):
+        """测试unit_price为0时使用其它价格列，且无法转换的值被跳过"""
+        order_df = pd.DataFrame({
+            'item_id': ['A001', 'A001', 'A001'],
+            'size': ['M', 'M', 'M'],
+            'color': ['红', '红', '红'],
+            'unit_price': [0.0, 0.0, 0.0],
+            'price': ['11', 'abc', None],
+            '单价': [None, 10.0, None]
+        })
+
+        _, details, _ = self.comparator.check_rows(order_df, self.spec, check_total_calc=False)
+
+        self.assertEqual(list(details), ['单价不符 (标准价格: 10.0)', '', '单价无效'])
+
+    def test_compare_orders_writes_columns(self):
+        """测试比对结果写入核对状态和错误详情"""
+        order_path = os.path.join(self.temp_dir, 'order.xlsx')
+        spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({'item_id': ['A001', 'Z999'], 'unit_price': [10.0, 1.0]}).to_excel(order_path, index=False)
+        pd.DataFrame({'item_id': ['A001'], 'standard_unit_price': [10.0]}).to_excel(spec_path, index=False)
+
+        result = self.comparator.compare_orders(order_path, spec_path)
+        result_df = pd.read_excel(result['result_file_path'])
+
+        self.assertEqual(list(result_df['核对状态']), ['通过', '有问题'])
+        self.assertEqual(result_df['错误详情'].iloc[1], '产品ID不存在')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+测试比对结果摘要的保存与读取
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.comparison_results import (
+    load_comparison_summary, get_comparison_summary_path, build_comparison_preview
+)
+
+
+class ComparisonTestCase(unittest.TestCase):
+    """创建订单和规格表文件"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.order_path = os.path.join(self.temp_dir, 'order.xlsx')
+        self.spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+
+        pd.DataFrame({
+            'item_id': ['A001', 'A002', 'B999', 'A001'],
+            'size': ['M', 'L', 'M', 'XL'],
+            'color': ['红', '蓝', '红', '红'],
+            'unit_price': [10.0, 25.0, 5.0, 10.0],
+            'quantity': [2, 1, 1, 1],
+            'total_price': [20.0, 25.0, 5.0, 10.0]
+        }).to_excel(self.order_path, index=False)
+
+        pd.DataFrame({
+            'item_id': ['A001', 'A002'],
+            'size': ['M', 'L'],
+            'color': ['红', '蓝'],
+            'standard_unit_price': [10.0, 20.0]
+        }).to_excel(self.spec_path, index=False)
+
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+
+class TestComparisonSummary(ComparisonTestCase):
+    """测试compare_orders保存摘要"""
+
+    def test_summary_saved_with_result(self):
+        """测试比对后摘要与统计结果一致"""
+        result = self.comparator.compare_orders(self.order_path, self.spec_path)
+
+        summary = load_comparison_summary(self.temp_dir, result['result_file_id'])
+        self.assertIsNotNone(summary)
+        self.assertEqual(summary['stats'], result['stats'])
+        self.assertEqual(summary['stats']['error_records'], 3)
+        self.assertTrue(summary['check_total_calc'])
+
+        # 预览与重新读取工作簿的结果一致
+        workbook_df = pd.read_excel(result['result_file_path'])
+        self.assertEqual(summary['preview']['columns'], list(workbook_df.columns))
+        self.assertEqual(len(summary['preview']['data']), len(workbook_df))
+        self.assertIsNone(summary['preview']['data'][0]['错误详情'])
+
+    def test_multi_sheet_preview(self):
+        """测试多工作表结果的预览只包含第一个工作表"""
+        df = pd.DataFrame({
+            'item_id': ['A', 'B', 'C'],
+            '核对状态': ['通过', '有问题', '通过'],
+            '工作表': ['Sheet_B', 'Sheet_A', 'Sheet_B'],
+            '表格序号': [1, 2, 1]
+        })
+        preview = build_comparison_preview(df)
+
+        self.assertEqual(preview['columns'], ['item_id', '核对状态'])
+        self.assertEqual([row['item_id'] for row in preview['data']], ['B'])
+
+
+class TestComparisonEndpoints(ComparisonTestCase):
+    """测试预览和统计接口"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        super().setUp()
+        from src.routes.spec_routes import spec_bp
+        self.app = Flask(__name__)
+        self.app.register_blueprint(spec_bp)
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        super().tearDown()
+
+    def test_stats_without_workbook_read(self):
+        """测试统计和预览接口只读取摘要"""
+        result = self.comparator.compare_orders(self.order_path, self.spec_path)
+        result_id = result['result_file_id']
+
+        with patch('pandas.read_excel') as mock_read_excel:
+            stats_response = self.client.get(f'/api/comparison/{result_id}/stats')
+            preview_response = self.client.get(f'/api/preview_comparison/{result_id}')
+        mock_read_excel.assert_not_called()
+
+        self.assertEqual(stats_response.status_code, 200)
+        self.assertEqual(stats_response.get_json()['stats'], result['stats'])
+
+        preview = preview_response.get_json()
+        self.assertEqual(preview['total_rows'], 4)
+        self.assertEqual(preview['error_rows'], 3)
+        self.assertEqual(preview['preview_rows'], 4)
+
+    def test_preview_columnar_layout(self):
+        """测试比对结果预览的列式布局"""
+        result = self.comparator.compare_orders(self.order_path, self.spec_path)
+
+        data = self.client.get(f"/api/preview_comparison/{result['result_file_id']}?layout=columnar").get_json()
+
+        self.assertEqual(data['layout'], 'columnar')
+        self.assertEqual(len(data['data']), len(data['columns']))
+        self.assertEqual(data['data'][data['columns'].index('核对状态')], ['通过', '有问题', '有问题', '有问题'])
+
+    def test_ndjson_stream(self):
+        """测试比对结果的NDJSON流式输出"""
+        result = self.comparator.compare_orders(self.order_path, self.spec_path)
+
+        response = self.client.get(f"/api/preview_comparison/{result['result_file_id']}",
+                                   headers={'Accept': 'application/x-ndjson'})
+
+        lines = [json.loads(line) for line in response.get_data().splitlines()]
+        self.assertEqual(lines[0], {'type': 'stats', 'total_rows': 4, 'error_rows': 3})
+        self.assertEqual(lines[1]['type'], 'header')
+        self.assertIn('核对状态', lines[1]['columns'])
+        self.assertEqual(sum(len(line['rows']) for line in lines if line['type'] == 'rows'), 4)
+        self.assertEqual(lines[-1]['type'], 'end')
+
+    def test_backfill_for_old_results(self):
+        """测试旧结果没有摘要时从工作簿生成"""
+        result = self.comparator.compare_orders(self.order_path, self.spec_path)
+        result_id = result['result_file_id']
+        os.remove(get_comparison_summary_path(self.temp_dir, result_id))
+
+        response = self.client.get(f'/api/comparison/{result_id}/stats')
+        self.assertEqual(response.get_json()['stats'], result['stats'])
+        self.assertIsNotNone(load_comparison_summary(self.temp_dir, result_id))
+
+    def test_missing_result(self):
+        """测试比对结果不存在"""
+        self.assertEqual(self.client.get('/api/comparison/unknown/stats').status_code, 404)
+        self.assertEqual(self.client.get('/api/preview_comparison/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+测试转换产物的保存与复用
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import conversion_artifacts
+from src.utils.conversion_artifacts import (
+    save_preview_artifact, load_preview_artifact, remove_artifacts, get_preview_artifact_path,
+    write_json_atomic
+)
+
+
+def make_extracted_data(rows=30):
+    """创建模拟的提取结果"""
+    df = pd.DataFrame({
+        'ITEM': [f'ITEM{i:03d}' for i in range(rows)],
+        'QUANTITY': np.arange(rows, dtype=np.int64),
+        'PRICE': [np.nan if i == 0 else float(i) for i in range(rows)]
+    })
+    return [{'table_index': 1, 'page': 1, 'data': df, 'accuracy': 0.95}]
+
+
+class TestPreviewArtifact(unittest.TestCase):
+    """测试预览产物"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_and_load(self):
+        """测试保存并读取预览产物"""
+        self.assertTrue(save_preview_artifact(self.temp_dir, 'f1', make_extracted_data(), 'camelot'))
+
+        artifact = load_preview_artifact(self.temp_dir, 'f1')
+        self.assertIsNotNone(artifact)
+        self.assertEqual(artifact['tables_count'], 1)
+        self.assertEqual(artifact['method'], 'camelot')
+
+        table = artifact['preview_data'][0]
+        self.assertEqual(table['total_rows'], 30)
+        self.assertEqual(len(table['data']), 20)
+        self.assertIsNone(table['data'][0][2])  # NaN被转换为null
+        self.assertEqual(table['data'][1][1], 1)
+
+    def test_missing_and_removed(self):
+        """测试产物不存在及删除"""
+        self.assertIsNone(load_preview_artifact(self.temp_dir, 'missing'))
+
+        save_preview_artifact(self.temp_dir, 'f2', make_extracted_data())
+        remove_artifacts(self.temp_dir, 'f2')
+        self.assertFalse(os.path.exists(get_preview_artifact_path(self.temp_dir, 'f2')))
+
+    def test_corrupted_artifact(self):
+        """测试损坏的产物被忽略"""
+        with open(get_preview_artifact_path(self.temp_dir, 'bad'), 'w') as f:
+            f.write('{not json')
+        self.assertIsNone(load_preview_artifact(self.temp_dir, 'bad'))
+
+
+class TestWriteJsonAtomic(unittest.TestCase):
+    """测试原子写入"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'f1.preview.json')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_concurrent_writers(self):
+        """测试写入过程中另一个写入者写同一文件时互不影响"""
+        dumps_json = conversion_artifacts.dumps_json
+
+        def dumps_with_other_writer(data):
+            if data['writer'] == 'outer':
+                write_json_atomic(self.path, {'writer': 'inner'})
+            return dumps_json(data)
+
+        with patch.object(conversion_artifacts, 'dumps_json', side_effect=dumps_with_other_writer):
+            write_json_atomic(self.path, {'writer': 'outer'})
+
+        self.assertEqual(self.read(), {'writer': 'outer'})
+        self.assertEqual(os.listdir(self.temp_dir), ['f1.preview.json'])
+
+    def test_failed_write_cleans_up(self):
+        """测试写入失败时删除临时文件并保留原有内容"""
+        write_json_atomic(self.path, {'writer': 'first'})
+        with patch.object(conversion_artifacts, 'dumps_json', side_effect=ValueError('bad data')):
+            with self.assertRaises(ValueError):
+                write_json_atomic(self.path, {'writer': 'second'})
+
+        self.assertEqual(self.read(), {'writer': 'first'})
+        self.assertEqual(os.listdir(self.temp_dir), ['f1.preview.json'])
+
+
+class TestPreviewEndpoint(unittest.TestCase):
+    """测试/api/pdf/preview复用转换产物"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.app = Flask(__name__)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_preview_uses_artifact(self):
+        """测试存在产物时不重新提取"""
+        save_preview_artifact(self.temp_dir, 'f1', make_extracted_data())
+
+        with patch('src.routes.pdf_converter.extract_order_tables') as mock_extract:
+            response = self.client.get('/api/pdf/preview/f1')
+
+        mock_extract.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['tables_count'], 1)
+        self.assertEqual(data['preview_data'][0]['total_rows'], 30)
+
+    def test_preview_columnar_layout(self):
+        """测试产物以列式布局返回"""
+        save_preview_artifact(self.temp_dir, 'f1', make_extracted_data(3))
+
+        response = self.client.get('/api/pdf/preview/f1?layout=columnar')
+
+        table = response.get_json()['preview_data'][0]
+        self.assertEqual(table['layout'], 'columnar')
+        self.assertEqual(table['data'], [['ITEM000', 'ITEM001', 'ITEM002'], [0, 1, 2], [None, 1.0, 2.0]])
+
+    def test_preview_falls_back_to_extraction(self):
+        """测试没有产物时回退到提取并保存产物"""
+        with open(os.path.join(self.temp_dir, 'f2.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+
+        with patch('src.routes.pdf_converter.extract_order_tables',
+                   return_value=(make_extracted_data(5), None, 'tabula', None)) as mock_extract:
+            response = self.client.get('/api/pdf/preview/f2')
+            self.assertEqual(response.status_code, 200)
+            self.client.get('/api/pdf/preview/f2')
+
+        self.assertEqual(mock_extract.call_count, 1)
+        self.assertIsNotNone(load_preview_artifact(self.temp_dir, 'f2'))
+
+    def test_preview_missing_file(self):
+        """测试文件不存在"""
+        response = self.client.get('/api/pdf/preview/unknown')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
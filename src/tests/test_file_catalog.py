@@ -0,0 +1,186 @@
+"""
+测试SQLite文件目录
+"""
+
+import os
+import sys
+import io
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.user import db
+from src.models.file_catalog import (
+    ConvertedFile, record_upload, record_conversion, remove_conversion,
+    get_entry, list_conversions, import_json_sidecars, find_uploads_by_hash, ensure_catalog_columns
+)
+
+
+class CatalogTestCase(unittest.TestCase):
+    """创建内存数据库与临时目录"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def add_conversion(self, file_id, convert_time, record_count=1):
+        record_upload(file_id, f'{file_id}.pdf', convert_time, 100)
+        record_conversion(file_id, {
+            'filename': f'converted_{file_id}.xlsx',
+            'original_filename': f'{file_id}.pdf',
+            'convert_time': convert_time,
+            'file_size': 200,
+            'record_count': record_count
+        })
+
+
+class TestFileCatalog(CatalogTestCase):
+    """测试目录读写"""
+
+    def test_record_and_list(self):
+        """测试记录转换并按时间倒序分页"""
+        for i in range(5):
+            self.add_conversion(f'f{i}', f'2024-01-0{i + 1}T10:00:00', record_count=i)
+        record_upload('pending', 'pending.pdf', '2024-02-01T00:00:00', 10)
+
+        rows, total = list_conversions(offset=1, limit=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([row.file_id for row in rows], ['f3', 'f2'])
+        self.assertFalse(get_entry('pending').is_converted)
+
+    def test_remove(self):
+        """测试删除记录"""
+        self.add_conversion('f1', '2024-01-01T10:00:00')
+        remove_conversion('f1')
+        self.assertIsNone(get_entry('f1'))
+
+    def test_import_sidecars(self):
+        """测试从JSON元数据导入"""
+        with open(os.path.join(self.temp_dir, 'a.json'), 'w', encoding='utf-8') as f:
+            json.dump({'original_filename': 'a.pdf', 'convert_time': '2024-01-01T00:00:00',
+                       'record_count': 7, 'file_size': 10}, f)
+        with open(os.path.join(self.temp_dir, 'a.preview.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1}, f)
+        with open(os.path.join(self.temp_dir, 'order_comparison_x.json'), 'w', encoding='utf-8') as f:
+            json.dump({}, f)
+
+        self.assertEqual(import_json_sidecars(self.temp_dir, self.temp_dir), 1)
+        self.assertEqual(import_json_sidecars(self.temp_dir, self.temp_dir), 1)
+        self.assertEqual(ConvertedFile.query.count(), 1)
+        self.assertEqual(get_entry('a').record_count, 7)
+
+    def test_import_upload_hash(self):
+        """测试从上传元数据导入内容哈希"""
+        with open(os.path.join(self.temp_dir, 'a.json'), 'w', encoding='utf-8') as f:
+            json.dump({'original_filename': 'a.pdf', 'upload_time': '2024-01-01T00:00:00',
+                       'file_size': 10, 'sha256': 'ab' * 32}, f)
+
+        import_json_sidecars(self.temp_dir, os.path.join(self.temp_dir, 'outputs'))
+        self.assertEqual(find_uploads_by_hash('ab' * 32), ['a'])
+        self.assertEqual(find_uploads_by_hash('cd' * 32), [])
+
+    def test_add_missing_columns(self):
+        """测试为旧版本创建的目录表补充sha256列"""
+        self.assertFalse(ensure_catalog_columns())
+
+        db.drop_all()
+        with db.engine.begin() as connection:
+            connection.execute(db.text(
+                'CREATE TABLE converted_files (id INTEGER PRIMARY KEY, file_id VARCHAR(64) NOT NULL UNIQUE, '
+                'original_filename VARCHAR(255) NOT NULL, filename VARCHAR(255), upload_time VARCHAR(32), '
+                'upload_size INTEGER NOT NULL, convert_time VARCHAR(32), file_size INTEGER NOT NULL, '
+                'record_count INTEGER NOT NULL)'))
+
+        self.assertTrue(ensure_catalog_columns())
+        self.assertFalse(ensure_catalog_columns())
+        record_upload('a', 'a.pdf', '2024-01-01T00:00:00', 10, 'ab' * 32)
+        self.assertEqual(find_uploads_by_hash('ab' * 32), ['a'])
+
+
+class TestCatalogEndpoints(CatalogTestCase):
+    """测试文件接口使用目录"""
+
+    def test_upload_records_entry(self):
+        """测试上传写入目录"""
+        response = self.client.post('/api/pdf/upload', data={
+            'file': (io.BytesIO(b'%PDF-1.4 test'), 'order.pdf')
+        }, content_type='multipart/form-data')
+
+        self.assertEqual(response.status_code, 200)
+        entry = get_entry(response.get_json()['file_id'])
+        self.assertEqual(entry.original_filename, 'order.pdf')
+        self.assertEqual(entry.sha256, response.get_json()['sha256'])
+        self.assertFalse(entry.is_converted)
+        self.assertNotIn('duplicate_of', response.get_json())
+
+    def test_upload_duplicate(self):
+        """测试按目录中的内容哈希列出内容相同的已上传文件"""
+        first = self.client.post('/api/pdf/upload', data={
+            'file': (io.BytesIO(b'%PDF-1.4 test'), 'order.pdf')
+        }, content_type='multipart/form-data').get_json()
+        second = self.client.post('/api/pdf/upload', data={
+            'file': (io.BytesIO(b'%PDF-1.4 test'), 'copy.pdf')
+        }, content_type='multipart/form-data').get_json()
+
+        self.assertEqual(second['duplicate_of'], [first['file_id']])
+
+    def test_list_converted_paginated(self):
+        """测试分页列出已转换文件"""
+        for i in range(3):
+            self.add_conversion(f'f{i}', f'2024-01-0{i + 1}T10:00:00')
+        open(os.path.join(self.temp_dir, 'f2.xlsx'), 'wb').close()
+
+        response = self.client.get('/api/pdf/list_converted?offset=0&limit=2')
+        data = response.get_json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([f['file_id'] for f in data['files']], ['f2', 'f1'])
+        self.assertTrue(data['files'][0]['exists'])
+        self.assertFalse(data['files'][1]['exists'])
+
+    def test_status_and_delete(self):
+        """测试状态查询与删除"""
+        self.add_conversion('f1', '2024-01-01T10:00:00', record_count=4)
+        open(os.path.join(self.temp_dir, 'f1.xlsx'), 'wb').close()
+
+        data = self.client.get('/api/pdf/check_file_exists/f1').get_json()
+        self.assertEqual(data['record_count'], 4)
+
+        response = self.client.delete('/api/pdf/delete_converted/f1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(get_entry('f1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+测试规格表中不存在的产品ID的相似产品查找
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.item_suggest import ItemSuggestIndex, normalize_item_id
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.spec_cache import SpecTable, LayeredSpecTable, SpecCache
+
+
+def levenshtein(a, b):
+    """逐字符计算的编辑距离，用于核对索引给出的距离"""
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def spec_table(item_ids):
+    return SpecTable.from_frame(pd.DataFrame({'item_id': item_ids, 'standard_unit_price': [1.0] * len(item_ids)}))
+
+
+class TestItemSuggestIndex(unittest.TestCase):
+    """测试相似产品ID索引"""
+
+    def test_normalize(self):
+        """测试大小写、分隔符、字母O及前导零"""
+        self.assertEqual(normalize_item_id('sku-00O12 b'), 'SKU12B')
+        self.assertEqual(normalize_item_id('A-0'), 'A0')
+        self.assertEqual(normalize_item_id('---'), '')
+
+    def test_common_typos(self):
+        """测试O/0、连字符、前导零、单字符错误及相邻字符交换"""
+        index = ItemSuggestIndex(np.array(['AB-12345', 'AB-12354', 'CD-5678', 'X1'], dtype=object))
+
+        self.assertEqual(index.lookup(['ab12345', 'AB-O012345', 'AB-1234', 'CD-5679', 'CD-5768', 'X2', '', None]), [
+            [(0, 'AB-12345'), (2, 'AB-12354')],
+            [(0, 'AB-12345'), (2, 'AB-12354')],
+            [(1, 'AB-12345'), (1, 'AB-12354')],
+            [(1, 'CD-5678')],
+            # 较短的ID只接受编辑距离1以内的产品
+            [],
+            [],
+            [],
+            []
+        ])
+
+    def test_distances_match_levenshtein(self):
+        """测试随机产品ID的距离与逐字符计算一致，且编辑距离为1的产品都能找到"""
+        rng = np.random.default_rng(0)
+        items = np.array(list(dict.fromkeys(
+            ''.join(rng.choice(list('ABC123'), size=rng.integers(3, 8))) for _ in range(400)
+        )), dtype=object)
+        queries = [''.join(rng.choice(list('ABC123'), size=rng.integers(3, 8))) for _ in range(200)]
+        index = ItemSuggestIndex(items)
+
+        for query, matches in zip(queries, index.lookup(queries, limit=len(items))):
+            key = normalize_item_id(query)
+            distances = {item: levenshtein(key, normalize_item_id(item)) for item in items}
+            for distance, item in matches:
+                self.assertEqual(distance, distances[item])
+            expected = {item for item, distance in distances.items() if distance <= (1 if len(key) >= 3 else 0)}
+            self.assertTrue(expected <= {item for _, item in matches})
+            self.assertEqual(matches, sorted(matches))
+
+
+class TestSuggestionsInComparison(unittest.TestCase):
+    """测试比对时为不存在的产品ID附上相似产品"""
+
+    def test_error_details(self):
+        """测试错误详情中的相似产品，没有相似产品时与原来相同"""
+        comparator = OrderSpecComparator()
+        order_df = pd.DataFrame({
+            'item_id': ['A-0012', 'Z999', 'A001'], 'unit_price': [1.0, 1.0, 1.0]
+        })
+
+        _, details, stats = comparator.check_rows(order_df, spec_table(['A12', 'A13', 'A001']))
+
+        self.assertEqual(list(details), ['产品ID不存在 (相似产品: A12, A001, A13)', '产品ID不存在', ''])
+        self.assertEqual(stats['error_types']['PRODUCT_NOT_FOUND'], 2)
+
+    def test_layered(self):
+        """测试分层规格表合并各层的相似产品"""
+        layered = LayeredSpecTable([spec_table(['B-100', 'A-100']), spec_table(['A-100', 'A-101'])], ['c', 'b'])
+        self.assertEqual(layered.suggest(['A-10O', 'A-102'], limit=2), [
+            [(0, 'A-100'), (1, 'B-100')],
+            [(1, 'A-100'), (1, 'A-101')]
+        ])
+
+    def test_cache_accounts_index(self):
+        """测试建立相似产品ID索引后缓存的内存占用随之更新"""
+        cache = SpecCache()
+        table = spec_table(['A-%d' % i for i in range(100)])
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as f:
+            cache.get(f.name, lambda path: table)
+            before = cache.stats()['bytes']
+            table.suggest(['A-1000'])
+            self.assertIs(cache.get(f.name, lambda path: None), table)
+            self.assertEqual(cache.stats()['bytes'], before + table.suggest_index().nbytes)
+            cache.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
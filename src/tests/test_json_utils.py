@@ -0,0 +1,178 @@
+"""
+测试JSON工具模块
+"""
+
+import os
+import sys
+import json
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import json_utils
+from src.utils.json_utils import (
+    clean_dataframe_nan, clean_nan_values, dumps_json, safe_jsonify,
+    dataframe_to_columns, prepare_sheet_data, parse_layout, LAYOUT_COLUMNAR
+)
+
+
+class TestCleanDataframeNan(unittest.TestCase):
+    """测试DataFrame空值清理"""
+
+    def test_nan_and_inf_replaced(self):
+        """测试NaN、Inf及字符串空值被替换为None"""
+        df = pd.DataFrame({
+            'ITEM': ['A', 'nan', None, 'NULL'],
+            'PRICE': [1.5, np.nan, np.inf, -np.inf],
+            'QUANTITY': [1, 2, 3, 4],
+            'MIXED': pd.Series([1, float('inf'), 'Inf', np.nan], dtype=object),
+            'DATE': pd.to_datetime(['2024-01-01', None, '2024-01-03', None])
+        })
+
+        result = clean_dataframe_nan(df)
+
+        self.assertEqual(result['columns'], ['ITEM', 'PRICE', 'QUANTITY', 'MIXED', 'DATE'])
+        self.assertEqual([row['ITEM'] for row in result['data']], ['A', None, None, None])
+        self.assertEqual([row['PRICE'] for row in result['data']], [1.5, None, None, None])
+        self.assertEqual([row['MIXED'] for row in result['data']], [1, None, None, None])
+        self.assertIsNone(result['data'][1]['DATE'])
+
+    def test_native_types(self):
+        """测试数值转换为Python原生类型"""
+        df = pd.DataFrame({
+            'QUANTITY': np.array([1, 2], dtype=np.int64),
+            'FLAG': [True, False],
+            'OBJ': pd.Series([np.int64(5), 'x'], dtype=object)
+        })
+
+        row = clean_dataframe_nan(df)['data'][0]
+
+        self.assertIs(type(row['QUANTITY']), int)
+        self.assertIs(type(row['FLAG']), bool)
+        self.assertIs(type(row['OBJ']), int)
+
+    def test_matches_recursive_cleaning(self):
+        """测试结果与逐个单元格清理一致"""
+        df = pd.DataFrame({
+            'A': ['x', 'inf', None],
+            'B': [np.nan, 2.0, np.inf]
+        })
+
+        expected = clean_nan_values(df.astype(object).to_dict('records'))
+        self.assertEqual(clean_dataframe_nan(df)['data'], expected)
+
+    def test_empty(self):
+        """测试空DataFrame"""
+        self.assertEqual(clean_dataframe_nan(pd.DataFrame()), {'columns': [], 'data': []})
+
+
+class TestDumpsJson(unittest.TestCase):
+    """测试单次编码的JSON序列化"""
+
+    def payload(self):
+        return {
+            'values': [np.nan, np.float64('inf'), np.int64(3), np.bool_(True)],
+            'time': pd.Timestamp('2024-01-02 03:04:05'),
+            'missing': pd.NaT,
+            'array': np.array([1.0, np.nan]),
+            'frame': pd.DataFrame({'A': [1.0, np.nan]}),
+            'text': '红色'
+        }
+
+    def expected(self):
+        return {
+            'values': [None, None, 3, True],
+            'time': '2024-01-02T03:04:05',
+            'missing': None,
+            'array': [1.0, None],
+            'frame': {'columns': ['A'], 'data': [{'A': 1.0}, {'A': None}]},
+            'text': '红色'
+        }
+
+    def test_orjson_and_stdlib_match(self):
+        """测试orjson与标准库编码结果一致"""
+        with patch.object(json_utils, 'HAS_ORJSON', False):
+            stdlib_output = dumps_json(self.payload())
+        self.assertEqual(json.loads(stdlib_output), self.expected())
+
+        if json_utils.HAS_ORJSON:
+            self.assertEqual(dumps_json(self.payload()), stdlib_output)
+
+    def test_nan_strings_null(self):
+        """测试字典、列表及对象数组中的空值字符串输出为null，键及其它字符串不变"""
+        payload = {
+            'sample': ['A001', 'nan', 'NULL', '-Inf'],
+            'nan': 'inf',
+            'array': np.array(['x', 'NaN'], dtype=object),
+            'numbers': np.array([1.0, np.nan]),
+            'text': 'nano'
+        }
+        expected = {
+            'sample': ['A001', None, None, None],
+            'nan': None,
+            'array': ['x', None],
+            'numbers': [1.0, None],
+            'text': 'nano'
+        }
+        with patch.object(json_utils, 'HAS_ORJSON', False):
+            self.assertEqual(json.loads(dumps_json(payload)), expected)
+        self.assertEqual(json.loads(dumps_json(payload)), expected)
+        self.assertEqual(json.loads(dumps_json({'quote': '"nan"'})), {'quote': '"nan"'})
+
+    def test_unsupported_type(self):
+        """测试无法序列化的对象"""
+        with self.assertRaises(TypeError):
+            dumps_json({'obj': object()})
+
+    def test_safe_jsonify_response(self):
+        """测试响应内容和类型"""
+        response = safe_jsonify({'count': np.int64(2), 'price': np.nan})
+
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(json.loads(response.get_data()), {'count': 2, 'price': None})
+
+
+class TestColumnarLayout(unittest.TestCase):
+    """测试列式布局"""
+
+    def test_dataframe_to_columns(self):
+        """测试数值列保持为numpy数组，编码结果与records一致"""
+        df = pd.DataFrame({
+            'ITEM': ['A', None, 'C'],
+            'QUANTITY': np.array([1, 2, 3], dtype=np.int64),
+            'PRICE': [1.5, np.nan, np.inf]
+        })
+
+        columns, data = dataframe_to_columns(df)
+
+        self.assertEqual(columns, ['ITEM', 'QUANTITY', 'PRICE'])
+        self.assertIsInstance(data[1], np.ndarray)
+        self.assertEqual(json.loads(dumps_json(data)), [['A', None, 'C'], [1, 2, 3], [1.5, None, None]])
+
+        records = clean_dataframe_nan(df)['data']
+        decoded = json.loads(dumps_json(data))
+        for i, column in enumerate(columns):
+            self.assertEqual(decoded[i], [row[column] for row in records])
+
+    def test_prepare_sheet_data_columnar(self):
+        """测试工作表数据列式输出"""
+        result = prepare_sheet_data(pd.DataFrame({'A': [1, 2]}), layout=LAYOUT_COLUMNAR)
+
+        self.assertEqual(result['layout'], 'columnar')
+        self.assertEqual(result['total_rows'], 2)
+        self.assertEqual(json.loads(dumps_json(result['data'])), [[1, 2]])
+
+    def test_parse_layout(self):
+        """测试layout参数解析"""
+        self.assertEqual(parse_layout(None), 'records')
+        self.assertEqual(parse_layout('Columnar'), 'columnar')
+        with self.assertRaises(ValueError):
+            parse_layout('rows')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+测试分层规格表比对
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.spec_cache import SpecTable, LayeredSpecTable, get_spec_cache, text_column
+
+BASE_SPEC = pd.DataFrame({
+    'item_id': ['A001', 'A001', 'B002', 'D004'],
+    'size': ['M', 'L', '', 'S'],
+    'color': ['', '', '', ''],
+    'standard_unit_price': [10.0, 10.0, 5.0, 3.0]
+})
+
+CUSTOMER_SPEC = pd.DataFrame({
+    'item_id': ['A001', 'E005'],
+    'size': ['M', ''],
+    'color': ['', ''],
+    'standard_unit_price': [12.0, 7.0]
+})
+
+
+class TestLayeredSpecTable(unittest.TestCase):
+    """测试产品归属及按层查找"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.table = LayeredSpecTable(
+            [SpecTable.from_frame(CUSTOMER_SPEC), SpecTable.from_frame(BASE_SPEC)],
+            ['customer', 'base']
+        )
+
+    def test_first_layer_wins(self):
+        """测试产品使用第一个包含它的规格表，尺寸不会回退到后面的规格表"""
+        order = pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002', 'E005', 'X999'],
+            'size': ['M', 'L', '', '', '']
+        })
+        item_id, size, color = (text_column(order, name) for name in ('item_id', 'size', 'color'))
+
+        layer = self.table.resolve(item_id)
+        found = self.table.match(item_id, size, color)
+
+        self.assertEqual(self.table.layer_names(layer).tolist(), ['customer', 'customer', 'base', 'customer', ''])
+        self.assertEqual(found['key_found'].tolist(), [True, False, True, True, False])
+        self.assertEqual(found['spec_price'][[0, 2, 3]].tolist(), [12.0, 5.0, 7.0])
+        self.assertEqual(found['item_exists'].tolist(), [True, True, True, True, False])
+        self.assertEqual(found['size_found'].tolist(), [True, False, True, True, False])
+
+    def test_single_layer_matches_spec_table(self):
+        """测试只有一层时与直接使用规格表的结果一致"""
+        order = pd.DataFrame({'item_id': ['A001', 'D004', 'Z'], 'size': ['L', 'M', ''], 'unit_price': [10.0, 3.0, 1.0]})
+        comparator = OrderSpecComparator(output_dir=tempfile.gettempdir())
+        spec = SpecTable.from_frame(BASE_SPEC)
+
+        direct = comparator.check_rows(order, spec)
+        layered = comparator.check_rows(order, LayeredSpecTable([spec], ['base']))
+
+        self.assertEqual(direct[1].tolist(), layered[1].tolist())
+        self.assertEqual(direct[2], layered[2])
+
+
+class TestCompareOrdersLayered(unittest.TestCase):
+    """测试分层比对结果及接口"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spec_paths = {}
+        for spec_id, df in (('customer', CUSTOMER_SPEC), ('base', BASE_SPEC)):
+            self.spec_paths[spec_id] = os.path.join(self.temp_dir, f'{spec_id}.xlsx')
+            df.to_excel(self.spec_paths[spec_id], index=False)
+        self.order_path = os.path.join(self.temp_dir, 'order-1.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002', 'X999'],
+            'size': ['M', 'L', '', ''],
+            'unit_price': [12.0, 10.0, 5.0, 1.0]
+        }).to_excel(self.order_path, index=False)
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+    def test_layer_column_and_stats(self):
+        """测试结果记录匹配的规格表层"""
+        result = self.comparator.compare_orders_layered(
+            self.order_path, [('customer', self.spec_paths['customer']), ('base', self.spec_paths['base'])]
+        )
+
+        df = pd.read_excel(result['result_file_path'], keep_default_na=False)
+        self.assertEqual(df['匹配规格表'].tolist(), ['customer', 'customer', 'base', ''])
+        self.assertEqual(df['核对状态'].tolist(), ['通过', '有问题', '通过', '有问题'])
+        self.assertEqual(result['stats']['layer_matches'], {'customer': 2, 'base': 1})
+        self.assertEqual(result['stats']['error_types']['SIZE_MISMATCH'], 1)
+        self.assertIn('规格表匹配统计', self.comparator.get_comparison_summary(result['stats']))
+
+    def test_endpoint(self):
+        """测试compare_orders接口的spec_ids参数"""
+        from src.routes import spec_routes
+        app = Flask(__name__)
+        app.register_blueprint(spec_routes.spec_bp)
+        mock_path_manager = MagicMock()
+        mock_path_manager.get_output_path.side_effect = lambda filename: os.path.join(self.temp_dir, filename)
+
+        with patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager), \
+                patch.object(spec_routes.spec_manager, 'get_spec_path', side_effect=self.spec_paths.get), \
+                patch.object(spec_routes.comparator, 'output_dir', self.temp_dir):
+            client = app.test_client()
+            response = client.post('/api/compare_orders', json={
+                'order_file_id': 'order-1', 'spec_ids': ['customer', 'base']
+            })
+            missing = client.post('/api/compare_orders', json={
+                'order_file_id': 'order-1', 'spec_ids': ['customer', 'unknown']
+            })
+            invalid = client.post('/api/compare_orders', json={'order_file_id': 'order-1', 'spec_ids': []})
+
+        self.assertEqual(response.status_code, 200, response.get_json())
+        self.assertEqual(response.get_json()['stats']['layer_matches'], {'customer': 2, 'base': 1})
+        self.assertEqual(missing.status_code, 404)
+        self.assertIn('unknown', missing.get_json()['error'])
+        self.assertEqual(invalid.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
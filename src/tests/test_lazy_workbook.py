@@ -0,0 +1,181 @@
+"""
+测试比对结果工作簿的延迟生成
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+from flask import Flask
+from openpyxl import load_workbook
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.comparison_results import save_comparison_rows, load_comparison_rows, get_comparison_rows_path
+from src.utils.row_errors import ERROR_BITS, RowErrors
+from src.utils.spec_cache import get_spec_cache
+
+
+def workbook_cells(path):
+    """工作簿各工作表的单元格值及填充色"""
+    wb = load_workbook(path)
+    return {
+        ws.title: [[(cell.value, cell.fill.fgColor.rgb) for cell in row] for row in ws.iter_rows()]
+        for ws in wb.worksheets
+    }
+
+
+class TestComparisonRows(unittest.TestCase):
+    """测试每行比对结果的保存与读取"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        """测试错误位掩码、数值明细、相似产品及匹配规格表读回后不变"""
+        bits = ERROR_BITS
+        mask = np.array([0, bits['SIZE_MISMATCH'], 0, bits['PRICE_MISMATCH'] | bits['TOTAL_CALC_ERROR'],
+                         bits['EMPTY_ITEM_ID'], 0, bits['PRODUCT_NOT_FOUND'], bits['PRODUCT_NOT_FOUND']], dtype=np.uint8)
+        errors = RowErrors(mask, [10.0, np.nan, 10.0, 5.5, np.nan, 1.0, np.nan, np.nan],
+                           [20.0, 9.0, np.nan, 11.0, np.nan, np.nan, np.nan, np.nan], {6: 'A001, A002'})
+        layers = np.array(['base', 'customer', 'base', '', 'base', 'customer', '', ''], dtype=object)
+
+        self.assertTrue(save_comparison_rows(self.temp_dir, 'r1', errors, layers))
+        rows = load_comparison_rows(self.temp_dir, 'r1')
+
+        self.assertEqual(rows['errors'].mask.tolist(), mask.tolist())
+        self.assertEqual(rows['errors'].details().tolist(), errors.details().tolist())
+        self.assertEqual(rows['errors'].details().tolist(), [
+            '', '尺寸不符', '', '单价不符 (标准价格: 5.5); 总价计算错误 (应为: 11.00)', '产品ID为空', '',
+            '产品ID不存在 (相似产品: A001, A002)', '产品ID不存在'
+        ])
+        self.assertEqual(rows['layer_names'].tolist(), layers.tolist())
+        self.assertIsNone(load_comparison_rows(self.temp_dir, 'missing'))
+
+
+class TestLazyWorkbook(unittest.TestCase):
+    """测试比对接口不生成工作簿，第一次下载时按保存的结果生成"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spec_paths = {
+            'base': os.path.join(self.temp_dir, 'base.xlsx'),
+            'customer': os.path.join(self.temp_dir, 'customer.xlsx')
+        }
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002'], 'size': ['M', 'L', ''], 'standard_unit_price': [10.0, 10.0, 5.0]
+        }).to_excel(self.spec_paths['base'], index=False)
+        pd.DataFrame({'item_id': ['B002'], 'standard_unit_price': [6.0]}).to_excel(self.spec_paths['customer'], index=False)
+        self.order_path = os.path.join(self.temp_dir, 'order-1.xlsx')
+        self.write_order(['A001', 'A001', 'B002', 'C003'])
+
+        from src.routes import spec_routes
+        self.spec_routes = spec_routes
+        self.app = Flask(__name__)
+        self.app.register_blueprint(spec_routes.spec_bp)
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        mock_path_manager.get_output_path.side_effect = lambda filename: os.path.join(self.temp_dir, filename)
+        self.patchers = [
+            patch('src.routes.spec_routes.get_path_manager', return_value=mock_path_manager),
+            patch.object(spec_routes.spec_manager, 'get_spec_path', side_effect=self.spec_paths.get),
+            patch.object(spec_routes.comparator, 'output_dir', self.temp_dir)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        for patcher in self.patchers:
+            patcher.stop()
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+    def write_order(self, item_ids):
+        pd.DataFrame({
+            'item_id': item_ids, 'size': ['M', 'XL', '', ''][:len(item_ids)],
+            'unit_price': [10.0, 10.0, 6.0, 1.0][:len(item_ids)]
+        }).to_excel(self.order_path, index=False)
+
+    def compare(self, payload):
+        response = self.client.post('/api/compare_orders', json=dict({'order_file_id': 'order-1'}, **payload))
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def download(self, result_file_id):
+        response = self.client.get(f'/api/download_comparison/{result_file_id}')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        return os.path.join(self.temp_dir, f'order_comparison_{result_file_id}.xlsx')
+
+    def assert_lazy_matches_eager(self, payload, eager):
+        result = self.compare(payload)
+        workbook_path = os.path.join(self.temp_dir, f"order_comparison_{result['result_file_id']}.xlsx")
+        self.assertFalse(result['workbook_ready'])
+        self.assertFalse(os.path.exists(workbook_path))
+        self.assertTrue(os.path.exists(get_comparison_rows_path(self.temp_dir, result['result_file_id'])))
+        self.assertEqual(result['stats'], eager['stats'])
+
+        # 订单未变化时不重新比对
+        with patch.object(self.spec_routes.comparator, 'find_row_errors') as mock_check:
+            self.assertEqual(self.download(result['result_file_id']), workbook_path)
+        mock_check.assert_not_called()
+        self.assertEqual(workbook_cells(workbook_path), workbook_cells(eager['result_file_path']))
+
+        # 之后直接使用已生成的工作簿
+        with patch.object(self.spec_routes.comparator, 'render_workbook') as mock_render:
+            self.download(result['result_file_id'])
+        mock_render.assert_not_called()
+
+    def test_single_spec(self):
+        """测试单个规格表"""
+        eager = self.comparator.compare_orders(self.order_path, self.spec_paths['base'])
+        self.assert_lazy_matches_eager({'spec_id': 'base'}, eager)
+
+    def test_layered(self):
+        """测试分层规格表的匹配规格表列"""
+        eager = self.comparator.compare_orders_layered(
+            self.order_path, [('customer', self.spec_paths['customer']), ('base', self.spec_paths['base'])]
+        )
+        self.assert_lazy_matches_eager({'spec_ids': ['customer', 'base']}, eager)
+
+    def test_order_changed(self):
+        """测试订单在比对后被替换为其它内容时不生成与摘要不一致的工作簿，报告结果已失效"""
+        result = self.compare({'spec_id': 'base'})
+        self.write_order(['A001', 'B002'])
+
+        response = self.client.get(f"/api/download_comparison/{result['result_file_id']}")
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.get_json()['error_code'], 'RESULT_STALE')
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, f"order_comparison_{result['result_file_id']}.xlsx")))
+        self.assertEqual(self.client.get('/api/download_comparison/unknown').status_code, 404)
+
+    def test_spec_changed(self):
+        """测试规格表在比对后变化、需要重新比对时统计与摘要不同则不生成工作簿"""
+        result = self.compare({'spec_id': 'base'})
+        os.remove(get_comparison_rows_path(self.temp_dir, result['result_file_id']))
+        pd.DataFrame({'item_id': ['A001', 'B002', 'C003'], 'standard_unit_price': [10.0, 6.0, 1.0]}).to_excel(
+            self.spec_paths['base'], index=False)
+        get_spec_cache().clear()
+
+        self.assertIsNone(self.comparator.render_workbook(result['result_file_id']))
+        self.assertEqual(self.client.get(f"/api/download_comparison/{result['result_file_id']}").status_code, 410)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+测试NDJSON流式响应模块
+"""
+
+import os
+import sys
+import json
+import unittest
+import numpy as np
+from flask import Flask, request
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.ndjson_stream import (
+    wants_ndjson, chunked, table_events, ndjson_response, NDJSON_MIMETYPE
+)
+
+
+class TestNdjsonStream(unittest.TestCase):
+    """测试事件生成和编码"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.app = Flask(__name__)
+
+    def test_table_events(self):
+        """测试表格事件按块输出"""
+        events = list(table_events({'columns': ['A']}, ([i] for i in range(5)), chunk_size=2))
+
+        self.assertEqual(events[0], {'type': 'header', 'columns': ['A']})
+        self.assertEqual([event['offset'] for event in events[1:-1]], [0, 2, 4])
+        self.assertEqual(events[3]['rows'], [[4]])
+        self.assertEqual(events[-1], {'type': 'end', 'returned_rows': 5})
+        self.assertEqual(list(chunked([], 3)), [])
+
+    def test_wants_ndjson(self):
+        """测试Accept头协商"""
+        cases = [
+            ({}, False),
+            ({'Accept': NDJSON_MIMETYPE}, True),
+            ({'Accept': 'application/json, application/x-ndjson;q=0.5'}, False),
+            ({'Accept': '*/*'}, False)
+        ]
+        for headers, expected in cases:
+            with self.app.test_request_context(headers=headers):
+                self.assertEqual(wants_ndjson(request), expected, headers)
+
+    def test_error_line_on_failure(self):
+        """测试输出过程中出错时以error行结束"""
+        def events():
+            yield {'type': 'header', 'value': np.int64(1)}
+            raise RuntimeError('读取失败')
+
+        with self.app.test_request_context():
+            response = ndjson_response(events())
+            lines = [json.loads(line) for line in response.get_data().splitlines()]
+
+        self.assertEqual(response.headers['X-Accel-Buffering'], 'no')
+        self.assertEqual(lines, [
+            {'type': 'header', 'value': 1},
+            {'type': 'error', 'error': '读取失败'}
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
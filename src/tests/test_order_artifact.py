@@ -0,0 +1,171 @@
+"""
+测试转换时保存的订单数据产物及比对时的直接复用
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.conversion_artifacts import (
+    ARTIFACT_VERSION, save_order_artifact, load_order_artifact, get_order_artifact_path, remove_artifacts
+)
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.sheet_reader import read_back_frame
+from src.utils.spec_cache import get_spec_cache
+
+
+def pdf_sheet_frames():
+    """模拟PDF转换得到的工作表：订单表格的列名为数字，标题行在数据中"""
+    items = pd.DataFrame({
+        0: ['Item No', 'A001', 'A001', None, 'B002', '0012'],
+        1: ['Size', 'M', 'XL', None, 'NA', ''],
+        2: ['Unit Price', '10.00', '10', None, '5.5', '3'],
+        3: ['Quantity', 2, 1.0, None, 4, 'n/a']
+    })
+    return [
+        ('Customer_Info', pd.DataFrame([{'customer': 'ACME', 'po_number': '4500012345'}])),
+        ('Order_Items', items),
+        ('Summary', pd.DataFrame([{'total': 61.0, 'tax': 0.0}]))
+    ]
+
+
+class TestReadBackFrame(unittest.TestCase):
+    """测试read_back_frame与写入再读取Excel的结果一致"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_read_excel(self):
+        """测试类型推断、空值字符串、重复列名、末尾空行与read_excel一致"""
+        frames = [
+            pd.DataFrame({'a': ['1', '2.5', 'NA'], 'b': [1.0, 2.0, None], 'c': [True, False, True]}),
+            pd.DataFrame([['x', 1, 'True'], ['y', 2.0, 'False'], [None, None, '']], columns=['k', 'k', '']),
+            pd.DataFrame({0: ['Item', '=A1', ' 7 '], 1: [np.nan, 3, 'n/a']}),
+            pd.DataFrame({'only_header': []})
+        ]
+        path = os.path.join(self.temp_dir, 'frame.xlsx')
+        for df in frames:
+            df.to_excel(path, index=False)
+            pd.testing.assert_frame_equal(read_back_frame(df), pd.read_excel(path), check_column_type=False)
+
+
+class TestOrderArtifact(unittest.TestCase):
+    """测试订单数据产物与从Excel加载的订单数据一致"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_path = os.path.join(self.temp_dir, 'order-1.xlsx')
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+    def convert(self, sheet_frames):
+        from src.routes.pdf_converter import write_excel_sheets, save_converted_order
+        self.assertEqual(write_excel_sheets(sheet_frames, self.excel_path), (True, None))
+        return save_converted_order(self.excel_path, sheet_frames)
+
+    def assert_artifact_matches_excel(self, sheet_frames):
+        self.assertTrue(self.convert(sheet_frames))
+        artifact_df = self.comparator.load_order_data(self.excel_path)
+
+        with patch('src.utils.order_comparator.load_order_artifact', return_value=None):
+            excel_df = self.comparator.load_order_data(self.excel_path)
+
+        pd.testing.assert_frame_equal(artifact_df, excel_df)
+        return artifact_df
+
+    def test_artifact_matches_excel(self):
+        """测试产物与解析Excel得到的订单数据相同，且比对时不再读取Excel"""
+        self.assert_artifact_matches_excel(pdf_sheet_frames())
+
+        with patch('pandas.read_excel') as mock_read:
+            self.comparator.load_order_data(self.excel_path)
+        mock_read.assert_not_called()
+
+    def test_inferred_header(self):
+        """测试数字列名的单个工作表按标题行推断列名"""
+        order_df = self.assert_artifact_matches_excel(pdf_sheet_frames()[1:2])
+
+        self.assertEqual(order_df['item_id'].tolist(), ['A001', 'A001', 'B002', '0012'])
+        self.assertEqual(order_df['unit_price'].tolist(), [10.0, 10.0, 5.5, 3.0])
+
+    def test_comparison_uses_artifact(self):
+        """测试比对结果与不使用产物时一致"""
+        self.convert(pdf_sheet_frames())
+        spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'B002'], 'size': ['M', ''], 'standard_unit_price': [10.0, 5.5]
+        }).to_excel(spec_path, index=False)
+
+        with_artifact = self.comparator.compare_orders(self.excel_path, spec_path)
+        with patch('src.utils.order_comparator.load_order_artifact', return_value=None):
+            without_artifact = self.comparator.compare_orders(self.excel_path, spec_path)
+
+        self.assertEqual(with_artifact['stats'], without_artifact['stats'])
+
+    def test_invalidated_when_excel_changes(self):
+        """测试Excel被替换后不再使用产物"""
+        self.convert(pdf_sheet_frames())
+        self.assertIsNotNone(load_order_artifact(self.excel_path))
+
+        pd.DataFrame({'item_id': ['Z9'], 'unit_price': [1.0]}).to_excel(self.excel_path, index=False)
+        self.assertIsNone(load_order_artifact(self.excel_path))
+        self.assertEqual(self.comparator.load_order_data(self.excel_path)['item_id'].tolist(), ['Z9'])
+
+    def test_artifact_before_column_profile_rebuilt(self):
+        """测试列名推断规则变化前（版本1）保存的产物被忽略，解析Excel后按当前规则重新保存"""
+        self.convert(pdf_sheet_frames())
+        artifact_path = get_order_artifact_path(self.temp_dir, 'order-1')
+        with open(artifact_path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+        # 模拟旧规则得到的数据
+        artifact['version'] = 1
+        artifact['columns'] = [{'name': 'item_id', 'dtype': 'object', 'values': ['OLD'] * artifact['rows']}]
+        with open(artifact_path, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f)
+
+        self.assertIsNone(load_order_artifact(self.excel_path))
+        order_df = self.comparator.load_order_data(self.excel_path)
+        self.assertNotIn('OLD', order_df['item_id'].tolist())
+
+        with open(artifact_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['version'], ARTIFACT_VERSION)
+        pd.testing.assert_frame_equal(load_order_artifact(self.excel_path), order_df)
+
+    def test_unsupported_and_removed(self):
+        """测试含日期列时不保存产物，删除转换产物时一并删除"""
+        pd.DataFrame({'item_id': ['A']}).to_excel(self.excel_path, index=False)
+        dated = pd.DataFrame({'item_id': ['A'], 'date': pd.to_datetime(['2024-01-01'])})
+        self.assertFalse(save_order_artifact(self.excel_path, dated))
+
+        self.assertTrue(save_order_artifact(self.excel_path, pd.DataFrame({'item_id': ['A']})))
+        remove_artifacts(self.temp_dir, 'order-1')
+        self.assertFalse(os.path.exists(get_order_artifact_path(self.temp_dir, 'order-1')))
+
+    def test_duplicate_sheet_names(self):
+        """测试同名工作表（在Excel中相互覆盖）时不保存产物"""
+        frame = pd.DataFrame({'item_id': ['A']})
+        self.assertFalse(self.convert([('Table_1', frame), ('Table_1', frame)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+测试每行比对错误的位掩码表示
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.comparison_results import build_comparison_preview
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.row_errors import ERROR_BITS, RowErrors, add_result_columns
+from src.utils.spec_cache import SpecTable
+
+
+class TestRowErrors(unittest.TestCase):
+    """测试位掩码的统计、筛选及错误详情生成"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        spec = SpecTable.from_frame(pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002'],
+            'size': ['M', 'L', ''],
+            'standard_unit_price': [10.0, 12.0, 5.5]
+        }))
+        self.order_df = pd.DataFrame({
+            'item_id': ['A001', None, 'A001', 'a-001', 'A001', 'B002', 'B002'],
+            'size': ['M', 'M', 'XL', 'M', 'L', '', ''],
+            'unit_price': [10.0, 10.0, 10.0, 10.0, 12.0, 6.0, 5.5],
+            'quantity': [2.0, 1.0, 1.0, 1.0, 1.0, 3.0, 2.0],
+            'total_price': [20.0, 10.0, 10.0, 10.0, 10.0, 10.0, 11.0]
+        })
+        self.errors = OrderSpecComparator().find_row_errors(self.order_df, spec)
+
+    def test_mask_and_stats(self):
+        """测试每行的位掩码、按类型筛选及按位计数的统计"""
+        bits = ERROR_BITS
+        self.assertEqual(self.errors.mask.dtype, np.uint8)
+        self.assertEqual(self.errors.mask.tolist(), [
+            0, bits['EMPTY_ITEM_ID'], bits['SIZE_MISMATCH'], bits['PRODUCT_NOT_FOUND'], bits['TOTAL_CALC_ERROR'],
+            bits['PRICE_MISMATCH'] | bits['TOTAL_CALC_ERROR'], 0
+        ])
+        self.assertEqual(np.flatnonzero(self.errors.rows_with('TOTAL_CALC_ERROR')).tolist(), [4, 5])
+        self.assertEqual(self.errors.stats(), {
+            'total_records': 7,
+            'error_records': 5,
+            'error_types': {
+                'PRODUCT_NOT_FOUND': 1, 'SIZE_MISMATCH': 1, 'COLOR_MISMATCH': 0, 'PRICE_MISMATCH': 1,
+                'TOTAL_CALC_ERROR': 2
+            }
+        })
+
+    def test_details(self):
+        """测试错误详情由位掩码及数值明细生成，取部分行时一致"""
+        details = self.errors.details()
+        self.assertEqual(details.tolist(), [
+            '', '产品ID为空', '尺寸不符', '产品ID不存在 (相似产品: A001)', '总价计算错误 (应为: 12.00)',
+            '单价不符 (标准价格: 5.5); 总价计算错误 (应为: 18.00)', ''
+        ])
+        self.assertEqual(self.errors.take(np.array([5, 3])).details().tolist(), details[[5, 3]].tolist())
+
+    def test_arrays_round_trip(self):
+        """测试保存为数组后还原，掩码及错误详情不变"""
+        restored = RowErrors.from_arrays(self.errors.to_arrays())
+        self.assertEqual(restored.mask.tolist(), self.errors.mask.tolist())
+        self.assertEqual(restored.details().tolist(), self.errors.details().tolist())
+        self.assertEqual(restored.stats(), self.errors.stats())
+
+    def test_preview_renders_only_preview_rows(self):
+        """测试传入比对错误时预览与先添加结果列再生成的预览一致"""
+        df = self.order_df.copy()
+        df['工作表'] = ['S2', 'S1', 'S2', 'S1', 'S1', 'S2', 'S1']
+        df['表格序号'] = [2, 1, 2, 1, 1, 2, 1]
+
+        expected = build_comparison_preview(add_result_columns(df.copy(), self.errors), max_rows=3)
+        self.assertEqual(build_comparison_preview(df, max_rows=3, errors=self.errors), expected)
+        self.assertNotIn('错误详情', df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
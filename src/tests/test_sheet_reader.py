@@ -0,0 +1,202 @@
+"""
+测试工作表分页读取
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.sheet_reader import read_sheet_page, iter_sheet_rows, stream_sheet_rows, SheetNotFoundError
+
+
+class TestReadSheetPage(unittest.TestCase):
+    """测试read_sheet_page"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_path = os.path.join(self.temp_dir, 'order.xlsx')
+        self.df = pd.DataFrame({
+            'ITEM': [f'ITEM{i:03d}' for i in range(50)],
+            'DESCRIPTION': ['红色T恤' if i % 2 == 0 else '蓝色裤子' for i in range(50)],
+            'QUANTITY': [i % 7 for i in range(50)],
+            'PRICE': [10.5 + i for i in range(50)]
+        })
+        with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
+            self.df.to_excel(writer, sheet_name='Order_Items', index=False)
+            self.df.head(3).to_excel(writer, sheet_name='Summary', index=False)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_row_range(self):
+        """测试按行范围读取"""
+        page = read_sheet_page(self.excel_path, 'Order_Items', offset=10, limit=5)
+
+        self.assertEqual(page['columns'], ['ITEM', 'DESCRIPTION', 'QUANTITY', 'PRICE'])
+        self.assertEqual(page['total_rows'], 50)
+        self.assertEqual(len(page['rows']), 5)
+        self.assertEqual(page['rows'][0][0], 'ITEM010')
+        self.assertEqual(page['rows'][-1][0], 'ITEM014')
+
+    def test_read_all_rows(self):
+        """测试不指定limit时读取全部行"""
+        page = read_sheet_page(self.excel_path, 'Summary')
+
+        self.assertEqual(page['total_rows'], 3)
+        self.assertEqual(len(page['rows']), 3)
+
+    def test_column_projection(self):
+        """测试列投影"""
+        page = read_sheet_page(self.excel_path, 'Order_Items', limit=2, columns=['PRICE', 'ITEM'])
+
+        self.assertEqual(page['columns'], ['PRICE', 'ITEM'])
+        self.assertEqual(page['rows'][0], [10.5, 'ITEM000'])
+
+    def test_filter(self):
+        """测试过滤"""
+        page = read_sheet_page(self.excel_path, 'Order_Items', limit=3,
+                               filters={'DESCRIPTION': '蓝色'})
+
+        self.assertEqual(page['total_rows'], 50)
+        self.assertEqual(page['filtered_rows'], 25)
+        self.assertEqual([row[0] for row in page['rows']], ['ITEM001', 'ITEM003', 'ITEM005'])
+
+    def test_sort(self):
+        """测试排序与分页"""
+        page = read_sheet_page(self.excel_path, 'Order_Items', offset=1, limit=2,
+                               sort_by='PRICE', descending=True)
+
+        self.assertEqual([row[0] for row in page['rows']], ['ITEM048', 'ITEM047'])
+
+        expected = self.df.sort_values(['QUANTITY'], kind='stable')['ITEM'].tolist()[:4]
+        page = read_sheet_page(self.excel_path, 'Order_Items', limit=4, sort_by='QUANTITY')
+        self.assertEqual([row[0] for row in page['rows']], expected)
+
+    def test_missing_sheet_and_column(self):
+        """测试不存在的工作表和列"""
+        with self.assertRaises(SheetNotFoundError):
+            read_sheet_page(self.excel_path, 'Missing')
+
+        with self.assertRaises(KeyError):
+            read_sheet_page(self.excel_path, 'Order_Items', columns=['UNKNOWN'])
+
+    def test_iter_sheet_rows(self):
+        """测试行迭代器"""
+        columns, rows = iter_sheet_rows(self.excel_path, 'Order_Items', start=48)
+
+        self.assertEqual(columns[0], 'ITEM')
+        self.assertEqual([row[0] for row in rows], ['ITEM048', 'ITEM049'])
+
+    def test_stream_sheet_rows(self):
+        """测试流式读取的过滤、投影和范围"""
+        columns, total_rows, rows = stream_sheet_rows(
+            self.excel_path, 'Order_Items', offset=1, limit=2, columns=['ITEM'], filters={'DESCRIPTION': '蓝色'}
+        )
+
+        self.assertEqual(columns, ['ITEM'])
+        self.assertEqual(total_rows, 50)
+        self.assertEqual(list(rows), [['ITEM003'], ['ITEM005']])
+
+        with self.assertRaises(KeyError):
+            stream_sheet_rows(self.excel_path, 'Order_Items', columns=['UNKNOWN'])
+
+
+class TestSheetDataEndpoint(unittest.TestCase):
+    """测试sheet_data分页接口"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        pd.DataFrame({
+            'ITEM': [f'ITEM{i:03d}' for i in range(30)],
+            'PRICE': [float(i) for i in range(30)]
+        }).to_excel(os.path.join(self.temp_dir, 'file-1.xlsx'), sheet_name='Order_Items', index=False)
+
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.app = Flask(__name__)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_paginated_response(self):
+        """测试分页响应包含总数"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&offset=5&limit=10&columns=ITEM')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['total_rows'], 30)
+        self.assertEqual(data['returned_rows'], 10)
+        self.assertEqual(data['columns'], ['ITEM'])
+        self.assertEqual(data['data'][0], {'ITEM': 'ITEM005'})
+
+    def test_filter_and_sort(self):
+        """测试过滤和排序参数"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items'
+                                   '&filter=ITEM:item00&sort=PRICE&order=desc&limit=2')
+
+        data = response.get_json()
+        self.assertEqual(data['filtered_rows'], 10)
+        self.assertEqual([row['ITEM'] for row in data['data']], ['ITEM009', 'ITEM008'])
+
+    def test_columnar_layout(self):
+        """测试列式布局"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&limit=3&layout=columnar')
+
+        data = response.get_json()
+        self.assertEqual(data['layout'], 'columnar')
+        self.assertEqual(data['columns'], ['ITEM', 'PRICE'])
+        self.assertEqual(data['data'], [['ITEM000', 'ITEM001', 'ITEM002'], [0, 1, 2]])
+        self.assertEqual(data['returned_rows'], 3)
+
+    def test_ndjson_stream(self):
+        """测试NDJSON流式输出"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&offset=2',
+                                   headers={'Accept': 'application/x-ndjson'})
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data().splitlines()]
+        self.assertEqual(lines[0]['type'], 'header')
+        self.assertEqual(lines[0]['columns'], ['ITEM', 'PRICE'])
+        self.assertEqual(lines[0]['total_rows'], 30)
+        self.assertEqual(lines[1]['rows'][0], ['ITEM002', 2])
+        self.assertEqual(lines[-1], {'type': 'end', 'returned_rows': 28})
+
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Missing',
+                                   headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_arguments(self):
+        """测试无效参数"""
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Missing')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&columns=UNKNOWN')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/pdf/sheet_data/file-1?sheet=Order_Items&filter=bad')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
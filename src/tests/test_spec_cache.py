@@ -0,0 +1,199 @@
+"""
+测试规格表缓存
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.spec_cache import SpecCache, SpecTable, get_spec_cache
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.enhanced_spec_manager import EnhancedProductSpecManager
+
+
+def make_table(rows):
+    return SpecTable.from_frame(pd.DataFrame({
+        'item_id': [f'A{i}' for i in range(rows)],
+        'size': ['M'] * rows,
+        'color': ['红'] * rows,
+        'standard_unit_price': [10.0] * rows
+    }))
+
+
+class TestSpecTable(unittest.TestCase):
+    """测试查找结构"""
+
+    def test_lookup_structures(self):
+        """测试复合键、产品ID及尺寸/颜色索引"""
+        table = SpecTable.from_frame(pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002'],
+            'size': ['M', 'L', ''],
+            'color': ['红', '蓝', '白'],
+            'standard_unit_price': [10.0, 12.0, float('nan')]
+        }))
+
+        self.assertEqual(table.key_prices[table.key_index.get_loc('A001|L|蓝')], 12.0)
+        self.assertEqual(sorted(table.item_ids), ['A001', 'B002'])
+        self.assertIn(('A001', 'L'), table.size_pairs)
+        self.assertNotIn(('B002', 'M'), table.size_pairs)
+        self.assertIn(('B002', '白'), table.color_pairs)
+        self.assertGreater(table.nbytes, 0)
+
+
+class TestSpecCache(unittest.TestCase):
+    """测试缓存命中、失效和淘汰"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for name in ('s1', 's2', 's3'):
+            path = os.path.join(self.temp_dir, f'{name}.xlsx')
+            with open(path, 'wb') as f:
+                f.write(name.encode())
+            self.paths.append(path)
+        self.loads = []
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def loader(self, path):
+        self.loads.append(os.path.basename(path))
+        return make_table(10)
+
+    def test_hit_and_file_change(self):
+        """测试命中及文件变化后重新加载"""
+        cache = SpecCache()
+        first = cache.get(self.paths[0], self.loader, spec_id='s1')
+        self.assertIs(cache.get(self.paths[0], self.loader, spec_id='s1'), first)
+
+        stat = os.stat(self.paths[0])
+        with open(self.paths[0], 'wb') as f:
+            f.write(b'changed')
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertIsNot(cache.get(self.paths[0], self.loader, spec_id='s1'), first)
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 2, 1))
+        self.assertEqual(self.loads, ['s1.xlsx', 's1.xlsx'])
+
+    def test_invalidate(self):
+        """测试按spec_id失效"""
+        cache = SpecCache()
+        cache.get(self.paths[0], self.loader, spec_id='s1')
+
+        self.assertTrue(cache.invalidate('s1'))
+        self.assertFalse(cache.invalidate('s1'))
+        cache.get(self.paths[0], self.loader, spec_id='s1')
+
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        """测试超过内存上限时淘汰最久未使用的规格表"""
+        cache = SpecCache(max_bytes=int(make_table(10).nbytes * 2.5))
+        cache.get(self.paths[0], self.loader, spec_id='s1')
+        cache.get(self.paths[1], self.loader, spec_id='s2')
+        cache.get(self.paths[0], self.loader, spec_id='s1')
+        cache.get(self.paths[2], self.loader, spec_id='s3')
+
+        stats = cache.stats()
+        self.assertEqual(stats['spec_ids'], ['s1', 's3'])
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['bytes'], stats['max_bytes'])
+
+    def test_failed_load_not_cached(self):
+        """测试加载失败不缓存"""
+        cache = SpecCache()
+        self.assertIsNone(cache.get(self.paths[0], lambda path: None, spec_id='s1'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+class TestComparatorSpecCache(unittest.TestCase):
+    """测试比对器使用规格表缓存"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.order_path = os.path.join(self.temp_dir, 'order.xlsx')
+        self.spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'A001', 'B999'],
+            'size': ['M', 'XL', 'M', 'M'],
+            'color': ['红', '红', '绿', '红'],
+            'unit_price': [10.0, 10.0, 10.0, 5.0]
+        }).to_excel(self.order_path, index=False)
+        pd.DataFrame({
+            'item_id': ['A001', 'A001'],
+            'size': ['M', 'L'],
+            'color': ['红', '蓝'],
+            'standard_unit_price': [10.0, 10.0]
+        }).to_excel(self.spec_path, index=False)
+        self.comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        get_spec_cache().invalidate('spec-1')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().invalidate('spec-1')
+        shutil.rmtree(self.temp_dir)
+
+    def test_spec_loaded_once(self):
+        """测试同一规格表只解析一次且结果相同"""
+        with patch.object(OrderSpecComparator, 'load_spec_data', wraps=OrderSpecComparator.load_spec_data) as mock_load:
+            first = self.comparator.compare_orders(self.order_path, self.spec_path, spec_id='spec-1')
+            second = self.comparator.compare_orders(self.order_path, self.spec_path, spec_id='spec-1')
+
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(first['stats'], second['stats'])
+        self.assertEqual(first['stats']['error_types']['SIZE_MISMATCH'], 1)
+        self.assertEqual(first['stats']['error_types']['COLOR_MISMATCH'], 1)
+        self.assertEqual(first['stats']['error_types']['PRODUCT_NOT_FOUND'], 1)
+
+
+class TestSpecCacheInvalidation(unittest.TestCase):
+    """测试删除规格表时缓存失效及统计接口"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = EnhancedProductSpecManager(specs_dir=self.temp_dir)
+        spec_path = os.path.join(self.temp_dir, 'spec-2.xlsx')
+        pd.DataFrame({'item_id': ['A001'], 'standard_unit_price': [10.0]}).to_excel(spec_path, index=False)
+        with open(os.path.join(self.temp_dir, 'spec-2.json'), 'w', encoding='utf-8') as f:
+            json.dump({'spec_id': 'spec-2', 'stored_filename': 'spec-2.xlsx'}, f)
+        get_spec_cache().get(spec_path, lambda path: make_table(1), spec_id='spec-2')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().invalidate('spec-2')
+        shutil.rmtree(self.temp_dir)
+
+    def test_delete_spec_invalidates(self):
+        """测试删除规格表后缓存被移除"""
+        self.assertIn('spec-2', get_spec_cache().stats()['spec_ids'])
+        self.manager.delete_spec('spec-2')
+        self.assertNotIn('spec-2', get_spec_cache().stats()['spec_ids'])
+
+    def test_stats_endpoint(self):
+        """测试缓存统计接口"""
+        from src.routes.spec_routes import spec_bp
+        app = Flask(__name__)
+        app.register_blueprint(spec_bp)
+
+        data = app.test_client().get('/api/spec_cache/stats').get_json()
+        self.assertIn('spec-2', data['spec_ids'])
+        self.assertIn('hit_rate', data)
+
+
+if __name__ == '__main__':
+    unittest.main()
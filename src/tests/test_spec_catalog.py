@@ -0,0 +1,123 @@
+"""
+测试规格表目录及按内容哈希查找内容相同的规格表
+"""
+
+import os
+import sys
+import io
+import json
+import hashlib
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+import pandas as pd
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.user import db
+from src.models.spec_catalog import (
+    SpecFile, record_spec, remove_spec, find_specs_by_hash, import_spec_metadata
+)
+from src.utils.enhanced_spec_manager import EnhancedProductSpecManager
+
+
+class SpecCatalogTestCase(unittest.TestCase):
+    """创建内存数据库与临时规格表目录"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir)
+
+
+class TestSpecCatalog(SpecCatalogTestCase):
+    """测试目录读写及导入"""
+
+    def test_record_find_remove(self):
+        """测试按哈希查找及删除记录"""
+        record_spec('s2', 'ab' * 32)
+        record_spec('s1', 'ab' * 32)
+        record_spec('s3', 'cd' * 32)
+
+        self.assertEqual(find_specs_by_hash('ab' * 32), ['s1', 's2'])
+        remove_spec('s1')
+        self.assertEqual(find_specs_by_hash('ab' * 32), ['s2'])
+        self.assertEqual(find_specs_by_hash('ef' * 32), [])
+
+    def test_import_metadata(self):
+        """测试导入元数据，没有sha256的旧规格表按原始文件计算"""
+        data = b'legacy spec'
+        with open(os.path.join(self.temp_dir, 'old.xlsx'), 'wb') as f:
+            f.write(data)
+        with open(os.path.join(self.temp_dir, 'old.json'), 'w', encoding='utf-8') as f:
+            json.dump({'spec_id': 'old', 'stored_filename': 'old.xlsx'}, f)
+        with open(os.path.join(self.temp_dir, 'new.json'), 'w', encoding='utf-8') as f:
+            json.dump({'spec_id': 'new', 'stored_filename': 'new.xlsx', 'sha256': 'ab' * 32}, f)
+        with open(os.path.join(self.temp_dir, 'broken.json'), 'w', encoding='utf-8') as f:
+            json.dump({'spec_id': 'broken', 'stored_filename': 'missing.xlsx'}, f)
+
+        self.assertEqual(import_spec_metadata(self.temp_dir), 2)
+        self.assertEqual(import_spec_metadata(self.temp_dir), 2)
+        self.assertEqual(SpecFile.query.count(), 2)
+        self.assertEqual(find_specs_by_hash(hashlib.sha256(data).hexdigest()), ['old'])
+        self.assertEqual(find_specs_by_hash('ab' * 32), ['new'])
+
+
+class TestSpecManagerCatalog(SpecCatalogTestCase):
+    """测试规格表上传及删除维护目录"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        super().setUp()
+        self.manager = EnhancedProductSpecManager(specs_dir=self.temp_dir)
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            'item_id': ['A001', 'A002'],
+            'product_name': ['T恤', '衬衫'],
+            'size': ['M', 'L'],
+            'color': ['红', '蓝'],
+            'standard_unit_price': [10.0, 12.0]
+        }).to_excel(buffer, index=False)
+        self.data = buffer.getvalue()
+
+    def upload(self, filename):
+        return self.manager.upload_spec(FileStorage(stream=io.BytesIO(self.data), filename=filename))
+
+    def test_duplicate_from_catalog(self):
+        """测试按目录中的哈希列出内容相同的规格表，不再读取各规格表的元数据"""
+        first = self.upload('spec.xlsx')
+        self.assertNotIn('error', first)
+        self.assertNotIn('duplicate_of', first)
+        self.assertEqual(find_specs_by_hash(first['sha256']), [first['spec_id']])
+
+        with patch('os.listdir', side_effect=AssertionError('不应扫描规格表目录')):
+            second = self.upload('copy.xlsx')
+        self.assertEqual(second['duplicate_of'], [first['spec_id']])
+
+    def test_delete_removes_entry(self):
+        """测试删除规格表后不再作为重复项列出"""
+        first = self.upload('spec.xlsx')
+        self.assertEqual(self.manager.delete_spec(first['spec_id']), {'message': '规格表删除成功'})
+        self.assertEqual(find_specs_by_hash(first['sha256']), [])
+        self.assertNotIn('duplicate_of', self.upload('copy.xlsx'))
+
+
+if __name__ == '__main__':
+    unittest.main()
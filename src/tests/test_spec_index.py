@@ -0,0 +1,148 @@
+"""
+测试规格表索引的持久化
+"""
+
+import os
+import sys
+import uuid
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils import spec_index
+from src.utils.spec_index import get_spec_index_path, save_spec_index, load_spec_index
+from src.utils.spec_cache import SpecTable, get_spec_cache
+from src.utils.order_comparator import OrderSpecComparator
+
+
+class SpecIndexTestCase(unittest.TestCase):
+    """创建规格表文件"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spec_path = os.path.join(self.temp_dir, 'spec.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'A001', 'B002', 'A001'],
+            'size': ['M', 'L', '', 'M'],
+            'color': ['红', '蓝', '白', '红'],
+            'product_name': ['衬衫', '衬衫', '裤子', '衬衫'],
+            'standard_unit_price': [10.0, 12.0, 5.5, 11.0]
+        }).to_excel(self.spec_path, index=False)
+        get_spec_cache().clear()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        get_spec_cache().clear()
+        shutil.rmtree(self.temp_dir)
+
+
+class TestSpecIndex(SpecIndexTestCase):
+    """测试索引内容、读写和过期"""
+
+    def test_index_contents(self):
+        """测试复合键行号、产品尺寸/颜色及产品单价"""
+        table = OrderSpecComparator.index_spec(self.spec_path)
+
+        self.assertTrue(os.path.exists(get_spec_index_path(self.spec_path)))
+        self.assertEqual(list(table.rows_for_key('A001|M|红')), [0, 3])
+        self.assertEqual(table.key_prices[table.key_index.get_loc('A001|M|红')], 11.0)
+        self.assertEqual(dict(zip(table.arrays['items'], table.arrays['item_prices'])), {'A001': 10.0, 'B002': 5.5})
+        self.assertEqual(sorted(table.size_pairs.tolist()), [('A001', 'L'), ('A001', 'M'), ('B002', '')])
+
+    def test_round_trip(self):
+        """测试保存后读取的结构一致"""
+        table = OrderSpecComparator.index_spec(self.spec_path)
+        loaded = load_spec_index(self.spec_path)
+
+        self.assertEqual(set(loaded.arrays), set(table.arrays))
+        for name, array in table.arrays.items():
+            np.testing.assert_array_equal(loaded.arrays[name], array)
+        self.assertTrue(loaded.size_pairs.equals(table.size_pairs))
+
+    def test_stale_and_version(self):
+        """测试规格表变化或版本不符时索引失效"""
+        save_spec_index(self.spec_path, SpecTable.from_frame(pd.read_excel(self.spec_path)))
+        self.assertIsNotNone(load_spec_index(self.spec_path))
+
+        with patch.object(spec_index, 'SPEC_INDEX_VERSION', 99):
+            self.assertIsNone(load_spec_index(self.spec_path))
+
+        pd.DataFrame({'item_id': ['X'], 'standard_unit_price': [1.0]}).to_excel(self.spec_path, index=False)
+        self.assertIsNone(load_spec_index(self.spec_path))
+
+    def test_comparator_reads_index(self):
+        """测试有索引时比对不再解析规格表"""
+        OrderSpecComparator.index_spec(self.spec_path)
+        order_path = os.path.join(self.temp_dir, 'order.xlsx')
+        pd.DataFrame({
+            'item_id': ['A001', 'B002', 'C003'], 'size': ['M', 'XL', ''], 'unit_price': [11.0, 5.5, 1.0]
+        }).to_excel(order_path, index=False)
+        comparator = OrderSpecComparator(output_dir=self.temp_dir)
+
+        with patch.object(OrderSpecComparator, 'load_spec_data') as mock_load:
+            result = comparator.compare_orders(order_path, self.spec_path)
+
+        mock_load.assert_not_called()
+        self.assertEqual(result['stats']['error_types']['PRODUCT_NOT_FOUND'], 1)
+        self.assertEqual(result['stats']['error_types']['SIZE_MISMATCH'], 1)
+
+    def test_missing_index_rebuilt(self):
+        """测试没有索引的旧规格表在比对时补建索引"""
+        comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        self.assertIsNotNone(comparator.load_spec_table(self.spec_path))
+        self.assertIsNotNone(load_spec_index(self.spec_path))
+
+
+class TestConfirmMappingIndex(SpecIndexTestCase):
+    """测试确认映射时生成索引，删除规格表时删除索引"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        super().setUp()
+        from src.routes import spec_routes
+        self.app = Flask(__name__)
+        self.app.register_blueprint(spec_routes.spec_bp)
+        self.client = self.app.test_client()
+        self.patcher = patch.object(spec_routes.spec_manager, 'specs_dir', self.temp_dir)
+        self.patcher.start()
+
+        self.file_id = str(uuid.uuid4())
+        shutil.copy(self.spec_path, os.path.join(tempfile.gettempdir(), f"{self.file_id}.xlsx"))
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        upload_path = os.path.join(tempfile.gettempdir(), f"{self.file_id}.xlsx")
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+        super().tearDown()
+
+    def test_confirm_and_delete(self):
+        """测试确认映射保存规格表及索引"""
+        response = self.client.post('/api/confirm_mapping', json={
+            'file_id': self.file_id,
+            'mapping_type': 'custom',
+            'column_mapping': {
+                'item_id': 'item_id', 'product_name': 'product_name', 'standard_unit_price': 'standard_unit_price'
+            }
+        })
+
+        self.assertEqual(response.status_code, 200, response.get_json())
+        spec_id = response.get_json()['spec_id']
+        saved_path = os.path.join(self.temp_dir, f"{spec_id}.xlsx")
+        self.assertIsNotNone(load_spec_index(saved_path))
+
+        self.assertEqual(self.client.delete(f'/api/delete_spec/{spec_id}').status_code, 200)
+        self.assertFalse(os.path.exists(get_spec_index_path(saved_path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
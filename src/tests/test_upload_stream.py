@@ -0,0 +1,220 @@
+"""
+测试上传文件的流式写入、哈希、页数统计及文件头检查
+"""
+
+import io
+import os
+import sys
+import json
+import zlib
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from werkzeug.datastructures import FileStorage
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.content_hash import file_sha256
+from src.utils import upload_stream
+from src.utils.upload_stream import (
+    PdfPageCounter, StreamingUploadRequest, UploadRejected, UploadSink, count_pdf_pages, save_upload
+)
+
+
+def make_pdf(pages):
+    """只包含页对象结构的PDF字节"""
+    objects = [b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj',
+               b'2 0 obj << /Type /Pages /Count %d >> endobj' % pages]
+    objects += [b'%d 0 obj << /Type/Page /Parent 2 0 R >> endobj' % (i + 3) for i in range(pages)]
+    return b'%PDF-1.4\n' + b'\n'.join(objects) + b'\n%%EOF\n'
+
+
+def make_object_stream_pdf(pages):
+    """页对象压缩在对象流中、使用交叉引用流的PDF字节（PDF 1.5起的常见写法）"""
+    page_numbers = list(range(3, pages + 3))
+    stream_number, xref_number = pages + 3, pages + 4
+    bodies = [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>' for _ in page_numbers]
+    offsets, position = [], 0
+    for body in bodies:
+        offsets.append(position)
+        position += len(body) + 1
+    header = b' '.join(b'%d %d' % pair for pair in zip(page_numbers, offsets)) + b' '
+    packed = zlib.compress(header + b' '.join(bodies))
+
+    kids = b' '.join(b'%d 0 R' % number for number in page_numbers)
+    objects = [
+        (1, b'<< /Type /Catalog /Pages 2 0 R >>'),
+        (2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, pages)),
+        (stream_number, b'<< /Type /ObjStm /N %d /First %d /Filter /FlateDecode /Length %d >>\nstream\n%s\nendstream'
+         % (pages, len(header), len(packed), packed))
+    ]
+    data = b'%PDF-1.5\n'
+    locations = {}
+    for number, body in objects:
+        locations[number] = len(data)
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    locations[xref_number] = len(data)
+
+    entries = [b'\x00' + (0).to_bytes(4, 'big') + (65535).to_bytes(2, 'big')]
+    for number in range(1, xref_number + 1):
+        if number in locations:
+            entries.append(b'\x01' + locations[number].to_bytes(4, 'big') + b'\x00\x00')
+        else:
+            entries.append(b'\x02' + stream_number.to_bytes(4, 'big') + (number - 3).to_bytes(2, 'big'))
+    table = b''.join(entries)
+    data += (b'%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Length %d >>\nstream\n%s\nendstream\nendobj\n'
+             % (xref_number, xref_number + 1, len(table), table))
+    return data + b'startxref\n%d\n%%%%EOF\n' % locations[xref_number]
+
+
+class TestPdfPageCounter(unittest.TestCase):
+    """测试逐块统计页对象"""
+
+    def test_chunk_boundaries(self):
+        """测试任意分块方式的页数与整体统计相同，/Pages不计入"""
+        data = make_pdf(7)
+        for size in (1, 2, 5, 11, 16, len(data)):
+            counter = PdfPageCounter()
+            for start in range(0, len(data), size):
+                counter.update(data[start:start + size])
+            self.assertEqual(counter.finish(), 7, size)
+
+    def test_no_pages(self):
+        """测试没有页对象时为None"""
+        counter = PdfPageCounter()
+        counter.update(b'%PDF-1.7 /Type /Pages')
+        self.assertIsNone(counter.finish())
+
+
+class TestUploadSink(unittest.TestCase):
+    """测试写入临时文件、文件头检查及改名"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.target = os.path.join(self.temp_dir, 'upload.pdf')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_commit(self):
+        """测试文件头分在多块中、改名后哈希与文件内容一致且没有遗留临时文件"""
+        data = make_pdf(3)
+        sink = UploadSink(self.temp_dir, kind='pdf')
+        for start in range(0, len(data), 3):
+            sink.write(data[start:start + 3])
+        info = sink.commit(self.target)
+
+        self.assertEqual(info, {'file_size': len(data), 'sha256': hashlib.sha256(data).hexdigest(), 'page_count': 3})
+        self.assertEqual(os.listdir(self.temp_dir), ['upload.pdf'])
+        with patch('builtins.open', side_effect=AssertionError('不应重新读取文件')):
+            self.assertEqual(file_sha256(self.target), info['sha256'])
+
+    def test_reject_magic(self):
+        """测试第一块不是PDF文件头时不再写入，关闭后删除临时文件"""
+        sink = UploadSink(self.temp_dir, kind='pdf')
+        sink.write(b'PK\x03\x04' + b'x' * 1000)
+        sink.write(b'y' * 1000)
+        self.assertEqual(os.path.getsize(sink.temp_path), 0)
+
+        with self.assertRaises(UploadRejected) as context:
+            sink.commit(self.target)
+        self.assertEqual(context.exception.error_code, 'INVALID_FILE_CONTENT')
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    @unittest.skipUnless(upload_stream.HAS_PDFPLUMBER, '需要pdfplumber')
+    def test_object_stream_pages(self):
+        """测试页对象压缩在对象流中时从页树根读取页数，逐块扫描统计不到"""
+        data = make_object_stream_pdf(5)
+        counter = PdfPageCounter()
+        counter.update(data)
+        self.assertIsNone(counter.finish())
+
+        sink = UploadSink(self.temp_dir, kind='pdf')
+        sink.write(data)
+        self.assertEqual(sink.commit(self.target)['page_count'], 5)
+        self.assertEqual(count_pdf_pages(self.target), 5)
+
+    def test_page_count_fallback(self):
+        """测试无法从页树根读取页数时使用逐块统计的页对象数"""
+        with patch.object(upload_stream, 'count_pdf_pages', return_value=None):
+            info = save_upload(FileStorage(io.BytesIO(make_pdf(3)), filename='a.pdf'), self.target, kind='pdf')
+        self.assertEqual(info['page_count'], 3)
+
+    def test_size_limit(self):
+        """测试超过大小上限"""
+        sink = UploadSink(self.temp_dir, kind='pdf', max_bytes=100)
+        sink.write(make_pdf(1))
+        sink.write(b'0' * 100)
+        with self.assertRaises(UploadRejected) as context:
+            sink.commit(self.target)
+        self.assertEqual(context.exception.error_code, 'FILE_TOO_LARGE')
+
+    def test_save_upload_copies_stream(self):
+        """测试普通上传流分块复制，结果相同"""
+        data = make_pdf(2)
+        info = save_upload(FileStorage(io.BytesIO(data), filename='a.pdf'), self.target, kind='pdf')
+        self.assertEqual(info['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertEqual(info['page_count'], 2)
+        with open(self.target, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+        with self.assertRaises(UploadRejected):
+            save_upload(FileStorage(io.BytesIO(b''), filename='b.xlsx'), self.target, kind='xlsx')
+
+
+class TestStreamingUploadRoute(unittest.TestCase):
+    """测试上传接口在解析请求时直接写入临时文件"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.temp_dir = tempfile.mkdtemp()
+        request_class = type('TestUploadRequest', (StreamingUploadRequest,), {'upload_dir': self.temp_dir})
+        self.app = Flask(__name__)
+        self.app.request_class = request_class
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.paths = patch('src.routes.pdf_converter.get_upload_output_paths',
+                           return_value=(self.temp_dir, self.temp_dir))
+        self.paths.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.paths.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def upload(self, data, filename):
+        return self.app.test_client().post('/api/pdf/upload', content_type='multipart/form-data',
+                                           data={'file': (io.BytesIO(data), filename)})
+
+    def test_upload_pdf(self):
+        """测试上传后元数据记录哈希及页数"""
+        data = make_pdf(4)
+        with patch('src.routes.pdf_converter.save_upload', wraps=save_upload) as mock_save:
+            response = self.upload(data, 'order.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(mock_save.call_args[0][0].stream, UploadSink)
+
+        body = response.get_json()
+        with open(os.path.join(self.temp_dir, f"{body['file_id']}.json"), encoding='utf-8') as f:
+            metadata = json.load(f)
+        self.assertEqual(metadata['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertEqual(metadata['page_count'], 4)
+        self.assertEqual(body['sha256'], metadata['sha256'])
+        self.assertFalse([name for name in os.listdir(self.temp_dir) if name.endswith('.part')])
+
+    def test_reject_non_pdf(self):
+        """测试扩展名为pdf但内容不是PDF时拒绝且不保留文件"""
+        response = self.upload(b'<html>not a pdf</html>', 'fake.pdf')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error_code'], 'INVALID_FILE_CONTENT')
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
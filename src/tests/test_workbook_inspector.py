@@ -0,0 +1,146 @@
+"""
+测试工作簿检查模块
+"""
+
+import os
+import re
+import sys
+import unittest
+import zipfile
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from openpyxl import Workbook
+from flask import Flask
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.workbook_inspector import (
+    inspect_workbook, list_sheet_names, is_sheet_empty, InvalidWorkbookError
+)
+from src.utils.order_comparator import OrderSpecComparator
+
+
+class TestWorkbookInspector(unittest.TestCase):
+    """测试工作表列表及维度读取"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_path = os.path.join(self.temp_dir, 'order.xlsx')
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = 'Order_Items'
+        ws.append(['item_id', 'unit_price'])
+        for i in range(10):
+            ws.append([f'ITEM{i:03d}', 10 + i])
+        header_only = wb.create_sheet('只有表头')
+        header_only.append(['item_id', 'unit_price'])
+        wb.create_sheet('Empty')
+        hidden = wb.create_sheet('Hidden')
+        hidden.append(['item_id'])
+        hidden.append(['X'])
+        hidden.sheet_state = 'hidden'
+        wb.save(self.excel_path)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_sheet_names_match_pandas(self):
+        """测试工作表顺序与pandas一致"""
+        self.assertEqual(list_sheet_names(self.excel_path), pd.ExcelFile(self.excel_path).sheet_names)
+
+    def test_dimensions(self):
+        """测试维度信息及空工作表判断"""
+        sheets = {sheet['name']: sheet for sheet in inspect_workbook(self.excel_path, dimensions=True)}
+
+        self.assertEqual(sheets['Order_Items']['dimension']['ref'], 'A1:B11')
+        self.assertEqual(sheets['Hidden']['state'], 'hidden')
+        self.assertFalse(is_sheet_empty(sheets['Order_Items']))
+        self.assertTrue(is_sheet_empty(sheets['只有表头']))
+        self.assertTrue(is_sheet_empty(sheets['Empty']))
+        self.assertFalse(is_sheet_empty({'name': 'unknown', 'dimension': None}))
+
+    def test_invalid_file(self):
+        """测试非xlsx文件"""
+        bad_path = os.path.join(self.temp_dir, 'bad.xlsx')
+        with open(bad_path, 'wb') as f:
+            f.write(b'not a zip file')
+
+        with self.assertRaises(InvalidWorkbookError):
+            list_sheet_names(bad_path)
+
+    def test_comparator_opens_workbook_once(self):
+        """测试比对器只打开一次工作簿，逐个解析工作表，空工作表不计入订单数据"""
+        comparator = OrderSpecComparator(output_dir=self.temp_dir)
+        parse = pd.ExcelFile.parse
+
+        with patch.object(pd.ExcelFile, 'parse', autospec=True, side_effect=parse) as mock_parse, \
+                patch('src.utils.order_comparator.pd.ExcelFile', wraps=pd.ExcelFile) as mock_open, \
+                patch('src.utils.order_comparator.pd.read_excel') as mock_read:
+            df = comparator.load_order_data(self.excel_path)
+
+        parsed = [call.args[1] for call in mock_parse.call_args_list]
+        self.assertEqual(parsed, ['Order_Items', '只有表头', 'Empty', 'Hidden'])
+        mock_open.assert_called_once()
+        mock_read.assert_not_called()
+        self.assertEqual(len(df), 11)
+        self.assertEqual(sorted(df['工作表'].unique()), ['Hidden', 'Order_Items'])
+
+    def test_comparator_ignores_stale_dimension(self):
+        """测试维度信息不准确（<dimension ref="A1"/>）时仍按实际数据加载工作表"""
+        stale_path = os.path.join(self.temp_dir, 'stale.xlsx')
+        with zipfile.ZipFile(self.excel_path) as source, zipfile.ZipFile(stale_path, 'w') as target:
+            for item in source.infolist():
+                data = source.read(item.filename)
+                if item.filename.startswith('xl/worksheets/'):
+                    data = re.sub(rb'<dimension ref="[^"]*" ?/>', b'<dimension ref="A1"/>', data)
+                target.writestr(item, data)
+        self.assertTrue(is_sheet_empty(inspect_workbook(stale_path, dimensions=True)[0]))
+
+        df = OrderSpecComparator(output_dir=self.temp_dir).load_order_data(stale_path)
+        self.assertEqual(len(df), 11)
+        self.assertEqual(len(df), len(pd.read_excel(stale_path, sheet_name='Order_Items')) + 1)
+
+class TestPreviewConvertedEndpoint(unittest.TestCase):
+    """测试preview_converted接口"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        with pd.ExcelWriter(os.path.join(self.temp_dir, 'f1.xlsx'), engine='openpyxl') as writer:
+            pd.DataFrame({'ITEM': ['A', 'B']}).to_excel(writer, sheet_name='Order_Items', index=False)
+            pd.DataFrame({'KEY': ['k']}).to_excel(writer, sheet_name='Summary', index=False)
+
+        from src.routes.pdf_converter import pdf_converter_bp
+        self.app = Flask(__name__)
+        self.app.register_blueprint(pdf_converter_bp, url_prefix='/api/pdf')
+        self.client = self.app.test_client()
+
+        mock_path_manager = MagicMock()
+        mock_path_manager.config.uploads_dir = self.temp_dir
+        mock_path_manager.config.outputs_dir = self.temp_dir
+        self.patcher = patch('src.routes.pdf_converter.get_path_manager', return_value=mock_path_manager)
+        self.patcher.start()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_sheets_listed(self):
+        """测试返回工作表列表及可选维度"""
+        data = self.client.get('/api/pdf/preview_converted/f1').get_json()
+        self.assertEqual(data['sheets'], ['Order_Items', 'Summary'])
+        self.assertNotIn('sheet_info', data)
+
+        data = self.client.get('/api/pdf/preview_converted/f1?dimensions=true').get_json()
+        self.assertEqual(data['sheet_info'][0]['dimension']['max_row'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
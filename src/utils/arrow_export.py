@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Arrow IPC导出模块 - 以application/vnd.apache.arrow.stream格式输出表格数据
+
+客户端通过请求头 Accept: application/vnd.apache.arrow.stream 启用，需要安装pyarrow。
+数量、单价、金额、交货日期等列按名称转换为数值/日期类型，其余列保留pandas推断的类型，
+无法统一类型的列输出为字符串。
+"""
+
+import io
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from flask import Response
+
+from .json_utils import safe_jsonify
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# 每个record batch包含的行数
+ARROW_BATCH_ROWS = 500
+
+# 按列名（大写）指定的类型：转换后的标准列名及比对器使用的列名
+ARROW_COLUMN_TYPES = {
+    'QUANTITY': 'integer',
+    'PRICE': 'float',
+    'AMOUNT': 'float',
+    'DELIVERY DATE': 'date',
+    'UNIT_PRICE': 'float',
+    'TOTAL_PRICE': 'float',
+    'STANDARD_UNIT_PRICE': 'float'
+}
+
+
+def wants_arrow(request) -> bool:
+    """判断客户端是否请求Arrow IPC流（Accept头中Arrow优先于JSON和NDJSON）"""
+    best = request.accept_mimetypes.best_match(
+        ['application/json', 'application/x-ndjson', ARROW_STREAM_MIMETYPE]
+    )
+    return best == ARROW_STREAM_MIMETYPE
+
+
+def _to_number(series: pd.Series) -> np.ndarray:
+    """转换为float64数组，去掉千分位和货币符号，无法解析的值为NaN"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    cleaned = series.astype('string').str.replace(r'[^\d.\-]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _typed_array(series: pd.Series, kind: str):
+    """按指定类型转换列"""
+    if kind == 'date':
+        values = pd.to_datetime(series, errors='coerce', format='mixed').dt.normalize()
+        return pa.array(values.to_numpy(), from_pandas=True).cast(pa.date32())
+
+    values = _to_number(series)
+    mask = np.isnan(values)
+    if kind == 'integer':
+        valid = values[~mask]
+        if np.all(valid == np.floor(valid)):
+            return pa.array(np.where(mask, 0, values).astype(np.int64), mask=mask)
+    return pa.array(values, mask=mask, type=pa.float64())
+
+
+def _inferred_array(series: pd.Series):
+    """使用pandas推断的类型，对象列无法统一类型时输出为字符串"""
+    if series.dtype != object:
+        return pa.array(series, from_pandas=True)
+    try:
+        array = pa.array(series, from_pandas=True)
+        if not pa.types.is_null(array.type):
+            return array
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    strings = series.astype('string')
+    return pa.array(strings.to_numpy(dtype=object, na_value=None), type=pa.string())
+
+
+def dataframe_to_arrow(df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None):
+    """
+    DataFrame转换为Arrow表
+
+    Args:
+        df: 数据
+        metadata: 写入schema的元数据（如工作表名称、总行数）
+
+    Returns:
+        pyarrow.Table
+    """
+    arrays = []
+    for i in range(len(df.columns)):
+        series = df.iloc[:, i]
+        kind = ARROW_COLUMN_TYPES.get(str(df.columns[i]).strip().upper())
+        arrays.append(_typed_array(series, kind) if kind else _inferred_array(series))
+
+    table = pa.Table.from_arrays(arrays, names=[str(column) for column in df.columns])
+    if metadata:
+        table = table.replace_schema_metadata({str(k): str(v) for k, v in metadata.items()})
+    return table
+
+
+def rows_to_arrow(columns: Sequence[Any], rows: Iterator[List[Any]],
+                  metadata: Optional[Dict[str, Any]] = None):
+    """由行迭代器（如stream_sheet_rows的结果）构建Arrow表"""
+    df = pd.DataFrame(list(rows), columns=pd.Index(columns, dtype=object))
+    return dataframe_to_arrow(df, metadata)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    """取出缓冲区中已写入的字节并清空"""
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def encode_arrow_stream(table, batch_rows: int = ARROW_BATCH_ROWS) -> Iterator[bytes]:
+    """按record batch逐块编码为Arrow IPC流"""
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, table.schema)
+    yield _drain(sink)
+    for batch in table.to_batches(max_chunksize=batch_rows):
+        writer.write_batch(batch)
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def arrow_response(table) -> Response:
+    """创建Arrow IPC流式响应"""
+    response = Response(encode_arrow_stream(table), mimetype=ARROW_STREAM_MIMETYPE)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def arrow_unavailable_response() -> Response:
+    """未安装pyarrow时的406响应"""
+    response = safe_jsonify({'error': '服务器未安装pyarrow，无法输出Arrow格式'})
+    response.status_code = 406
+    return response
+
+
+__all__ = [
+    'HAS_PYARROW',
+    'ARROW_STREAM_MIMETYPE',
+    'ARROW_BATCH_ROWS',
+    'ARROW_COLUMN_TYPES',
+    'wants_arrow',
+    'dataframe_to_arrow',
+    'rows_to_arrow',
+    'encode_arrow_stream',
+    'arrow_response',
+    'arrow_unavailable_response'
+]
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+列画像模块 - 按列内容及表头关键词推断没有列名的表格各列的含义
+
+对每列的前若干个非空值一次性计算特征（数字比例、小数比例、字母数字编码比例、文本比例），
+表头行的关键词命中按单元格向量化匹配。订单比对（OrderSpecComparator）和PDF表格列名标准化
+（standardize_column_names）共用这里的关键词表和打分规则，PDF表格在打分表中另加总价一项。
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 每列参与内容推断的非空值个数
+PROFILE_SAMPLE_SIZE = 10
+
+# 订单表头关键词，按优先顺序：一列同时命中多个字段时取第一个
+ORDER_FIELD_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('item_id', ['item', 'number', 'id', '编号', '货号', '产品编号', '商品编号']),
+    ('size', ['size', 'dimension', '尺寸', '规格', '型号']),
+    ('color', ['color', 'colour', '颜色', '色彩']),
+    ('unit_price', ['price', 'unit', 'cost', '单价', '价格', '金额']),
+    ('quantity', ['quantity', 'qty', 'amount', '数量', '件数']),
+    ('total_price', ['total', 'sum', '总价', '合计', '小计']),
+    ('product_name', ['product', 'description', 'name', '产品', '商品', '名称', '描述'])
+]
+
+# 判断一行是否为订单表头行的关键词
+ORDER_HEADER_KEYWORDS = ['item', 'product', 'price', 'size', 'color', 'quantity', 'amount']
+
+# PDF订单表格的表头关键词（大写）
+PDF_HEADER_KEYWORDS = ['ITEM', 'EXTERNAL', 'NUMBER', 'DESCRIPTION', 'DELIVERY', 'DATE', 'UNIT', 'QUANTITY', 'QTY',
+                       'PRICE', 'AMOUNT']
+
+# PDF订单表格第一行数据即为表头时包含的关键词
+PDF_FIRST_ROW_KEYWORDS = ['DESCRIPTION', 'ITEM', 'QTY', 'PRICE', 'AMOUNT']
+
+# PDF订单表格的标准列名及别名
+PDF_COLUMN_ALIASES: Dict[str, List[str]] = {
+    'ITEM': ['item', 'item_code', 'code', '项目', '编号', 'part', 'part_no'],
+    'EXTERNAL ITEM NUMBER': [
+        'external_item_number', 'external_item', 'ext_item', 'supplier_code', 'vendor_code',
+        'external item number', 'external item', 'ext item number'
+    ],
+    'DESCRIPTION': ['description', 'desc', 'product', 'name', '描述', '产品名称', 'product_name'],
+    'DELIVERY DATE': [
+        'delivery_date', 'delivery', 'due_date', 'ship_date',
+        'delivery date'
+    ],
+    'UNIT': ['unit', 'uom', 'measure', '单位', 'units'],
+    'QUANTITY': ['quantity', 'qty', 'amount', '数量', 'qnty'],
+    'PRICE': ['price', 'unit_price', 'cost', '单价', '价格', 'rate'],
+    'AMOUNT': ['amount', 'total', 'total_price', '总价', '金额', 'total_amount']
+}
+
+# 按列内容推断的打分规则，按优先顺序：(字段, 特征, 下限)，特征均超过下限时该列可作为该字段
+CONTENT_RULES: List[Tuple[str, Dict[str, float]]] = [
+    ('item_id', {'code_ratio': 0.0}),
+    ('unit_price', {'numeric_ratio': 0.7, 'decimal_ratio': 0.0}),
+    ('quantity', {'numeric_ratio': 0.7}),
+    ('product_name', {'text_ratio': 0.5})
+]
+
+# PDF订单表格按列内容推断的打分规则：单价之后的下一个小数列为总价
+PDF_CONTENT_RULES: List[Tuple[str, Dict[str, float]]] = (
+    CONTENT_RULES[:2] + [('total_price', {'numeric_ratio': 0.7, 'decimal_ratio': 0.0})] + CONTENT_RULES[2:]
+)
+
+# 按列内容推断出的字段对应的PDF标准列名
+PDF_CONTENT_COLUMNS: Dict[str, str] = {
+    'item_id': 'ITEM',
+    'product_name': 'DESCRIPTION',
+    'quantity': 'QUANTITY',
+    'unit_price': 'PRICE',
+    'total_price': 'AMOUNT'
+}
+
+_LETTER = re.compile(r'[^\W\d_]')
+_ALPHA_HEADER = r'^[A-Za-z\s]+$'
+
+
+def keyword_pattern(keywords: Sequence[str]) -> str:
+    """匹配任一关键词（子串）的正则表达式"""
+    return '|'.join(re.escape(keyword) for keyword in keywords)
+
+
+def cell_text(df: pd.DataFrame) -> pd.DataFrame:
+    """str(value).strip()后的单元格文本（列按位置编号），空值为空字符串"""
+    values = df.to_numpy(dtype=object)
+    text = pd.DataFrame(values).map(lambda value: '' if pd.isna(value) else str(value).strip())
+    return text.astype(object)
+
+
+def contains_any(text: pd.DataFrame, keywords: Sequence[str]) -> pd.DataFrame:
+    """各单元格文本是否包含任一关键词"""
+    pattern = keyword_pattern(keywords)
+    return text.apply(lambda column: column.str.contains(pattern, regex=True))
+
+
+def keyword_rows(df: pd.DataFrame, keywords: Sequence[str]) -> np.ndarray:
+    """包含任一关键词（小写比较）的行位置"""
+    text = cell_text(df).apply(lambda column: column.str.lower())
+    return np.flatnonzero(contains_any(text, keywords).any(axis=1).to_numpy())
+
+
+def header_like_ratio(df: pd.DataFrame, keywords: Sequence[str]) -> pd.Series:
+    """
+    各行非空单元格中像表头的比例：包含关键词（大写比较），或者是长度大于2的纯字母文本
+
+    Returns:
+        pandas.Series: 按行位置编号，没有非空单元格的行为NaN
+    """
+    text = cell_text(df).apply(lambda column: column.str.upper())
+    non_empty = text != ''
+    alpha = text.apply(lambda column: column.str.match(_ALPHA_HEADER) & (column.str.len() > 2))
+    header_like = non_empty & (contains_any(text, keywords) | alpha)
+    counts = non_empty.sum(axis=1)
+    return (header_like.sum(axis=1) / counts).where(counts > 0)
+
+
+def match_header_fields(df: pd.DataFrame,
+                        field_keywords: Sequence[Tuple[str, Sequence[str]]] = ORDER_FIELD_KEYWORDS
+                        ) -> Dict[int, str]:
+    """
+    由表头行的文本确定各列字段：依次检查各字段的关键词，一列取第一个命中的字段
+
+    Args:
+        df: 表头行
+        field_keywords: (字段, 关键词)列表
+
+    Returns:
+        dict: 列位置 -> 字段
+    """
+    text = cell_text(df).apply(lambda column: column.str.lower())
+    fields = pd.Series(None, index=text.columns, dtype=object)
+    for field, keywords in field_keywords:
+        hits = contains_any(text, keywords).any(axis=0) & fields.isna()
+        fields[hits] = field
+    return {int(position): field for position, field in fields.dropna().items()}
+
+
+def profile_columns(df: pd.DataFrame, sample_size: int = PROFILE_SAMPLE_SIZE) -> pd.DataFrame:
+    """
+    计算各列前sample_size个非空值的内容特征
+
+    Returns:
+        pandas.DataFrame: 按列位置编号，列为count（样本数）、numeric_ratio（数字）、
+                          decimal_ratio（有小数部分的数字）、code_ratio（长度大于3的字母数字编码）、
+                          text_ratio（长度大于2的非数字文本）
+    """
+    present = df.notna().to_numpy()
+    taken = present & (np.cumsum(present, axis=0) <= sample_size)
+    rows, positions = np.nonzero(taken)
+    values = pd.Series(df.to_numpy(dtype=object)[rows, positions], dtype=object)
+
+    text = values.map(str).astype(object)
+    number = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+    numeric = number.notna()
+    # 文本中的小数点（如"10.00"）或数值的小数部分；读取为浮点数的整数（如数量10.0）不算小数
+    is_text = values.map(lambda value: isinstance(value, str)).astype(bool)
+    fractional = np.isfinite(number) & (number != np.floor(number.where(np.isfinite(number), 0)))
+    decimal = numeric & ((is_text & text.str.contains('.', regex=False)) | (~is_text & fractional))
+    length = text.str.len()
+    features = pd.DataFrame({
+        'position': positions,
+        'numeric_ratio': numeric,
+        'decimal_ratio': decimal,
+        'code_ratio': (length > 3) & text.str.contains(_LETTER) & text.str.contains(r'\d'),
+        'text_ratio': (length > 2) & ~numeric
+    })
+
+    profile = features.groupby('position').mean().reindex(range(df.shape[1]), fill_value=0.0)
+    profile.insert(0, 'count', np.bincount(positions, minlength=df.shape[1]))
+    return profile
+
+
+def score_columns(profile: pd.DataFrame, rules: Sequence[Tuple[str, Dict[str, float]]] = CONTENT_RULES
+                  ) -> pd.DataFrame:
+    """打分表：各列（行）是否满足各字段（列）的内容规则，没有样本的列不满足任何规则"""
+    scores = pd.DataFrame(index=profile.index)
+    for field, thresholds in rules:
+        matched = profile['count'] > 0
+        for feature, lower in thresholds.items():
+            matched &= profile[feature] > lower
+        scores[field] = matched
+    return scores
+
+
+def infer_fields_by_content(df: pd.DataFrame, sample_size: int = PROFILE_SAMPLE_SIZE,
+                            rules: Sequence[Tuple[str, Dict[str, float]]] = CONTENT_RULES) -> Dict[int, str]:
+    """
+    按列内容推断字段：依列顺序，每列取打分表中第一个满足且尚未分配的字段
+
+    Returns:
+        dict: 列位置 -> 字段
+    """
+    scores = score_columns(profile_columns(df, sample_size), rules)
+    assigned: Dict[int, str] = {}
+    for position, row in zip(scores.index.tolist(), scores.to_numpy().tolist()):
+        field = next((name for name, ok in zip(scores.columns, row) if ok and name not in assigned.values()), None)
+        if field is not None:
+            assigned[position] = field
+    return assigned
+
+
+def match_column_alias(name: str, aliases: Dict[str, Sequence[str]] = PDF_COLUMN_ALIASES,
+                       normalize=str) -> Optional[str]:
+    """规范化后的列名与别名相同时返回对应的标准列名"""
+    normalized = normalize(name)
+    for standard, names in aliases.items():
+        if any(normalize(alias) == normalized for alias in names):
+            return standard
+    return None
+
+
+__all__ = [
+    'PROFILE_SAMPLE_SIZE',
+    'ORDER_FIELD_KEYWORDS',
+    'ORDER_HEADER_KEYWORDS',
+    'PDF_HEADER_KEYWORDS',
+    'PDF_FIRST_ROW_KEYWORDS',
+    'PDF_COLUMN_ALIASES',
+    'CONTENT_RULES',
+    'PDF_CONTENT_RULES',
+    'PDF_CONTENT_COLUMNS',
+    'cell_text',
+    'contains_any',
+    'keyword_rows',
+    'header_like_ratio',
+    'match_header_fields',
+    'profile_columns',
+    'score_columns',
+    'infer_fields_by_content',
+    'match_column_alias'
+]
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+比对结果摘要模块 - 持久化比对统计信息、预览数据及每行的比对结果
+
+摘要与比对结果工作簿一起保存在outputs目录中（order_comparison_{id}.json），
+预览和统计接口直接读取摘要，不需要重新解析xlsx。
+延迟生成工作簿时另存每行的比对结果（order_comparison_{id}.rows.npz），生成工作簿时不需要重新比对
+"""
+
+import os
+import json
+import logging
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .conversion_artifacts import write_json_atomic
+from .json_utils import prepare_sheet_data
+from .row_errors import RowErrors, add_result_columns
+
+logger = logging.getLogger(__name__)
+
+# 摘要格式版本，格式变化时递增以忽略旧摘要
+SUMMARY_VERSION = 1
+
+# 预览数据保存的最大行数
+COMPARISON_PREVIEW_ROWS = 100
+
+# 每行比对结果的格式版本
+ROWS_VERSION = 2
+
+
+def get_comparison_summary_path(output_dir: str, result_file_id: str) -> str:
+    """获取比对结果摘要文件路径"""
+    return os.path.join(output_dir, f"order_comparison_{result_file_id}.json")
+
+
+def build_comparison_preview(result_df: pd.DataFrame, max_rows: int = COMPARISON_PREVIEW_ROWS,
+                             errors: Optional[RowErrors] = None) -> Dict[str, Any]:
+    """
+    生成比对结果的预览数据，内容与结果工作簿第一个工作表的前max_rows行一致
+
+    Args:
+        result_df: 包含核对状态和错误详情的比对结果
+        max_rows: 预览行数
+        errors: result_df尚未添加核对状态和错误详情时为每行的比对错误，只为预览行生成错误详情
+
+    Returns:
+        dict: columns, data
+    """
+    df = result_df
+    positions = np.arange(len(df))
+    if '工作表' in df.columns and '表格序号' in df.columns and not df.empty:
+        # 多工作表结果按工作表名称排序保存，第一个工作表即排序后的第一个
+        first_sheet = sorted(df['工作表'].dropna().unique(), key=str)[0]
+        in_sheet = (df['工作表'] == first_sheet).to_numpy()
+        df = df[in_sheet].drop(['工作表', '表格序号'], axis=1)
+        positions = positions[in_sheet]
+
+    head = df.head(max_rows)
+    if errors is not None:
+        head = add_result_columns(head.copy(), errors.take(positions[:max_rows]))
+    # 空字符串在工作簿中保存为空单元格，预览中同样显示为null
+    head = head.where(head.ne(''))
+    sheet_data = prepare_sheet_data(head)
+    return {'columns': sheet_data['columns'], 'data': sheet_data['data']}
+
+
+def save_comparison_summary(output_dir: str, result_file_id: str, stats: Dict[str, Any],
+                            preview: Dict[str, Any], **extra: Any) -> bool:
+    """
+    保存比对结果摘要
+
+    Args:
+        output_dir: 输出目录
+        result_file_id: 比对结果ID
+        stats: compare_orders生成的统计信息
+        preview: build_comparison_preview生成的预览数据
+        **extra: 其它需要记录的信息（如check_total_calc）
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        summary = {
+            'version': SUMMARY_VERSION,
+            'result_file_id': result_file_id,
+            'created_time': datetime.now().isoformat(),
+            'stats': stats,
+            'preview': preview
+        }
+        summary.update(extra)
+        write_json_atomic(get_comparison_summary_path(output_dir, result_file_id), summary)
+        return True
+    except Exception as e:
+        logger.warning(f"保存比对结果摘要失败: {result_file_id}, 错误: {e}")
+        return False
+
+
+def load_comparison_summary(output_dir: str, result_file_id: str) -> Optional[Dict[str, Any]]:
+    """
+    读取比对结果摘要
+
+    Returns:
+        摘要字典，不存在、损坏或版本不匹配时返回None
+    """
+    path = get_comparison_summary_path(output_dir, result_file_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        if summary.get('version') != SUMMARY_VERSION:
+            return None
+        return summary
+    except Exception as e:
+        logger.warning(f"读取比对结果摘要失败: {result_file_id}, 错误: {e}")
+        return None
+
+
+def get_comparison_rows_path(output_dir: str, result_file_id: str) -> str:
+    """获取每行比对结果文件路径"""
+    return os.path.join(output_dir, f"order_comparison_{result_file_id}.rows.npz")
+
+
+def save_comparison_rows(output_dir: str, result_file_id: str, errors: RowErrors,
+                         layer_names: Optional[np.ndarray] = None) -> bool:
+    """
+    保存每行的比对结果（先写临时文件再替换）
+
+    保存错误位掩码及有问题的行的数值明细（见RowErrors.to_arrays），分层比对的匹配规格表保存为编码和名称
+
+    Args:
+        output_dir: 输出目录
+        result_file_id: 比对结果ID
+        errors: 每行的比对错误
+        layer_names: 每行匹配的规格表（分层比对）
+
+    Returns:
+        bool: 是否保存成功
+    """
+    path = get_comparison_rows_path(output_dir, result_file_id)
+    arrays = {
+        'version': np.array(ROWS_VERSION),
+        **errors.to_arrays()
+    }
+    if layer_names is not None:
+        layer_codes, names = pd.factorize(pd.Series(layer_names, dtype=object).fillna(''))
+        arrays['layer_codes'] = layer_codes.astype(np.int32)
+        arrays['layer_names'] = np.asarray(names, dtype=object).astype(str)
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return True
+    except Exception as e:
+        logger.warning(f"保存每行比对结果失败: {result_file_id}, 错误: {e}")
+        return False
+
+
+def load_comparison_rows(output_dir: str, result_file_id: str) -> Optional[Dict[str, Any]]:
+    """
+    读取每行的比对结果
+
+    Returns:
+        dict: errors（RowErrors），分层比对时还有layer_names；不存在、损坏或版本不匹配时返回None
+    """
+    path = get_comparison_rows_path(output_dir, result_file_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != ROWS_VERSION:
+                return None
+            rows = {'errors': RowErrors.from_arrays(data)}
+            if 'layer_codes' in data.files:
+                rows['layer_names'] = data['layer_names'].astype(object)[data['layer_codes']]
+        return rows
+    except Exception as e:
+        logger.warning(f"读取每行比对结果失败: {result_file_id}, 错误: {e}")
+        return None
+
+
+def remove_comparison_result(output_dir: str, result_file_id: str) -> None:
+    """删除比对结果工作簿、摘要及每行比对结果"""
+    for path in (os.path.join(output_dir, f"order_comparison_{result_file_id}.xlsx"),
+                 get_comparison_summary_path(output_dir, result_file_id),
+                 get_comparison_rows_path(output_dir, result_file_id)):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"删除比对结果失败: {path}, 错误: {e}")
+
+
+def backfill_comparison_summary(output_dir: str, result_file_id: str,
+                                error_types: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    为没有摘要的旧比对结果读取一次工作簿并生成摘要
+
+    错误类型统计根据错误详情文本还原
+
+    Args:
+        output_dir: 输出目录
+        result_file_id: 比对结果ID
+        error_types: 错误类型代码到名称的映射（OrderSpecComparator.ERROR_TYPES）
+
+    Returns:
+        摘要字典，工作簿不存在时返回None
+    """
+    file_path = os.path.join(output_dir, f"order_comparison_{result_file_id}.xlsx")
+    if not os.path.exists(file_path):
+        return None
+
+    sheets = pd.read_excel(file_path, sheet_name=None)
+    frames = list(sheets.values())
+    first_df = frames[0] if frames else pd.DataFrame()
+
+    stats = {
+        'total_records': 0,
+        'error_records': 0,
+        'error_types': {error_type: 0 for error_type in error_types}
+    }
+    for df in frames:
+        stats['total_records'] += len(df)
+        if '核对状态' in df.columns:
+            stats['error_records'] += int((df['核对状态'] == '有问题').sum())
+        if '错误详情' in df.columns:
+            for detail in df['错误详情'].dropna():
+                for message in str(detail).split('; '):
+                    for error_type, name in error_types.items():
+                        if message.startswith(name):
+                            stats['error_types'][error_type] += 1
+                            break
+
+    preview = build_comparison_preview(first_df)
+    save_comparison_summary(output_dir, result_file_id, stats, preview, backfilled=True)
+    return load_comparison_summary(output_dir, result_file_id) or {
+        'result_file_id': result_file_id, 'stats': stats, 'preview': preview
+    }
+
+
+__all__ = [
+    'SUMMARY_VERSION',
+    'COMPARISON_PREVIEW_ROWS',
+    'ROWS_VERSION',
+    'get_comparison_summary_path',
+    'build_comparison_preview',
+    'save_comparison_summary',
+    'load_comparison_summary',
+    'get_comparison_rows_path',
+    'save_comparison_rows',
+    'load_comparison_rows',
+    'remove_comparison_result',
+    'backfill_comparison_summary'
+]
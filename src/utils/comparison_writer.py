@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+比对结果流式写入模块 - 基于openpyxl只写模式按块追加比对结果
+
+已写入的行由openpyxl写入临时文件，不保留在内存中。格式与OrderSpecComparator.save_with_formatting一致：
+问题行整行高亮，核对状态列红色粗体（多工作表时错误详情列同样）。
+两点不同：openpyxl在保存前会把全部批注保留在内存中，因此不为错误详情添加批注（内容与错误详情列相同）；
+只写模式下列宽必须在写入第一行之前设置，因此按表头和该工作表的第一块数据计算。
+"""
+
+import logging
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger(__name__)
+
+# 与pandas.DataFrame.to_excel一致的表头样式
+_THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+# 列宽上限
+MAX_COLUMN_WIDTH = 50
+
+
+class ComparisonWorkbookWriter:
+    """按块追加比对结果的工作簿写入器"""
+
+    def __init__(self, file_path: str, sheet_names: Sequence[str], columns: Sequence[Any],
+                 error_fill, error_font, multi_sheet: bool = False):
+        """
+        Args:
+            file_path: 结果工作簿路径
+            sheet_names: 工作表名称（按此顺序创建）
+            columns: 每个工作表的列名
+            error_fill: 问题行的填充样式
+            error_font: 核对状态/错误详情的字体
+            multi_sheet: 是否为多工作表结果（决定错误详情列的格式）
+        """
+        self.file_path = file_path
+        self.columns = list(columns)
+        self.error_fill = error_fill
+        self.error_font = error_font
+        self.multi_sheet = multi_sheet
+        self.status_idx = self.columns.index('核对状态') if '核对状态' in self.columns else None
+        self.error_idx = self.columns.index('错误详情') if '错误详情' in self.columns else None
+
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {name: self.workbook.create_sheet(title=name) for name in sheet_names}
+        self._started: Dict[str, bool] = {name: False for name in sheet_names}
+        self.rows_written = 0
+
+    def _start_sheet(self, sheet_name: str, rows: List[List[Any]]):
+        """按表头和第一块数据设置列宽并写入表头"""
+        ws = self.sheets[sheet_name]
+        for col_idx, name in enumerate(self.columns):
+            max_length = max([len(str(name))] + [len(str(row[col_idx])) for row in rows])
+            ws.column_dimensions[get_column_letter(col_idx + 1)].width = min(max_length + 2, MAX_COLUMN_WIDTH)
+
+        header = []
+        for name in self.columns:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        ws.append(header)
+        self._started[sheet_name] = True
+
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> List[List[Any]]:
+        """DataFrame转换为行列表，空值和空字符串写为空单元格"""
+        values = df.astype(object).where(df.notna() & df.ne(''), None)
+        return [list(row) for row in values.itertuples(index=False, name=None)]
+
+    def _styled_row(self, ws, row: List[Any]) -> List[Any]:
+        """问题行：整行高亮并设置字体"""
+        cells = []
+        for col_idx, value in enumerate(row):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.fill = self.error_fill
+            if col_idx == self.status_idx or (self.multi_sheet and col_idx == self.error_idx):
+                cell.font = self.error_font
+            cells.append(cell)
+        return cells
+
+    def append(self, sheet_name: str, df: pd.DataFrame):
+        """追加一块比对结果（列与self.columns一致）"""
+        ws = self.sheets[sheet_name]
+        rows = self._rows(df[self.columns])
+        if not self._started[sheet_name]:
+            self._start_sheet(sheet_name, rows)
+
+        for row in rows:
+            if self.status_idx is not None and row[self.status_idx] == '有问题':
+                ws.append(self._styled_row(ws, row))
+            else:
+                ws.append(row)
+        self.rows_written += len(rows)
+
+    def close(self):
+        """写入没有数据的工作表的表头并保存工作簿"""
+        for sheet_name, started in self._started.items():
+            if not started:
+                self._start_sheet(sheet_name, [])
+        self.workbook.save(self.file_path)
+        logger.info(f"分块写入 {self.rows_written} 行比对结果到 {self.file_path}")
+
+
+__all__ = [
+    'MAX_COLUMN_WIDTH',
+    'ComparisonWorkbookWriter'
+]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+文件内容哈希模块 - 计算文件内容的SHA-256，用作比对结果缓存等的内容指纹
+
+按(路径, mtime, 大小)在进程内缓存已计算的哈希，文件未变化时不重复读取
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+# 每次读取的字节数
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# 进程内缓存的最大文件数
+HASH_CACHE_ENTRIES = 1024
+
+_hash_cache: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    文件内容的SHA-256（十六进制）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 64位十六进制哈希
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        digest = _hash_cache.get(key)
+        if digest is not None:
+            _hash_cache.move_to_end(key)
+            return digest
+
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            sha256.update(block)
+    digest = sha256.hexdigest()
+
+    _store(key, digest)
+    return digest
+
+
+def remember_sha256(file_path: str, digest: str):
+    """记录写入文件时已计算的哈希，之后file_sha256不再读取该文件"""
+    stat = os.stat(file_path)
+    _store((os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size), digest)
+
+
+def _store(key: Tuple[str, int, int], digest: str):
+    with _hash_lock:
+        _hash_cache[key] = digest
+        _hash_cache.move_to_end(key)
+        while len(_hash_cache) > HASH_CACHE_ENTRIES:
+            _hash_cache.popitem(last=False)
+
+
+__all__ = [
+    'HASH_CHUNK_BYTES',
+    'file_sha256',
+    'remember_sha256'
+]
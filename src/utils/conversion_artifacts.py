@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+转换产物模块 - 持久化PDF转换过程中提取的表格，供预览、比对等后续步骤直接复用
+
+产物与转换后的Excel文件一起保存在outputs目录中，以file_id命名
+"""
+
+import os
+import json
+import math
+import logging
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .json_utils import prepare_preview_data, dumps_json
+
+logger = logging.getLogger(__name__)
+
+# 产物格式版本，格式或订单列名推断规则变化时递增以忽略旧产物
+ARTIFACT_VERSION = 2
+
+# 预览产物中每个表格保存的最大行数
+PREVIEW_MAX_ROWS = 20
+
+
+def get_preview_artifact_path(output_dir: str, file_id: str) -> str:
+    """获取预览产物文件路径"""
+    return os.path.join(output_dir, f"{file_id}.preview.json")
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """先写临时文件再重命名，避免读到写了一半的产物；每次写入使用独立的临时文件，并发写入互不影响"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps_json(data))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def save_preview_artifact(output_dir: str, file_id: str, extracted_data: List[Dict[str, Any]],
+                          method: str = 'enhanced') -> bool:
+    """
+    保存提取表格的预览产物
+
+    Args:
+        output_dir: 输出目录
+        file_id: 文件ID
+        extracted_data: 提取的表格数据列表
+        method: 提取方式（enhanced/camelot/tabula）
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        extracted_data = extracted_data if isinstance(extracted_data, list) else []
+        artifact = {
+            'version': ARTIFACT_VERSION,
+            'file_id': file_id,
+            'created_time': datetime.now().isoformat(),
+            'method': method,
+            'tables_count': len(extracted_data),
+            'max_rows': PREVIEW_MAX_ROWS,
+            'preview_data': prepare_preview_data(extracted_data, max_rows=PREVIEW_MAX_ROWS)
+        }
+        write_json_atomic(get_preview_artifact_path(output_dir, file_id), artifact)
+        return True
+    except Exception as e:
+        logger.warning(f"保存预览产物失败: {file_id}, 错误: {e}")
+        return False
+
+
+def load_preview_artifact(output_dir: str, file_id: str) -> Optional[Dict[str, Any]]:
+    """
+    读取预览产物
+
+    Returns:
+        产物字典，不存在、损坏或版本不匹配时返回None
+    """
+    path = get_preview_artifact_path(output_dir, file_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+        if artifact.get('version') != ARTIFACT_VERSION:
+            return None
+        return artifact
+    except Exception as e:
+        logger.warning(f"读取预览产物失败: {file_id}, 错误: {e}")
+        return None
+
+
+def get_order_artifact_path(output_dir: str, file_id: str) -> str:
+    """获取订单数据产物文件路径"""
+    return os.path.join(output_dir, f"{file_id}.order.json")
+
+
+def _excel_signature(excel_path: str) -> List[int]:
+    stat = os.stat(excel_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _order_artifact_path(excel_path: str) -> str:
+    output_dir, filename = os.path.split(excel_path)
+    return get_order_artifact_path(output_dir, os.path.splitext(filename)[0])
+
+
+def _is_json_column(series: pd.Series) -> bool:
+    """列的值能否无损地保存为JSON：数字（Inf除外，JSON中为null）、文本、布尔及空值"""
+    if series.dtype.kind in 'biu':
+        return True
+    if series.dtype.kind == 'f':
+        return not np.isinf(series.to_numpy()).any()
+    if series.dtype.kind == 'O':
+        return series.map(lambda value: value is None or isinstance(value, (str, bool, int)) or (
+            isinstance(value, float) and not math.isinf(value))).all()
+    return False
+
+
+def save_order_artifact(excel_path: str, order_df: pd.DataFrame) -> bool:
+    """
+    保存转换后订单的标准化数据（OrderSpecComparator.load_order_data的结果），比对时直接使用而无需重新解析Excel
+
+    按列保存列名、数据类型和值，并记录Excel文件的mtime和大小，Excel被替换后产物自动失效。
+    包含数字、文本、布尔以外的列（如日期）时不保存，比对仍读取Excel
+
+    Args:
+        excel_path: 转换生成的Excel文件路径
+        order_df: 标准化后的订单数据
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        columns = []
+        for name in order_df.columns:
+            series = order_df[name]
+            if not _is_json_column(series):
+                logger.info(f"订单数据包含无法按JSON保存的列，不保存订单产物: {name} ({series.dtype})")
+                return False
+            columns.append({'name': name, 'dtype': str(series.dtype), 'values': series.tolist()})
+
+        artifact = {
+            'version': ARTIFACT_VERSION,
+            'created_time': datetime.now().isoformat(),
+            'source': _excel_signature(excel_path),
+            'rows': len(order_df),
+            # 删除空行后的行号不连续时保存行号
+            'index': None if order_df.index.equals(pd.RangeIndex(len(order_df))) else order_df.index.tolist(),
+            'columns': columns
+        }
+        write_json_atomic(_order_artifact_path(excel_path), artifact)
+        return True
+    except Exception as e:
+        logger.warning(f"保存订单产物失败: {excel_path}, 错误: {e}")
+        return False
+
+
+def has_order_artifact(excel_path: str) -> bool:
+    """Excel文件是否有订单数据产物（不检查是否仍然有效）"""
+    return os.path.exists(_order_artifact_path(excel_path))
+
+
+def load_order_artifact(excel_path: str) -> Optional[pd.DataFrame]:
+    """
+    读取Excel文件对应的订单数据产物
+
+    Returns:
+        标准化后的订单数据，不存在、损坏、版本不匹配或Excel已变化时返回None
+    """
+    path = _order_artifact_path(excel_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+        if artifact.get('version') != ARTIFACT_VERSION or artifact.get('source') != _excel_signature(excel_path):
+            return None
+
+        data = []
+        for column in artifact['columns']:
+            dtype = column['dtype']
+            if dtype in ('object', 'str', 'string'):
+                values = pd.Series(column['values'], dtype=object)
+                values = values.where(values.notna(), np.nan)
+                data.append(values if dtype == 'object' else values.astype(dtype))
+            else:
+                # 浮点列中的null为NaN
+                data.append(pd.Series(column['values'], dtype=dtype))
+        # 按位置组装，保留重复的列名
+        index = pd.RangeIndex(artifact['rows']) if artifact.get('index') is None else pd.Index(artifact['index'])
+        order_df = pd.DataFrame({position: series.set_axis(index) for position, series in enumerate(data)}, index=index)
+        order_df.columns = [column['name'] for column in artifact['columns']]
+        return order_df
+    except Exception as e:
+        logger.warning(f"读取订单产物失败: {path}, 错误: {e}")
+        return None
+
+
+def remove_artifacts(output_dir: str, file_id: str) -> None:
+    """删除文件ID对应的所有转换产物"""
+    for path in (get_preview_artifact_path(output_dir, file_id), get_order_artifact_path(output_dir, file_id)):
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"删除转换产物失败: {path}, 错误: {e}")
+
+
+__all__ = [
+    'ARTIFACT_VERSION',
+    'PREVIEW_MAX_ROWS',
+    'write_json_atomic',
+    'get_preview_artifact_path',
+    'save_preview_artifact',
+    'load_preview_artifact',
+    'get_order_artifact_path',
+    'save_order_artifact',
+    'has_order_artifact',
+    'load_order_artifact',
+    'remove_artifacts'
+]
@@ -382,40 +382,47 @@ class EnhancedPDFParser:
         
         return info
     
+    def build_sheet_frames(self, sections: Dict[str, Any]) -> List[Tuple[str, pd.DataFrame]]:
+        """按工作表顺序生成多工作表Excel中各工作表的数据"""
+        sheet_frames = []
+        
+        # 1. Customer_Info 工作表
+        if sections['customer_info']['found']:
+            customer_df = pd.DataFrame([sections['customer_info']['data']])
+            if not customer_df.empty:
+                sheet_frames.append(('Customer_Info', customer_df))
+        
+        # 2. Order_Items 工作表
+        if sections['order_tables']['found'] and sections['order_tables']['data']:
+            # 合并所有表格
+            all_tables = []
+            for table_info in sections['order_tables']['data']:
+                df = table_info['data']
+                if not df.empty:
+                    all_tables.append(df)
+            
+            if all_tables:
+                combined_df = pd.concat(all_tables, ignore_index=True)
+                sheet_frames.append(('Order_Items', combined_df))
+        
+        # 3. Summary 工作表
+        if sections['summary']['found']:
+            summary_df = pd.DataFrame([sections['summary']['data']])
+            if not summary_df.empty:
+                sheet_frames.append(('Summary', summary_df))
+        
+        # 如果没有找到任何结构化数据，至少创建一个工作表
+        if not any(sections[key]['found'] for key in sections):
+            sheet_frames.append(('Data', pd.DataFrame({'Message': ['No structured data found in PDF']})))
+        
+        return sheet_frames
+    
     def create_multi_sheet_excel(self, sections: Dict[str, Any], output_path: str) -> bool:
         """创建包含三个工作表的Excel文件"""
         try:
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                
-                # 1. Customer_Info 工作表
-                if sections['customer_info']['found']:
-                    customer_df = pd.DataFrame([sections['customer_info']['data']])
-                    if not customer_df.empty:
-                        customer_df.to_excel(writer, sheet_name='Customer_Info', index=False)
-                
-                # 2. Order_Items 工作表
-                if sections['order_tables']['found'] and sections['order_tables']['data']:
-                    # 合并所有表格
-                    all_tables = []
-                    for table_info in sections['order_tables']['data']:
-                        df = table_info['data']
-                        if not df.empty:
-                            all_tables.append(df)
-                    
-                    if all_tables:
-                        combined_df = pd.concat(all_tables, ignore_index=True)
-                        combined_df.to_excel(writer, sheet_name='Order_Items', index=False)
-                
-                # 3. Summary 工作表
-                if sections['summary']['found']:
-                    summary_df = pd.DataFrame([sections['summary']['data']])
-                    if not summary_df.empty:
-                        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-                
-                # 如果没有找到任何结构化数据，至少创建一个工作表
-                if not any(sections[key]['found'] for key in sections):
-                    empty_df = pd.DataFrame({'Message': ['No structured data found in PDF']})
-                    empty_df.to_excel(writer, sheet_name='Data', index=False)
+                for sheet_name, df in self.build_sheet_frames(sections):
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
             
             logger.info(f"Successfully created multi-sheet Excel: {output_path}")
             return True
@@ -7,6 +7,7 @@ import os
 import uuid
 import datetime
 import json
+import logging
 from werkzeug.utils import secure_filename
 from flask import current_app
 import pandas as pd
@@ -14,6 +15,13 @@ import numpy as np
 from difflib import get_close_matches
 
 from src.utils.config_loader import ConfigLoader
+from src.utils.spec_cache import get_spec_cache
+from src.utils.spec_index import remove_spec_index
+from src.utils.order_comparator import OrderSpecComparator
+from src.models import spec_catalog
+from src.utils.upload_stream import UploadRejected, save_upload, upload_kind
+
+logger = logging.getLogger(__name__)
 
 class MappingResult:
     """列名映射结果类"""
@@ -373,9 +381,16 @@ class EnhancedProductSpecManager:
             file_extension = original_filename.rsplit('.', 1)[1].lower()
             stored_filename = f"{spec_id}.{file_extension}"
             
-            # 保存文件
+            # 保存文件：分块写入临时文件后改名，同时计算SHA-256并检查Excel文件头
             file_path = os.path.join(self.specs_dir, stored_filename)
-            file.save(file_path)
+            try:
+                upload_info = save_upload(file, file_path, kind=upload_kind(original_filename))
+            except UploadRejected as e:
+                return {
+                    'error': '文件内容不是有效的Excel文件' if e.error_code == 'INVALID_FILE_CONTENT' else e.message,
+                    'error_code': e.error_code,
+                    'message': e.message
+                }
             
             # 验证Excel文件是否可以正常读取
             try:
@@ -460,6 +475,9 @@ class EnhancedProductSpecManager:
                 mapped_file_path = os.path.join(self.specs_dir, f"{spec_id}_mapped.xlsx")
                 mapped_df.to_excel(mapped_file_path, index=False)
                 
+                # 建立比对使用的规格表索引
+                OrderSpecComparator.index_spec(mapped_file_path)
+                
                 # 创建元数据文件
                 metadata = {
                     'spec_id': spec_id,
@@ -467,14 +485,22 @@ class EnhancedProductSpecManager:
                     'stored_filename': stored_filename,
                     'mapped_filename': f"{spec_id}_mapped.xlsx",
                     'upload_time': datetime.datetime.now().isoformat(),
-                    'file_size': os.path.getsize(file_path),
+                    'file_size': upload_info['file_size'],
+                    'sha256': upload_info['sha256'],
                     'record_count': len(df),
                     'column_mapping': mapping_result.mapped_columns
                 }
                 
+                # 内容相同的已有规格表
+                duplicates = self.find_specs_by_hash(upload_info['sha256'])
+                
                 metadata_path = os.path.join(self.specs_dir, f"{spec_id}.json")
                 with open(metadata_path, 'w', encoding='utf-8') as f:
                     json.dump(metadata, f, ensure_ascii=False, indent=2)
+                self.update_spec_catalog(spec_catalog.record_spec, spec_id, upload_info['sha256'])
+                
+                # 规格表文件已更新，丢弃旧的缓存
+                get_spec_cache().invalidate(spec_id)
                 
                 # 构建成功响应
                 response = {
@@ -483,8 +509,11 @@ class EnhancedProductSpecManager:
                     'record_count': len(df),
                     'upload_time': metadata['upload_time'],
                     'mapping_applied': True,
-                    'mapped_columns': mapping_result.mapped_columns
+                    'mapped_columns': mapping_result.mapped_columns,
+                    'sha256': upload_info['sha256']
                 }
+                if duplicates:
+                    response['duplicate_of'] = duplicates
                 
                 # 如果有列映射，添加映射信息
                 if mapping_result.mapped_columns:
@@ -672,7 +701,32 @@ class EnhancedProductSpecManager:
         except Exception as e:
             current_app.logger.error(f"获取规格表列表失败: {str(e)}")
             return []
-    
+
+    def find_specs_by_hash(self, sha256):
+        """
+        查找上传文件内容相同的规格表
+
+        从SQLite规格表目录按哈希索引查找，目录不可用时只记录警告并返回空列表
+
+        Args:
+            sha256: 上传文件内容的SHA-256
+
+        Returns:
+            list: spec_id列表
+        """
+        try:
+            return spec_catalog.find_specs_by_hash(sha256)
+        except Exception as e:
+            logger.warning(f"查询规格表目录失败: {str(e)}")
+            return []
+
+    def update_spec_catalog(self, operation, *args):
+        """更新规格表目录，目录不可用时只记录警告（JSON元数据仍然保留）"""
+        try:
+            operation(*args)
+        except Exception as e:
+            logger.warning(f"更新规格表目录失败: {str(e)}")
+
     def delete_spec(self, spec_id):
         """
         删除产品规格表
@@ -697,15 +751,20 @@ class EnhancedProductSpecManager:
             excel_path = os.path.join(self.specs_dir, metadata['stored_filename'])
             if os.path.exists(excel_path):
                 os.remove(excel_path)
+            remove_spec_index(excel_path)
             
             # 删除映射后的Excel文件（如果存在）
             if 'mapped_filename' in metadata:
                 mapped_path = os.path.join(self.specs_dir, metadata['mapped_filename'])
                 if os.path.exists(mapped_path):
                     os.remove(mapped_path)
+                remove_spec_index(mapped_path)
                 
             # 删除元数据文件
             os.remove(metadata_path)
+            self.update_spec_catalog(spec_catalog.remove_spec, spec_id)
+            
+            get_spec_cache().invalidate(spec_id)
             
             return {'message': '规格表删除成功'}
             
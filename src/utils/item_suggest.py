@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+相似产品ID模块 - 为规格表中不存在的订单产品ID查找最接近的规格表产品ID
+
+产品ID先做规范化（大写、去掉空格/连字符等分隔符、字母O视为数字0、去掉数字前导零），
+再以规范化后的ID及其删除任意一个字符得到的变体建立哈希索引（对称删除法）。
+编辑距离不超过1的ID之间必然共享一个变体，距离可由匹配的变体直接得出：
+两边都未删除为0，只删除一边或删除同一位置为1，删除不同位置为2（如相邻字符交换）。
+查询只需对各个变体做二分查找，查找耗时与规格表大小无关。
+"""
+
+import re
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 每个产品ID返回的相似产品数
+SUGGESTION_LIMIT = 3
+
+# 每个变体最多取的候选数，避免过短的变体在大规格表中命中过多产品
+MAX_VARIANT_CANDIDATES = 64
+
+_SEPARATORS = re.compile(r'[\W_]+')
+_LEADING_ZEROS = re.compile(r'(?<![0-9])0+(?=[0-9])')
+
+
+def normalize_item_id(item_id: str) -> str:
+    """规范化产品ID：大写，去掉分隔符，字母O视为数字0，去掉数字前导零"""
+    key = _SEPARATORS.sub('', str(item_id).upper()).replace('O', '0')
+    return _LEADING_ZEROS.sub('', key)
+
+
+def max_distance(length: int) -> int:
+    """规范化ID长度对应的最大编辑距离，过短的ID只接受规范化后相同的产品"""
+    if length < 3:
+        return 0
+    return 1 if length < 7 else 2
+
+
+def _variants(keys: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    规范化ID本身及删除一个字符的各个变体
+
+    Returns:
+        tuple: (变体哈希值, 所属ID序号, 删除的字符位置（-1表示未删除）)
+    """
+    keys = [(position, key) for position, key in enumerate(keys) if key]
+    variants = [variant for _, key in keys for variant in [key] + [key[:i] + key[i + 1:] for i in range(len(key))]]
+    if not variants:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    counts = np.array([len(key) + 1 for _, key in keys], dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    owners = np.repeat(np.array([position for position, _ in keys], dtype=np.int64), counts)
+    deleted = np.arange(len(variants)) - np.repeat(starts, counts) - 1
+    # 变体大多互不相同，不先去重直接计算哈希
+    hashes = pd.util.hash_array(np.array(variants, dtype=object), categorize=False)
+    return hashes, owners, deleted
+
+
+class ItemSuggestIndex:
+    """规格表产品ID的相似查找索引，建立后只读共享"""
+
+    def __init__(self, items: np.ndarray):
+        self.items = np.asarray(items, dtype=object)
+        hashes, owners, deleted = _variants(normalize_item_id(item) for item in self.items.tolist())
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.owners = owners[order].astype(np.int32)
+        self.deleted = np.minimum(deleted[order], np.iinfo(np.int16).max).astype(np.int16)
+        self.nbytes = self.hashes.nbytes + self.owners.nbytes + self.deleted.nbytes
+
+    def lookup(self, item_ids: Sequence[str], limit: int = SUGGESTION_LIMIT) -> List[List[Tuple[int, str]]]:
+        """
+        查找每个产品ID最接近的规格表产品ID
+
+        Args:
+            item_ids: 订单产品ID
+            limit: 每个产品ID最多返回的相似产品数
+
+        Returns:
+            list: 每个产品ID的[(编辑距离, 规格表产品ID)]，按编辑距离、产品ID排序
+        """
+        codes, unique_ids = pd.factorize(pd.Series(item_ids, dtype=object))
+        query_keys = [normalize_item_id(item_id) for item_id in unique_ids.tolist()]
+        found = [[] for _ in range(len(query_keys))]
+
+        # 所有变体一起二分查找，展开命中的区间得到(查询序号, 候选产品序号, 编辑距离)
+        variant_hashes, queries, query_deleted = _variants(query_keys)
+        starts = np.searchsorted(self.hashes, variant_hashes, side='left')
+        counts = np.minimum(np.searchsorted(self.hashes, variant_hashes, side='right') - starts,
+                            MAX_VARIANT_CANDIDATES)
+        total = int(counts.sum())
+        if total:
+            offsets = np.cumsum(counts) - counts
+            slots = np.repeat(starts - offsets, counts) + np.arange(total)
+            queries = np.repeat(queries, counts)
+            query_deleted = np.repeat(query_deleted, counts)
+            item_deleted = self.deleted[slots].astype(np.int64)
+            distance = np.where((query_deleted < 0) & (item_deleted < 0), 0,
+                                np.where((query_deleted < 0) | (item_deleted < 0) | (query_deleted == item_deleted), 1, 2))
+
+            # 同一候选由多个变体命中时取最小距离
+            allowed = np.array([max_distance(len(key)) for key in query_keys], dtype=np.int64)
+            candidates = self.owners[slots].astype(np.int64)
+            order = np.lexsort((distance, candidates, queries))
+            queries, candidates, distance = queries[order], candidates[order], distance[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (queries[1:] != queries[:-1]) | (candidates[1:] != candidates[:-1])
+            keep = first & (distance <= allowed[queries])
+            for query, candidate, value in zip(queries[keep].tolist(), candidates[keep].tolist(),
+                                               distance[keep].tolist()):
+                found[query].append((value, self.items[candidate]))
+
+        ranked = [sorted(matches)[:limit] for matches in found]
+        return [ranked[code] if code >= 0 else [] for code in codes.tolist()]
+
+
+__all__ = [
+    'SUGGESTION_LIMIT',
+    'normalize_item_id',
+    'ItemSuggestIndex'
+]
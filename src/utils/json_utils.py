@@ -5,11 +5,24 @@ JSON工具模块 - 统一处理NaN值和JSON序列化
 Steering Rule: 所有API响应都必须通过此模块处理，确保JSON序列化安全
 """
 
+import re
 import json
 import math
 import pandas as pd
 import numpy as np
-from flask import jsonify
+from flask import Response
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 视为空值的字符串（不区分大小写）
+NAN_STRINGS = ('nan', 'inf', '-inf', 'null')
+
+# 编码结果中可能由空值字符串编码而来的字符串（不区分大小写）
+_NAN_STRING_TOKEN = re.compile(rb'"(?i:nan|-?inf|null)"')
 
 def clean_nan_values(obj):
     """
@@ -37,17 +50,63 @@ def clean_nan_values(obj):
         return None
     elif isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
         return None
-    elif isinstance(obj, str) and obj.lower() in ['nan', 'inf', '-inf', 'null']:
+    elif isinstance(obj, str) and obj.lower() in NAN_STRINGS:
         return None
     elif obj is np.nan:
         return None
     else:
         return obj
 
+def _dataframe_null_mask(df):
+    """
+    按列向量化计算需要替换为None的单元格
+    
+    包括NaN/NaT/None、数值列中的±Inf、对象列中的±Inf，以及字符串形式的空值
+    """
+    mask = df.isna().to_numpy(copy=True)
+    
+    for i, dtype in enumerate(df.dtypes):
+        column = df.iloc[:, i]
+        if pd.api.types.is_float_dtype(dtype):
+            mask[:, i] |= np.isinf(column.to_numpy(dtype=float, na_value=np.nan))
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            if pd.api.types.is_object_dtype(dtype):
+                mask[:, i] |= column.isin([np.inf, -np.inf]).to_numpy()
+            try:
+                lowered = column.str.lower()
+            except AttributeError:
+                # 列中没有字符串
+                continue
+            mask[:, i] |= lowered.isin(NAN_STRINGS).to_numpy()
+    
+    return mask
+
+def _column_to_list(column, null_mask):
+    """
+    将一列转换为Python原生类型的列表，null_mask为True的位置替换为None
+    
+    数值和布尔列直接由numpy转换，不经过逐个单元格的装箱
+    """
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        values = column.to_numpy().tolist()
+    else:
+        values = column.astype(object).tolist()
+        if pd.api.types.is_object_dtype(dtype):
+            # 对象列中可能混有numpy标量
+            values = [v.item() if isinstance(v, np.generic) else v for v in values]
+    
+    for idx in np.flatnonzero(null_mask).tolist():
+        values[idx] = None
+    return values
+
 def clean_dataframe_nan(df):
     """
     专门处理DataFrame中的NaN值
     
+    使用掩码一次性确定NaN/Inf位置，按列转换为Python列表后组装为记录，
+    不再逐个单元格调用Python函数
+    
     Args:
         df: pandas DataFrame
         
@@ -57,59 +116,171 @@ def clean_dataframe_nan(df):
     if df.empty:
         return {'columns': [], 'data': []}
     
-    # 彻底清理DataFrame中的NaN值
-    df_clean = df.copy()
-    # 使用map替代已弃用的applymap
-    df_clean = df_clean.map(lambda x: None if pd.isna(x) or 
-                           (isinstance(x, float) and (math.isnan(x) or math.isinf(x))) 
-                           else x)
-    
-    # 转换为字典列表并再次清理
-    data_records = df_clean.to_dict('records')
-    clean_records = clean_nan_values(data_records)
+    mask = _dataframe_null_mask(df)
+    columns = list(df.columns)
+    values = [_column_to_list(df.iloc[:, i], mask[:, i]) for i in range(len(columns))]
     
     return {
-        'columns': list(df_clean.columns),
-        'data': clean_records  # 转换为字典列表格式
+        'columns': columns,
+        'data': [dict(zip(columns, row)) for row in zip(*values)]  # 转换为字典列表格式
     }
 
-def safe_jsonify(data, **kwargs):
+# 表格数据的响应布局：records为每行一个对象，columnar为列名只出现一次、每列一个数组
+LAYOUT_RECORDS = 'records'
+LAYOUT_COLUMNAR = 'columnar'
+
+def parse_layout(value):
+    """
+    解析layout查询参数
+    
+    Raises:
+        ValueError: 不支持的布局
+    """
+    layout = (value or LAYOUT_RECORDS).strip().lower()
+    if layout not in (LAYOUT_RECORDS, LAYOUT_COLUMNAR):
+        raise ValueError(f'无效的layout: {value}，可选值为 {LAYOUT_RECORDS} 或 {LAYOUT_COLUMNAR}')
+    return layout
+
+def dataframe_to_columns(df):
+    """
+    将DataFrame转换为列式数据
+    
+    数值和布尔列直接返回连续的numpy数组，由序列化器读取缓冲区编码（NaN/Inf编码为null），
+    其它列按clean_dataframe_nan的规则转换为列表
+    
+    Returns:
+        (列名列表, 每列一个数组的列表)
+    """
+    columns = list(df.columns)
+    if df.empty:
+        return columns, [[] for _ in columns]
+    
+    mask = _dataframe_null_mask(df)
+    data = []
+    for i in range(len(columns)):
+        column = df.iloc[:, i]
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'biuf':
+            data.append(np.ascontiguousarray(column.to_numpy()))
+        else:
+            data.append(_column_to_list(column, mask[:, i]))
+    return columns, data
+
+def rows_to_columns(rows, width):
+    """将二维行数组转置为每列一个列表"""
+    if not rows:
+        return [[] for _ in range(width)]
+    return [list(column) for column in zip(*rows)]
+
+def records_to_columns(columns, records):
+    """将字典列表转换为每列一个列表"""
+    return [[record.get(column) for record in records] for column in columns]
+
+def _json_default(obj):
+    """
+    处理序列化器无法直接编码的对象：DataFrame、numpy数组及标量、时间、NaT/NA等
+    """
+    if isinstance(obj, pd.DataFrame):
+        return clean_dataframe_nan(obj)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy().tolist()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f'无法序列化的类型: {type(obj).__name__}')
+
+# 标准库编码器：紧凑输出，遇到NaN/Inf时抛出ValueError以便单独处理
+_STRICT_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False,
+                                   separators=(',', ':'), default=_json_default)
+_LENIENT_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=True,
+                                    separators=(',', ':'), default=_json_default)
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _null_nan_strings(obj):
+    """
+    递归将dict/list/tuple及对象数组中的空值字符串替换为None，其它对象原样返回
+    
+    DataFrame由clean_dataframe_nan在编码时处理，不需要在这里展开
+    """
+    if isinstance(obj, dict):
+        return {k: _null_nan_strings(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_null_nan_strings(v) for v in obj]
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)) and obj.dtype == object:
+        return [_null_nan_strings(v) for v in obj.tolist()]
+    if isinstance(obj, str) and obj.lower() in NAN_STRINGS:
+        return None
+    return obj
+
+def _encode(data):
+    """编码为JSON字节串，NaN/Inf输出为null"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, default=_json_default, option=_ORJSON_OPTIONS)
+    
+    try:
+        return _STRICT_ENCODER.encode(data).encode('utf-8')
+    except ValueError:
+        # 数据中含有NaN/Inf：先按宽松模式编码，再把NaN/Infinity常量解析为null
+        text = _LENIENT_ENCODER.encode(data)
+        return _STRICT_ENCODER.encode(json.loads(text, parse_constant=lambda _: None)).encode('utf-8')
+
+def dumps_json(data):
+    """
+    一次性将数据编码为JSON字节串，NaN/Inf及NAN_STRINGS中的字符串输出为null
+    
+    安装了orjson时使用orjson（原生支持numpy且将NaN/Inf编码为null），
+    否则使用标准库编码器；标准库只有在数据确实包含NaN/Inf时才会再处理一次。
+    空值字符串在编码结果中扫描，只有出现"nan"、"null"等字符串时才替换后重新编码
+    
+    Args:
+        data: 要序列化的数据，可以包含numpy标量/数组、Timestamp、DataFrame
+        
+    Returns:
+        bytes: UTF-8编码的JSON
+        
+    Raises:
+        TypeError: 数据中包含无法序列化的对象
+    """
+    encoded = _encode(data)
+    if _NAN_STRING_TOKEN.search(encoded):
+        encoded = _encode(_null_nan_strings(data))
+    return encoded
+
+def safe_jsonify(data):
     """
     安全的JSON响应生成器
     
     Steering Rule: 所有API响应都应该使用此函数而不是直接使用jsonify
     
+    数据只编码一次，NaN/Inf及空值字符串在编码时转换为null，不再预先递归清理
+    
     Args:
         data: 要序列化的数据
-        **kwargs: jsonify的其他参数
         
     Returns:
         Flask Response对象
+        
+    Raises:
+        TypeError: 数据中包含无法序列化的对象（由路由的异常处理返回500）
     """
-    # 清理NaN值
-    clean_data = clean_nan_values(data)
-    
-    # 验证JSON序列化
-    try:
-        json.dumps(clean_data, ensure_ascii=False)
-    except (TypeError, ValueError) as e:
-        # 如果仍然有序列化问题，返回错误信息
-        error_data = {
-            'error': 'JSON序列化失败',
-            'message': str(e),
-            'data_type': str(type(data))
-        }
-        return jsonify(error_data), 500
-    
-    return jsonify(clean_data, **kwargs)
+    return Response(dumps_json(data), mimetype='application/json')
 
-def prepare_preview_data(extracted_data, max_rows=20):
+def prepare_preview_data(extracted_data, max_rows=20, layout=LAYOUT_RECORDS):
     """
     统一的预览数据准备函数
     
     Args:
         extracted_data: 提取的表格数据列表
         max_rows: 最大显示行数
+        layout: records时data为二维行数组，columnar时data为每列一个数组
         
     Returns:
         清理后的预览数据
@@ -124,32 +295,64 @@ def prepare_preview_data(extracted_data, max_rows=20):
         # 限制显示行数
         preview_df = df.head(max_rows)
         
-        # 清理数据
-        clean_result = clean_dataframe_nan(preview_df)
+        if layout == LAYOUT_COLUMNAR:
+            columns, data = dataframe_to_columns(preview_df)
+        else:
+            # 清理数据
+            clean_result = clean_dataframe_nan(preview_df)
+            columns = clean_result['columns']
+            data = [list(row.values()) for row in clean_result['data']]  # 转换为二维数组
         
-        preview_data.append({
+        table = {
             'table_index': table_info.get('table_index', 1),
             'page': table_info.get('page', 1),
             'accuracy': table_info.get('accuracy', 0.8),
-            'columns': clean_result['columns'],
-            'data': [list(row.values()) for row in clean_result['data']],  # 转换为二维数组
+            'columns': columns,
+            'data': data,
             'total_rows': len(df),
             'total_columns': len(df.columns)
-        })
+        }
+        if layout == LAYOUT_COLUMNAR:
+            table['layout'] = LAYOUT_COLUMNAR
+        preview_data.append(table)
     
     return preview_data
 
-def prepare_sheet_data(df, sheet_name=None):
+def preview_tables_to_columnar(preview_data):
+    """将records布局的预览表格（二维行数组）转换为columnar布局"""
+    tables = []
+    for table in preview_data:
+        if table.get('layout') == LAYOUT_COLUMNAR:
+            tables.append(table)
+            continue
+        columnar = dict(table)
+        columnar['data'] = rows_to_columns(table['data'], len(table['columns']))
+        columnar['layout'] = LAYOUT_COLUMNAR
+        tables.append(columnar)
+    return tables
+
+def prepare_sheet_data(df, sheet_name=None, layout=LAYOUT_RECORDS):
     """
     统一的工作表数据准备函数
     
     Args:
         df: pandas DataFrame
         sheet_name: 工作表名称
+        layout: records时data为字典列表，columnar时data为每列一个数组
         
     Returns:
         清理后的工作表数据
     """
+    if layout == LAYOUT_COLUMNAR:
+        columns, data = dataframe_to_columns(df)
+        return {
+            'layout': LAYOUT_COLUMNAR,
+            'columns': columns,
+            'data': data,
+            'total_rows': len(df),
+            'sheet_name': sheet_name or 'Sheet1'
+        }
+    
     if df.empty:
         return {
             'columns': [],
@@ -168,11 +371,54 @@ def prepare_sheet_data(df, sheet_name=None):
         'sheet_name': sheet_name or 'Sheet1'
     }
 
+def prepare_sheet_page(page, sheet_name=None, offset=0, limit=None, layout=LAYOUT_RECORDS):
+    """
+    分页工作表数据准备函数
+    
+    Args:
+        page: sheet_reader.read_sheet_page的返回结果
+        sheet_name: 工作表名称
+        offset: 起始行偏移
+        limit: 每页行数
+        layout: records或columnar
+        
+    Returns:
+        清理后的分页工作表数据，data格式与prepare_sheet_data一致
+    """
+    columns = page['columns']
+    if layout == LAYOUT_COLUMNAR:
+        data = clean_nan_values(rows_to_columns(page['rows'], len(columns)))
+    else:
+        data = clean_nan_values([dict(zip(columns, row)) for row in page['rows']])
+    
+    result = {
+        'columns': columns,
+        'data': data,
+        'total_rows': page['total_rows'],
+        'filtered_rows': page['filtered_rows'],
+        'offset': offset,
+        'limit': limit,
+        'returned_rows': len(page['rows']),
+        'sheet_name': sheet_name or 'Sheet1'
+    }
+    if layout == LAYOUT_COLUMNAR:
+        result['layout'] = LAYOUT_COLUMNAR
+    return result
+
 # 导出的主要函数
 __all__ = [
     'clean_nan_values',
     'clean_dataframe_nan', 
+    'dumps_json',
     'safe_jsonify',
+    'LAYOUT_RECORDS',
+    'LAYOUT_COLUMNAR',
+    'parse_layout',
+    'dataframe_to_columns',
+    'rows_to_columns',
+    'records_to_columns',
     'prepare_preview_data',
-    'prepare_sheet_data'
+    'preview_tables_to_columnar',
+    'prepare_sheet_data',
+    'prepare_sheet_page'
 ]
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+NDJSON流式响应模块 - 按行块逐步输出大型表格数据
+
+客户端通过请求头 Accept: application/x-ndjson 启用。每行是一个JSON对象：
+    {"type": "header", "columns": [...], ...}       表格信息
+    {"type": "rows", "offset": 0, "rows": [[...]]}  一块数据行（二维数组）
+    {"type": "end", "returned_rows": n}             表格结束
+    {"type": "error", "error": "..."}               输出过程中发生错误
+"""
+
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from flask import Response, stream_with_context
+
+from .json_utils import dumps_json
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# 每个rows行包含的数据行数
+STREAM_CHUNK_ROWS = 500
+
+
+def wants_ndjson(request) -> bool:
+    """判断客户端是否请求NDJSON流（Accept头中NDJSON优先于JSON）"""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """按固定大小分块"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def table_events(header: Dict[str, Any], rows: Iterable[List[Any]],
+                 chunk_size: int = STREAM_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    """
+    生成一个表格的事件序列：header、若干rows块、end
+
+    Args:
+        header: 表格信息（列名、工作表名称、总行数等）
+        rows: 行迭代器，每行为与columns对应的列表
+        chunk_size: 每块的行数
+    """
+    event = {'type': 'header'}
+    event.update(header)
+    yield event
+
+    returned = 0
+    for chunk in chunked(rows, chunk_size):
+        yield {'type': 'rows', 'offset': returned, 'rows': chunk}
+        returned += len(chunk)
+
+    yield {'type': 'end', 'returned_rows': returned}
+
+
+def encode_ndjson(events: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """将事件逐个编码为NDJSON行，中途出错时输出error行后结束"""
+    try:
+        for event in events:
+            yield dumps_json(event) + b'\n'
+    except Exception as e:
+        logger.error(f"NDJSON流输出失败: {e}")
+        yield dumps_json({'type': 'error', 'error': str(e)}) + b'\n'
+
+
+def ndjson_response(events: Iterable[Dict[str, Any]]) -> Response:
+    """创建NDJSON流式响应"""
+    response = Response(stream_with_context(encode_ndjson(events)), mimetype=NDJSON_MIMETYPE)
+    # 禁止反向代理缓冲，客户端可以逐块渲染
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+__all__ = [
+    'NDJSON_MIMETYPE',
+    'STREAM_CHUNK_ROWS',
+    'wants_ndjson',
+    'chunked',
+    'table_events',
+    'encode_ndjson',
+    'ndjson_response'
+]
@@ -11,11 +11,45 @@ from openpyxl.comments import Comment
 import os
 import uuid
 import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .workbook_inspector import inspect_workbook, InvalidWorkbookError
+from .comparison_results import (
+    COMPARISON_PREVIEW_ROWS, build_comparison_preview, save_comparison_summary, load_comparison_summary,
+    save_comparison_rows, load_comparison_rows
+)
+from .spec_cache import SpecTable, LayeredSpecTable, get_spec_cache, text_column
+from .spec_index import load_spec_index, save_spec_index
+from .sheet_reader import iter_sheet_chunks
+from .comparison_writer import ComparisonWorkbookWriter
+from .conversion_artifacts import has_order_artifact, load_order_artifact, save_order_artifact
+from .content_hash import file_sha256
+from .row_errors import ERROR_TYPES, ERROR_BITS, RowErrors, add_result_columns
+from .column_profile import ORDER_HEADER_KEYWORDS, keyword_rows, match_header_fields, infer_fields_by_content
 
 # 设置日志记录器
 logger = logging.getLogger(__name__)
 
+# 比对器版本，比对规则、订单列名推断或结果格式变化时递增，使缓存的比对结果失效
+COMPARATOR_VERSION = 3
+
+# 批量比对的最大线程数
+BATCH_MAX_WORKERS = os.cpu_count() or 1
+
+# 分块比对每块的订单行数
+DEFAULT_CHUNK_ROWS = 20000
+
+# 订单行数（按工作表维度信息估算）超过该值时自动使用分块比对
+CHUNKED_COMPARE_MIN_ROWS = 200000
+
 class OrderSpecComparator:
+    # 单价、数量、总价可能所在的列，按优先顺序
+    PRICE_COLUMNS = ['unit_price', 'price', '单价', '价格', 'cost']
+    QUANTITY_COLUMNS = ['quantity', 'qty', '数量', '件数']
+    TOTAL_COLUMNS = ['total_price', 'total', '总价', '合计', '小计']
+    
     def __init__(self, output_dir='outputs'):
         # 确保使用绝对路径
         if not os.path.isabs(output_dir):
@@ -28,13 +62,7 @@ class OrderSpecComparator:
         self.ensure_output_dir()
         
         # 定义错误类型
-        self.ERROR_TYPES = {
-            'PRODUCT_NOT_FOUND': '产品ID不存在',
-            'SIZE_MISMATCH': '尺寸不符',
-            'COLOR_MISMATCH': '颜色不符',
-            'PRICE_MISMATCH': '单价不符',
-            'TOTAL_CALC_ERROR': '总价计算错误'
-        }
+        self.ERROR_TYPES = dict(ERROR_TYPES)
         
         # 定义高亮颜色
         self.ERROR_FILL = PatternFill(start_color='FFE6E6', end_color='FFE6E6', fill_type='solid')
@@ -46,104 +74,119 @@ class OrderSpecComparator:
             os.makedirs(self.output_dir)
     
     def _infer_columns_by_content(self, df):
-        """基于数据内容推断列名"""
-        column_mapping = {}
+        """基于数据内容推断列名（按列内容特征的打分表，见column_profile）"""
+        fields = infer_fields_by_content(df)
+        return {df.columns[position]: field for position, field in fields.items()}
+    
+    def _float_values(self, series):
+        """列转换为float64数组，与float(value)一致，无法转换的值为NaN"""
+        if pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
         
-        for col in df.columns:
-            # 获取该列的非空值样本
-            sample_values = df[col].dropna().astype(str).head(10).tolist()
-            if not sample_values:
-                continue
-                
-            # 分析数据模式
-            sample_text = ' '.join(sample_values).lower()
-            
-            # 检查是否是产品ID列（通常包含字母数字组合）
-            if any(val for val in sample_values if len(str(val)) > 3 and any(c.isalpha() for c in str(val)) and any(c.isdigit() for c in str(val))):
-                if 'item_id' not in column_mapping.values():
-                    column_mapping[col] = 'item_id'
-                    continue
-            
-            # 检查是否是价格列（数字且通常有小数点）
-            numeric_count = sum(1 for val in sample_values if self._is_numeric(val))
-            if numeric_count > len(sample_values) * 0.7:  # 70%以上是数字
-                decimal_count = sum(1 for val in sample_values if '.' in str(val))
-                if decimal_count > 0 and 'unit_price' not in column_mapping.values():
-                    column_mapping[col] = 'unit_price'
-                    continue
-                elif 'quantity' not in column_mapping.values():
-                    column_mapping[col] = 'quantity'
-                    continue
-            
-            # 检查是否是产品名称列（通常是中文或较长的文本）
-            text_count = sum(1 for val in sample_values if len(str(val)) > 2 and not self._is_numeric(val))
-            if text_count > len(sample_values) * 0.5 and 'product_name' not in column_mapping.values():
-                column_mapping[col] = 'product_name'
-                continue
+        def to_float(value):
+            try:
+                return np.nan if pd.isna(value) else float(value)
+            except (ValueError, TypeError):
+                return np.nan
         
-        return column_mapping
+        return np.fromiter((to_float(value) for value in series), dtype=np.float64, count=len(series))
     
-    def _is_numeric(self, value):
-        """检查值是否为数字"""
-        try:
-            float(str(value).replace(',', ''))
-            return True
-        except (ValueError, TypeError):
-            return False
-    
-    def _get_price_value(self, row):
-        """获取行中的价格值，尝试多个可能的列名"""
-        price_columns = ['unit_price', 'price', '单价', '价格', 'cost']
+    def _positive_values(self, df, columns):
+        """
+        按列的优先顺序取每行第一个大于0的值（单价、数量、总价可能在不同的列中）
         
-        for col in price_columns:
-            if col in row and not pd.isna(row[col]):
-                try:
-                    price = float(row[col])
-                    if price > 0:
-                        return price
-                except (ValueError, TypeError):
-                    continue
+        Returns:
+            numpy.ndarray: 每行的值，没有大于0的值时为0
+        """
+        result = np.zeros(len(df))
+        found = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            if col in df.columns:
+                values = self._float_values(df[col])
+                take = ~found & (values > 0)
+                result[take] = values[take]
+                found |= take
+        return result
+    
+    def check_rows(self, order_df, spec_table, check_total_calc=True):
+        """
+        比对订单各行并生成错误详情（find_row_errors的结果按输出格式展开）
         
-        return 0.0
+        Returns:
+            tuple: (每行是否有问题, 每行的错误详情, 统计信息)
+        """
+        errors = self.find_row_errors(order_df, spec_table, check_total_calc)
+        return errors.has_error, errors.details(), errors.stats()
     
-    def _get_quantity_value(self, row):
-        """获取行中的数量值"""
-        quantity_columns = ['quantity', 'qty', '数量', '件数']
+    def find_row_errors(self, order_df, spec_table, check_total_calc=True):
+        """
+        向量化比对：以复合键、产品ID及(产品ID, 尺寸/颜色)为键在规格表的哈希索引中查找
+        （哈希连接），单价和总价检查为列运算。每行的错误记录为位掩码及数值明细，
+        产品ID不存在时另记规格表中最接近的产品ID
         
-        for col in quantity_columns:
-            if col in row and not pd.isna(row[col]):
-                try:
-                    qty = float(row[col])
-                    if qty > 0:
-                        return qty
-                except (ValueError, TypeError):
-                    continue
+        Args:
+            order_df: load_order_data返回的订单数据
+            spec_table: 规格表（SpecTable或LayeredSpecTable）
+            check_total_calc: 是否检查总价计算
+            
+        Returns:
+            RowErrors: 每行的比对错误
+        """
+        item_id = text_column(order_df, 'item_id')
+        size = text_column(order_df, 'size')
+        color = text_column(order_df, 'color')
+        price = self._positive_values(order_df, self.PRICE_COLUMNS)
         
-        return 0.0
-    
-    def _get_total_value(self, row):
-        """获取行中的总价值"""
-        total_columns = ['total_price', 'total', '总价', '合计', '小计']
+        # 检查必需字段是否为空，再检查单价
+        empty_id = order_df['item_id'].isna().to_numpy() | (item_id == '').to_numpy()
+        invalid_price = ~empty_id & (price <= 0)
+        active = ~(empty_id | invalid_price)
         
-        for col in total_columns:
-            if col in row and not pd.isna(row[col]):
-                try:
-                    total = float(row[col])
-                    if total > 0:
-                        return total
-                except (ValueError, TypeError):
-                    continue
+        # 复合键完全匹配
+        found = spec_table.match(item_id, size, color)
+        matched = active & found['key_found']
+        spec_price = found['spec_price']
         
-        return 0.0
-    
-    def _has_quantity_and_total(self, row):
-        """检查行中是否有数量和总价数据"""
-        return self._get_quantity_value(row) > 0 and self._get_total_value(row) > 0
+        # 复合键不匹配：产品ID不存在，或者尺寸/颜色不符（订单中为空时视为匹配）
+        unmatched = active & ~found['key_found']
+        not_found = unmatched & ~found['item_exists']
+        partial = unmatched & found['item_exists']
+        size_error = partial & (size != '').to_numpy() & ~found['size_found']
+        color_error = partial & (color != '').to_numpy() & ~found['color_found']
+        
+        # 找到匹配的规格：检查单价（允许0.01的误差）和总价计算
+        with np.errstate(invalid='ignore'):
+            price_error = matched & (np.abs(price - spec_price) > 0.01)
+        total_error = np.zeros(len(order_df), dtype=bool)
+        expected_total = np.full(len(order_df), np.nan)
+        if check_total_calc:
+            quantity = self._positive_values(order_df, self.QUANTITY_COLUMNS)
+            total = self._positive_values(order_df, self.TOTAL_COLUMNS)
+            expected_total = price * quantity
+            total_error = matched & (quantity > 0) & (total > 0) & (np.abs(total - expected_total) > 0.01)
+        
+        mask = np.zeros(len(order_df), dtype=np.uint8)
+        for code, rows in (('EMPTY_ITEM_ID', empty_id), ('INVALID_PRICE', invalid_price),
+                           ('PRODUCT_NOT_FOUND', not_found), ('SIZE_MISMATCH', size_error),
+                           ('COLOR_MISMATCH', color_error), ('PRICE_MISMATCH', price_error),
+                           ('TOTAL_CALC_ERROR', total_error)):
+            mask[rows] |= ERROR_BITS[code]
+        
+        not_found_rows = np.flatnonzero(not_found)
+        suggestions = {
+            row: ', '.join(item for _, item in matches)
+            for row, matches in zip(not_found_rows.tolist(), spec_table.suggest(item_id.iloc[not_found_rows].tolist()))
+            if matches
+        }
+        return RowErrors(mask, spec_price, expected_total, suggestions)
             
     def load_order_data(self, order_file_path):
         """
         加载订单数据，支持多个工作表
         
+        PDF转换时保存了订单数据产物（见conversion_artifacts.save_order_artifact）且Excel未变化时直接使用产物；
+        产物已失效（版本不同或Excel已变化）时解析Excel后重新保存产物
+        
         Args:
             order_file_path: 订单Excel文件路径
             
@@ -151,183 +194,209 @@ class OrderSpecComparator:
             pandas.DataFrame: 合并后的订单数据，如果失败返回None
         """
         try:
-            # 读取Excel文件的所有工作表
-            excel_file = pd.ExcelFile(order_file_path)
-            sheet_names = excel_file.sheet_names
-            
-            logger.info(f"发现 {len(sheet_names)} 个工作表: {sheet_names}")
+            order_df = load_order_artifact(order_file_path)
+            if order_df is not None:
+                logger.info(f"使用转换时保存的订单数据: {order_file_path}, {len(order_df)} 行数据")
+                return order_df
+            stale_artifact = has_order_artifact(order_file_path)
             
-            all_dataframes = []
+            sheet_frames = []
             
-            # 遍历所有工作表
-            for sheet_name in sheet_names:
-                try:
-                    df = pd.read_excel(order_file_path, sheet_name=sheet_name)
-                    
-                    # 跳过空工作表
-                    if df.empty:
-                        logger.info(f"跳过空工作表: {sheet_name}")
+            # 工作簿只打开一次（共享字符串、样式只解析一次），再逐个解析工作表；
+            # 不按<dimension>跳过空工作表（部分写入器输出的维度不准确），空工作表由standardize_order_sheets跳过
+            with pd.ExcelFile(order_file_path) as workbook:
+                logger.info(f"发现 {len(workbook.sheet_names)} 个工作表: {workbook.sheet_names}")
+                
+                for sheet_name in workbook.sheet_names:
+                    try:
+                        sheet_frames.append((sheet_name, workbook.parse(sheet_name)))
+                    except Exception as e:
+                        logger.warning(f"加载工作表 '{sheet_name}' 失败: {str(e)}")
                         continue
-                    
-                    # 添加工作表标识列
-                    df['工作表'] = sheet_name
-                    df['表格序号'] = len(all_dataframes) + 1
-                    
-                    all_dataframes.append(df)
-                    logger.info(f"成功加载工作表 '{sheet_name}': {len(df)} 行数据")
-                    
-                except Exception as e:
-                    logger.warning(f"加载工作表 '{sheet_name}' 失败: {str(e)}")
-                    continue
             
-            if not all_dataframes:
-                logger.error("没有成功加载任何工作表")
-                return None
+            order_df = self.standardize_order_sheets(sheet_frames)
+            if stale_artifact and order_df is not None and save_order_artifact(order_file_path, order_df):
+                logger.info(f"已按当前规则重新保存订单数据产物: {order_file_path}")
+            return order_df
             
-            # 合并所有工作表的数据
-            df = pd.concat(all_dataframes, ignore_index=True)
-            logger.info(f"合并后总数据行数: {len(df)}")
+        except Exception as e:
+            logger.error(f"加载订单数据失败: {str(e)}")
+            return None
+    
+    def standardize_order_sheets(self, sheet_frames):
+        """
+        合并各工作表的数据并标准化列名和数据类型
+        
+        Args:
+            sheet_frames: [(工作表名称, DataFrame)]，DataFrame与pandas.read_excel读取该工作表的结果一致
             
-            # 如果只有一个工作表，移除工作表标识列以保持兼容性
-            if len(all_dataframes) == 1:
-                df = df.drop(['工作表', '表格序号'], axis=1)
+        Returns:
+            pandas.DataFrame: 合并后的订单数据，没有数据或无法确定item_id列时返回None
+        """
+        all_dataframes = []
+        for sheet_name, df in sheet_frames:
+            # 跳过空工作表
+            if df.empty:
+                logger.info(f"跳过空工作表: {sheet_name}")
+                continue
             
-            # 数据清洗
-            df = df.dropna(how='all')  # 删除完全空白的行
+            # 添加工作表标识列
+            df = df.copy()
+            df['工作表'] = sheet_name
+            df['表格序号'] = len(all_dataframes) + 1
             
-            # 标准化列名（去除空格，转换为小写）
-            # 确保列名是字符串类型
-            df.columns = [str(col).strip().lower() for col in df.columns]
+            all_dataframes.append(df)
+            logger.info(f"成功加载工作表 '{sheet_name}': {len(df)} 行数据")
+        
+        if not all_dataframes:
+            logger.error("没有成功加载任何工作表")
+            return None
+        
+        # 合并所有工作表的数据
+        df = pd.concat(all_dataframes, ignore_index=True)
+        logger.info(f"合并后总数据行数: {len(df)}")
+        
+        # 如果只有一个工作表，移除工作表标识列以保持兼容性
+        if len(all_dataframes) == 1:
+            df = df.drop(['工作表', '表格序号'], axis=1)
+        
+        # 数据清洗
+        df = df.dropna(how='all')  # 删除完全空白的行
+        
+        # 标准化列名（去除空格，转换为小写）
+        # 确保列名是字符串类型
+        df.columns = [str(col).strip().lower() for col in df.columns]
+        
+        plan = self._order_column_plan(df)
+        if plan is None:
+            return None
+        return self._apply_order_column_plan(df, plan)
             
-            # 检查是否是从PDF转换的Excel文件（列名可能是数字）
-            if all(col.isdigit() for col in df.columns if col.strip()):
-                logger.info("检测到从PDF转换的Excel文件，尝试推断列名")
-                
-                # 尝试从前几行推断列名
-                header_rows = df.head(5)  # 取前5行尝试推断列名
-                
-                # 查找可能的标题行
-                potential_headers = {}
-                for i, row in header_rows.iterrows():
-                    # 检查这一行是否包含关键字
-                    row_values = [str(v).lower() for v in row.values if pd.notna(v)]
-                    keywords = ['item', 'product', 'price', 'size', 'color', 'quantity', 'amount']
-                    if any(kw in ' '.join(row_values) for kw in keywords):
-                        # 记录这一行可能包含的列名
-                        for col_idx, value in enumerate(row):
-                            if pd.notna(value) and str(value).strip():
-                                col_name = str(col_idx)
-                                if col_name not in potential_headers:
-                                    potential_headers[col_name] = []
-                                potential_headers[col_name].append(str(value).lower())
-                
-                # 创建映射字典
-                column_mapping = {}
-                
-                # 尝试映射列名
-                for col, values in potential_headers.items():
-                    # 合并这一列的所有可能值
-                    combined = ' '.join(values).lower()
-                    
-                    # 更强大的列名映射逻辑
-                    if any(kw in combined for kw in ['item', 'number', 'id', '编号', '货号', '产品编号', '商品编号']):
-                        column_mapping[col] = 'item_id'
-                    elif any(kw in combined for kw in ['size', 'dimension', '尺寸', '规格', '型号']):
-                        column_mapping[col] = 'size'
-                    elif any(kw in combined for kw in ['color', 'colour', '颜色', '色彩']):
-                        column_mapping[col] = 'color'
-                    elif any(kw in combined for kw in ['price', 'unit', 'cost', '单价', '价格', '金额']):
-                        column_mapping[col] = 'unit_price'
-                    elif any(kw in combined for kw in ['quantity', 'qty', 'amount', '数量', '件数']):
-                        column_mapping[col] = 'quantity'
-                    elif any(kw in combined for kw in ['total', 'sum', '总价', '合计', '小计']):
-                        column_mapping[col] = 'total_price'
-                    elif any(kw in combined for kw in ['product', 'description', 'name', '产品', '商品', '名称', '描述']):
-                        column_mapping[col] = 'product_name'
-                
-                # 如果找到了映射，重命名列并跳过标题行
-                if column_mapping:
-                    # 找到最后一个标题行的索引，但要确保不删除所有数据
-                    last_header_row = max(header_rows.index)
-                    
-                    # 只有当标题行不是最后一行时才删除
-                    if last_header_row < len(df) - 1:
-                        df = df.iloc[last_header_row+1:].reset_index(drop=True)
-                    else:
-                        # 如果标题行是最后几行，只删除第一行
-                        df = df.iloc[1:].reset_index(drop=True)
-                    
-                    # 重命名列
-                    df = df.rename(columns=column_mapping)
-                    
-                    logger.info(f"列映射结果: {column_mapping}")
-                    logger.info(f"删除标题行后剩余数据行数: {len(df)}")
-                else:
-                    logger.warning("无法推断列名，尝试基于数据内容推断")
-                    # 尝试基于数据内容推断列名
-                    column_mapping = self._infer_columns_by_content(df)
-                    if column_mapping:
-                        df = df.rename(columns=column_mapping)
-                        logger.info(f"基于内容推断的列映射结果: {column_mapping}")
-                    else:
-                        logger.warning("完全无法推断列名，使用默认列名")
-            
-            # 检查必需的列是否存在（进一步放宽要求）
-            required_columns = ['item_id']  # 只要求item_id为必需列
-            optional_columns = ['unit_price', 'product_name', 'quantity', 'size', 'color']
+    def _order_column_plan(self, df):
+        """
+        确定订单的列名映射：PDF转换的Excel（列名为数字）从前几行推断列名并跳过标题行，
+        缺少item_id时使用第一列
+        
+        Args:
+            df: 列名已标准化的订单数据（分块比对时为第一块）
             
-            missing_columns = [col for col in required_columns if col not in df.columns]
+        Returns:
+            dict: skip_rows（需要跳过的标题行数）和columns（映射后的列名），无法确定item_id列时返回None
+        """
+        skip_rows = 0
+        renamed = df.iloc[:0]
+        
+        # 检查是否是从PDF转换的Excel文件（列名可能是数字）
+        if all(col.isdigit() for col in df.columns if col.strip()):
+            logger.info("检测到从PDF转换的Excel文件，尝试推断列名")
             
-            if missing_columns:
-                logger.error(f"订单文件缺少必需的列: {missing_columns}")
-                logger.info(f"当前列名: {list(df.columns)}")
-                logger.info("尝试使用第一列作为item_id")
-                
-                # 如果只缺少item_id，尝试使用第一列
-                if missing_columns == ['item_id'] and len(df.columns) > 0:
-                    first_col = df.columns[0]
-                    df = df.rename(columns={first_col: 'item_id'})
-                    logger.info(f"将第一列 '{first_col}' 重命名为 'item_id'")
-                else:
-                    return None
-                
-            # 数据类型转换和清洗
-            df['item_id'] = df['item_id'].fillna('').astype(str).str.strip()
+            # 尝试从前几行推断列名：包含关键词的行为标题行
+            header_rows = df.head(5)  # 取前5行尝试推断列名
+            header_positions = keyword_rows(header_rows, ORDER_HEADER_KEYWORDS)
             
-            # 为缺少的列添加默认值
-            for col in optional_columns:
-                if col not in df.columns:
-                    if col in ['unit_price', 'quantity', 'total_price']:
-                        df[col] = 0.0  # 数字列默认为0
-                    else:
-                        df[col] = ''   # 文本列默认为空字符串
+            # 按标题行的文本映射列名
+            fields = match_header_fields(header_rows.iloc[header_positions]) if len(header_positions) else {}
+            column_mapping = {df.columns[position]: field for position, field in fields.items()}
             
-            # 数据类型转换
-            if 'size' in df.columns:
-                df['size'] = df['size'].fillna('').astype(str).str.strip()
+            # 如果找到了映射，重命名列并跳过标题行
+            if column_mapping:
+                # 找到最后一个标题行，但要确保不删除所有数据
+                last_header_row = int(header_positions.max())
                 
-            if 'color' in df.columns:
-                df['color'] = df['color'].fillna('').astype(str).str.strip()
+                # 只有当标题行不是最后一行时才删除
+                if last_header_row < len(df) - 1:
+                    skip_rows = last_header_row + 1
+                else:
+                    # 如果标题行是最后几行，只删除第一行
+                    skip_rows = 1
                 
-            if 'product_name' in df.columns:
-                df['product_name'] = df['product_name'].fillna('').astype(str).str.strip()
+                # 重命名列
+                renamed = renamed.rename(columns=column_mapping)
                 
-            if 'unit_price' in df.columns:
-                df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce').fillna(0.0)
+                logger.info(f"列映射结果: {column_mapping}")
+                logger.info(f"删除标题行后剩余数据行数: {max(len(df) - skip_rows, 0)}")
+            else:
+                logger.warning("无法推断列名，尝试基于数据内容推断")
+                # 尝试基于数据内容推断列名
+                column_mapping = self._infer_columns_by_content(df)
+                if column_mapping:
+                    renamed = renamed.rename(columns=column_mapping)
+                    logger.info(f"基于内容推断的列映射结果: {column_mapping}")
+                else:
+                    logger.warning("完全无法推断列名，使用默认列名")
+        
+        # 检查必需的列是否存在（进一步放宽要求）
+        required_columns = ['item_id']  # 只要求item_id为必需列
+        
+        missing_columns = [col for col in required_columns if col not in renamed.columns]
+        
+        if missing_columns:
+            logger.error(f"订单文件缺少必需的列: {missing_columns}")
+            logger.info(f"当前列名: {list(renamed.columns)}")
+            logger.info("尝试使用第一列作为item_id")
+            
+            # 如果只缺少item_id，尝试使用第一列
+            if missing_columns == ['item_id'] and len(renamed.columns) > 0:
+                first_col = renamed.columns[0]
+                renamed = renamed.rename(columns={first_col: 'item_id'})
+                logger.info(f"将第一列 '{first_col}' 重命名为 'item_id'")
+            else:
+                return None
+        
+        return {'skip_rows': skip_rows, 'columns': list(renamed.columns)}
+    
+    def _apply_order_column_plan(self, df, plan, skip_header=True):
+        """
+        按_order_column_plan的结果映射列名并清洗数据类型
+        
+        Args:
+            df: 列名已标准化的订单数据
+            plan: _order_column_plan的返回值
+            skip_header: 是否跳过标题行（分块比对时只有第一块需要）
+            
+        Returns:
+            pandas.DataFrame: 清洗后的订单数据
+        """
+        if skip_header and plan['skip_rows']:
+            df = df.iloc[plan['skip_rows']:].reset_index(drop=True)
+        df.columns = plan['columns']
+        
+        optional_columns = ['unit_price', 'product_name', 'quantity', 'size', 'color']
             
-            if 'quantity' in df.columns:
-                df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0.0)
+        # 数据类型转换和清洗
+        df['item_id'] = df['item_id'].fillna('').astype(str).str.strip()
+        
+        # 为缺少的列添加默认值
+        for col in optional_columns:
+            if col not in df.columns:
+                if col in ['unit_price', 'quantity', 'total_price']:
+                    df[col] = 0.0  # 数字列默认为0
+                else:
+                    df[col] = ''   # 文本列默认为空字符串
+        
+        # 数据类型转换
+        if 'size' in df.columns:
+            df['size'] = df['size'].fillna('').astype(str).str.strip()
             
-            if 'total_price' in df.columns:
-                df['total_price'] = pd.to_numeric(df['total_price'], errors='coerce').fillna(0.0)
+        if 'color' in df.columns:
+            df['color'] = df['color'].fillna('').astype(str).str.strip()
             
-            return df
+        if 'product_name' in df.columns:
+            df['product_name'] = df['product_name'].fillna('').astype(str).str.strip()
             
-        except Exception as e:
-            logger.error(f"加载订单数据失败: {str(e)}")
-            return None
+        if 'unit_price' in df.columns:
+            df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce').fillna(0.0)
+        
+        if 'quantity' in df.columns:
+            df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0.0)
+        
+        if 'total_price' in df.columns:
+            df['total_price'] = pd.to_numeric(df['total_price'], errors='coerce').fillna(0.0)
+        
+        return df
             
-    def load_spec_data(self, spec_file_path):
+    @staticmethod
+    def load_spec_data(spec_file_path):
         """
         加载产品规格数据
         
@@ -407,7 +476,50 @@ class OrderSpecComparator:
             logger.error(f"加载规格数据失败: {str(e)}")
             return None
             
-    def compare_orders(self, order_file_path, spec_file_path, check_total_calc=True):
+    @classmethod
+    def index_spec(cls, spec_file_path):
+        """
+        解析规格表、建立查找结构并保存索引文件（规格表上传或确认映射时调用）
+        
+        Args:
+            spec_file_path: 产品规格Excel文件路径
+            
+        Returns:
+            SpecTable: 规格表，如果失败返回None
+        """
+        spec_df = cls.load_spec_data(spec_file_path)
+        if spec_df is None:
+            return None
+        table = SpecTable.from_frame(spec_df)
+        save_spec_index(spec_file_path, table)
+        return table
+    
+    def _build_spec_table(self, spec_file_path):
+        """读取规格表索引，没有可用的索引时解析规格表并补建索引"""
+        table = load_spec_index(spec_file_path)
+        if table is None:
+            table = self.index_spec(spec_file_path)
+        return table
+    
+    def load_spec_table(self, spec_file_path, spec_id=None):
+        """
+        通过规格表缓存获取规格表及查找结构
+        
+        Args:
+            spec_file_path: 产品规格Excel文件路径
+            spec_id: 规格表ID（作为缓存键）
+            
+        Returns:
+            SpecTable: 规格表，如果失败返回None
+        """
+        try:
+            return get_spec_cache().get(spec_file_path, self._build_spec_table, spec_id=spec_id)
+        except OSError as e:
+            logger.error(f"加载规格数据失败: {str(e)}")
+            return None
+            
+    def compare_orders(self, order_file_path, spec_file_path, check_total_calc=True, spec_id=None, chunk_rows=None,
+                       write_workbook=True):
         """
         比对订单与产品规格
         
@@ -415,150 +527,463 @@ class OrderSpecComparator:
             order_file_path: 订单Excel文件路径
             spec_file_path: 产品规格Excel文件路径
             check_total_calc: 是否检查总价计算
+            spec_id: 规格表ID，用于规格表缓存
+            chunk_rows: 分块比对的每块行数（见compare_with_table）
+            write_workbook: 是否立即生成结果工作簿，为False时在第一次下载时由render_workbook生成
             
         Returns:
             dict: 比对结果，包含结果文件路径和统计信息
         """
         try:
-            # 加载数据
-            order_df = self.load_order_data(order_file_path)
-            spec_df = self.load_spec_data(spec_file_path)
+            spec_table = self.load_spec_table(spec_file_path, spec_id)
+            if spec_table is None:
+                return {'error': '数据加载失败'}
+            source = None if write_workbook else {
+                'order_file_path': order_file_path, 'spec_file_path': spec_file_path, 'spec_id': spec_id
+            }
+            return self.compare_with_table(order_file_path, spec_table, check_total_calc, write_workbook, source,
+                                           chunk_rows=chunk_rows)
+            
+        except Exception as e:
+            logger.error(f"订单比对失败: {str(e)}")
+            return {'error': f'比对失败: {str(e)}'}
+    
+    def load_spec_layers(self, spec_layers):
+        """
+        按优先顺序加载多个规格表（各层分别使用规格表缓存，不合并）
+        
+        Args:
+            spec_layers: [(spec_id, 规格表文件路径), ...]，靠前的规格表优先
+            
+        Returns:
+            LayeredSpecTable: 分层规格表，任一层加载失败返回None
+        """
+        tables = []
+        for spec_id, spec_file_path in spec_layers:
+            table = self.load_spec_table(spec_file_path, spec_id)
+            if table is None:
+                logger.error(f"规格表层加载失败: {spec_id}")
+                return None
+            tables.append(table)
+        return LayeredSpecTable(tables, [spec_id for spec_id, _ in spec_layers])
+    
+    def compare_orders_layered(self, order_file_path, spec_layers, check_total_calc=True, chunk_rows=None,
+                               write_workbook=True):
+        """
+        按优先顺序比对多个规格表：每个产品使用第一个包含该产品ID的规格表，
+        结果中的“匹配规格表”列记录所用的规格表
+        
+        Args:
+            order_file_path: 订单Excel文件路径
+            spec_layers: [(spec_id, 规格表文件路径), ...]，靠前的规格表优先
+            check_total_calc: 是否检查总价计算
+            chunk_rows: 分块比对的每块行数（见compare_with_table）
+            write_workbook: 是否立即生成结果工作簿，为False时在第一次下载时由render_workbook生成
             
-            if order_df is None or spec_df is None:
+        Returns:
+            dict: 比对结果，统计信息中的layer_matches为各层匹配的行数
+        """
+        try:
+            spec_table = self.load_spec_layers(spec_layers)
+            if spec_table is None:
                 return {'error': '数据加载失败'}
-                
-            # 创建规格数据的查找字典
-            spec_dict = {}
-            for _, row in spec_df.iterrows():
-                # 安全地获取列值
-                item_id = str(row.get('item_id', '')).strip()
-                size = str(row.get('size', '')).strip()
-                color = str(row.get('color', '')).strip()
-                
-                key = f"{item_id}|{size}|{color}"
-                spec_dict[key] = {
-                    'standard_unit_price': row.get('standard_unit_price', 0),
-                    'product_name': row.get('product_name', ''),
-                    'description': row.get('description', '')
-                }
-            
-            # 初始化结果列
-            order_df['核对状态'] = '通过'
-            order_df['错误详情'] = ''
-            
-            # 记录统计信息
-            stats = {
-                'total_records': len(order_df),
-                'error_records': 0,
-                'error_types': {error_type: 0 for error_type in self.ERROR_TYPES.keys()}
+            source = None if write_workbook else {
+                'order_file_path': order_file_path, 'spec_layers': [list(layer) for layer in spec_layers]
+            }
+            return self.compare_with_table(order_file_path, spec_table, check_total_calc, write_workbook, source,
+                                           chunk_rows=chunk_rows)
+            
+        except Exception as e:
+            logger.error(f"订单比对失败: {str(e)}")
+            return {'error': f'比对失败: {str(e)}'}
+    
+    def _annotate(self, order_df, spec_table, check_total_calc):
+        """
+        比对订单数据，分层比对时添加匹配规格表列
+        
+        核对状态和错误详情列在输出时由add_result_columns添加
+        
+        Returns:
+            tuple: (每行的比对错误, 统计信息)
+        """
+        # 与规格表做哈希连接比对
+        errors = self.find_row_errors(order_df, spec_table, check_total_calc)
+        stats = errors.stats()
+        if isinstance(spec_table, LayeredSpecTable):
+            # 记录每行产品所属的规格表层
+            layer = spec_table.resolve(text_column(order_df, 'item_id'))
+            order_df['匹配规格表'] = spec_table.layer_names(layer)
+            stats['layer_matches'] = {
+                spec_id: int((layer == position).sum()) for position, spec_id in enumerate(spec_table.spec_ids)
             }
+        return errors, stats
+    
+    def _check_order(self, order_file_path, spec_table, check_total_calc):
+        """加载订单并与规格表比对，返回订单数据、每行的比对错误及统计信息"""
+        order_df = self.load_order_data(order_file_path)
+        if order_df is None:
+            return None, None, None
+        
+        errors, stats = self._annotate(order_df, spec_table, check_total_calc)
+        return order_df, errors, stats
+    
+    def _estimate_order_rows(self, order_file_path):
+        """根据工作表维度信息估算订单数据行数，无法估算时返回0"""
+        try:
+            sheets = inspect_workbook(order_file_path, dimensions=True)
+        except (InvalidWorkbookError, OSError):
+            return 0
+        return sum(max(sheet['dimension']['max_row'] - 1, 0) for sheet in sheets if sheet.get('dimension'))
+    
+    @staticmethod
+    def _add_stats(total, stats):
+        """累加分块比对的统计信息"""
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                counts = total.setdefault(key, {})
+                for name, count in value.items():
+                    counts[name] = counts.get(name, 0) + count
+            else:
+                total[key] = total.get(key, 0) + value
+        return total
+    
+    def compare_chunked(self, order_file_path, spec_table, check_total_calc=True,
+                        chunk_rows=DEFAULT_CHUNK_ROWS, result_file_path=None):
+        """
+        分块比对大订单：按块读取订单行，逐块与内存中的规格表索引比对，并追加写入只写模式的结果工作簿
+        
+        内存占用由块大小和规格表索引决定，与订单总行数无关。列名映射由第一块确定，
+        结果与load_order_data+save_with_formatting一致，但列宽按第一块数据计算、错误详情不加批注，
+        单元格值按原样处理（整数产品ID不会因为同列有空值而变成浮点数）。
+        
+        Args:
+            order_file_path: 订单Excel文件路径
+            spec_table: 规格表（SpecTable或LayeredSpecTable）
+            check_total_calc: 是否检查总价计算
+            chunk_rows: 每块的行数
+            result_file_path: 结果工作簿路径，None表示不生成工作簿
             
-            # 逐行比对
-            for idx, row in order_df.iterrows():
-                errors = []
+        Returns:
+            tuple: (统计信息, 预览数据)，订单没有数据或缺少产品ID列时为(None, None)
+        """
+        headers, chunks = iter_sheet_chunks(order_file_path, chunk_rows)
+        if not headers:
+            logger.error("没有成功加载任何工作表")
+            return None, None
+        
+        multi_sheet = len(headers) > 1
+        sheet_numbers = {name: number for number, name in enumerate(headers, 1)}
+        if multi_sheet:
+            # 与pd.concat合并各工作表（含工作表标识列）后的列顺序一致
+            raw_columns = list(dict.fromkeys(
+                column for columns in headers.values() for column in list(columns) + ['工作表', '表格序号']
+            ))
+            # 与按工作表分组保存一致，结果工作表按名称排序，预览为排序后的第一个工作表
+            output_sheets = sorted(headers, key=str)
+        else:
+            raw_columns = next(iter(headers.values()))
+            output_sheets = ['Sheet1']
+        preview_sheet = output_sheets[0] if multi_sheet else next(iter(headers))
+        logger.info(f"分块比对 {len(headers)} 个工作表，每块 {chunk_rows} 行")
+        
+        plan = None
+        writer = None
+        stats = {}
+        preview_frames = []
+        preview_rows = 0
+        try:
+            for sheet_name, rows in chunks:
+                df = pd.DataFrame(rows, columns=pd.Index(headers[sheet_name], dtype=object), dtype=object)
+                if multi_sheet:
+                    df['工作表'] = sheet_name
+                    df['表格序号'] = sheet_numbers[sheet_name]
+                    df = df.reindex(columns=raw_columns)
+                else:
+                    df = df.dropna(how='all')  # 删除完全空白的行
+                df.columns = [str(col).strip().lower() for col in df.columns]
                 
-                # 检查必需字段是否为空
-                if pd.isna(row['item_id']) or str(row['item_id']).strip() == '':
-                    errors.append('产品ID为空')
-                # 检查价格字段（可能在不同的列中）
-                elif self._get_price_value(row) <= 0:
-                    errors.append('单价无效')
+                first_chunk = plan is None
+                if first_chunk:
+                    plan = self._order_column_plan(df)
+                    if plan is None:
+                        return None, None
+                df = self._apply_order_column_plan(df, plan, skip_header=first_chunk)
+                errors, chunk_stats = self._annotate(df, spec_table, check_total_calc)
+                self._add_stats(stats, chunk_stats)
+                add_result_columns(df, errors)
+                
+                if multi_sheet:
+                    output_columns = [col for col in df.columns if col not in ('工作表', '表格序号')]
                 else:
-                    # 构造查找键
-                    item_id = str(row.get('item_id', '')).strip()
-                    size = str(row.get('size', '')).strip()
-                    color = str(row.get('color', '')).strip()
-                    
-                    lookup_key = f"{item_id}|{size}|{color}"
-                    
-                    if lookup_key not in spec_dict:
-                        # 检查是否只是产品ID不存在
-                        item_exists = any(str(spec_row.get('item_id', '')).strip() == str(row.get('item_id', '')).strip() for _, spec_row in spec_df.iterrows())
-                        
-                        if not item_exists:
-                            errors.append(self.ERROR_TYPES['PRODUCT_NOT_FOUND'])
-                            stats['error_types']['PRODUCT_NOT_FOUND'] += 1
-                        else:
-                            # 产品ID存在，但尺寸或颜色不匹配
-                            item_specs = spec_df[spec_df['item_id'] == row.get('item_id', '')]
-                            
-                            # 检查尺寸是否匹配
-                            order_size = str(row.get('size', '')).strip()
-                            if order_size:  # 只有当订单中有尺寸时才检查
-                                size_match = any(str(spec_row.get('size', '')).strip() == order_size for _, spec_row in item_specs.iterrows())
-                            else:
-                                size_match = True  # 如果订单中没有尺寸，则视为匹配
-                            
-                            # 检查颜色是否匹配
-                            order_color = str(row.get('color', '')).strip()
-                            if order_color:  # 只有当订单中有颜色时才检查
-                                color_match = any(str(spec_row.get('color', '')).strip() == order_color for _, spec_row in item_specs.iterrows())
-                            else:
-                                color_match = True  # 如果订单中没有颜色，则视为匹配
-                            
-                            if not size_match:
-                                errors.append(self.ERROR_TYPES['SIZE_MISMATCH'])
-                                stats['error_types']['SIZE_MISMATCH'] += 1
-                                
-                            if not color_match:
-                                errors.append(self.ERROR_TYPES['COLOR_MISMATCH'])
-                                stats['error_types']['COLOR_MISMATCH'] += 1
-                    else:
-                        # 找到匹配的规格，检查单价
-                        spec_info = spec_dict[lookup_key]
-                        
-                        # 检查单价是否匹配
-                        if 'standard_unit_price' in spec_info:
-                            try:
-                                order_price = self._get_price_value(row)
-                                spec_price = float(spec_info['standard_unit_price'])
-                                if order_price > 0 and abs(order_price - spec_price) > 0.01:  # 允许0.01的误差
-                                    errors.append(f"{self.ERROR_TYPES['PRICE_MISMATCH']} (标准价格: {spec_price})")
-                                    stats['error_types']['PRICE_MISMATCH'] += 1
-                            except (ValueError, TypeError):
-                                errors.append(f"单价格式无效")
-                                stats['error_types']['PRICE_MISMATCH'] += 1
-                            
-                        # 检查总价计算（如果有相关列）
-                        if check_total_calc and self._has_quantity_and_total(row):
-                            try:
-                                unit_price = self._get_price_value(row)
-                                quantity = self._get_quantity_value(row)
-                                total_price = self._get_total_value(row)
-                                
-                                if unit_price > 0 and quantity > 0 and total_price > 0:
-                                    expected_total = unit_price * quantity
-                                    if abs(total_price - expected_total) > 0.01:
-                                        errors.append(f"{self.ERROR_TYPES['TOTAL_CALC_ERROR']} (应为: {expected_total:.2f})")
-                                        stats['error_types']['TOTAL_CALC_ERROR'] += 1
-                            except (ValueError, TypeError):
-                                # 如果转换失败，跳过总价检查
-                                pass
+                    output_columns = list(df.columns)
+                if writer is None and result_file_path:
+                    writer = ComparisonWorkbookWriter(result_file_path, output_sheets, output_columns,
+                                                      self.ERROR_FILL, self.ERROR_FONT, multi_sheet=multi_sheet)
+                if writer is not None:
+                    writer.append(sheet_name if multi_sheet else output_sheets[0], df)
                 
-                # 更新结果
-                if errors:
-                    order_df.at[idx, '核对状态'] = '有问题'
-                    order_df.at[idx, '错误详情'] = '; '.join(errors)
-                    stats['error_records'] += 1
+                if sheet_name == preview_sheet and preview_rows < COMPARISON_PREVIEW_ROWS:
+                    preview_frames.append(df.head(COMPARISON_PREVIEW_ROWS - preview_rows))
+                    preview_rows += len(preview_frames[-1])
+        finally:
+            chunks.close()
+        
+        if writer is not None:
+            writer.close()
+        stats.setdefault('total_records', 0)
+        stats.setdefault('error_records', 0)
+        logger.info(f"分块比对完成: {stats['total_records']} 行")
+        preview = build_comparison_preview(pd.concat(preview_frames, ignore_index=True)) if preview_frames else \
+            {'columns': [], 'data': []}
+        return stats, preview
+    
+    def compare_with_table(self, order_file_path, spec_table, check_total_calc=True,
+                           write_workbook=True, source=None, chunk_rows=None):
+        """
+        使用已加载的规格表比对一个订单
+        
+        Args:
+            order_file_path: 订单Excel文件路径
+            spec_table: load_spec_table返回的规格表
+            check_total_calc: 是否检查总价计算
+            write_workbook: 是否立即生成结果工作簿，为False时在下载时由render_workbook生成
+            source: 比对来源（订单/规格表路径等）及订单内容哈希，保存在摘要中供render_workbook生成工作簿；
+                    不分块时同时保存每行的比对结果，生成工作簿时不需要重新比对
+            chunk_rows: 分块比对的每块行数，None表示订单超过CHUNKED_COMPARE_MIN_ROWS行时自动分块
+            
+        Returns:
+            dict: 比对结果，包含结果文件路径和统计信息
+        """
+        try:
+            if chunk_rows is None and self._estimate_order_rows(order_file_path) > CHUNKED_COMPARE_MIN_ROWS:
+                chunk_rows = DEFAULT_CHUNK_ROWS
                     
+            if source and not write_workbook:
+                # 读取订单前计算哈希，生成工作簿时据此判断订单是否变化
+                source = dict(source, order_hash=file_sha256(order_file_path))
+            
             # 生成结果文件
             result_file_id = str(uuid.uuid4())
             result_filename = f"order_comparison_{result_file_id}.xlsx"
             result_file_path = os.path.join(self.output_dir, result_filename)
             
-            # 保存到Excel并添加格式
-            self.save_with_formatting(order_df, result_file_path)
+            if chunk_rows:
+                # 分块比对，结果逐块写入工作簿
+                stats, preview = self.compare_chunked(
+                    order_file_path, spec_table, check_total_calc, chunk_rows,
+                    result_file_path if write_workbook else None
+                )
+                if stats is None:
+                    return {'error': '数据加载失败'}
+            else:
+                order_df, errors, stats = self._check_order(order_file_path, spec_table, check_total_calc)
+                if order_df is None:
+                    return {'error': '数据加载失败'}
+                
+                # 保存到Excel并添加格式；延迟生成工作簿时只为预览行生成错误详情
+                if write_workbook:
+                    self.save_with_formatting(add_result_columns(order_df, errors), result_file_path)
+                elif source:
+                    save_comparison_rows(
+                        self.output_dir, result_file_id, errors,
+                        order_df['匹配规格表'].to_numpy() if '匹配规格表' in order_df.columns else None
+                    )
+                preview = build_comparison_preview(order_df, errors=None if write_workbook else errors)
+            
+            # 保存统计信息和预览数据，预览接口不再需要重新读取工作簿
+            extra = {'source': source} if source else {}
+            save_comparison_summary(
+                self.output_dir,
+                result_file_id,
+                stats,
+                preview,
+                check_total_calc=check_total_calc,
+                **extra
+            )
             
             return {
                 'result_file_id': result_file_id,
                 'result_file_path': result_file_path,
                 'filename': result_filename,
+                'workbook_ready': write_workbook,
                 'stats': stats
             }
             
         except Exception as e:
             logger.error(f"订单比对失败: {str(e)}")
             return {'error': f'比对失败: {str(e)}'}
+    
+    def render_workbook(self, result_file_id):
+        """
+        为未生成工作簿的比对结果生成结果工作簿
+        
+        保存了每行的比对结果时直接按保存的结果生成；否则按摘要中的比对来源重新比对。
+        订单或规格表在比对后已变化时，生成的工作簿会与摘要中的统计及预览不一致，此时不生成
+        
+        Args:
+            result_file_id: 比对结果ID
+            
+        Returns:
+            str: 工作簿路径，摘要中没有比对来源、数据加载失败或比对结果已失效时返回None
+        """
+        summary = load_comparison_summary(self.output_dir, result_file_id)
+        source = (summary or {}).get('source')
+        if not source or not os.path.exists(source['order_file_path']):
+            return None
+        order_file_path = source['order_file_path']
+        if source.get('order_hash') and file_sha256(order_file_path) != source['order_hash']:
+            logger.warning(f"订单在比对后已变化，比对结果已失效: {result_file_id}")
+            return None
+        check_total_calc = summary.get('check_total_calc', True)
+        
+        # 先写临时文件再替换，并发下载时不会读到写了一半的工作簿
+        result_file_path = os.path.join(self.output_dir, f"order_comparison_{result_file_id}.xlsx")
+        fd, temp_path = tempfile.mkstemp(dir=self.output_dir, suffix='.xlsx')
+        os.close(fd)
+        try:
+            order_df = self._load_row_results(order_file_path, source, result_file_id)
+            if order_df is not None:
+                self.save_with_formatting(order_df, temp_path)
+            else:
+                if source.get('spec_layers'):
+                    spec_table = self.load_spec_layers([tuple(layer) for layer in source['spec_layers']])
+                else:
+                    spec_table = self.load_spec_table(source['spec_file_path'], source.get('spec_id'))
+                if spec_table is None:
+                    return None
+                
+                if self._estimate_order_rows(order_file_path) > CHUNKED_COMPARE_MIN_ROWS:
+                    stats, _ = self.compare_chunked(order_file_path, spec_table, check_total_calc,
+                                                    DEFAULT_CHUNK_ROWS, temp_path)
+                else:
+                    order_df, errors, stats = self._check_order(order_file_path, spec_table, check_total_calc)
+                    if order_df is not None:
+                        self.save_with_formatting(add_result_columns(order_df, errors), temp_path)
+                if stats is None:
+                    return None
+                if stats != summary['stats']:
+                    logger.warning(f"订单或规格表在比对后已变化，比对结果已失效: {result_file_id}")
+                    return None
+            os.replace(temp_path, result_file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return result_file_path
+    
+    def _load_row_results(self, order_file_path, source, result_file_id):
+        """加载订单并附加保存的每行比对结果，没有保存结果时返回None"""
+        if not source.get('order_hash'):
+            return None
+        rows = load_comparison_rows(self.output_dir, result_file_id)
+        if rows is None:
+            return None
+        order_df = self.load_order_data(order_file_path)
+        if order_df is None or len(order_df) != len(rows['errors']):
+            return None
+        
+        if 'layer_names' in rows:
+            order_df['匹配规格表'] = rows['layer_names']
+        add_result_columns(order_df, rows['errors'])
+        logger.info(f"按保存的比对结果生成工作簿: {result_file_id}")
+        return order_df
+    
+    def compare_orders_batch(self, order_files, spec_file_path, check_total_calc=True, spec_id=None,
+                             write_workbooks=False, max_workers=None):
+        """
+        用同一个规格表批量比对多个订单
+        
+        规格表只加载一次（规格表缓存中的查找结构），各订单在进程内共用的线程池中比对，
+        不再派生工作进程重建规格表及相似产品索引。
+        
+        Args:
+            order_files: 订单文件ID到文件路径的有序字典
+            spec_file_path: 产品规格Excel文件路径
+            check_total_calc: 是否检查总价计算
+            spec_id: 规格表ID，用于规格表缓存
+            write_workbooks: 是否立即生成每个订单的结果工作簿
+            max_workers: 同时比对的订单数，默认为CPU核数
+            
+        Returns:
+            dict: results（按order_files顺序的每个订单结果）和stats（汇总统计），规格表加载失败时包含error
+        """
+        spec_table = self.load_spec_table(spec_file_path, spec_id)
+        if spec_table is None:
+            return {'error': '规格表加载失败'}
+        
+        source = {'spec_file_path': spec_file_path, 'spec_id': spec_id}
+        tasks = [
+            (order_file_id, order_file_path, check_total_calc, write_workbooks,
+             None if write_workbooks else dict(source, order_file_path=order_file_path))
+            for order_file_id, order_file_path in order_files.items()
+        ]
+        
+        workers = min(max_workers or BATCH_MAX_WORKERS, BATCH_MAX_WORKERS, len(tasks))
+        results = [None] * len(tasks)
+        pending = iter(enumerate(tasks))
+        pending_lock = threading.Lock()
+        
+        def run_pending():
+            # 每个线程依次取下一个订单，同时比对的订单数不超过workers
+            while True:
+                with pending_lock:
+                    index, task = next(pending, (None, None))
+                if task is None:
+                    return
+                try:
+                    results[index] = self._compare_batch_order(spec_table, *task)
+                except Exception as e:
+                    logger.error(f"批量比对订单失败: {task[0]}, 错误: {str(e)}")
+                    results[index] = {'order_file_id': task[0], 'error': f'比对失败: {str(e)}'}
+        
+        if workers <= 1:
+            run_pending()
+        else:
+            executor = get_batch_executor()
+            for future in [executor.submit(run_pending) for _ in range(workers)]:
+                future.result()
+        
+        return {'results': results, 'stats': self.aggregate_stats(results), 'workers': max(workers, 1)}
+    
+    def _compare_batch_order(self, spec_table, order_file_id, order_file_path, check_total_calc,
+                             write_workbook, source):
+        """批量比对中的单个订单"""
+        result = self.compare_with_table(order_file_path, spec_table, check_total_calc, write_workbook, source)
+        result['order_file_id'] = order_file_id
+        result.pop('result_file_path', None)
+        return result
+    
+    def aggregate_stats(self, results):
+        """
+        汇总批量比对的统计信息
+        
+        Args:
+            results: compare_orders_batch中每个订单的结果
+            
+        Returns:
+            dict: 订单数、成功/失败订单数及合计的记录数和错误类型统计
+        """
+        stats = {
+            'total_orders': len(results),
+            'succeeded_orders': 0,
+            'failed_orders': 0,
+            'error_orders': 0,
+            'total_records': 0,
+            'error_records': 0,
+            'error_types': {error_type: 0 for error_type in self.ERROR_TYPES}
+        }
+        for result in results:
+            if 'error' in result:
+                stats['failed_orders'] += 1
+                continue
+            order_stats = result['stats']
+            stats['total_records'] += order_stats['total_records']
+            stats['error_records'] += order_stats['error_records']
+            if order_stats['error_records']:
+                stats['error_orders'] += 1
+            for error_type, count in order_stats['error_types'].items():
+                stats['error_types'][error_type] = stats['error_types'].get(error_type, 0) + count
+        stats['succeeded_orders'] = stats['total_orders'] - stats['failed_orders']
+        return stats
             
     def save_with_formatting(self, df, file_path):
         """
@@ -726,6 +1151,26 @@ class OrderSpecComparator:
             if count > 0:
                 error_name = self.ERROR_TYPES.get(error_type, error_type)
                 summary += f"- {error_name}: {count}条\n"
+        
+        if 'layer_matches' in stats:
+            summary += "\n规格表匹配统计:\n"
+            for spec_id, count in stats['layer_matches'].items():
+                summary += f"- {spec_id}: {count}条\n"
                 
         return summary
 
+
+# 批量比对共用的线程池及创建它的进程（gunicorn派生的工作进程中线程不会随fork复制，需重新创建）
+_batch_executor = None
+_batch_executor_pid = None
+_batch_executor_lock = threading.Lock()
+
+
+def get_batch_executor():
+    """批量比对共用的线程池，每个进程第一次批量比对时创建，之后复用"""
+    global _batch_executor, _batch_executor_pid
+    with _batch_executor_lock:
+        if _batch_executor is None or _batch_executor_pid != os.getpid():
+            _batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch-compare')
+            _batch_executor_pid = os.getpid()
+        return _batch_executor
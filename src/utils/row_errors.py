@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+每行比对错误模块 - 以错误位掩码及数值明细表示每行的比对结果
+
+比对时每行只记录错误位掩码（每种错误一位）和数值明细（标准价格、应有总价），
+产品ID不存在的行另记相似产品。错误详情文本在输出（写入工作簿、生成预览）时才生成，
+统计信息由按位计数得到，按错误类型筛选只需一次按位与。
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# 统计的错误类型代码及名称
+ERROR_TYPES = {
+    'PRODUCT_NOT_FOUND': '产品ID不存在',
+    'SIZE_MISMATCH': '尺寸不符',
+    'COLOR_MISMATCH': '颜色不符',
+    'PRICE_MISMATCH': '单价不符',
+    'TOTAL_CALC_ERROR': '总价计算错误'
+}
+
+# 错误详情中的全部错误，按拼接顺序，序号即在位掩码中的位置
+ERROR_MESSAGES = {
+    'EMPTY_ITEM_ID': '产品ID为空',
+    'INVALID_PRICE': '单价无效',
+    **ERROR_TYPES
+}
+
+ERROR_BITS = {code: np.uint8(1 << position) for position, code in enumerate(ERROR_MESSAGES)}
+
+
+class RowErrors:
+    """
+    一组订单行的比对错误
+
+    mask为每行的错误位掩码（ERROR_BITS），expected_price为匹配的标准单价，
+    expected_total为应有总价（未检查总价时为NaN），suggestions为产品ID不存在的行的相似产品
+    （行号 -> 以逗号分隔的产品ID）
+    """
+
+    def __init__(self, mask: np.ndarray, expected_price: np.ndarray, expected_total: np.ndarray,
+                 suggestions: Optional[Dict[int, str]] = None):
+        self.mask = np.asarray(mask, dtype=np.uint8)
+        self.expected_price = np.asarray(expected_price, dtype=np.float64)
+        self.expected_total = np.asarray(expected_total, dtype=np.float64)
+        self.suggestions = suggestions or {}
+
+    def __len__(self):
+        return len(self.mask)
+
+    @property
+    def has_error(self) -> np.ndarray:
+        """每行是否有问题"""
+        return self.mask != 0
+
+    def rows_with(self, code: str) -> np.ndarray:
+        """每行是否有指定类型的错误"""
+        return (self.mask & ERROR_BITS[code]) != 0
+
+    def stats(self) -> Dict[str, Any]:
+        """统计信息：总行数、有问题的行数及各错误类型的行数"""
+        return {
+            'total_records': len(self.mask),
+            'error_records': int(np.count_nonzero(self.mask)),
+            'error_types': {code: int(np.count_nonzero(self.mask & ERROR_BITS[code])) for code in ERROR_TYPES}
+        }
+
+    def take(self, rows: np.ndarray) -> 'RowErrors':
+        """指定行的比对错误"""
+        rows = np.asarray(rows, dtype=np.int64)
+        positions = {row: position for position, row in enumerate(rows.tolist())}
+        return RowErrors(
+            self.mask[rows], self.expected_price[rows], self.expected_total[rows],
+            {positions[row]: text for row, text in self.suggestions.items() if row in positions}
+        )
+
+    def details(self) -> np.ndarray:
+        """按错误位掩码生成每行的错误详情，没有问题的行为空字符串"""
+        details = np.full(len(self.mask), '', dtype=object)
+        renderers = {
+            'PRODUCT_NOT_FOUND': lambda rows: [
+                ERROR_MESSAGES['PRODUCT_NOT_FOUND'] + (f" (相似产品: {self.suggestions[row]})"
+                                                       if self.suggestions.get(row) else '')
+                for row in rows.tolist()
+            ],
+            'PRICE_MISMATCH': lambda rows: [
+                f"{ERROR_MESSAGES['PRICE_MISMATCH']} (标准价格: {value})" for value in self.expected_price[rows].tolist()
+            ],
+            'TOTAL_CALC_ERROR': lambda rows: [
+                f"{ERROR_MESSAGES['TOTAL_CALC_ERROR']} (应为: {value:.2f})"
+                for value in self.expected_total[rows].tolist()
+            ]
+        }
+        for code, message in ERROR_MESSAGES.items():
+            rows = np.flatnonzero(self.mask & ERROR_BITS[code])
+            if len(rows) == 0:
+                continue
+            text = np.empty(len(rows), dtype=object)
+            text[:] = renderers[code](rows) if code in renderers else message
+            current = details[rows]
+            details[rows] = np.where(current == '', text, current + '; ' + text)
+        return details
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """可保存为npz的数组，数值明细只保存有问题的行"""
+        error_rows = np.flatnonzero(self.mask)
+        suggestion_rows = np.array(sorted(self.suggestions), dtype=np.int64)
+        return {
+            'error_mask': self.mask,
+            'error_rows': error_rows.astype(np.int64),
+            'expected_price': self.expected_price[error_rows],
+            'expected_total': self.expected_total[error_rows],
+            'suggestion_rows': suggestion_rows,
+            'suggestions': np.array([self.suggestions[row] for row in suggestion_rows.tolist()], dtype=str)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> 'RowErrors':
+        """由to_arrays保存的数组还原"""
+        mask = arrays['error_mask']
+        error_rows = arrays['error_rows']
+        expected_price = np.full(len(mask), np.nan)
+        expected_price[error_rows] = arrays['expected_price']
+        expected_total = np.full(len(mask), np.nan)
+        expected_total[error_rows] = arrays['expected_total']
+        suggestions = dict(zip(arrays['suggestion_rows'].tolist(), arrays['suggestions'].tolist()))
+        return cls(mask, expected_price, expected_total, suggestions)
+
+
+def add_result_columns(df: pd.DataFrame, errors: RowErrors) -> pd.DataFrame:
+    """输出前在订单数据中添加核对状态和错误详情列"""
+    df['核对状态'] = np.where(errors.has_error, '有问题', '通过')
+    df['错误详情'] = errors.details()
+    return df
+
+
+__all__ = [
+    'ERROR_TYPES',
+    'ERROR_MESSAGES',
+    'ERROR_BITS',
+    'RowErrors',
+    'add_result_columns'
+]
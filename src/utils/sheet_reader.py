@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+工作表分页读取模块 - 基于openpyxl只读模式按行范围读取Excel工作表
+
+只读取请求页所需的行和列，内存与延迟随页大小增长，而不是随整个工作表大小增长
+"""
+
+import heapq
+import logging
+from itertools import chain, islice, repeat
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+logger = logging.getLogger(__name__)
+
+# 单页最大行数，防止一次请求拉取过多数据
+MAX_PAGE_SIZE = 5000
+
+# pandas.read_excel默认视为空值的字符串，分块读取时同样转换为None
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+
+class SheetNotFoundError(KeyError):
+    """请求的工作表不存在"""
+
+
+def _header_names(header_row: Sequence[Any]) -> List[Any]:
+    """
+    生成与pandas.read_excel一致的列名：空表头为"Unnamed: i"，重复列名追加".n"后缀
+    """
+    names = []
+    seen: Dict[Any, int] = {}
+    for i, value in enumerate(header_row):
+        name = value if value is not None and str(value).strip() != '' else f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _open_sheet(file_path: str, sheet_name: Optional[str]):
+    """以只读模式打开工作簿并返回(workbook, worksheet)"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    if sheet_name is None:
+        return wb, wb.worksheets[0]
+    if sheet_name not in wb.sheetnames:
+        wb.close()
+        raise SheetNotFoundError(sheet_name)
+    return wb, wb[sheet_name]
+
+
+def _data_row_count(ws) -> Optional[int]:
+    """根据工作表维度信息获取数据行数（不含表头），维度缺失时返回None"""
+    try:
+        max_row = ws.max_row
+    except Exception:
+        return None
+    if max_row is None:
+        return None
+    return max(max_row - 1, 0)
+
+
+def _pad(row: Tuple[Any, ...], width: int) -> Tuple[Any, ...]:
+    """补齐或截断行到表头宽度"""
+    if len(row) < width:
+        return row + (None,) * (width - len(row))
+    return row[:width]
+
+
+def _matches(row: Sequence[Any], filters: Sequence[Tuple[int, str]]) -> bool:
+    """判断行是否满足所有过滤条件（不区分大小写的子串匹配）"""
+    for col_idx, needle in filters:
+        value = row[col_idx]
+        if value is None or needle not in str(value).lower():
+            return False
+    return True
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """排序键：数字在前按数值排序，其它按字符串排序，空值始终排在最后"""
+    if value is None:
+        return (2, '')
+    if isinstance(value, bool):
+        return (1, str(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value))
+
+
+def iter_sheet_rows(file_path: str, sheet_name: Optional[str] = None,
+                    start: int = 0, stop: Optional[int] = None) -> Tuple[List[Any], Iterator[Tuple[Any, ...]]]:
+    """
+    按行范围迭代工作表数据行
+
+    Args:
+        file_path: Excel文件路径
+        sheet_name: 工作表名称，None表示第一个工作表
+        start: 起始数据行（0表示表头后的第一行）
+        stop: 结束数据行（不包含），None表示到末尾
+
+    Returns:
+        (列名列表, 行元组迭代器)，迭代结束后自动关闭工作簿
+    """
+    wb, ws = _open_sheet(file_path, sheet_name)
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        wb.close()
+        return [], iter(())
+
+    columns = _header_names(header)
+    width = len(columns)
+
+    def _generate():
+        try:
+            for row in islice(rows, start, stop):
+                yield _pad(row, width)
+        finally:
+            wb.close()
+
+    return columns, _generate()
+
+
+def stream_sheet_rows(file_path: str, sheet_name: Optional[str] = None, offset: int = 0,
+                      limit: Optional[int] = None, columns: Optional[Sequence[str]] = None,
+                      filters: Optional[Dict[str, str]] = None
+                      ) -> Tuple[List[Any], Optional[int], Iterator[List[Any]]]:
+    """
+    流式读取工作表，逐行输出投影和过滤后的数据，内存占用与总行数无关
+
+    工作表、列名和过滤条件在返回前校验，错误不会推迟到迭代过程中；
+    与read_sheet_page不同，limit不受MAX_PAGE_SIZE限制
+
+    Args:
+        file_path: Excel文件路径
+        sheet_name: 工作表名称，None表示第一个工作表
+        offset: 跳过的（过滤后）数据行数
+        limit: 最多输出的行数，None表示全部
+        columns: 需要返回的列名，None表示全部列
+        filters: {列名: 关键字}，不区分大小写的子串匹配
+
+    Returns:
+        (列名列表, 数据行数（维度信息缺失时为None）, 行迭代器)，迭代结束后自动关闭工作簿
+
+    Raises:
+        SheetNotFoundError: 工作表不存在
+        KeyError: 列不存在
+    """
+    offset = max(int(offset or 0), 0)
+    stop = offset + max(int(limit), 0) if limit is not None else None
+    filters = filters or {}
+
+    wb, ws = _open_sheet(file_path, sheet_name)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            wb.close()
+            return [], 0, iter(())
+
+        all_columns = _header_names(header)
+        width = len(all_columns)
+        lookup = {str(name): idx for idx, name in enumerate(all_columns)}
+
+        def _resolve(name):
+            if str(name) not in lookup:
+                raise KeyError(f'列不存在: {name}')
+            return lookup[str(name)]
+
+        selected = [_resolve(name) for name in columns] if columns else list(range(width))
+        filter_specs = [(_resolve(name), str(value).lower()) for name, value in filters.items()]
+        total_rows = _data_row_count(ws)
+    except Exception:
+        wb.close()
+        raise
+
+    def _generate():
+        try:
+            padded = (_pad(r, width) for r in rows)
+            if filter_specs:
+                padded = (row for row in padded if _matches(row, filter_specs))
+            for row in islice(padded, offset, stop):
+                yield [row[i] for i in selected]
+        finally:
+            wb.close()
+
+    return [all_columns[i] for i in selected], total_rows, _generate()
+
+
+def _is_blank(row: Sequence[Any]) -> bool:
+    return all(value is None for value in row)
+
+
+def _na_to_none(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    return tuple(None if isinstance(value, str) and value in NA_STRINGS else value for value in row)
+
+
+def iter_sheet_chunks(file_path: str, chunk_rows: int, sheet_names: Optional[Sequence[str]] = None
+                      ) -> Tuple[Dict[str, List[Any]], Iterator[Tuple[str, List[Tuple[Any, ...]]]]]:
+    """
+    只读打开一次工作簿，逐个工作表按块输出数据行，内存占用与块大小有关，与总行数无关
+
+    与pandas.read_excel一致：没有数据行的工作表不输出，工作表末尾的空行不输出（中间的空行保留），
+    默认空值字符串（NA_STRINGS）转换为None
+
+    Args:
+        file_path: Excel文件路径
+        chunk_rows: 每块的行数
+        sheet_names: 需要读取的工作表，None表示全部
+
+    Returns:
+        ({工作表名称: 列名列表}（按工作簿顺序，只包含有数据行的工作表）, (工作表名称, 行元组列表)迭代器)，
+        迭代结束后自动关闭工作簿
+    """
+    chunk_rows = max(int(chunk_rows), 1)
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        headers: Dict[str, List[Any]] = {}
+        for ws in wb.worksheets:
+            if sheet_names is not None and ws.title not in sheet_names:
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            # 只扫描到第一个非空数据行
+            if header is not None and any(not _is_blank(_na_to_none(row)) for row in rows):
+                headers[ws.title] = _header_names(header)
+            rows.close()
+    except Exception:
+        wb.close()
+        raise
+
+    def _generate():
+        try:
+            for sheet_name, columns in headers.items():
+                width = len(columns)
+                blank = (None,) * width
+                rows = wb[sheet_name].iter_rows(values_only=True)
+                next(rows, None)
+                chunk = []
+                pending_blanks = 0
+                for raw in rows:
+                    row = _na_to_none(_pad(raw, width))
+                    if _is_blank(row):
+                        # 空行在后面还有数据行时才输出
+                        pending_blanks += 1
+                        continue
+                    for item in chain(repeat(blank, pending_blanks), (row,)):
+                        chunk.append(item)
+                        if len(chunk) >= chunk_rows:
+                            yield sheet_name, chunk
+                            chunk = []
+                    pending_blanks = 0
+                if chunk:
+                    yield sheet_name, chunk
+        finally:
+            wb.close()
+
+    return headers, _generate()
+
+
+def _written_cell(value: Any) -> Any:
+    """DataFrame.to_excel写入的值经openpyxl读回后的值（与pandas的openpyxl读取器一致）"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        # 以"="开头的字符串被写为公式，只读取缓存值时为空
+        return '' if value.startswith('=') and len(value) > 1 else value
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    try:
+        if pd.isna(value):
+            return ''
+    except (TypeError, ValueError):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        number = int(value) if np.isfinite(value) else value
+        return number if number == value else float(value)
+    return value
+
+
+def read_back_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    不经过文件，得到df.to_excel(index=False)写入的工作表再由pandas.read_excel读回的结果
+
+    按pandas的openpyxl读取器转换单元格值（空值为空字符串、整数值的浮点数为整数）并去掉末尾空行，
+    再交给read_excel使用的同一个TextParser推断列类型、处理空值字符串和重复列名
+
+    Args:
+        df: 要写入工作表的数据
+
+    Returns:
+        pandas.DataFrame: 读回的数据，没有表头时为空DataFrame
+    """
+    data = [[_written_cell(value) for value in df.columns]]
+    data.extend([_written_cell(value) for value in row] for row in df.itertuples(index=False, name=None))
+
+    last_row_with_data = -1
+    for row_number, row in enumerate(data):
+        while row and row[-1] == '':
+            row.pop()
+        if row:
+            last_row_with_data = row_number
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in data)
+    data = [row + [''] * (width - len(row)) for row in data]
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def read_sheet_page(file_path: str, sheet_name: Optional[str] = None, offset: int = 0,
+                    limit: Optional[int] = None, columns: Optional[Sequence[str]] = None,
+                    filters: Optional[Dict[str, str]] = None, sort_by: Optional[str] = None,
+                    descending: bool = False) -> Dict[str, Any]:
+    """
+    读取工作表的一页数据
+
+    没有过滤和排序时只迭代[offset, offset+limit)范围内的行；有过滤或排序时
+    流式扫描一遍，只保留投影后的列，排序使用大小为offset+limit的堆
+
+    Args:
+        file_path: Excel文件路径
+        sheet_name: 工作表名称
+        offset: 跳过的数据行数
+        limit: 返回的最大行数，None表示全部
+        columns: 需要返回的列名，None表示全部列
+        filters: {列名: 关键字}，不区分大小写的子串匹配，多个条件为"与"关系
+        sort_by: 排序列名
+        descending: 是否倒序
+
+    Returns:
+        dict: columns, rows(二维列表), total_rows, filtered_rows
+    """
+    offset = max(int(offset or 0), 0)
+    if limit is not None:
+        limit = max(min(int(limit), MAX_PAGE_SIZE), 0)
+    filters = filters or {}
+
+    wb, ws = _open_sheet(file_path, sheet_name)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return {'columns': [], 'rows': [], 'total_rows': 0, 'filtered_rows': 0}
+
+        all_columns = _header_names(header)
+        width = len(all_columns)
+        lookup = {str(name): idx for idx, name in enumerate(all_columns)}
+
+        def _resolve(name):
+            if str(name) not in lookup:
+                raise KeyError(f'列不存在: {name}')
+            return lookup[str(name)]
+
+        selected = [_resolve(name) for name in columns] if columns else list(range(width))
+        filter_specs = [(_resolve(name), str(value).lower()) for name, value in filters.items()]
+        sort_idx = _resolve(sort_by) if sort_by is not None else None
+        stop = offset + limit if limit is not None else None
+
+        if not filter_specs and sort_idx is None:
+            # 纯行范围读取
+            page = [
+                [row[i] for i in selected]
+                for row in (_pad(r, width) for r in islice(rows, offset, stop))
+            ]
+            total_rows = _data_row_count(ws)
+            if total_rows is None:
+                # 维度信息缺失，只能继续计数剩余行
+                total_rows = offset + len(page) + sum(1 for _ in rows)
+            return {
+                'columns': [all_columns[i] for i in selected],
+                'rows': page,
+                'total_rows': total_rows,
+                'filtered_rows': total_rows
+            }
+
+        # 过滤/排序需要完整扫描，但只保留需要的列
+        needed = sorted(set(selected) | ({sort_idx} if sort_idx is not None else set()))
+        total_rows = 0
+        filtered_rows = 0
+
+        def _candidates():
+            nonlocal total_rows, filtered_rows
+            for seq, raw in enumerate(rows):
+                total_rows += 1
+                row = _pad(raw, width)
+                if filter_specs and not _matches(row, filter_specs):
+                    continue
+                filtered_rows += 1
+                yield seq, {i: row[i] for i in needed}
+
+        if sort_idx is None:
+            kept = []
+            for _, row in _candidates():
+                if stop is None or len(kept) < stop:
+                    kept.append(row)
+            page_rows = kept[offset:]
+        else:
+            if descending:
+                # 空值仍排在最后，相同值保持原始顺序
+                def key(item):
+                    value = item[1][sort_idx]
+                    return (value is not None, _sort_key(value), -item[0])
+
+                if stop is None:
+                    ordered = sorted(_candidates(), key=key, reverse=True)
+                else:
+                    ordered = heapq.nlargest(stop, _candidates(), key=key)
+            else:
+                def key(item):
+                    return (_sort_key(item[1][sort_idx]), item[0])
+
+                if stop is None:
+                    ordered = sorted(_candidates(), key=key)
+                else:
+                    ordered = heapq.nsmallest(stop, _candidates(), key=key)
+            page_rows = [row for _, row in ordered[offset:]]
+
+        return {
+            'columns': [all_columns[i] for i in selected],
+            'rows': [[row[i] for i in selected] for row in page_rows],
+            'total_rows': total_rows,
+            'filtered_rows': filtered_rows
+        }
+    finally:
+        wb.close()
+
+
+__all__ = [
+    'MAX_PAGE_SIZE',
+    'SheetNotFoundError',
+    'iter_sheet_rows',
+    'stream_sheet_rows',
+    'iter_sheet_chunks',
+    'read_back_frame',
+    'read_sheet_page'
+]
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+规格表缓存模块 - 在进程内缓存解析后的规格表及其查找结构
+
+缓存键为spec_id（没有spec_id时为文件路径），命中时比较文件的mtime和大小，
+文件被替换后自动重新加载。按估算的内存占用做LRU淘汰。
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .item_suggest import SUGGESTION_LIMIT, ItemSuggestIndex
+
+logger = logging.getLogger(__name__)
+
+# 默认内存上限（字节）
+DEFAULT_SPEC_CACHE_BYTES = 256 * 1024 * 1024
+
+# 索引中每个字符串值（字符串对象及哈希表）的估算开销（字节）
+INDEXED_VALUE_BYTES = 64
+
+
+def text_column(df: pd.DataFrame, name: str) -> pd.Series:
+    """与str(value).strip()结果一致的文本列（重置索引），缺少的列为空字符串"""
+    if name not in df.columns:
+        return pd.Series([''] * len(df), dtype=str)
+    return df[name].map(str).astype(str).str.strip().reset_index(drop=True)
+
+
+class SpecTable:
+    """
+    规格表比对使用的查找结构，缓存后只读共享
+
+    arrays为可持久化的numpy数组（见spec_index模块）：
+        keys/key_prices                复合键（item_id|size|color）及标准单价，重复的键以最后一行为准
+        key_row_offsets/key_rows       复合键 -> 规格表行号（CSR格式）
+        items/item_prices              产品ID及该产品第一行的标准单价
+        size_items/sizes               (产品ID序号, 尺寸)组合
+        color_items/colors             (产品ID序号, 颜色)组合
+
+    相似产品ID索引在第一次查找规格表中不存在的产品时建立，之后计入nbytes
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.row_count = int(arrays['row_count'])
+        self.key_index = pd.Index(arrays['keys'])
+        self.key_prices = arrays['key_prices']
+        self.item_ids = pd.Index(arrays['items'])
+        self.size_pairs = pd.MultiIndex.from_arrays([arrays['items'][arrays['size_items']], arrays['sizes']])
+        self.color_pairs = pd.MultiIndex.from_arrays([arrays['items'][arrays['color_items']], arrays['colors']])
+
+        # 预先建立哈希表，之后每次比对只需按订单行查找
+        for index in (self.key_index, self.item_ids, self.size_pairs, self.color_pairs):
+            index.get_indexer(index[:1])
+
+        indexed_values = len(self.key_index) + len(self.item_ids) + 2 * (len(self.size_pairs) + len(self.color_pairs))
+        self.nbytes = sum(array.nbytes for array in arrays.values()) + INDEXED_VALUE_BYTES * indexed_values
+        self._suggest_index = None
+        self._suggest_lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SpecTable':
+        """由load_spec_data标准化后的规格表建立查找结构"""
+        item_id = text_column(df, 'item_id')
+        size = text_column(df, 'size')
+        color = text_column(df, 'color')
+        price = pd.to_numeric(df['standard_unit_price'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # 复合键 -> 行号：按键分组的稳定排序
+        key_codes, keys = pd.factorize(item_id + '|' + size + '|' + color)
+        key_rows = np.argsort(key_codes, kind='stable')
+        key_row_offsets = np.concatenate([[0], np.cumsum(np.bincount(key_codes, minlength=len(keys)))])
+
+        item_codes, items = pd.factorize(item_id)
+        first_rows = np.zeros(len(items), dtype=np.int64)
+        first_rows[item_codes[::-1]] = np.arange(len(df))[::-1]
+
+        size_pairs = pd.DataFrame({'item': item_codes, 'value': size}).drop_duplicates()
+        color_pairs = pd.DataFrame({'item': item_codes, 'value': color}).drop_duplicates()
+
+        return cls({
+            'row_count': np.array(len(df)),
+            'keys': keys.to_numpy(dtype=str),
+            'key_prices': price[key_rows[key_row_offsets[1:] - 1]],
+            'key_row_offsets': key_row_offsets.astype(np.int64),
+            'key_rows': key_rows.astype(np.int64),
+            'items': items.to_numpy(dtype=str),
+            'item_prices': price[first_rows],
+            'size_items': size_pairs['item'].to_numpy(dtype=np.int32),
+            'sizes': size_pairs['value'].to_numpy(dtype=str),
+            'color_items': color_pairs['item'].to_numpy(dtype=np.int32),
+            'colors': color_pairs['value'].to_numpy(dtype=str)
+        })
+
+    def match(self, item_id: pd.Series, size: pd.Series, color: pd.Series) -> Dict[str, np.ndarray]:
+        """
+        在哈希索引中查找订单各行（哈希连接）
+
+        Args:
+            item_id/size/color: text_column得到的订单文本列
+
+        Returns:
+            dict: key_found（复合键匹配）、spec_price（匹配的标准单价，否则为NaN）、item_exists（产品ID存在）、
+                  size_found/color_found（(产品ID, 尺寸/颜色)组合存在）
+        """
+        positions = self.key_index.get_indexer(item_id + '|' + size + '|' + color)
+        key_found = positions >= 0
+        spec_price = np.full(len(item_id), np.nan)
+        spec_price[key_found] = self.key_prices[positions[key_found]]
+        return {
+            'key_found': key_found,
+            'spec_price': spec_price,
+            'item_exists': self.item_ids.get_indexer(item_id) >= 0,
+            'size_found': self.size_pairs.get_indexer(pd.MultiIndex.from_arrays([item_id, size])) >= 0,
+            'color_found': self.color_pairs.get_indexer(pd.MultiIndex.from_arrays([item_id, color])) >= 0
+        }
+
+    def rows_for_key(self, composite_key: str) -> np.ndarray:
+        """复合键对应的规格表行号"""
+        position = self.key_index.get_indexer([composite_key])[0]
+        if position < 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = self.arrays['key_row_offsets']
+        return self.arrays['key_rows'][offsets[position]:offsets[position + 1]]
+
+    def suggest_index(self) -> ItemSuggestIndex:
+        """相似产品ID索引，第一次使用时建立"""
+        with self._suggest_lock:
+            if self._suggest_index is None:
+                self._suggest_index = ItemSuggestIndex(self.arrays['items'])
+                self.nbytes += self._suggest_index.nbytes
+                logger.info(f"建立相似产品ID索引: {len(self.item_ids)} 个产品")
+            return self._suggest_index
+
+    def suggest(self, item_ids: Sequence[str], limit: int = SUGGESTION_LIMIT) -> List[List[Tuple[int, str]]]:
+        """规格表中与各产品ID最接近的产品ID，返回值见ItemSuggestIndex.lookup"""
+        if len(item_ids) == 0:
+            return []
+        return self.suggest_index().lookup(item_ids, limit)
+
+
+class LayeredSpecTable:
+    """
+    按优先顺序叠加的多个规格表（如基础目录+客户覆盖规格表）
+
+    每个订单行按产品ID归属到第一个包含该产品的规格表，再在该规格表中查找，
+    各层规格表不做物理合并，仍共享规格表缓存中的查找结构。
+    """
+
+    def __init__(self, layers: Sequence[SpecTable], spec_ids: Sequence[str]):
+        self.layers = list(layers)
+        self.spec_ids = list(spec_ids)
+
+    def resolve(self, item_id: pd.Series) -> np.ndarray:
+        """每行产品ID归属的规格表层序号（-1表示各层都不包含）"""
+        layer = np.full(len(item_id), -1, dtype=np.int64)
+        pending = np.arange(len(item_id))
+        for position, table in enumerate(self.layers):
+            if len(pending) == 0:
+                break
+            found = table.item_ids.get_indexer(item_id.iloc[pending]) >= 0
+            layer[pending[found]] = position
+            pending = pending[~found]
+        return layer
+
+    def layer_names(self, layer: np.ndarray) -> np.ndarray:
+        """层序号对应的spec_id，不属于任何层的行为空字符串"""
+        names = np.array(self.spec_ids + [''], dtype=object)
+        return names[layer]
+
+    def match(self, item_id: pd.Series, size: pd.Series, color: pd.Series) -> Dict[str, np.ndarray]:
+        """按层查找订单各行，返回值与SpecTable.match相同"""
+        layer = self.resolve(item_id)
+        result = {
+            'key_found': np.zeros(len(item_id), dtype=bool),
+            'spec_price': np.full(len(item_id), np.nan),
+            'item_exists': layer >= 0,
+            'size_found': np.zeros(len(item_id), dtype=bool),
+            'color_found': np.zeros(len(item_id), dtype=bool)
+        }
+        for position, table in enumerate(self.layers):
+            rows = np.flatnonzero(layer == position)
+            if len(rows) == 0:
+                continue
+            matched = table.match(item_id.iloc[rows].reset_index(drop=True),
+                                  size.iloc[rows].reset_index(drop=True),
+                                  color.iloc[rows].reset_index(drop=True))
+            for name in ('key_found', 'spec_price', 'size_found', 'color_found'):
+                result[name][rows] = matched[name]
+        return result
+
+    def suggest(self, item_ids: Sequence[str], limit: int = SUGGESTION_LIMIT) -> List[List[Tuple[int, str]]]:
+        """各层中与各产品ID最接近的产品ID，距离相同时优先靠前的层"""
+        merged = [[] for _ in range(len(item_ids))]
+        for position, table in enumerate(self.layers):
+            for matches, suggestions in zip(merged, table.suggest(item_ids, limit)):
+                matches.extend((distance, position, item) for distance, item in suggestions)
+        results = []
+        for matches in merged:
+            seen = set()
+            results.append([])
+            for distance, _, item in sorted(matches):
+                if item not in seen and len(results[-1]) < limit:
+                    seen.add(item)
+                    results[-1].append((distance, item))
+        return results
+
+
+class _CacheEntry:
+    def __init__(self, spec_id, path, signature, table):
+        self.spec_id = spec_id
+        self.path = path
+        self.signature = signature
+        self.table = table
+        # 计入缓存的内存占用，规格表之后建立相似产品ID索引时在下次命中时更新
+        self.nbytes = table.nbytes
+
+
+class SpecCache:
+    """按内存占用限制的规格表LRU缓存（线程安全）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_SPEC_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, _CacheEntry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _signature(path: str):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, spec_path: str, loader: Callable[[str], Optional[SpecTable]],
+            spec_id: Optional[str] = None) -> Optional[SpecTable]:
+        """
+        获取规格表，未命中或文件已变化时调用loader加载
+
+        Args:
+            spec_path: 规格表文件路径
+            loader: 加载函数，失败时返回None（不缓存）
+            spec_id: 规格表ID
+
+        Returns:
+            SpecTable，加载失败返回None
+        """
+        key = spec_id or os.path.abspath(spec_path)
+        signature = self._signature(spec_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature and entry.path == spec_path:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                if entry.table.nbytes != entry.nbytes:
+                    self._bytes += entry.table.nbytes - entry.nbytes
+                    entry.nbytes = entry.table.nbytes
+                    self._evict()
+                return entry.table
+            self._misses += 1
+
+        # 加载过程不持有锁，同一规格表并发加载时以最后一次为准
+        table = loader(spec_path)
+        if table is None:
+            return None
+
+        with self._lock:
+            self._remove(key)
+            if table.nbytes <= self.max_bytes:
+                self._entries[key] = _CacheEntry(spec_id, spec_path, signature, table)
+                self._bytes += table.nbytes
+                self._evict()
+            else:
+                logger.info(f"规格表超过缓存上限，不缓存: {spec_path}")
+        return table
+
+    def _evict(self):
+        """淘汰最久未使用的规格表直到不超过内存上限"""
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.nbytes
+        return True
+
+    def invalidate(self, spec_id: str) -> bool:
+        """删除指定规格表的缓存"""
+        with self._lock:
+            removed = self._remove(spec_id)
+            if removed:
+                self._invalidations += 1
+            return removed
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'spec_ids': [entry.spec_id for entry in self._entries.values() if entry.spec_id]
+            }
+
+
+_spec_cache_instance = None
+
+
+def get_spec_cache() -> SpecCache:
+    """获取全局规格表缓存实例（单例模式）"""
+    global _spec_cache_instance
+    if _spec_cache_instance is None:
+        _spec_cache_instance = SpecCache()
+    return _spec_cache_instance
+
+
+__all__ = [
+    'DEFAULT_SPEC_CACHE_BYTES',
+    'text_column',
+    'SpecTable',
+    'LayeredSpecTable',
+    'SpecCache',
+    'get_spec_cache'
+]
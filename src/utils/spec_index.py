@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+规格表索引模块 - 将规格表的查找结构持久化为与规格表同名的.index.npz文件
+
+索引在规格表上传/确认映射时生成，比对时一次读取即可得到查找结构，不需要重新解析xlsx。
+索引记录了生成时规格表文件的mtime和大小，文件变化后索引视为过期。
+"""
+
+import os
+import logging
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from .spec_cache import SpecTable
+
+logger = logging.getLogger(__name__)
+
+# 索引格式版本，格式变化时递增以忽略旧索引
+SPEC_INDEX_VERSION = 1
+
+SPEC_INDEX_SUFFIX = '.index.npz'
+
+
+def get_spec_index_path(spec_path: str) -> str:
+    """获取规格表索引文件路径（与规格表同目录、同名）"""
+    return os.path.splitext(spec_path)[0] + SPEC_INDEX_SUFFIX
+
+
+def _source_signature(spec_path: str) -> np.ndarray:
+    stat = os.stat(spec_path)
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def save_spec_index(spec_path: str, table: SpecTable) -> bool:
+    """
+    保存规格表索引（先写临时文件再替换）
+
+    Args:
+        spec_path: 规格表文件路径
+        table: 由该规格表建立的查找结构
+
+    Returns:
+        bool: 是否保存成功
+    """
+    index_path = get_spec_index_path(spec_path)
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(index_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    version=np.array(SPEC_INDEX_VERSION),
+                    source=_source_signature(spec_path),
+                    **table.arrays
+                )
+            os.replace(temp_path, index_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return True
+    except Exception as e:
+        logger.warning(f"保存规格表索引失败: {index_path}, 错误: {str(e)}")
+        return False
+
+
+def load_spec_index(spec_path: str) -> Optional[SpecTable]:
+    """
+    读取规格表索引
+
+    Returns:
+        SpecTable，索引不存在、版本不符或规格表已变化时返回None
+    """
+    index_path = get_spec_index_path(spec_path)
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with np.load(index_path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        if int(arrays.pop('version')) != SPEC_INDEX_VERSION:
+            return None
+        if not np.array_equal(arrays.pop('source'), _source_signature(spec_path)):
+            logger.info(f"规格表已变化，索引过期: {index_path}")
+            return None
+        return SpecTable(arrays)
+    except Exception as e:
+        logger.warning(f"读取规格表索引失败: {index_path}, 错误: {str(e)}")
+        return None
+
+
+def remove_spec_index(spec_path: str):
+    """删除规格表索引"""
+    index_path = get_spec_index_path(spec_path)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+
+__all__ = [
+    'SPEC_INDEX_VERSION',
+    'SPEC_INDEX_SUFFIX',
+    'get_spec_index_path',
+    'save_spec_index',
+    'load_spec_index',
+    'remove_spec_index'
+]
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+上传流模块 - 上传文件边接收边写入磁盘，同时计算SHA-256、PDF页数并检查文件头
+
+StreamingUploadRequest在解析multipart请求时把每个上传文件直接写入上传目录中的临时文件
+（UploadSink），写入的同时更新SHA-256、统计PDF页对象，第一块数据到达时检查文件头，
+文件头不符或超过大小上限时不再写入。路由确认文件类型后调用save_upload把临时文件改名为
+最终文件（原子替换），不需要再复制一遍或重新读取计算哈希。
+PDF页数在改名后从页树根的/Count读取（压缩在对象流中的页对象逐块扫描统计不到），
+读取失败时使用逐块统计的页对象数。
+未使用StreamingUploadRequest的应用（如测试中的Flask应用），save_upload分块复制上传流，结果相同。
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional
+
+from flask import Request
+
+from .content_hash import remember_sha256
+
+try:
+    import pdfplumber
+    from pdfminer.pdftypes import resolve1
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+# 分块复制上传流时每块的字节数
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+# 各文件类型的文件头
+FILE_SIGNATURES = {
+    'pdf': (b'%PDF-',),
+    'xlsx': (b'PK\x03\x04',),
+    'xls': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',)
+}
+
+# 临时文件后缀，改名前的上传文件
+PARTIAL_SUFFIX = '.part'
+
+# 页对象（/Type /Page，不含/Pages）；压缩在对象流中的页对象统计不到
+_PAGE_OBJECT = re.compile(rb'/Type\s{0,8}/Page(?![A-Za-z])')
+_PAGE_TAIL_BYTES = 32
+
+
+class UploadRejected(ValueError):
+    """上传文件的文件头不符或超过大小上限"""
+
+    def __init__(self, error_code: str, message: str):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+
+
+def upload_kind(filename: Optional[str]) -> Optional[str]:
+    """按扩展名确定检查文件头时使用的文件类型，不检查的文件返回None"""
+    if not filename or '.' not in filename:
+        return None
+    extension = filename.rsplit('.', 1)[1].lower()
+    return extension if extension in FILE_SIGNATURES else None
+
+
+class PdfPageCounter:
+    """逐块统计PDF中的页对象个数，跨块边界的页对象只计一次"""
+
+    def __init__(self):
+        self.count = 0
+        self._tail = b''
+        self._offset = 0
+        self._counted_until = 0
+
+    def update(self, data: bytes, final: bool = False):
+        buffer = self._tail + data
+        for match in _PAGE_OBJECT.finditer(buffer):
+            if self._offset + match.start() < self._counted_until:
+                continue
+            # 恰好在块末尾结束的匹配可能是/Pages的前缀，等下一块再确定
+            if match.end() == len(buffer) and not final:
+                break
+            self.count += 1
+            self._counted_until = self._offset + match.end()
+        keep = min(len(buffer), _PAGE_TAIL_BYTES)
+        self._offset += len(buffer) - keep
+        self._tail = buffer[len(buffer) - keep:]
+
+    def finish(self) -> Optional[int]:
+        """统计结束，没有找到页对象时返回None"""
+        self.update(b'', final=True)
+        return self.count or None
+
+
+def count_pdf_pages(file_path: str) -> Optional[int]:
+    """从PDF页树根的/Count读取页数，只解析交叉引用及目录对象；无法读取时返回None"""
+    if not HAS_PDFPLUMBER:
+        return None
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            count = resolve1(resolve1(pdf.doc.catalog['Pages']).get('Count'))
+    except Exception:
+        return None
+    return count if isinstance(count, int) and count > 0 else None
+
+
+class UploadSink:
+    """
+    写入上传目录中临时文件的上传流，写入时计算SHA-256、PDF页数并检查文件头
+
+    作为Werkzeug解析multipart请求时的文件容器使用（提供write/seek/read），
+    commit后改名为最终文件，未commit时close删除临时文件
+    """
+
+    def __init__(self, directory: str, kind: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.kind = kind
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.rejected: Optional[UploadRejected] = None
+        self._sha256 = hashlib.sha256()
+        self._pages = PdfPageCounter() if kind == 'pdf' else None
+        self._head = b''
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, suffix=PARTIAL_SUFFIX)
+        self._file = os.fdopen(fd, 'w+b')
+
+    def _check_head(self, data: bytes):
+        """文件头累计到足够长度后检查，确定不符时拒绝"""
+        signatures = FILE_SIGNATURES[self.kind]
+        self._head = (self._head + data)[:max(len(signature) for signature in signatures)]
+        if any(self._head.startswith(signature) for signature in signatures):
+            self._head = None
+        elif not any(signature.startswith(self._head) for signature in signatures):
+            self.rejected = UploadRejected('INVALID_FILE_CONTENT', f'文件内容不是有效的{self.kind.upper()}文件')
+
+    def write(self, data: bytes) -> int:
+        if self.rejected is not None:
+            return len(data)
+        if self.kind and self._head is not None:
+            self._check_head(data)
+            if self.rejected is not None:
+                return len(data)
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.rejected = UploadRejected('FILE_TOO_LARGE', f'文件超过大小上限 {self.max_bytes // (1024 * 1024)}MB')
+            return len(data)
+        self._sha256.update(data)
+        if self._pages is not None:
+            self._pages.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def commit(self, file_path: str, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        把临时文件改名为file_path，临时文件与file_path不在同一文件系统时先复制到file_path所在目录
+
+        Returns:
+            dict: file_size（字节数）、sha256、page_count（PDF页数，统计不到时为None）
+
+        Raises:
+            UploadRejected: 文件头不符、为空或超过大小上限，临时文件已删除
+        """
+        if self.rejected is None and max_bytes is not None and self.size > max_bytes:
+            self.rejected = UploadRejected('FILE_TOO_LARGE', f'文件超过大小上限 {max_bytes // (1024 * 1024)}MB')
+        if self.rejected is None and self.size == 0:
+            self.rejected = UploadRejected('EMPTY_FILE', '上传的文件为空')
+        if self.kind and self.rejected is None and self._head is not None:
+            self.rejected = UploadRejected('INVALID_FILE_CONTENT', f'文件内容不是有效的{self.kind.upper()}文件')
+        if self.rejected is not None:
+            self.close()
+            raise self.rejected
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        try:
+            os.replace(self.temp_path, file_path)
+        except OSError:
+            _copy_replace(self.temp_path, file_path)
+            os.remove(self.temp_path)
+        self.temp_path = None
+
+        digest = self._sha256.hexdigest()
+        remember_sha256(file_path, digest)
+        page_count = None
+        if self._pages is not None:
+            page_count = count_pdf_pages(file_path) or self._pages.finish()
+        return {
+            'file_size': self.size,
+            'sha256': digest,
+            'page_count': page_count
+        }
+
+    def close(self):
+        """关闭文件，未commit的临时文件删除"""
+        if not self._file.closed:
+            self._file.close()
+        if self.temp_path is not None:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+            self.temp_path = None
+
+
+def _copy_replace(source_path: str, file_path: str):
+    """复制到file_path所在目录的临时文件后改名"""
+    fd, staged_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=PARTIAL_SUFFIX)
+    try:
+        with open(source_path, 'rb') as source, os.fdopen(fd, 'wb') as target:
+            shutil.copyfileobj(source, target, UPLOAD_CHUNK_BYTES)
+        os.replace(staged_path, file_path)
+    except BaseException:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        raise
+
+
+def save_upload(file, file_path: str, kind: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    保存上传文件：请求解析时已写入同类型UploadSink的直接改名，否则分块复制并计算哈希
+
+    Args:
+        file: 上传的文件对象（werkzeug FileStorage）
+        file_path: 最终文件路径
+        kind: 检查文件头的文件类型（pdf/xlsx/xls）
+        max_bytes: 文件大小上限
+
+    Returns:
+        dict: file_size、sha256、page_count
+
+    Raises:
+        UploadRejected: 文件头不符、为空或超过大小上限
+    """
+    stream = file.stream
+    if isinstance(stream, UploadSink) and stream.temp_path is not None and stream.kind == kind:
+        return stream.commit(file_path, max_bytes=max_bytes)
+
+    sink = UploadSink(os.path.dirname(os.path.abspath(file_path)), kind=kind, max_bytes=max_bytes)
+    try:
+        stream.seek(0)
+        for block in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b''):
+            sink.write(block)
+            if sink.rejected is not None:
+                break
+        return sink.commit(file_path, max_bytes=max_bytes)
+    finally:
+        sink.close()
+
+
+class StreamingUploadRequest(Request):
+    """
+    解析multipart请求时把上传文件直接写入UploadSink的请求类
+
+    临时文件写在upload_dir（默认为上传目录），单个文件的大小上限为MAX_CONTENT_LENGTH
+    """
+
+    upload_dir: Optional[str] = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        directory = self.upload_dir
+        if directory is None:
+            from .path_manager import get_path_manager
+            directory = get_path_manager().config.uploads_dir
+        os.makedirs(directory, exist_ok=True)
+        return UploadSink(directory, kind=upload_kind(filename), max_bytes=self.max_content_length)
+
+
+__all__ = [
+    'UPLOAD_CHUNK_BYTES',
+    'FILE_SIGNATURES',
+    'UploadRejected',
+    'upload_kind',
+    'PdfPageCounter',
+    'count_pdf_pages',
+    'UploadSink',
+    'save_upload',
+    'StreamingUploadRequest'
+]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+工作簿检查模块 - 直接从xlsx压缩包读取工作表列表和维度信息
+
+只读取xl/workbook.xml（以及可选的各工作表开头部分），不需要通过openpyxl
+或pandas加载整个工作簿
+"""
+
+import re
+import zipfile
+import logging
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+from openpyxl.utils.cell import range_boundaries
+
+logger = logging.getLogger(__name__)
+
+WORKBOOK_PART = 'xl/workbook.xml'
+WORKBOOK_RELS_PART = 'xl/_rels/workbook.xml.rels'
+
+# 读取工作表开头时的最大字节数，<dimension>元素位于<sheetData>之前
+DIMENSION_SCAN_BYTES = 64 * 1024
+
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+_SHEET_DATA_RE = re.compile(rb'<(?:\w+:)?sheetData[\s>/]')
+
+
+class InvalidWorkbookError(ValueError):
+    """文件不是有效的xlsx工作簿"""
+
+
+def _local_name(tag: str) -> str:
+    """去掉XML命名空间，兼容Transitional和Strict两种OOXML格式"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _relationship_id(element: ET.Element) -> Optional[str]:
+    """获取sheet元素的r:id属性"""
+    for key, value in element.attrib.items():
+        if _local_name(key) == 'id':
+            return value
+    return None
+
+
+def _read_sheet_entries(zf: zipfile.ZipFile) -> List[Dict[str, Any]]:
+    """从workbook.xml读取工作表名称、状态和关系ID"""
+    try:
+        data = zf.read(WORKBOOK_PART)
+    except KeyError:
+        raise InvalidWorkbookError('工作簿缺少xl/workbook.xml')
+
+    root = ET.fromstring(data)
+    sheets = []
+    for element in root.iter():
+        if _local_name(element.tag) != 'sheet':
+            continue
+        sheets.append({
+            'name': element.get('name'),
+            'state': element.get('state', 'visible'),
+            'rel_id': _relationship_id(element)
+        })
+    return sheets
+
+
+def _read_sheet_targets(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """读取关系ID到工作表XML路径的映射"""
+    try:
+        root = ET.fromstring(zf.read(WORKBOOK_RELS_PART))
+    except KeyError:
+        return {}
+
+    targets = {}
+    for element in root:
+        target = element.get('Target')
+        if not target:
+            continue
+        if target.startswith('/'):
+            path = target.lstrip('/')
+        else:
+            path = posixpath.normpath(posixpath.join('xl', target))
+        targets[element.get('Id')] = path
+    return targets
+
+
+def _read_dimension(zf: zipfile.ZipFile, part: str) -> Optional[Dict[str, Any]]:
+    """只解压工作表XML开头部分，读取<dimension ref="...">"""
+    try:
+        with zf.open(part) as f:
+            head = b''
+            while len(head) < DIMENSION_SCAN_BYTES:
+                chunk = f.read(8192)
+                if not chunk:
+                    break
+                head += chunk
+                match = _DIMENSION_RE.search(head)
+                if match:
+                    break
+                if _SHEET_DATA_RE.search(head):
+                    return None
+            else:
+                return None
+    except KeyError:
+        return None
+
+    match = _DIMENSION_RE.search(head)
+    if not match:
+        return None
+
+    ref = match.group(1).decode('ascii', 'ignore')
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+    except (ValueError, TypeError):
+        return None
+    return {
+        'ref': ref,
+        'min_row': min_row,
+        'max_row': max_row,
+        'min_col': min_col,
+        'max_col': max_col
+    }
+
+
+def inspect_workbook(file_path: str, dimensions: bool = False) -> List[Dict[str, Any]]:
+    """
+    读取工作簿中的工作表信息
+
+    Args:
+        file_path: xlsx文件路径
+        dimensions: 是否同时读取各工作表的维度信息
+
+    Returns:
+        按工作簿顺序排列的工作表信息列表，每项包含name、state，
+        dimensions为True时还包含dimension（维度缺失时为None）
+
+    Raises:
+        InvalidWorkbookError: 文件不是有效的xlsx工作簿
+    """
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            sheets = _read_sheet_entries(zf)
+            if dimensions:
+                targets = _read_sheet_targets(zf)
+                for sheet in sheets:
+                    part = targets.get(sheet['rel_id'])
+                    sheet['dimension'] = _read_dimension(zf, part) if part else None
+    except zipfile.BadZipFile as e:
+        raise InvalidWorkbookError(f'无效的xlsx文件: {e}')
+    except ET.ParseError as e:
+        raise InvalidWorkbookError(f'无法解析工作簿结构: {e}')
+
+    for sheet in sheets:
+        sheet.pop('rel_id', None)
+    return sheets
+
+
+def list_sheet_names(file_path: str) -> List[str]:
+    """
+    获取工作表名称列表，顺序与pandas.ExcelFile.sheet_names一致
+
+    Raises:
+        InvalidWorkbookError: 文件不是有效的xlsx工作簿
+    """
+    return [sheet['name'] for sheet in inspect_workbook(file_path)]
+
+
+def is_sheet_empty(sheet: Dict[str, Any]) -> bool:
+    """
+    根据维度信息判断工作表是否没有数据行（最多只有表头）
+
+    维度信息缺失时无法判断，返回False
+    """
+    dimension = sheet.get('dimension')
+    if not dimension:
+        return False
+    return dimension['max_row'] <= 1
+
+
+__all__ = [
+    'InvalidWorkbookError',
+    'inspect_workbook',
+    'list_sheet_names',
+    'is_sheet_empty'
+]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+生产环境WSGI入口 - 供gunicorn等预派生（pre-fork）服务器加载
+
+gunicorn以preload_app方式在主进程中导入本模块：应用、PDF处理引擎及已上传规格表的缓存
+都在主进程中加载一次，派生的工作进程以写时复制方式共享这些内存，不再各自重复加载。
+服务器参数见项目根目录的gunicorn.conf.py。
+
+用法:
+    gunicorn src.wsgi:application
+"""
+
+import gc
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app
+from src.models.user import db
+from src.utils.enhanced_pdf_parser import get_enhanced_parser
+from src.utils.order_comparator import OrderSpecComparator
+from src.utils.spec_cache import get_spec_cache
+
+
+def preload_specs(flask_app):
+    """
+    把已上传的规格表加载到规格表缓存，超出缓存上限的规格表按LRU淘汰
+
+    Returns:
+        int: 加载成功的规格表数
+    """
+    from src.routes.spec_routes import spec_manager
+
+    comparator = OrderSpecComparator()
+    loaded = 0
+    with flask_app.app_context():
+        for spec in spec_manager.list_specs():
+            spec_id = spec['spec_id']
+            spec_path = spec_manager.get_spec_path(spec_id)
+            if spec_path is None:
+                continue
+            try:
+                if comparator.load_spec_table(spec_path, spec_id=spec_id) is not None:
+                    loaded += 1
+            except Exception as e:
+                flask_app.logger.warning(f"预加载规格表失败: {spec_id}, 错误: {str(e)}")
+    return loaded
+
+
+def warm_up(flask_app, load_specs=True):
+    """
+    在派生工作进程前加载PDF处理引擎及规格表缓存，并关闭主进程的数据库连接
+
+    加载完成后冻结垃圾回收跟踪的对象，工作进程的垃圾回收不再改写这些对象所在的内存页，
+    写时复制共享的内存不会因此被逐页复制。
+    """
+    start = time.perf_counter()
+    parser = get_enhanced_parser()
+    spec_count = preload_specs(flask_app) if load_specs else 0
+    # 关闭主进程建立的数据库连接，工作进程各自建立连接，不共享继承的连接
+    with flask_app.app_context():
+        db.engine.dispose()
+    gc.collect()
+    gc.freeze()
+
+    cache_stats = get_spec_cache().stats()
+    flask_app.logger.info(
+        f"预加载完成: PDF处理库 {parser.available_libraries}, 规格表 {spec_count} 个 "
+        f"({cache_stats['bytes'] / 1024 / 1024:.1f}MB), 耗时 {time.perf_counter() - start:.2f}s"
+    )
+
+
+# 在gunicorn下运行时，应用日志输出到gunicorn的错误日志
+_gunicorn_logger = logging.getLogger('gunicorn.error')
+if _gunicorn_logger.handlers:
+    app.logger.handlers = _gunicorn_logger.handlers
+    app.logger.setLevel(_gunicorn_logger.level)
+
+warm_up(app, load_specs=os.environ.get('PRELOAD_SPECS', '1').lower() not in ('0', 'false', 'no'))
+
+application = app